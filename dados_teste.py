@@ -0,0 +1,88 @@
+"""
+Dados e utilitários compartilhados pelos scripts de teste (teste_*.py):
+parâmetros de loteamento, perímetros de exemplo, geração dos DXF de entrada
+e verificações comuns sobre o resultado do processador.
+"""
+
+import os
+import math
+
+import ezdxf
+import numpy as np
+import shapely
+
+from loteamento_processor_ultra_avancado import LoteamentoProcessorUltraAvancado
+
+PARAMETROS = {
+    'largura_rua': 8.0, 'largura_calcada': 2.0, 'profundidade_max_quadra': 60.0,
+    'orientacao_preferencial': 'Automática', 'area_minima_lote': 200.0, 'area_maxima_lote': 600.0,
+    'area_preferencial_lote': 300.0, 'testada_minima_lote': 8.0, 'testada_maxima_lote': 20.0,
+    'testada_preferencial_lote': 12.0, 'profundidade_minima_lote': 15.0, 'profundidade_maxima_lote': 40.0,
+    'profundidade_padrao_lote': 25.0, 'percentual_area_verde': 15.0, 'percentual_area_institucional': 5.0,
+    'prioridade_aproveitamento': 'Máximo Aproveitamento', 'tolerancia_forma': 'Alta (Mais Irregular)',
+    'estrategia_esquina': 'Automático', 'densidade_lotes': 'Alta', 'liberdade_criativa': 'Máxima',
+    'experimentacao_formas': 'Retangulares',
+}
+
+# Gleba de ~37 ha (quadras grandes o bastante para o escalonador dividir)
+PERIMETRO = [(0, 0), (700, 0), (740, 420), (350, 560), (-40, 430)]
+
+# Gleba de ~14 ha, para os testes que processam várias vezes
+PERIMETRO_PEQUENO = [(0, 0), (400, 0), (430, 260), (200, 380), (-30, 300)]
+
+
+def criar_dxf_perimetro(arquivo, pontos=PERIMETRO):
+    """Grava o perímetro como uma polilinha fechada e retorna o caminho do arquivo"""
+    doc = ezdxf.new("R2010")
+    doc.modelspace().add_lwpolyline(pontos, close=True)
+    doc.saveas(arquivo)
+    return arquivo
+
+
+def criar_dxf_estrela(arquivo):
+    """Perímetro em estrela (muito côncavo), caso patológico para a subdivisão"""
+    pontos = []
+    for k in range(24):
+        angulo = 2 * math.pi * k / 24
+        raio = 400 if k % 2 == 0 else 150
+        pontos.append((raio * math.cos(angulo), raio * math.sin(angulo)))
+    criar_dxf_perimetro(arquivo, pontos)
+
+
+def criar_dxf_glebas(arquivo):
+    """Três glebas no layer GLEBAS, uma no layer OUTROS e uma polilinha aberta"""
+    doc = ezdxf.new("R2010")
+    msp = doc.modelspace()
+    doc.layers.new('GLEBAS')
+    doc.layers.new('OUTROS')
+    for i in range(3):
+        x = i * 200
+        msp.add_lwpolyline([(x, 0), (x + 160, 0), (x + 160, 200), (x, 210)], close=True,
+                           dxfattribs={'layer': 'GLEBAS'})
+    msp.add_lwpolyline([(0, 500), (100, 500), (100, 600)], close=True, dxfattribs={'layer': 'OUTROS'})
+    msp.add_lwpolyline([(0, 700), (100, 700), (100, 800)], dxfattribs={'layer': 'GLEBAS'})
+    doc.saveas(arquivo)
+
+
+def processar(pasta, nome, **parametros):
+    """Processa PERIMETRO com PARAMETROS (mais `parametros`); retorna o processador e o resultado"""
+    arquivo = os.path.join(pasta, "perimetro.dxf")
+    if not os.path.exists(arquivo):
+        criar_dxf_perimetro(arquivo)
+    processador = LoteamentoProcessorUltraAvancado(dict(PARAMETROS, **parametros))
+    resultado = processador.processar_loteamento_ultra_avancado(arquivo, os.path.join(pasta, nome + ".dxf"))
+    return processador, resultado
+
+
+def verificar_consistencia(processador):
+    """Lotes sem sobreposição entre si e dentro da quadra indicada por quadra_id"""
+    lotes = processador.lotes.geometrias
+    quadras = processador.quadras.geometrias
+    quadra_id = processador.lotes.coluna('quadra_id')
+    i, j = shapely.STRtree(lotes).query(lotes, predicate='intersects')
+    pares = i < j
+    sobreposicao = float(shapely.area(shapely.intersection(lotes[i[pares]], lotes[j[pares]])).sum())
+    dentro = bool(shapely.contains(shapely.buffer(quadras[quadra_id], 0.01), lotes).all())
+    ordenados = bool((np.diff(quadra_id) >= 0).all()) and processador.lotes.coluna('id').tolist() == list(range(len(lotes)))
+    print(f"  Sobreposição: {sobreposicao:.3f} m², dentro das quadras: {dentro}, ordem de quadra e ids: {ordenados}")
+    return sobreposicao < 1.0 and dentro and ordenados
@@ -0,0 +1,154 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+from loteamento_precisao import GRADE_PRECISAO_PADRAO
+from loteamento_qualidade import DISTANCIA_ACESSO, IndiceRuas, dimensoes_frente_rua
+from loteamento_tabela import TabelaFeicoes
+
+# Tratamentos dos lotes sem acesso: só marcar, fundir ao vizinho com acesso ou passar a área comum
+TRATAMENTOS_SEM_ACESSO = ('marcar', 'fundir', 'area_comum')
+
+
+def mascara_acesso(lotes, indice: IndiceRuas, distancia: float = DISTANCIA_ACESSO) -> np.ndarray:
+    """
+    Indica os lotes a até `distancia` de alguma via, com uma única consulta
+    `dwithin` de todos os lotes contra a STRtree dos segmentos das vias
+    (ver IndiceRuas).
+    """
+    geoms = np.asarray(lotes, dtype=object)
+    acesso = np.zeros(len(geoms), dtype=bool)
+    if len(geoms) == 0 or len(indice) == 0:
+        return acesso
+    lote, _ = indice.arvore_segmentos.query(geoms, predicate='dwithin', distance=distancia)
+    acesso[lote] = True
+    return acesso
+
+
+def destinos_fusao(lotes, acesso: np.ndarray, quadra_id: np.ndarray,
+                   tolerancia: float = GRADE_PRECISAO_PADRAO) -> np.ndarray:
+    """
+    Lote com acesso ao qual cada lote sem acesso deve ser fundido (-1 quando
+    não há). Cada lote sem acesso vai para o vizinho da mesma quadra com quem
+    compartilha a maior extensão de divisa, entre os que já têm acesso; em
+    rodadas, os que só encostam em outros lotes sem acesso seguem o destino
+    do vizinho resolvido na rodada anterior.
+    """
+    geoms = np.asarray(lotes, dtype=object)
+    destino = np.full(len(geoms), -1, dtype=np.int64)
+    sem_acesso = np.flatnonzero(~acesso)
+    if len(sem_acesso) == 0 or acesso.sum() == 0:
+        return destino
+
+    arvore = shapely.STRtree(geoms)
+    idx_lote, idx_viz = arvore.query(geoms[sem_acesso], predicate='dwithin', distance=tolerancia)
+    idx_lote = sem_acesso[idx_lote]
+    pares = (idx_lote != idx_viz) & (quadra_id[idx_lote] == quadra_id[idx_viz])
+    idx_lote, idx_viz = idx_lote[pares], idx_viz[pares]
+    if len(idx_lote) == 0:
+        return destino
+
+    # Extensão da divisa de cada par (lote sem acesso, vizinho)
+    divisa = shapely.length(shapely.intersection(
+        shapely.buffer(shapely.boundary(geoms[idx_lote]), tolerancia),
+        shapely.boundary(geoms[idx_viz])))
+    validos = divisa > tolerancia
+    idx_lote, idx_viz, divisa = idx_lote[validos], idx_viz[validos], divisa[validos]
+
+    raiz = np.where(acesso, np.arange(len(geoms)), -1)
+    while True:
+        candidatos = (raiz[idx_lote] < 0) & (raiz[idx_viz] >= 0)
+        if not candidatos.any():
+            break
+        lote, vizinho, extensao = idx_lote[candidatos], idx_viz[candidatos], divisa[candidatos]
+        ordem = np.lexsort((-extensao, lote))
+        primeiro = np.ones(len(ordem), dtype=bool)
+        primeiro[1:] = lote[ordem][1:] != lote[ordem][:-1]
+        escolhidos = ordem[primeiro]
+        raiz[lote[escolhidos]] = raiz[vizinho[escolhidos]]
+
+    destino[sem_acesso] = raiz[sem_acesso]
+    return destino
+
+
+def validar_acesso_lotes(lotes: TabelaFeicoes, vias, tratamento: str = 'marcar',
+                         distancia: float = DISTANCIA_ACESSO,
+                         tolerancia: float = GRADE_PRECISAO_PADRAO) -> Tuple[TabelaFeicoes, List[Polygon], Dict]:
+    """
+    Validação de acesso de todos os lotes contra ruas e calçadas (`vias`,
+    geometrias ou IndiceRuas), depois da subdivisão:
+    - 'marcar': só identifica os lotes sem acesso;
+    - 'fundir': funde cada lote sem acesso ao vizinho com acesso da mesma
+      quadra (ver `destinos_fusao`), com testada e profundidade medidas
+      pela frente do lote resultante; os que não têm vizinho ficam marcados;
+    - 'area_comum': retira os lotes sem acesso da tabela e os devolve como
+      áreas comuns.
+    Retorna (lotes, áreas comuns retiradas, relatório). Os ids dos lotes são
+    renumerados quando a tabela muda, mantendo a ordem por quadra; o
+    relatório traz as contagens e os ids dos lotes que seguem sem acesso.
+    """
+    if tratamento not in TRATAMENTOS_SEM_ACESSO:
+        print(f"Aviso: tratamento de lotes sem acesso desconhecido '{tratamento}', usando 'marcar'")
+        tratamento = 'marcar'
+    indice = vias if isinstance(vias, IndiceRuas) else IndiceRuas(list(vias))
+    geoms = lotes.geometrias
+    acesso = mascara_acesso(geoms, indice, distancia)
+    relatorio = {
+        'tratamento': tratamento,
+        'verificados': len(geoms),
+        'sem_acesso': int((~acesso).sum()),
+        'fundidos': 0,
+        'areas_comuns': 0,
+        'ids_sem_acesso': [],
+    }
+    areas_comuns = []
+    manter = np.ones(len(geoms), dtype=bool)
+
+    if tratamento == 'fundir' and relatorio['sem_acesso']:
+        destino = destinos_fusao(geoms, acesso, lotes.coluna('quadra_id'), tolerancia)
+        fundidos = destino >= 0
+        alvos = np.unique(destino[fundidos])
+        unioes = [shapely.union_all(np.concatenate([[geoms[alvo]], geoms[destino == alvo]]), grid_size=tolerancia)
+                  for alvo in alvos]
+        # Uniões que não resultam em um único polígono são desfeitas
+        poligonais = np.array([isinstance(uniao, Polygon) for uniao in unioes], dtype=bool)
+        fundidos &= np.isin(destino, alvos[poligonais])
+        if poligonais.any():
+            unioes = [uniao for uniao, ok in zip(unioes, poligonais) if ok]
+            lotes = lotes.filtrar(np.arange(len(geoms)))
+            lotes.substituir_geometrias(alvos[poligonais], unioes, dimensoes_frente_rua(unioes, indice, distancia))
+        manter &= ~fundidos
+        acesso |= fundidos
+        relatorio['fundidos'] = int(fundidos.sum())
+
+    elif tratamento == 'area_comum':
+        areas_comuns = list(geoms[~acesso])
+        manter &= acesso
+        acesso[:] = True
+        relatorio['areas_comuns'] = len(areas_comuns)
+
+    if not manter.all():
+        lotes = TabelaFeicoes.concatenar(lotes.camada, [lotes.filtrar(manter)])
+    relatorio['ids_sem_acesso'] = lotes.coluna('id')[~acesso[manter]].tolist()
+    return lotes, areas_comuns, relatorio
+
+
+def somar_relatorios_acesso(relatorios: List[Dict], quantidades_lotes: List[int]) -> Dict:
+    """
+    Junta os relatórios de partes processadas separadamente (ex.:
+    superquadras), cujos lotes são concatenados na mesma ordem: as contagens
+    são somadas e os ids deslocados pela quantidade de lotes das anteriores.
+    """
+    total = {'tratamento': '', 'verificados': 0, 'sem_acesso': 0, 'fundidos': 0, 'areas_comuns': 0,
+             'ids_sem_acesso': []}
+    deslocamento = 0
+    for relatorio, quantidade in zip(relatorios, quantidades_lotes):
+        if relatorio:
+            total['tratamento'] = relatorio['tratamento']
+            for chave in ('verificados', 'sem_acesso', 'fundidos', 'areas_comuns'):
+                total[chave] += relatorio[chave]
+            total['ids_sem_acesso'].extend(deslocamento + i for i in relatorio['ids_sem_acesso'])
+        deslocamento += quantidade
+    return total
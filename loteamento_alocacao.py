@@ -0,0 +1,152 @@
+import math
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+from loteamento_particionamento import _partes_poligonais, posicoes_de_corte_por_area
+
+
+def subconjunto_por_area(areas: Sequence[float], alvo: float, tolerancia: float,
+                         somente_abaixo: bool = False, max_celulas: int = 200000) -> List[int]:
+    """
+    Seleciona os índices cuja soma de áreas mais se aproxima de `alvo`
+    (subset-sum limitado).
+
+    Programação dinâmica aproximada: as áreas são discretizadas em unidades de
+    `tolerancia / n`, de modo que o erro de arredondamento acumulado fica dentro
+    da tolerância. As somas alcançáveis ficam em um único vetor de bits,
+    deslocado a cada item, e cada soma guarda o item que a alcançou primeiro
+    (ponteiro para a soma anterior): memória O(capacidade), e não
+    O(n x capacidade). Com `somente_abaixo`, só somas <= alvo são aceitas.
+    """
+    areas = np.asarray(areas, dtype=float)
+    n = len(areas)
+    if n == 0 or alvo <= 0:
+        return []
+
+    limite = alvo if somente_abaixo else alvo + max(tolerancia, 0.0) + areas.max()
+    unidade = max(tolerancia / n, limite / max_celulas, 1e-9)
+    pesos = np.rint(areas / unidade).astype(np.int64)
+    capacidade = int(math.ceil(limite / unidade))
+
+    alcancaveis = np.zeros(capacidade + 1, dtype=bool)
+    alcancaveis[0] = True
+    origem = np.full(capacidade + 1, -1, dtype=np.int32)
+    for i, peso in enumerate(pesos):
+        if 0 < peso <= capacidade:
+            # Somas novas a partir das já alcançadas pelos itens anteriores
+            novas = np.flatnonzero(alcancaveis[:capacidade + 1 - peso] & ~alcancaveis[peso:]) + peso
+            alcancaveis[novas] = True
+            origem[novas] = i
+
+    somas = np.flatnonzero(alcancaveis)
+    alvo_discreto = alvo / unidade
+    if somente_abaixo:
+        somas = somas[somas <= alvo_discreto + 0.5]
+    # Mais próxima do alvo; em empate, a que atinge o alvo
+    soma = int(somas[np.lexsort((somas < alvo_discreto, np.abs(somas - alvo_discreto)))[0]])
+
+    # A soma anterior de cada item foi alcançada por um item de índice menor: sem repetição
+    escolhidos = []
+    while soma > 0:
+        item = int(origem[soma])
+        escolhidos.append(item)
+        soma -= int(pesos[item])
+    return sorted(escolhidos)
+
+
+def recortar_por_area(poligono: Polygon, area_alvo: float) -> Tuple[List[Polygon], List[Polygon]]:
+    """
+    Recorta de `poligono` uma porção de área `area_alvo` por um corte
+    perpendicular ao maior lado da caixa envolvente (bisseção por área).
+    Retorna (partes recortadas, partes restantes).
+    """
+    if area_alvo <= 0:
+        return [], [poligono]
+    if area_alvo >= poligono.area:
+        return [poligono], []
+
+    geometrias = np.array([poligono], dtype=object)
+    limites = shapely.bounds(geometrias)
+    largura = limites[:, 2] - limites[:, 0]
+    altura = limites[:, 3] - limites[:, 1]
+    eixo = np.where(largura >= altura, 0, 1)
+    corte = posicoes_de_corte_por_area(geometrias, limites, eixo, np.array([area_alvo]), tolerancia=1e-3)[0]
+
+    min_x, min_y, max_x, max_y = limites[0]
+    if eixo[0] == 0:
+        faca = shapely.box(min_x - 1, min_y - 1, corte, max_y + 1)
+    else:
+        faca = shapely.box(min_x - 1, min_y - 1, max_x + 1, corte)
+
+    return (_partes_poligonais(poligono.intersection(faca)),
+            _partes_poligonais(poligono.difference(faca)))
+
+
+def _selecionar_por_meta(disponiveis: List[Polygon], meta: float, tolerancia: float,
+                        recortar: bool) -> Tuple[List[Polygon], List[Polygon]]:
+    """
+    Subconjunto de `disponiveis` cuja soma mais se aproxima de `meta`
+    (`subconjunto_por_area`). Se nenhum cair dentro da tolerância e
+    `recortar` estiver ativo, usa-se o melhor subconjunto abaixo da meta e o
+    déficit é recortado do maior candidato livre, cujo restante continua
+    disponível. Retorna (selecionados, restantes).
+    """
+    if meta <= 0 or not disponiveis:
+        return [], list(disponiveis)
+    disponiveis = list(disponiveis)
+    areas = [c.area for c in disponiveis]
+    escolhidos = subconjunto_por_area(areas, meta, tolerancia)
+    soma = sum(areas[i] for i in escolhidos)
+
+    recorte: Optional[List[Polygon]] = None
+    if recortar and abs(soma - meta) > tolerancia:
+        escolhidos = subconjunto_por_area(areas, meta, tolerancia, somente_abaixo=True)
+        deficit = meta - sum(areas[i] for i in escolhidos)
+        livres = [i for i in range(len(disponiveis)) if i not in escolhidos]
+        if livres and deficit > tolerancia:
+            maior = max(livres, key=lambda i: areas[i])
+            recorte, restante = recortar_por_area(disponiveis[maior], deficit)
+            disponiveis[maior:maior + 1] = restante
+            escolhidos = [i if i < maior else i + len(restante) - 1 for i in escolhidos]
+
+    usados = set(escolhidos)
+    selecionados = [disponiveis[i] for i in escolhidos] + (recorte or [])
+    return selecionados, [c for i, c in enumerate(disponiveis) if i not in usados]
+
+
+def alocar_por_metas(candidatos: List[Polygon], metas: Sequence[float], tolerancia_relativa: float = 0.02,
+                     recortar: bool = True) -> Tuple[List[List[Polygon]], List[float]]:
+    """
+    Distribui os polígonos candidatos entre as metas de área (ex.: verde e
+    institucional), sem repetir candidatos, decidindo as metas em conjunto:
+    1. o conjunto comum é o subconjunto cuja soma mais se aproxima da soma
+       das metas (`_selecionar_por_meta`, com recorte do déficit);
+    2. se o conjunto comum não basta para todas as metas, elas são reduzidas
+       na mesma proporção: o déficit é repartido, em vez de recair inteiro
+       sobre as últimas;
+    3. o conjunto comum é repartido da menor meta para a maior, cada uma com
+       `_selecionar_por_meta` sobre o que ainda resta dele; a maior fica com
+       o restante.
+    Retorna (polígonos de cada meta, déficit de cada meta): o déficit é o
+    quanto a área alocada ficou abaixo da meta (0 se a atingiu), para que a
+    falta de área não passe despercebida.
+    """
+    metas = [max(float(meta), 0.0) for meta in metas]
+    resultado: List[List[Polygon]] = [[] for _ in metas]
+    total = sum(metas)
+    if total <= 0:
+        return resultado, [0.0 for _ in metas]
+
+    comum, _ = _selecionar_por_meta(list(candidatos), total, max(total * tolerancia_relativa, 1e-6), recortar)
+    fator = min(1.0, sum(c.area for c in comum) / total)
+
+    ordem = sorted(range(len(metas)), key=lambda i: metas[i])
+    for i in ordem[:-1]:
+        meta = metas[i] * fator
+        resultado[i], comum = _selecionar_por_meta(comum, meta, max(meta * tolerancia_relativa, 1e-6), recortar)
+    resultado[ordem[-1]] = comum
+    deficits = [max(meta - sum(p.area for p in poligonos), 0.0) for meta, poligonos in zip(metas, resultado)]
+    return resultado, deficits
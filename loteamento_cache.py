@@ -0,0 +1,188 @@
+import hashlib
+import json
+import math
+import pickle
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+
+def forma_canonica(poligono: Polygon, mascara_ruas: Sequence[bool],
+                   tolerancia: float = 0.01) -> Optional[Tuple[tuple, np.ndarray, float]]:
+    """
+    Forma canônica de um polígono (sem furos) a menos de translação e rotação.
+
+    Para cada vértice inicial, o anel (em sentido anti-horário) é transladado
+    para que o vértice fique na origem e girado para que a aresta seguinte fique
+    sobre o eixo x; as coordenadas são quantizadas por `tolerancia`. A menor
+    sequência, junto com a máscara de arestas voltadas para rua na mesma ordem,
+    é a chave. Retorna (chave, origem, ângulo), onde origem e ângulo levam do
+    referencial canônico para o real, ou None se o polígono tiver furos.
+    """
+    if poligono.is_empty or len(poligono.interiors) > 0:
+        return None
+
+    coords = np.asarray(poligono.exterior.coords)[:-1]
+    mascara = np.asarray(mascara_ruas, dtype=bool)
+    n = len(coords)
+    if n < 3 or len(mascara) != n:
+        return None
+
+    if not poligono.exterior.is_ccw:
+        coords = coords[::-1]
+        mascara = mascara[(n - 2 - np.arange(n)) % n]
+
+    melhor = None
+    for k in range(n):
+        rolado = np.roll(coords, -k, axis=0) - coords[k]
+        dx, dy = rolado[1]
+        angulo = math.atan2(dy, dx)
+        cos, sen = math.cos(-angulo), math.sin(-angulo)
+        girado = rolado @ np.array([[cos, sen], [-sen, cos]])
+        quantizado = np.rint(girado / tolerancia).astype(np.int64)
+        chave = (n, quantizado.tobytes(), np.roll(mascara, -k).tobytes())
+        if melhor is None or chave < melhor[0]:
+            melhor = (chave, coords[k].copy(), angulo)
+
+    return melhor
+
+
+def _transformar(geometrias: np.ndarray, origem: np.ndarray, angulo: float, inversa: bool = False) -> np.ndarray:
+    """Aplica (ou desfaz) a rotação por `angulo` seguida da translação para `origem`."""
+    cos, sen = math.cos(angulo), math.sin(angulo)
+    if inversa:
+        rotacao = np.array([[cos, -sen], [sen, cos]])
+        return shapely.transform(geometrias, lambda xy: (xy - origem) @ rotacao)
+    rotacao = np.array([[cos, sen], [-sen, cos]])
+    return shapely.transform(geometrias, lambda xy: xy @ rotacao + origem)
+
+
+class CacheQuadrasCongruentes:
+    """
+    Memoização da subdivisão de quadras congruentes.
+
+    Quadras iguais a menos de translação/rotação (e com as mesmas arestas
+    voltadas para a rua) compartilham a mesma chave canônica; no acerto, o
+    parcelamento guardado é reaplicado por transformação afim e recortado pela
+    quadra real, para absorver o erro de quantização.
+    """
+
+    def __init__(self, tolerancia: float = 0.01):
+        self.tolerancia = tolerancia
+        self.entradas: Dict[tuple, Tuple[np.ndarray, List[str]]] = {}
+        self.acertos = 0
+        self.falhas = 0
+
+    def __len__(self) -> int:
+        return len(self.entradas)
+
+    def forma(self, quadra: Polygon, mascara_ruas: Sequence[bool]):
+        return forma_canonica(quadra, mascara_ruas, self.tolerancia)
+
+    def obter(self, forma, quadra: Polygon) -> Optional[Tuple[List[Polygon], List[str]]]:
+        """Lotes e estratégias da quadra congruente já calculada, ou None."""
+        if forma is None or forma[0] not in self.entradas:
+            self.falhas += 1
+            return None
+
+        chave, origem, angulo = forma
+        lotes_canonicos, estrategias = self.entradas[chave]
+        lotes = shapely.intersection(_transformar(lotes_canonicos, origem, angulo), quadra)
+
+        resultado, nomes = [], []
+        for lote, estrategia in zip(lotes, estrategias):
+            partes = [p for p in shapely.get_parts(lote) if isinstance(p, Polygon)]
+            if partes:
+                resultado.append(max(partes, key=lambda p: p.area))
+                nomes.append(estrategia)
+
+        self.acertos += 1
+        return resultado, nomes
+
+    def guardar(self, forma, lotes: List[Polygon], estrategias: List[str]):
+        """Guarda o parcelamento no referencial canônico da quadra."""
+        if forma is None:
+            return
+        chave, origem, angulo = forma
+        geometrias = np.asarray(lotes, dtype=object)
+        self.entradas[chave] = (_transformar(geometrias, origem, angulo, inversa=True), list(estrategias))
+
+
+# Parâmetros que não mudam o parcelamento de uma quadra (não entram no escopo do cache compartilhado)
+PARAMETROS_SEM_EFEITO_NO_PARCELAMENTO = {
+    'perfil', 'intervalo_amostragem_perfil', 'perfil_limite', 'formatos_gis', 'num_workers',
+    'arquivo_cache_quadras', 'prioridade', 'nome_projeto',
+}
+
+
+def escopo_parametros(parametros: Dict[str, Any]) -> str:
+    """
+    Impressão digital dos parâmetros que influenciam o parcelamento: quadras
+    congruentes só compartilham resultado entre execuções com o mesmo escopo.
+    """
+    relevantes = {chave: valor for chave, valor in parametros.items()
+                  if chave not in PARAMETROS_SEM_EFEITO_NO_PARCELAMENTO}
+    texto = json.dumps(relevantes, sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:32]
+
+
+class CacheQuadrasPersistente(CacheQuadrasCongruentes):
+    """
+    Cache de quadras congruentes gravado em um arquivo SQLite, compartilhado
+    entre execuções e entre processos (ex.: os trabalhos do serviço local).
+
+    As entradas ficam também em memória; uma falha em memória consulta o
+    arquivo e, no acerto, a entrada é trazida para a memória. Cada entrada é
+    separada por `escopo` (ver `escopo_parametros`), para que parâmetros de
+    lote diferentes nunca reaproveitem o parcelamento um do outro.
+    """
+
+    def __init__(self, arquivo: str, escopo: str = '', tolerancia: float = 0.01):
+        super().__init__(tolerancia)
+        self.arquivo = arquivo
+        self.escopo = escopo
+        self.carregadas = 0
+        self._conexao = None
+
+    def __getstate__(self):
+        estado = dict(self.__dict__)
+        estado['_conexao'] = None  # conexões SQLite não atravessam processos
+        return estado
+
+    def _banco(self) -> sqlite3.Connection:
+        if self._conexao is None:
+            self._conexao = sqlite3.connect(self.arquivo, timeout=30.0)
+            self._conexao.execute('PRAGMA journal_mode=WAL')
+            self._conexao.execute('CREATE TABLE IF NOT EXISTS quadras ('
+                                  'escopo TEXT, chave BLOB, lotes BLOB, estrategias TEXT, '
+                                  'PRIMARY KEY (escopo, chave))')
+        return self._conexao
+
+    def obter(self, forma, quadra: Polygon) -> Optional[Tuple[List[Polygon], List[str]]]:
+        if forma is not None and forma[0] not in self.entradas:
+            try:
+                linha = self._banco().execute('SELECT lotes, estrategias FROM quadras WHERE escopo = ? AND chave = ?',
+                                              (self.escopo, pickle.dumps(forma[0]))).fetchone()
+                if linha is not None:
+                    lotes = shapely.from_wkb(np.asarray(pickle.loads(linha[0]), dtype=object))
+                    self.entradas[forma[0]] = (lotes, json.loads(linha[1]))
+                    self.carregadas += 1
+            except sqlite3.Error as e:
+                print(f"Erro ao consultar o cache de quadras: {e}")
+        return super().obter(forma, quadra)
+
+    def guardar(self, forma, lotes: List[Polygon], estrategias: List[str]):
+        super().guardar(forma, lotes, estrategias)
+        if forma is None:
+            return
+        lotes_canonicos, nomes = self.entradas[forma[0]]
+        try:
+            with self._banco() as banco:
+                banco.execute('INSERT OR IGNORE INTO quadras VALUES (?, ?, ?, ?)',
+                              (self.escopo, pickle.dumps(forma[0]), pickle.dumps(list(shapely.to_wkb(lotes_canonicos))),
+                               json.dumps(nomes)))
+        except sqlite3.Error as e:
+            print(f"Erro ao gravar no cache de quadras: {e}")
@@ -0,0 +1,114 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+# Camadas auditadas, em ordem de precedência: a área coberta por mais de uma
+# camada conta só para a primeira (ex.: a calçada sobre o lote conta como calçada)
+CAMADAS_COBERTURA = ('ruas', 'calcadas', 'lotes', 'areas_verdes', 'areas_institucionais')
+
+# Interseções com área abaixo desta (m²) não contam como sobreposição
+AREA_MINIMA_SOBREPOSICAO = 1e-6
+
+
+def validar_cobertura(geometrias, largura_vazio: float = 0.0) -> Dict[str, Any]:
+    """
+    Validade de uma camada como cobertura poligonal (shapely.coverage_is_valid):
+    sem sobreposição, com vizinhos compartilhando os mesmos vértices nas
+    divisas e, com `largura_vazio` > 0, sem frestas mais estreitas que ela.
+    Retorna a validade, as feições com arestas inválidas e o comprimento delas.
+    """
+    geoms = np.asarray(geometrias, dtype=object)
+    if len(geoms) == 0:
+        return {'valida': True, 'feicoes_invalidas': 0, 'comprimento_invalido': 0.0}
+    arestas = shapely.coverage_invalid_edges(geoms, gap_width=largura_vazio)
+    invalidas = ~shapely.is_empty(arestas)
+    return {
+        'valida': bool(shapely.coverage_is_valid(geoms, gap_width=largura_vazio)),
+        'feicoes_invalidas': int(invalidas.sum()),
+        'comprimento_invalido': float(shapely.length(arestas[invalidas]).sum()),
+    }
+
+
+def auditar_cobertura(perimetro: Polygon, camadas: Dict[str, Any], perimetro_internalizado: Optional[Polygon] = None,
+                      largura_vazio: float = 0.0) -> Dict[str, Any]:
+    """
+    Auditoria de cobertura do loteamento:
+    - validade de cada camada como cobertura (`validar_cobertura`);
+    - sobreposições dentro de cada camada e entre camadas, de uma única
+      consulta indexada (STRtree), seguida do teste de interiores e da área
+      das interseções;
+    - decomposição exata da área do perímetro: cada ponto conta para a
+      primeira camada de CAMADAS_COBERTURA que o cobre (e, na mesma camada,
+      para a primeira feição), o que sobra da margem entre o perímetro e o
+      perímetro internalizado é 'margem_livre' e o resto são 'vazios'. As
+      parcelas somam a área do perímetro; o que as feições cobrem fora dele
+      fica em 'fora_perimetro'.
+
+    A área exclusiva de uma feição é a área dela menos a interseção com a
+    única feição anterior que a sobrepõe; nas que têm duas ou mais
+    anteriores, menos a área da união dessas interseções.
+    """
+    nomes = [nome for nome in CAMADAS_COBERTURA if nome in camadas]
+    if perimetro_internalizado is not None:
+        margem = perimetro.difference(perimetro_internalizado)
+        camadas = dict(camadas, margem_livre=[margem] if not margem.is_empty else [])
+        nomes.append('margem_livre')
+    partes = [np.asarray(camadas[nome], dtype=object) for nome in nomes]
+    geoms = np.concatenate(partes) if partes else np.empty(0, dtype=object)
+    codigos = np.repeat(np.arange(len(nomes)), [len(parte) for parte in partes])
+
+    auditoria = {
+        'camadas': {nome: validar_cobertura(parte, largura_vazio)
+                    for nome, parte in zip(nomes, partes) if nome != 'margem_livre'},
+        'sobreposicoes': {},
+        'areas': {nome: 0.0 for nome in nomes},
+        'fora_perimetro': 0.0,
+    }
+
+    # Recorte pelo perímetro das feições que não estão inteiramente dentro dele
+    shapely.prepare(perimetro)
+    fora = ~shapely.covers(perimetro, geoms)
+    if fora.any():
+        recortadas = shapely.intersection(geoms[fora], perimetro)
+        auditoria['fora_perimetro'] = float((shapely.area(geoms[fora]) - shapely.area(recortadas)).sum())
+        geoms = geoms.copy()
+        geoms[fora] = recortadas
+
+    # Pares (anterior, posterior) com interiores em comum: uma única consulta às caixas
+    # envolventes e o teste de interiores (DE-9IM) só nos pares candidatos
+    areas = shapely.area(geoms)
+    anterior, posterior = shapely.STRtree(geoms).query(geoms)
+    pares = anterior < posterior
+    anterior, posterior = anterior[pares], posterior[pares]
+    interiores = shapely.relate_pattern(geoms[anterior], geoms[posterior], 'T********')
+    anterior, posterior = anterior[interiores], posterior[interiores]
+    intersecoes = shapely.intersection(geoms[anterior], geoms[posterior])
+    sobreposicao = shapely.area(intersecoes)
+    relevantes = sobreposicao > AREA_MINIMA_SOBREPOSICAO
+    anterior, posterior = anterior[relevantes], posterior[relevantes]
+    intersecoes, sobreposicao = intersecoes[relevantes], sobreposicao[relevantes]
+
+    # A margem só entra na contabilidade das áreas, não no relatório de sobreposições
+    for a, b in sorted(set(zip(codigos[anterior].tolist(), codigos[posterior].tolist()))):
+        if nomes[b] == 'margem_livre':
+            continue
+        par = (codigos[anterior] == a) & (codigos[posterior] == b)
+        auditoria['sobreposicoes'][f"{nomes[a]}/{nomes[b]}"] = {'pares': int(par.sum()),
+                                                                'area': float(sobreposicao[par].sum())}
+
+    # Área exclusiva: desconta a sobreposição com a feição anterior; com duas ou mais, desconta a
+    # união das interseções (que podem se sobrepor entre si)
+    exclusivas = areas - np.bincount(posterior, weights=sobreposicao, minlength=len(geoms))
+    quantidade = np.bincount(posterior, minlength=len(geoms))
+    for indice in np.flatnonzero(quantidade > 1):
+        exclusivas[indice] = areas[indice] - shapely.union_all(intersecoes[posterior == indice]).area
+
+    for codigo, nome in enumerate(nomes):
+        auditoria['areas'][nome] = float(exclusivas[codigos == codigo].sum())
+    auditoria['areas']['vazios'] = float(perimetro.area - exclusivas.sum())
+    auditoria['area_perimetro'] = float(perimetro.area)
+    auditoria['valida'] = (all(camada['valida'] for camada in auditoria['camadas'].values())
+                           and not (codigos[anterior] == codigos[posterior]).any())
+    return auditoria
@@ -0,0 +1,199 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+from shapely.ops import unary_union
+
+from loteamento_indice_espacial import AlocadorLotes
+from loteamento_particionamento import _partes_poligonais, dividir_bsp, orientar_borda_para_dentro
+from loteamento_processor_avancado import LoteamentoProcessorAvancado
+from loteamento_qualidade import resumir_metricas
+
+# Estratégias completas que disputam cada quadra, na ordem de desempate
+ESTRATEGIAS_DISPUTA = ('esquinas', 'bordas_regulares', 'grade', 'bsp')
+
+# Subdivisão padrão do processador, referência da disputa: as demais só vencem uma quadra sem deixar
+# mais lotes sem acesso que ela e deixando livre a reserva da quadra para as áreas verdes e
+# institucionais (ou a área livre útil que a referência deixa, se for menor; ver _preserva_referencia)
+ESTRATEGIA_REFERENCIA = 'esquinas'
+
+# Custo relativo de cada estratégia (tempo medido por quadra, com 'esquinas' = 1), usado pelo escalonador
+CUSTO_RELATIVO_ESTRATEGIA = {'esquinas': 1.0, 'bordas_regulares': 0.25, 'grade': 0.1, 'bsp': 0.5}
+
+
+def estrategias_disputa(parametros: Dict) -> List[str]:
+    """
+    Estratégias da disputa por quadra (parametros['disputa_estrategias']):
+    True usa todas as de ESTRATEGIAS_DISPUTA, uma lista escolhe um
+    subconjunto (na ordem de ESTRATEGIAS_DISPUTA) e um valor falso desliga
+    a disputa.
+    """
+    escolha = parametros.get('disputa_estrategias')
+    if not escolha:
+        return []
+    if escolha is True:
+        return list(ESTRATEGIAS_DISPUTA)
+    desconhecidas = set(escolha) - set(ESTRATEGIAS_DISPUTA)
+    if desconhecidas:
+        print(f"Aviso: estratégias de disputa desconhecidas ignoradas: {sorted(desconhecidas)}")
+    return [nome for nome in ESTRATEGIAS_DISPUTA if nome in escolha]
+
+
+def _subdividir_bordas_regulares(processador, quadra: Polygon, numero_quadra: int) -> Tuple[List[Polygon], List[str]]:
+    """
+    Sequência do processador avançado: lotes regulares ao longo de cada borda
+    com rua e, na maior área que sobrar, lotes irregulares (triangulação ou
+    cortes). As bordas vêm do processador ultra-avançado (mesma tolerância das
+    demais estratégias) e os candidatos passam pelo alocador, que recorta as
+    sobreposições nos cantos.
+    """
+    try:
+        auxiliar = LoteamentoProcessorAvancado(processador.parametros)
+        parametros = auxiliar.parametros
+        area_minima = parametros['area_minima_lote']
+        testada_minima = parametros['testada_minima_lote']
+        largura = processador.parametros.get('largura_padrao_lote',
+                                             processador.parametros.get('testada_preferencial_lote', 12.0))
+        profundidade = parametros['profundidade_padrao_lote']
+
+        alocador = AlocadorLotes(area_minima, tamanho_celula=profundidade)
+        candidatos = []
+        for borda in processador._encontrar_bordas_com_rua(quadra):
+            borda = orientar_borda_para_dentro(quadra, borda)
+            candidatos.extend(auxiliar._criar_lotes_ao_longo_da_borda(quadra, borda, area_minima, testada_minima,
+                                                                      largura, profundidade))
+        regulares = alocador.alocar(candidatos, 'borda_regular')
+
+        if not processador._prazo_esgotado():
+            area_restante = auxiliar._calcular_area_restante_apos_lotes_regulares(quadra, regulares)
+            alocador.alocar(auxiliar._criar_lotes_irregulares(area_restante, area_minima, testada_minima), 'irregular')
+        return list(alocador.lotes), list(alocador.estrategias)
+
+    except Exception as e:
+        print(f"Erro na subdivisão por bordas regulares da quadra {numero_quadra}: {e}")
+        return [], []
+
+
+def _subdividir_bsp(processador, quadra: Polygon, numero_quadra: int) -> Tuple[List[Polygon], List[str]]:
+    """
+    Lotes ao longo das bordas com rua (os do ultra-avançado, sem os de esquina)
+    e particionamento BSP, balanceado pela área preferencial, só do que
+    sobrar: o BSP da quadra inteira corta lotes sem frente para a rua.
+    """
+    try:
+        parametros = processador.parametros
+        alocador = AlocadorLotes(parametros['area_minima_lote'], tamanho_celula=parametros['profundidade_padrao_lote'])
+        lotes_bordas = alocador.alocar(processador._criar_lotes_bordas_otimizados(quadra, {}), 'borda')
+
+        if not processador._prazo_esgotado():
+            area_restante = quadra.difference(unary_union(lotes_bordas)) if lotes_bordas else quadra
+            for parte in _partes_poligonais([area_restante]):
+                alocador.alocar(dividir_bsp(parte, parametros['area_preferencial_lote'],
+                                            parametros['testada_minima_lote']), 'bsp')
+        return list(alocador.lotes), list(alocador.estrategias)
+
+    except Exception as e:
+        print(f"Erro na subdivisão BSP da quadra {numero_quadra}: {e}")
+        return [], []
+
+
+def subdividir_com_estrategia(processador, nome: str, quadra: Polygon,
+                              numero_quadra: int) -> Tuple[List[Polygon], List[str]]:
+    """
+    Executa uma das estratégias completas da disputa:
+    - 'esquinas': sequência do ultra-avançado (esquinas, bordas, centro);
+    - 'bordas_regulares': sequência do avançado (bordas regulares, irregulares);
+    - 'grade': grade alinhada ao eixo principal, como no processador melhorado;
+    - 'bsp': bordas com rua e particionamento BSP do restante.
+    """
+    if nome == 'esquinas':
+        return processador._subdividir_quadra_com_estrategias(quadra, numero_quadra)
+    if nome == 'bordas_regulares':
+        return _subdividir_bordas_regulares(processador, quadra, numero_quadra)
+    if nome == 'grade':
+        return processador._subdividir_em_grade(quadra, numero_quadra)
+    if nome == 'bsp':
+        return _subdividir_bsp(processador, quadra, numero_quadra)
+    raise ValueError(f"Estratégia de disputa desconhecida: {nome}")
+
+
+def avaliar_parcelamento(processador, area: Polygon, lotes: Sequence[Polygon]) -> Dict[str, float]:
+    """
+    Avaliação de um parcelamento da área (quadra ou parte dela) pelas
+    métricas de qualidade (loteamento_qualidade): lotes, lotes conformes
+    (acesso, testada mínima sobre a rua, área e profundidade), área útil, forma e
+    a pontuação agregada, com o aproveitamento medido sobre a área.
+
+    Para a reserva das áreas comuns traz também 'area_livre_util', a área
+    que os lotes deixam livre em partes de ao menos meio lote mínimo (o
+    corte de _encontrar_areas_para_areas_comuns), e 'reserva_areas_comuns',
+    os percentuais de área verde e institucional aplicados à área.
+    """
+    parametros = processador.parametros
+    avaliacao = resumir_metricas(processador._metricas_qualidade(lotes), area.area)
+    avaliacao['area_livre_util'] = _area_livre_util(area, lotes, parametros['area_minima_lote'] * 0.5)
+    avaliacao['reserva_areas_comuns'] = area.area * (parametros['percentual_area_verde']
+                                                     + parametros['percentual_area_institucional']) / 100
+    return avaliacao
+
+
+def _area_livre_util(area: Polygon, lotes: Sequence[Polygon], area_minima: float) -> float:
+    """Área de `area` fora dos lotes, somando só as partes com ao menos `area_minima`."""
+    livre = area.difference(shapely.union_all(np.asarray(lotes, dtype=object))) if len(lotes) else area
+    partes = shapely.area(shapely.get_parts(livre))
+    return float(partes[partes >= area_minima].sum())
+
+
+def escolher_vencedora(candidatos: Sequence[Tuple[str, Dict[str, float]]]) -> Optional[int]:
+    """
+    Índice do candidato (nome, avaliação) de maior pontuação; no empate vence
+    o primeiro, de modo que a ordem de ESTRATEGIAS_DISPUTA decide. Com a
+    ESTRATEGIA_REFERENCIA entre os candidatos, ficam de fora os que deixam
+    mais lotes sem acesso que ela ou avançam sobre a reserva das áreas
+    comuns (_preserva_referencia); entre os demais, quem tem mais lotes
+    conformes e aproveita mais a quadra vence, mesmo ocupando mais área que
+    a referência.
+    """
+    referencia = next((avaliacao for nome, avaliacao in candidatos if nome == ESTRATEGIA_REFERENCIA), None)
+    melhor = None
+    for indice, (_, avaliacao) in enumerate(candidatos):
+        if referencia is not None and not _preserva_referencia(avaliacao, referencia):
+            continue
+        if melhor is None or avaliacao['pontuacao'] > candidatos[melhor][1]['pontuacao']:
+            melhor = indice
+    return melhor
+
+
+def _preserva_referencia(avaliacao: Dict[str, float], referencia: Dict[str, float]) -> bool:
+    """
+    Indica se o parcelamento não tem mais lotes sem acesso que o de
+    referência e deixa livre a reserva das áreas comuns: a parte da quadra
+    nas metas de área verde e institucional, ou a área livre útil da
+    referência quando ela já deixa menos que isso. A área livre além da
+    reserva e as sobras pequenas demais para área comum podem virar lotes.
+    """
+    sem_acesso = avaliacao['lotes'] - avaliacao['com_acesso']
+    reserva = min(referencia['area_livre_util'], referencia['reserva_areas_comuns'])
+    return (sem_acesso <= referencia['lotes'] - referencia['com_acesso']
+            and avaliacao['area_livre_util'] >= reserva * (1 - 1e-9) - 1e-6)
+
+
+def disputar_estrategias(processador, quadra: Polygon, numero_quadra: int,
+                         nomes: Sequence[str]) -> Tuple[List[Polygon], List[str], str, Dict[str, float]]:
+    """
+    Roda as estratégias em sequência no próprio processo e fica com o
+    parcelamento de maior pontuação. Com orçamento de tempo, para na
+    primeira estratégia que encontrar o prazo da quadra esgotado (a primeira
+    sempre roda). Retorna (lotes, estratégias dos lotes, vencedora, avaliação).
+    """
+    resultados = []
+    for ordem, nome in enumerate(nomes):
+        if ordem > 0 and processador._prazo_esgotado():
+            break
+        lotes, estrategias = subdividir_com_estrategia(processador, nome, quadra, numero_quadra)
+        resultados.append((nome, lotes, estrategias, avaliar_parcelamento(processador, quadra, lotes)))
+
+    vencedora = escolher_vencedora([(nome, avaliacao) for nome, _, _, avaliacao in resultados])
+    nome, lotes, estrategias, avaliacao = resultados[vencedora]
+    return lotes, estrategias, nome, avaliacao
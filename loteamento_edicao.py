@@ -0,0 +1,199 @@
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import shapely
+from shapely.geometry import LineString, Point, Polygon
+from shapely.affinity import translate
+
+from loteamento_alocacao import alocar_por_metas
+from loteamento_indice_espacial import GradeOcupacao
+from loteamento_precisao import fixar_precisao, fixar_precisao_camada
+from loteamento_tabela import TabelaFeicoes
+
+# Estado do processador trocado por uma edição (restaurado se ela falhar)
+ATRIBUTOS_EDITADOS = ('malha_viaria', 'ruas', 'calcadas', 'quadras', 'lotes', 'areas_verdes',
+                      'areas_institucionais', 'deficit_area_verde', 'deficit_area_institucional',
+                      'quadras_truncadas', 'grade_ocupacao', '_indice_ruas')
+
+
+class EditorMalhaViaria:
+    """
+    Edição interativa da malha viária de um processador ultra-avançado já
+    processado (mover, acrescentar ou remover um trecho de `malha_viaria`).
+
+    Cada edição recalcula só a vizinhança da alteração:
+    1. ruas e calçadas são regeradas (buffer por linha + união, barato);
+    2. a região alterada é o buffer dos trechos antigo e novo até a borda
+       externa das calçadas; as quadras que a tocam são encontradas por um
+       índice espacial (STRtree) e, unidas à região, formam a vizinhança;
+    3. na vizinhança as quadras são refeitas (vizinhança menos ruas),
+       subdivididas com o mesmo pipeline do processador (inclusive o cache de
+       quadras congruentes) e as áreas comuns que a tocavam são realocadas
+       ali, buscando as mesmas metas globais de área;
+    4. o resultado é costurado nas camadas existentes: quadras e lotes das
+       quadras afetadas saem, os novos entram no fim, com quadra_id renumerado.
+
+    O relatório de cada edição traz as quadras afetadas, os lotes removidos e
+    criados e o tempo gasto.
+    """
+
+    def __init__(self, processador, folga: float = 1.0):
+        self.processador = processador
+        self.folga = folga
+        self.historico: List[Dict[str, Any]] = []
+
+    def _alcance(self) -> float:
+        """Distância do eixo da via até onde a alteração de um trecho pode mudar quadras."""
+        parametros = self.processador.parametros
+        return parametros['largura_rua'] / 2 + parametros['largura_calcada'] + self.folga
+
+    def segmento_mais_proximo(self, x: float, y: float, distancia_maxima: float) -> Optional[int]:
+        """Índice do trecho de malha_viaria mais próximo de (x, y), até `distancia_maxima` (ou None)."""
+        linhas = np.asarray(self.processador.malha_viaria, dtype=object)
+        if len(linhas) == 0:
+            return None
+        indices = shapely.STRtree(linhas).query_nearest(Point(x, y), max_distance=distancia_maxima)
+        return int(indices[0]) if len(indices) else None
+
+    def _recortar(self, linha: LineString) -> List[LineString]:
+        """Trechos da linha dentro do perímetro internalizado (como na criação da malha)."""
+        partes = shapely.get_parts(linha.intersection(self.processador.perimetro_internalizado))
+        return [parte for parte in partes if isinstance(parte, LineString) and parte.length > 0]
+
+    def mover_segmento(self, indice: int, nova_linha: LineString) -> Dict[str, Any]:
+        """Substitui o trecho `indice` por `nova_linha`."""
+        malha = list(self.processador.malha_viaria)
+        antiga = malha.pop(indice)
+        novas = self._recortar(nova_linha)
+        return self._aplicar('mover', [antiga], novas, malha + novas)
+
+    def deslocar_segmento(self, indice: int, dx: float, dy: float) -> Dict[str, Any]:
+        """Arrasta o trecho `indice` por (dx, dy) metros."""
+        return self.mover_segmento(indice, translate(self.processador.malha_viaria[indice], dx, dy))
+
+    def adicionar_segmento(self, linha: LineString) -> Dict[str, Any]:
+        novas = self._recortar(linha)
+        return self._aplicar('adicionar', [], novas, list(self.processador.malha_viaria) + novas)
+
+    def remover_segmento(self, indice: int) -> Dict[str, Any]:
+        malha = list(self.processador.malha_viaria)
+        antiga = malha.pop(indice)
+        return self._aplicar('remover', [antiga], [], malha)
+
+    def _aplicar(self, operacao: str, antigas: List[LineString], novas: List[LineString],
+                 malha: List[LineString]) -> Dict[str, Any]:
+        processador = self.processador
+        inicio = time.perf_counter()
+        relatorio = {'operacao': operacao, 'sucesso': False, 'quadras_afetadas': 0, 'quadras_novas': 0,
+                     'lotes_removidos': 0, 'lotes_criados': 0}
+        estado = {atributo: getattr(processador, atributo) for atributo in ATRIBUTOS_EDITADOS}
+        try:
+            if not antigas and not novas:
+                raise ValueError("O trecho não cruza o perímetro internalizado")
+
+            # 1. Ruas e calçadas a partir da malha editada
+            processador.malha_viaria = malha
+            processador._gerar_ruas_e_calcadas()
+            processador._consolidar_camadas()
+            processador._indice_ruas = None
+
+            # 2. Região alterada e quadras que a tocam
+            regiao = shapely.union_all(shapely.buffer(np.asarray(antigas + novas, dtype=object), self._alcance()))
+            regiao = regiao.intersection(processador.perimetro_internalizado)
+            quadras = processador.quadras.geometrias
+            afetadas = np.unique(shapely.STRtree(quadras).query(regiao, predicate='intersects')) \
+                if len(quadras) else np.empty(0, dtype=np.int64)
+            vizinhanca = shapely.union_all(np.concatenate([quadras[afetadas], [regiao]]))
+
+            # 3a. Quadras refeitas na vizinhança
+            grade = processador._grade_precisao()
+            ruas_unidas = shapely.union_all(np.asarray(processador.ruas))
+            novas_quadras = shapely.get_parts(fixar_precisao(vizinhanca.difference(ruas_unidas), grade))
+            area_minima_quadra = processador.parametros['area_minima_lote'] * 3
+            novas_quadras = [q for q in novas_quadras if isinstance(q, Polygon) and q.area >= area_minima_quadra]
+
+            # 4a. Quadras e lotes mantidos, com quadra_id renumerado
+            manter = np.ones(len(quadras), dtype=bool)
+            manter[afetadas] = False
+            mapa = np.full(len(quadras), -1, dtype=np.int32)
+            mapa[manter] = np.arange(manter.sum())
+            quadras_mantidas = processador.quadras.filtrar(manter)
+            quadras_mantidas.renumerar_quadras(mapa)
+            lotes_id = processador.lotes.coluna('quadra_id')
+            lotes_mantidos = processador.lotes.filtrar(manter[lotes_id] | (lotes_id < 0))
+            lotes_mantidos.renumerar_quadras(mapa)
+
+            # 3b. Subdivisão das novas quadras
+            primeira = int(manter.sum())
+            blocos = [processador._lotes_da_quadra(quadra, primeira + i) for i, quadra in enumerate(novas_quadras)]
+
+            processador.quadras = TabelaFeicoes.concatenar('QUADRAS', [
+                quadras_mantidas,
+                TabelaFeicoes.de_geometrias('QUADRAS', novas_quadras, np.arange(primeira, primeira + len(novas_quadras))),
+            ])
+            processador.lotes = TabelaFeicoes.concatenar('LOTES', [lotes_mantidos] + blocos)
+            processador.quadras_truncadas = [int(mapa[i]) for i in processador.quadras_truncadas
+                                             if i < len(mapa) and mapa[i] >= 0]
+
+            # 3c. Áreas comuns da vizinhança
+            self._realocar_areas_comuns(vizinhanca, blocos)
+            processador.grade_ocupacao = None
+
+            relatorio.update({
+                'sucesso': True,
+                'quadras_afetadas': int(len(afetadas)),
+                'quadras_novas': len(novas_quadras),
+                'lotes_removidos': int(len(lotes_id) - len(lotes_mantidos)),
+                'lotes_criados': int(sum(len(b) for b in blocos)),
+            })
+
+        except Exception as e:
+            print(f"Erro na edição da malha viária: {e}")
+            relatorio['erro'] = str(e)
+            for atributo, valor in estado.items():
+                setattr(processador, atributo, valor)
+
+        relatorio['tempo'] = time.perf_counter() - inicio
+        self.historico.append(relatorio)
+        print(f"Edição ({operacao}): {relatorio['quadras_afetadas']} quadras afetadas, "
+              f"{relatorio['lotes_removidos']} lotes removidos, {relatorio['lotes_criados']} criados "
+              f"em {relatorio['tempo']:.2f}s")
+        return relatorio
+
+    def _realocar_areas_comuns(self, vizinhanca, blocos: List[TabelaFeicoes]):
+        """
+        Remove as áreas comuns que tocam a vizinhança e busca o que faltar das
+        metas globais nas áreas livres dela (grade de ocupação local).
+        """
+        processador = self.processador
+        parametros = processador.parametros
+        area_total = processador.perimetro_original.area
+        metas = []
+        mantidas = []
+        for atributo, chave in (('areas_verdes', 'percentual_area_verde'),
+                                ('areas_institucionais', 'percentual_area_institucional')):
+            tabela = getattr(processador, atributo)
+            geoms = tabela.geometrias
+            tocam = shapely.area(shapely.intersection(geoms, vizinhanca)) > 1e-6 if len(geoms) else np.zeros(0, bool)
+            mantidas.append(geoms[~tocam])
+            metas.append(max(0.0, parametros[chave] / 100 * area_total - float(shapely.area(geoms[~tocam]).sum())))
+
+        # A malha inteira costuma ser um único polígono: só o trecho em volta da vizinhança entra na grade
+        resolucao = parametros.get('resolucao_grade_ocupacao', 1.0)
+        grade = GradeOcupacao(vizinhanca, resolucao)
+        grade.marcar(shapely.clip_by_rect(np.asarray(processador.ruas), *vizinhanca.buffer(4 * resolucao).bounds))
+        for bloco in blocos:
+            grade.marcar(bloco)
+        livres = grade.areas_livres(parametros['area_minima_lote'] * 0.5)
+        novas, deficits = alocar_por_metas(livres, metas,
+                                           tolerancia_relativa=parametros.get('tolerancia_areas_comuns', 0.02),
+                                           recortar=parametros.get('recortar_areas_comuns', True)) \
+            if livres and any(metas) else ([[], []], metas)
+        processador.deficit_area_verde, processador.deficit_area_institucional = deficits
+
+        grade_precisao = processador._grade_precisao()
+        processador.areas_verdes = TabelaFeicoes.de_geometrias(
+            'AREA_VERDE', list(mantidas[0]) + fixar_precisao_camada(novas[0], grade_precisao))
+        processador.areas_institucionais = TabelaFeicoes.de_geometrias(
+            'AREA_INST', list(mantidas[1]) + fixar_precisao_camada(novas[1], grade_precisao))
@@ -0,0 +1,391 @@
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+from loteamento_disputa import (CUSTO_RELATIVO_ESTRATEGIA, avaliar_parcelamento, escolher_vencedora,
+                                estrategias_disputa, subdividir_com_estrategia)
+from loteamento_indice_espacial import AlocadorLotes
+from loteamento_tabela import TabelaFeicoes
+from loteamento_transporte import criar_executor, desempacotar_geometrias, empacotar_geometrias, liberar
+
+# Pesos do custo estimado de uma quadra (em "lotes equivalentes")
+VERTICES_RETANGULO = 4
+PESO_VERTICE_EXTRA = 0.2
+PESO_ARESTA_RUA = 2.0
+
+
+def estimar_custos(quadras: np.ndarray, arestas_rua: np.ndarray, area_preferencial: float) -> np.ndarray:
+    """
+    Custo relativo de subdividir cada quadra:
+
+        lotes esperados * (1 + 0,2 * vértices além de um retângulo) + 2 * arestas com rua
+
+    Os lotes esperados (área / área preferencial) dão a escala; cada vértice a
+    mais encarece as estratégias de esquina e de borda, e cada aresta voltada
+    para rua é percorrida pelas estratégias de borda.
+    """
+    lotes = shapely.area(quadras) / max(area_preferencial, 1e-9)
+    vertices = shapely.get_num_coordinates(shapely.get_exterior_ring(quadras)) - 1
+    irregularidade = 1 + PESO_VERTICE_EXTRA * np.maximum(vertices - VERTICES_RETANGULO, 0)
+    return lotes * irregularidade + PESO_ARESTA_RUA * np.asarray(arestas_rua, dtype=float)
+
+
+def repartir_bordas(comprimentos, partes: int) -> List[List[int]]:
+    """
+    Reparte as bordas com rua de uma quadra entre `partes` subtarefas: da mais
+    longa para a mais curta, cada borda vai para a parte com menor comprimento
+    acumulado (LPT), já que o custo da subdivisão de uma borda cresce com o
+    comprimento dela. Retorna os índices das bordas de cada parte, em ordem.
+    """
+    comprimentos = np.asarray(comprimentos, dtype=float)
+    grupos: List[List[int]] = [[] for _ in range(max(partes, 1))]
+    acumulado = np.zeros(len(grupos))
+    for indice in np.argsort(-comprimentos, kind='stable'):
+        parte = int(np.argmin(acumulado))
+        grupos[parte].append(int(indice))
+        acumulado[parte] += comprimentos[indice]
+    return [sorted(grupo) for grupo in grupos]
+
+
+def lotes_das_bordas(processador, quadra: Polygon, parte: int, partes: int) -> Dict[int, List[Polygon]]:
+    """
+    Parte `parte` de uma quadra dividida: refaz a alocação das esquinas (barata e
+    determinística) e subdivide só as bordas com rua que cabem a esta parte
+    (`repartir_bordas`). Os candidatos voltam por índice de borda, para o
+    processo principal montar a quadra com _subdividir_quadra_com_estrategias
+    exatamente como na execução serial.
+    """
+    area_minima = processador.parametros['area_minima_lote']
+    alocador = AlocadorLotes(area_minima, tamanho_celula=processador.parametros['profundidade_padrao_lote'])
+    _, area_restante = processador._alocar_esquinas(quadra, alocador)
+    if not (isinstance(area_restante, Polygon) and area_restante.area > area_minima):
+        return {}
+    bordas = processador._encontrar_bordas_com_rua(area_restante)
+    indices = repartir_bordas([borda.length for borda in bordas], partes)[parte]
+    return {i: processador._subdividir_borda_inteligente(area_restante, bordas[i]) for i in indices}
+
+
+# Estado de cada worker, montado uma vez por processo em `_iniciar_worker`
+_processador_worker = None
+_geometrias_worker = None
+
+
+def _iniciar_worker(classe, parametros: Dict, pacote_ruas, pacote_tarefas, perimetro):
+    global _processador_worker, _geometrias_worker
+    processador = classe(dict(parametros))
+    processador.ruas = TabelaFeicoes.de_geometrias('RUAS', desempacotar_geometrias(pacote_ruas, liberar=False))
+    processador.perimetro_internalizado = perimetro
+    processador.cache_quadras = None  # o cache de quadras congruentes fica no processo principal
+    _processador_worker = processador
+    _geometrias_worker = desempacotar_geometrias(pacote_tarefas, liberar=False)
+
+
+def _executar_tarefa(indice: int, numero_quadra: int, estrategia: Optional[str], prazo: Optional[float],
+                     devolver_brutos: bool, bordas: Optional[Tuple[int, int]] = None):
+    """
+    Subdivide uma quadra no worker; os lotes voltam pela memória
+    compartilhada. Com `estrategia` (disputa de estratégias) roda só aquela
+    estratégia e devolve também a avaliação do parcelamento. Com `bordas`
+    (parte, partes) devolve só os candidatos das bordas da parte
+    (`lotes_das_bordas`), em 'lotes', com a quantidade por borda em 'bordas'.
+    """
+    processador = _processador_worker
+    geometria = _geometrias_worker[indice]
+    inicio = time.perf_counter()
+    processador.quadras_truncadas = []
+    processador._prazo_quadra = inicio + prazo if prazo else None
+    avaliacao = None
+    try:
+        if bordas is not None:
+            por_borda = lotes_das_bordas(processador, geometria, *bordas)
+            return {
+                'lotes': empacotar_geometrias([lote for lotes in por_borda.values() for lote in lotes]),
+                'brutos': None,
+                'bordas': [(i, len(lotes)) for i, lotes in por_borda.items()],
+                'estrategias': [],
+                'avaliacao': None,
+                'truncada': False,
+                'pid': os.getpid(),
+                'duracao': time.perf_counter() - inicio,
+            }
+        if estrategia is None:
+            brutos, estrategias = processador._subdividir_quadra_no_orcamento(geometria, numero_quadra)
+        else:
+            processador._quadra_truncada = False
+            brutos, estrategias = subdividir_com_estrategia(processador, estrategia, geometria, numero_quadra)
+            avaliacao = avaliar_parcelamento(processador, geometria, brutos)
+            processador._marcar_truncada(numero_quadra)
+        lotes = processador._limpar_lascas_quadra(geometria, brutos)
+    finally:
+        processador._prazo_quadra = None
+        processador._indice_ruas = None
+    return {
+        'lotes': empacotar_geometrias(lotes),
+        'brutos': empacotar_geometrias(brutos) if devolver_brutos and brutos else None,
+        'estrategias': list(estrategias),
+        'avaliacao': avaliacao,
+        'truncada': bool(processador.quadras_truncadas),
+        'pid': os.getpid(),
+        'duracao': time.perf_counter() - inicio,
+    }
+
+
+class EscalonadorQuadras:
+    """
+    Subdivisão das quadras em processos paralelos, ciente do tamanho delas.
+
+    1. o custo de cada quadra é estimado pela área, pelos vértices e pelas
+       arestas com rua (`estimar_custos`);
+    2. quadras congruentes (mesma forma e mesmas bordas com rua) viram uma
+       tarefa só: os lotes da primeira vão para o cache de quadras congruentes
+       do processador, de onde as repetidas os reaproveitam, como na execução
+       serial;
+    3. quadras grandes demais para o equilíbrio da carga (custo acima de
+       `fracao_divisao` do custo médio por worker) são divididas em
+       subtarefas pelas bordas com rua (`repartir_bordas`), com pelo menos
+       `lotes_minimos_subtarefa` lotes esperados em cada parte: cada
+       subtarefa calcula os lotes das suas bordas (o grosso do custo) e o
+       processo principal monta a quadra com eles, com o mesmo resultado da
+       execução serial. A geometria da quadra não é cortada: cortes criariam
+       esquinas e bordas que não existem. Só a subdivisão completa é dividida,
+       sem disputa de estratégias nem orçamento de tempo;
+    4. com a disputa de estratégias (parametros['disputa_estrategias']),
+       cada quadra vira uma tarefa por estratégia, com o custo escalado por
+       CUSTO_RELATIVO_ESTRATEGIA: as estratégias de uma quadra correm em
+       workers diferentes e fica o parcelamento de maior pontuação;
+    5. as tarefas são despachadas da maior para a menor (LPT), e os lotes
+       saem em ordem de quadra assim que cada quadra fica completa.
+
+    `metricas` traz o número de tarefas, as quadras divididas e, por worker,
+    as tarefas executadas, o tempo ocupado e a utilização (tempo ocupado /
+    tempo da fase paralela).
+    """
+
+    def __init__(self, processador, max_workers: int, fracao_divisao: float = 0.5,
+                 lotes_minimos_subtarefa: float = 12.0):
+        self.processador = processador
+        self.max_workers = max(1, max_workers)
+        self.fracao_divisao = fracao_divisao
+        self.lotes_minimos_subtarefa = lotes_minimos_subtarefa
+        self.metricas: Dict[str, Any] = {}
+
+    def planejar(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Plano de execução: uma entrada por quadra (como obter os lotes dela) e
+        a lista de tarefas para os workers, já ordenada por custo decrescente.
+        """
+        processador = self.processador
+        parametros = processador.parametros
+        cache = processador.cache_quadras
+        quadras = processador.quadras.geometrias
+        mascaras = [processador._mascara_bordas_com_rua(quadra) for quadra in quadras]
+        custos = estimar_custos(quadras, [int(m.sum()) for m in mascaras], parametros['area_preferencial_lote'])
+
+        plano = []
+        primeiras = {}
+        for i, quadra in enumerate(quadras):
+            entrada = {'quadra': quadra, 'custo': float(custos[i]), 'forma': None, 'tarefas': [], 'partes': [],
+                       'resultado': None}
+            plano.append(entrada)
+            if quadra.area < parametros['area_minima_lote'] * 2:
+                entrada['modo'] = 'pequena'
+                continue
+            if cache is not None:
+                entrada['forma'] = cache.forma(quadra, mascaras[i])
+                chave = entrada['forma'][0] if entrada['forma'] is not None else None
+                if chave is not None and chave in primeiras:
+                    entrada['modo'] = 'congruente'
+                    continue
+                entrada['resultado'] = cache.obter(entrada['forma'], quadra)
+                if chave is not None:
+                    primeiras[chave] = i
+                    entrada['guardar'] = entrada['resultado'] is None
+            entrada['modo'] = 'cache' if entrada['resultado'] is not None else 'tarefa'
+
+        # Limite de custo por tarefa para o equilíbrio da carga
+        a_executar = [i for i, entrada in enumerate(plano) if entrada['modo'] == 'tarefa']
+        custo_total = sum(plano[i]['custo'] for i in a_executar)
+        limite = self.fracao_divisao * custo_total / self.max_workers if self.max_workers > 1 else math.inf
+
+        tarefas = []
+        area_preferencial = parametros['area_preferencial_lote']
+        nomes = estrategias_disputa(parametros) or [None]
+        divisivel = nomes == [None] and not processador.orcamento_tempo()
+        for i in a_executar:
+            entrada = plano[i]
+            quadra = entrada['quadra']
+            partes = 1
+            if divisivel and entrada['custo'] > limite:
+                lotes = quadra.area / area_preferencial
+                partes = int(min(math.ceil(entrada['custo'] / limite), lotes // self.lotes_minimos_subtarefa,
+                                 mascaras[i].sum()))
+            if partes > 1:
+                entrada['divisao'] = partes
+                for parte in range(partes):
+                    entrada['partes'].append([len(tarefas)])
+                    entrada['tarefas'].append(len(tarefas))
+                    tarefas.append({'quadra_id': i, 'parte': parte, 'geometria': quadra, 'estrategia': None,
+                                    'bordas': (parte, partes), 'custo': entrada['custo'] / partes})
+                continue
+            entrada['partes'].append(list(range(len(tarefas), len(tarefas) + len(nomes))))
+            entrada['tarefas'].extend(entrada['partes'][-1])
+            for nome in nomes:
+                tarefas.append({'quadra_id': i, 'parte': 0, 'geometria': quadra, 'estrategia': nome,
+                                'custo': entrada['custo'] * CUSTO_RELATIVO_ESTRATEGIA.get(nome, 1.0)})
+        ordem = sorted(range(len(tarefas)), key=lambda t: -tarefas[t]['custo'])
+        for posicao, t in enumerate(ordem):
+            tarefas[t]['ordem'] = posicao
+        return plano, tarefas
+
+    def iter_blocos(self, primeiro_id: int = 0):
+        """Gera, em ordem de quadra, a TabelaFeicoes com os lotes de cada quadra."""
+        processador = self.processador
+        parametros = processador.parametros
+        plano, tarefas = self.planejar()
+        custo_total = sum(t['custo'] for t in tarefas) or 1.0
+        orcamento = processador.orcamento_tempo()
+        processador.quadras_truncadas = []
+        divididas = sum(1 for entrada in plano if entrada.get('divisao'))
+        print(f"Escalonador: {len(tarefas)} tarefas para {len(plano)} quadras "
+              f"({divididas} divididas), {self.max_workers} workers")
+
+        resultados: Dict[int, Dict[str, Any]] = {}
+        ocupacao: Dict[int, Dict[str, float]] = {}
+        # Ruas e geometrias das tarefas vão uma vez para cada worker, pela memória compartilhada
+        # (as tarefas de uma mesma quadra, por estratégia na disputa ou por parte, dividem a geometria)
+        pecas: Dict[int, int] = {}
+        geometrias = []
+        for tarefa in tarefas:
+            if id(tarefa['geometria']) not in pecas:
+                pecas[id(tarefa['geometria'])] = len(geometrias)
+                geometrias.append(tarefa['geometria'])
+            tarefa['peca'] = pecas[id(tarefa['geometria'])]
+        pacote_ruas = empacotar_geometrias(np.asarray(processador.ruas))
+        pacote_tarefas = empacotar_geometrias(geometrias)
+        inicio = time.perf_counter()
+        proxima = 0
+        total = primeiro_id
+        try:
+            with criar_executor(min(self.max_workers, max(len(tarefas), 1)), initializer=_iniciar_worker,
+                                initargs=(type(processador), parametros, pacote_ruas, pacote_tarefas,
+                                          processador.perimetro_internalizado)) as executor:
+                pendentes = {}
+                for t in sorted(range(len(tarefas)), key=lambda t: tarefas[t]['ordem']):
+                    tarefa = tarefas[t]
+                    prazo = orcamento * self.max_workers * tarefa['custo'] / custo_total if orcamento else None
+                    entrada = plano[tarefa['quadra_id']]
+                    futuro = executor.submit(_executar_tarefa, tarefa['peca'], tarefa['quadra_id'] + 1,
+                                             tarefa['estrategia'], prazo, bool(entrada.get('guardar')),
+                                             tarefa.get('bordas'))
+                    pendentes[futuro] = t
+
+                while proxima < len(plano):
+                    while proxima < len(plano) and self._pronta(plano[proxima], resultados):
+                        bloco = self._montar(proxima, plano[proxima], resultados, total)
+                        self.processador._medir_frentes(bloco)
+                        proxima += 1
+                        if len(bloco):
+                            total += len(bloco)
+                            yield bloco
+                    if not pendentes:
+                        break
+                    concluidos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                    for futuro in concluidos:
+                        t = pendentes.pop(futuro)
+                        resultado = futuro.result()
+                        resultado['lotes'] = desempacotar_geometrias(resultado['lotes'])
+                        if resultado['brutos'] is not None:
+                            resultado['brutos'] = desempacotar_geometrias(resultado['brutos'])
+                        resultados[t] = resultado
+                        uso = ocupacao.setdefault(resultado['pid'], {'tarefas': 0, 'tempo_ocupado': 0.0})
+                        uso['tarefas'] += 1
+                        uso['tempo_ocupado'] += resultado['duracao']
+        finally:
+            liberar(pacote_ruas)
+            liberar(pacote_tarefas)
+
+        duracao = time.perf_counter() - inicio
+        por_worker = [{'worker': indice, 'pid': pid, 'tarefas': uso['tarefas'],
+                       'tempo_ocupado': uso['tempo_ocupado'],
+                       'utilizacao': uso['tempo_ocupado'] / duracao if duracao > 0 else 0.0}
+                      for indice, (pid, uso) in enumerate(sorted(ocupacao.items()))]
+        self.metricas = {
+            'workers': self.max_workers,
+            'tarefas': len(tarefas),
+            'quadras_divididas': divididas,
+            'quadras_congruentes': sum(1 for entrada in plano if entrada['modo'] == 'congruente'),
+            'custo_estimado': custo_total,
+            'tempo_paralelo': duracao,
+            'utilizacao_media': sum(w['utilizacao'] for w in por_worker) / self.max_workers,
+            'por_worker': por_worker,
+        }
+        utilizacoes = ', '.join(f"{w['utilizacao']:.0%}" for w in por_worker)
+        print(f"Escalonador: {duracao:.2f}s, utilização média {self.metricas['utilizacao_media']:.0%} ({utilizacoes})")
+
+    @staticmethod
+    def _pronta(entrada: Dict[str, Any], resultados: Dict[int, Dict[str, Any]]) -> bool:
+        return all(t in resultados for t in entrada['tarefas'])
+
+    def _melhor_parte(self, quadra_id: int, candidatos: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Resultado de uma parte: o único, ou o vencedor da disputa entre as estratégias."""
+        if len(candidatos) == 1 and candidatos[0]['avaliacao'] is None:
+            return candidatos[0]
+        nomes = estrategias_disputa(self.processador.parametros)
+        vencedora = escolher_vencedora([(nome, c['avaliacao']) for nome, c in zip(nomes, candidatos)])
+        self.processador.registrar_vitoria_disputa(quadra_id + 1, nomes[vencedora], candidatos[vencedora]['avaliacao'])
+        return candidatos[vencedora]
+
+    def _montar(self, quadra_id: int, entrada: Dict[str, Any], resultados: Dict[int, Dict[str, Any]],
+                primeiro_id: int) -> TabelaFeicoes:
+        """Lotes finais da quadra: partes calculadas nos workers, cache ou lote único."""
+        processador = self.processador
+        quadra = entrada['quadra']
+        bloco = TabelaFeicoes('LOTES', primeiro_id=primeiro_id)
+        modo = entrada['modo']
+
+        if modo == 'pequena':
+            if processador._quadra_tem_acesso_rua(quadra):
+                bloco.adicionar([quadra], quadra_id=quadra_id, estrategias=['quadra_unica'])
+                print(f"  Quadra {quadra_id+1} convertida em lote único")
+            return bloco
+
+        if modo in ('cache', 'congruente'):
+            resultado = entrada['resultado'] if modo == 'cache' else \
+                processador.cache_quadras.obter(entrada['forma'], quadra)
+            lotes, estrategias = resultado if resultado is not None else ([], [])
+            lotes = processador._limpar_lascas_quadra(quadra, lotes)
+            bloco.adicionar(lotes, quadra_id=quadra_id, estrategias=estrategias)
+        elif entrada.get('divisao'):
+            # Quadra dividida por bordas: monta no processo principal com os candidatos das partes
+            lotes_por_borda = {}
+            for t in entrada['tarefas']:
+                resultado = resultados.pop(t)
+                inicios = np.cumsum([0] + [quantidade for _, quantidade in resultado['bordas']])
+                for (borda, _), inicio, fim in zip(resultado['bordas'], inicios[:-1], inicios[1:]):
+                    lotes_por_borda[borda] = list(resultado['lotes'][inicio:fim])
+            brutos, estrategias = processador._subdividir_quadra_com_estrategias(quadra, quadra_id + 1,
+                                                                                 lotes_por_borda)
+            bloco.adicionar(processador._limpar_lascas_quadra(quadra, brutos), quadra_id=quadra_id,
+                            estrategias=estrategias)
+            if entrada.get('guardar'):
+                processador.cache_quadras.guardar(entrada['forma'], brutos, estrategias)
+        else:
+            partes = [self._melhor_parte(quadra_id, [resultados.pop(t) for t in tarefas])
+                      for tarefas in entrada['partes']]
+            for parte in partes:
+                bloco.adicionar(parte['lotes'], quadra_id=quadra_id, estrategias=parte['estrategias'])
+            truncada = any(parte['truncada'] for parte in partes)
+            if truncada:
+                processador.quadras_truncadas.append(quadra_id)
+            if entrada.get('guardar') and not truncada:
+                brutos = [g for parte in partes if parte['brutos'] is not None for g in parte['brutos']]
+                processador.cache_quadras.guardar(entrada['forma'], brutos,
+                                                  [e for parte in partes for e in parte['estrategias']])
+        print(f"  Lotes criados na quadra {quadra_id+1}: {len(bloco)}")
+        return bloco
@@ -0,0 +1,146 @@
+import json
+import os
+import warnings
+from typing import Dict, List, Optional
+
+import numpy as np
+import shapely
+
+from loteamento_tabela import TabelaFeicoes
+
+try:
+    import pyogrio
+    from pyogrio.raw import write as _pyogrio_write_raw
+except ImportError:  # pragma: no cover - dependência opcional
+    pyogrio = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - dependência opcional
+    pa = None
+
+
+# Camada do processador -> nome da camada no arquivo GIS
+CAMADAS_GIS = {
+    'lotes': 'LOTES',
+    'quadras': 'QUADRAS',
+    'ruas': 'RUAS',
+    'calcadas': 'CALCADAS',
+    'areas_verdes': 'AREA_VERDE',
+    'areas_institucionais': 'AREA_INST',
+}
+
+FORMATOS = {
+    '.gpkg': 'GPKG',
+    '.parquet': 'Parquet',
+    '.geoparquet': 'Parquet',
+    '.geojson': 'GeoJSON',
+    '.json': 'GeoJSON',
+}
+
+
+def colunas_atributos(tabela: TabelaFeicoes, camada: str) -> Dict[str, np.ndarray]:
+    """Colunas exportadas para cada feição: id, area, testada, profundidade, quadra_id e camada."""
+    n = len(tabela)
+    return {
+        'id': tabela.coluna('id').astype(np.int64),
+        'area': tabela.coluna('area').astype(np.float64),
+        'testada': tabela.coluna('testada').astype(np.float64),
+        'profundidade': tabela.coluna('profundidade').astype(np.float64),
+        'quadra_id': tabela.coluna('quadra_id').astype(np.int64),
+        'camada': np.full(n, camada, dtype=object),
+    }
+
+
+def escrever_camada(caminho: str, driver: str, camada: str, geometrias: np.ndarray,
+                    colunas: Dict[str, np.ndarray], crs: Optional[str] = None,
+                    acrescentar: bool = False):
+    """
+    Escreve uma camada em lote. Usa pyogrio.write_arrow (uma única transferência
+    Arrow para o GDAL) quando pyarrow está disponível; caso contrário, usa
+    pyogrio.write com arrays NumPy.
+    """
+    wkb = shapely.to_wkb(geometrias)
+    tipo = 'Polygon' if np.all(shapely.get_type_id(geometrias) == 3) else 'Unknown'
+    opcoes = {'layer': camada, 'driver': driver, 'append': acrescentar, 'geometry_type': tipo, 'crs': crs}
+
+    with warnings.catch_warnings():
+        # Coordenadas locais de projeto (DXF) normalmente não têm CRS definido
+        warnings.filterwarnings('ignore', message="'crs' was not provided")
+        if pa is not None and hasattr(pyogrio, 'write_arrow'):
+            tabela = pa.table({**colunas, 'geometry': pa.array(list(wkb), type=pa.binary())})
+            pyogrio.write_arrow(tabela, caminho, geometry_name='geometry', **opcoes)
+        else:
+            _pyogrio_write_raw(caminho, wkb, list(colunas.values()), list(colunas.keys()), **opcoes)
+
+
+def _escrever_geojson_puro(caminho: str, partes: List):
+    """GeoJSON sem GDAL: geometrias serializadas de forma vetorizada por shapely.to_geojson."""
+    features = []
+    for geometrias, colunas in partes:
+        textos = shapely.to_geojson(geometrias)
+        linhas = zip(*[valores.tolist() for valores in colunas.values()])
+        nomes = list(colunas.keys())
+        for texto, valores in zip(textos, linhas):
+            features.append({
+                'type': 'Feature',
+                'geometry': json.loads(texto),
+                'properties': dict(zip(nomes, valores)),
+            })
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump({'type': 'FeatureCollection', 'features': features}, arquivo)
+
+
+def exportar_camadas(tabelas: Dict[str, TabelaFeicoes], arquivo_saida: str,
+                     formato: Optional[str] = None, crs: Optional[str] = None) -> Dict[str, int]:
+    """
+    Exporta as camadas do resultado em memória para GeoPackage, GeoParquet ou
+    GeoJSON, sem recalcular nenhuma geometria.
+
+    - GeoPackage: uma camada por tipo de feição (LOTES, QUADRAS, RUAS...);
+    - GeoParquet/GeoJSON: todas as feições em uma única tabela, distinguidas
+      pela coluna `camada`.
+
+    Retorna o número de feições gravadas por camada.
+    """
+    extensao = os.path.splitext(arquivo_saida)[1].lower()
+    driver = formato or FORMATOS.get(extensao)
+    if driver is None:
+        raise ValueError(f"Formato de exportação não suportado: {extensao}")
+
+    partes = []
+    contagem = {}
+    for atributo, camada in CAMADAS_GIS.items():
+        tabela = tabelas.get(atributo)
+        if tabela is None or len(tabela) == 0:
+            continue
+        partes.append((tabela.geometrias, colunas_atributos(tabela, camada)))
+        contagem[camada] = len(tabela)
+
+    if os.path.exists(arquivo_saida):
+        os.remove(arquivo_saida)
+
+    if not partes:
+        return contagem
+
+    if driver == 'GPKG':
+        if pyogrio is None:
+            raise ImportError("pyogrio é necessário para exportar GeoPackage")
+        for geometrias, colunas in partes:
+            escrever_camada(arquivo_saida, driver, colunas['camada'][0], geometrias, colunas, crs)
+        return contagem
+
+    # Formatos de tabela única: concatenar as camadas
+    geometrias = np.concatenate([g for g, _ in partes])
+    colunas = {nome: np.concatenate([c[nome] for _, c in partes]) for nome in partes[0][1]}
+
+    if driver == 'Parquet':
+        import geopandas as gpd
+        gdf = gpd.GeoDataFrame(colunas, geometry=geometrias, crs=crs)
+        gdf.to_parquet(arquivo_saida)
+    elif pyogrio is not None:
+        escrever_camada(arquivo_saida, driver, 'loteamento', geometrias, colunas, crs)
+    else:
+        _escrever_geojson_puro(arquivo_saida, [(geometrias, colunas)])
+
+    return contagem
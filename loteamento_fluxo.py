@@ -0,0 +1,119 @@
+import os
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from ezdxf.addons import r12writer
+
+from loteamento_exportacao import CAMADAS_GIS, escrever_camada, colunas_atributos
+from loteamento_tabela import TabelaFeicoes
+
+# Layer DXF -> cor ACI (mesmas cores de adicionar_ao_dxf)
+CORES_LAYERS = {
+    'PERIMETRO': 1,
+    'RUAS': 2,
+    'CALCADAS': 8,
+    'QUADRAS': 3,
+    'LOTES': 4,
+    'AREA_VERDE': 3,
+    'AREA_INST': 6,
+    'MALHA_VIARIA': 7,
+}
+
+
+class EscritorDXFFluxo:
+    """
+    Consumidor de eventos que grava um DXF R12 em fluxo (ezdxf r12writer):
+    cada feição é escrita assim que chega, sem montar o documento em memória.
+    """
+
+    def __init__(self, arquivo_saida: str):
+        self.arquivo_saida = arquivo_saida
+        self.feicoes = 0
+        self._contexto = r12writer(arquivo_saida, fixed_tables=True)
+        self._dxf = self._contexto.__enter__()
+
+    def _polilinhas(self, coordenadas: Iterable, layer: str, fechada: bool = True):
+        for coords in coordenadas:
+            self._dxf.add_polyline_2d(np.asarray(coords)[:, :2].tolist(), closed=fechada,
+                                      layer=layer, color=CORES_LAYERS.get(layer))
+            self.feicoes += 1
+
+    def receber(self, tipo: str, dados: Any):
+        if tipo == 'perimetro':
+            self._polilinhas([dados.exterior.coords], 'PERIMETRO')
+        elif tipo == 'malha_viaria':
+            self._polilinhas([linha.coords for linha in dados], 'MALHA_VIARIA', fechada=False)
+        elif tipo == 'camada':
+            atributo, tabela = dados
+            self._polilinhas(tabela.coordenadas_exteriores(), CAMADAS_GIS[atributo])
+        elif tipo == 'lotes':
+            self._polilinhas(dados.coordenadas_exteriores(), 'LOTES')
+
+    def fechar(self):
+        if self._contexto is not None:
+            self._contexto.__exit__(None, None, None)
+            self._contexto = None
+
+
+class AcrescentadorGPKG:
+    """
+    Consumidor de eventos que grava um GeoPackage incrementalmente: camadas
+    completas são escritas ao chegar e os lotes são acrescentados à camada
+    LOTES em lotes de `quadras_por_gravacao` quadras (cada gravação abre o
+    arquivo, então gravar quadra a quadra seria lento).
+    """
+
+    def __init__(self, arquivo_saida: str, crs: Optional[str] = None, quadras_por_gravacao: int = 50):
+        self.arquivo_saida = arquivo_saida
+        self.crs = crs
+        self.quadras_por_gravacao = max(1, quadras_por_gravacao)
+        self.contagem: Dict[str, int] = {}
+        self._pendentes = []
+        if os.path.exists(arquivo_saida):
+            os.remove(arquivo_saida)
+
+    def _gravar(self, tabela: TabelaFeicoes, camada: str):
+        if len(tabela) == 0:
+            return
+        escrever_camada(self.arquivo_saida, 'GPKG', camada, tabela.geometrias, colunas_atributos(tabela, camada),
+                        self.crs, acrescentar=camada in self.contagem)
+        self.contagem[camada] = self.contagem.get(camada, 0) + len(tabela)
+
+    def _descarregar(self):
+        if self._pendentes:
+            self._gravar(TabelaFeicoes.concatenar('LOTES', self._pendentes), 'LOTES')
+            self._pendentes = []
+
+    def receber(self, tipo: str, dados: Any):
+        if tipo == 'camada':
+            atributo, tabela = dados
+            self._gravar(tabela, CAMADAS_GIS[atributo])
+        elif tipo == 'lotes':
+            self._pendentes.append(dados)
+            if len(self._pendentes) >= self.quadras_por_gravacao:
+                self._descarregar()
+
+    def fechar(self):
+        self._descarregar()
+
+
+def consumir(eventos: Iterable[Tuple[str, Any]], *consumidores) -> Dict[str, Any]:
+    """
+    Repassa cada evento de um fluxo (ex.: `iter_resultados`) a todos os
+    consumidores, na ordem em que chegam, e fecha os consumidores no final.
+    Retorna as estatísticas do evento 'estatisticas' (ou {'sucesso': False,
+    'erro': ...} se o fluxo gerou um evento de erro).
+    """
+    resultado = {'sucesso': False, 'erro': 'Fluxo sem estatísticas'}
+    try:
+        for tipo, dados in eventos:
+            if tipo == 'erro':
+                resultado = {'sucesso': False, 'erro': dados}
+            elif tipo == 'estatisticas':
+                resultado = {'sucesso': True, **dados}
+            for consumidor in consumidores:
+                consumidor.receber(tipo, dados)
+    finally:
+        for consumidor in consumidores:
+            consumidor.fechar()
+    return resultado
@@ -0,0 +1,344 @@
+import math
+from collections import defaultdict
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon, box
+from shapely.ops import unary_union
+
+
+class IndiceEspacialIncremental:
+    """
+    Índice espacial incremental baseado em grade uniforme (hash de células).
+
+    Diferente do STRtree do shapely, que é imutável, aceita inserções a qualquer
+    momento em O(1) por célula ocupada; a consulta custa proporcionalmente ao
+    número de geometrias nas células tocadas pela caixa envolvente.
+    """
+
+    def __init__(self, tamanho_celula: float = 20.0):
+        self.tamanho_celula = max(tamanho_celula, 1e-6)
+        self.celulas = defaultdict(list)
+        self.geometrias = []
+
+    def __len__(self) -> int:
+        return len(self.geometrias)
+
+    def _faixa_celulas(self, limites):
+        min_x, min_y, max_x, max_y = limites
+        c = self.tamanho_celula
+        return (int(math.floor(min_x / c)), int(math.floor(min_y / c)),
+                int(math.floor(max_x / c)), int(math.floor(max_y / c)))
+
+    def inserir(self, geometria) -> int:
+        """Insere uma geometria e retorna seu índice."""
+        indice = len(self.geometrias)
+        self.geometrias.append(geometria)
+        i0, j0, i1, j1 = self._faixa_celulas(geometria.bounds)
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                self.celulas[(i, j)].append(indice)
+        return indice
+
+    def consultar(self, geometria) -> List[int]:
+        """Índices das geometrias cujas células coincidem com a caixa envolvente da consulta."""
+        i0, j0, i1, j1 = self._faixa_celulas(geometria.bounds)
+        encontrados = set()
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                encontrados.update(self.celulas.get((i, j), ()))
+        return sorted(encontrados)
+
+
+class AlocadorLotes:
+    """
+    Motor de alocação de lotes sem sobreposição dentro de uma quadra.
+
+    Cada candidato é verificado contra os lotes já aceitos através do índice
+    incremental; sobreposições são recortadas antes da aceitação, de modo que o
+    conjunto final forma uma cobertura sem sobreposições.
+    """
+
+    def __init__(self, area_minima: float, tamanho_celula: float = 20.0,
+                 tolerancia_area: float = 1e-6):
+        self.area_minima = area_minima
+        self.tolerancia_area = tolerancia_area
+        self.indice = IndiceEspacialIncremental(tamanho_celula)
+        self.lotes = []
+        self.estrategias = []
+
+    def tentar_alocar(self, candidato: Polygon, estrategia: str = '') -> Optional[Polygon]:
+        """
+        Recorta o candidato contra os lotes vizinhos já aceitos e o aceita se a
+        maior parte restante ainda atingir a área mínima.
+        """
+        if candidato is None or candidato.is_empty:
+            return None
+
+        ids = self.indice.consultar(candidato)
+        if ids:
+            vizinhos = np.array([self.lotes[i] for i in ids], dtype=object)
+            sobreposicao = shapely.area(shapely.intersection(vizinhos, candidato))
+            conflitos = vizinhos[sobreposicao > self.tolerancia_area]
+            if len(conflitos) > 0:
+                candidato = candidato.difference(unary_union(conflitos))
+
+        partes = [p for p in shapely.get_parts(candidato) if isinstance(p, Polygon)]
+        if not partes:
+            return None
+
+        lote = max(partes, key=lambda p: p.area)
+        if lote.area < self.area_minima:
+            return None
+
+        self.indice.inserir(lote)
+        self.lotes.append(lote)
+        self.estrategias.append(estrategia)
+        return lote
+
+    def alocar(self, candidatos: List[Polygon], estrategia: str = '') -> List[Polygon]:
+        """Tenta alocar uma sequência de candidatos; retorna os aceitos."""
+        aceitos = []
+        for candidato in candidatos:
+            lote = self.tentar_alocar(candidato, estrategia)
+            if lote is not None:
+                aceitos.append(lote)
+        return aceitos
+
+
+def rotular_componentes(mascara: np.ndarray) -> Tuple[np.ndarray, int]:
+    """
+    Rotula os componentes conexos (vizinhança 4) de uma máscara booleana.
+
+    Trabalha sobre corridas horizontais de células: cada corrida recebe um
+    identificador e as corridas que se tocam entre linhas vizinhas são unidas
+    por propagação de mínimos com salto de ponteiros, tudo em NumPy.
+    Retorna a matriz de rótulos (0 = fora da máscara, 1..n) e n.
+    """
+    linhas, colunas = mascara.shape
+    plano = mascara.ravel()
+    if not plano.any():
+        return np.zeros(mascara.shape, dtype=np.int32), 0
+
+    inicio = plano.copy()
+    inicio[1:] &= ~plano[:-1]
+    inicio.reshape(linhas, colunas)[:, 0] = mascara[:, 0]
+    corrida = (np.cumsum(inicio) - 1).reshape(linhas, colunas)
+    num_corridas = int(inicio.sum())
+
+    verticais = mascara[:-1] & mascara[1:]
+    # Só o primeiro contato vertical de cada par de corridas é necessário
+    contato = verticais.copy()
+    contato[:, 1:] &= ~verticais[:, :-1]
+    a = corrida[:-1][contato]
+    b = corrida[1:][contato]
+
+    rotulo = np.arange(num_corridas)
+    while True:
+        anterior = rotulo
+        menor = np.minimum(rotulo[a], rotulo[b])
+        rotulo = rotulo.copy()
+        np.minimum.at(rotulo, a, menor)
+        np.minimum.at(rotulo, b, menor)
+        rotulo = rotulo[rotulo]
+        if np.array_equal(rotulo, anterior):
+            break
+
+    _, compacto = np.unique(rotulo, return_inverse=True)
+    rotulos = np.zeros(plano.size, dtype=np.int32)
+    rotulos[plano] = compacto[corrida.ravel()[plano]] + 1
+    return rotulos.reshape(linhas, colunas), int(compacto.max()) + 1
+
+
+def rasterizar_janela(geometrias: Iterable, min_x: float, min_y: float, resolucao: float,
+                      linhas: int, colunas: int) -> Optional[Tuple[int, int, np.ndarray]]:
+    """
+    Preenchimento por linhas de varredura de uma grade com origem (min_x,
+    min_y), células de lado `resolucao` e linha 0 embaixo. Calculado
+    diretamente sobre as arestas dos anéis (regra par-ímpar, o que trata os
+    furos), sem operações de sobreposição do GEOS, e só sobre a janela de
+    células atingidas: retorna (linha inicial, coluna inicial, máscara da
+    janela das células cujo centro está dentro de alguma geometria) ou None.
+    """
+    geoms = np.asarray(list(geometrias), dtype=object)
+    poligonos = shapely.get_parts(geoms) if len(geoms) else geoms
+    if len(poligonos) == 0:
+        return None
+    poligonos = poligonos[shapely.get_type_id(poligonos) == 3]
+    if len(poligonos) == 0:
+        return None
+
+    # Arestas de todos os anéis, com o polígono de origem de cada uma
+    aneis, dono_anel = shapely.get_rings(poligonos, return_index=True)
+    coords, anel = shapely.get_coordinates(aneis, return_index=True)
+    mesma = anel[1:] == anel[:-1]
+    x0, y0 = coords[:-1][mesma].T
+    x1, y1 = coords[1:][mesma].T
+    dono = dono_anel[anel[:-1][mesma]]
+
+    # Linhas da grade cujo centro fica no intervalo semiaberto [y_min, y_max) da aresta
+    y_min, y_max = np.minimum(y0, y1), np.maximum(y0, y1)
+    linha_ini = np.clip(np.ceil((y_min - min_y) / resolucao - 0.5), 0, linhas).astype(np.int64)
+    linha_fim = np.clip(np.ceil((y_max - min_y) / resolucao - 0.5), 0, linhas).astype(np.int64)
+    quantidades = linha_fim - linha_ini
+    if quantidades.sum() == 0:
+        return None
+
+    aresta = np.repeat(np.arange(len(x0)), quantidades)
+    deslocamento = np.arange(len(aresta)) - np.repeat(np.cumsum(quantidades) - quantidades, quantidades)
+    linha = linha_ini[aresta] + deslocamento
+    y = min_y + (linha + 0.5) * resolucao
+    x = x0[aresta] + (y - y0[aresta]) * (x1[aresta] - x0[aresta]) / (y1[aresta] - y0[aresta])
+
+    # Cada (polígono, linha) tem um número par de cruzamentos: ordenados,
+    # os pares consecutivos delimitam os trechos internos
+    ordem = np.lexsort((x, linha, dono[aresta]))
+    linha, x = linha[ordem], x[ordem]
+    linha_seg = linha[0::2]
+    col_ini = np.clip(np.ceil((x[0::2] - min_x) / resolucao - 0.5), 0, colunas).astype(np.int64)
+    col_fim = np.clip(np.floor((x[1::2] - min_x) / resolucao - 0.5), -1, colunas - 1).astype(np.int64)
+    validos = col_fim >= col_ini
+    if not validos.any():
+        return None
+    linha_seg, col_ini, col_fim = linha_seg[validos], col_ini[validos], col_fim[validos]
+
+    # Preenchimento das faixas por vetor de diferenças acumuladas, na janela atingida
+    linha0, coluna0 = int(linha_seg.min()), int(col_ini.min())
+    altura, largura = int(linha_seg.max()) - linha0 + 1, int(col_fim.max()) - coluna0 + 1
+    diferencas = np.zeros((altura, largura + 1), dtype=np.int32)
+    np.add.at(diferencas, (linha_seg - linha0, col_ini - coluna0), 1)
+    np.add.at(diferencas, (linha_seg - linha0, col_fim + 1 - coluna0), -1)
+    return linha0, coluna0, np.cumsum(diferencas[:, :-1], axis=1) > 0
+
+
+class GradeOcupacao:
+    """
+    Grade de ocupação (bitmap NumPy) de uma área de projeto.
+
+    As geometrias aceitas (ruas, lotes...) são rasterizadas por linhas de
+    varredura à medida que são marcadas, e também guardadas em um índice
+    incremental. Consultas de espaço livre rotulam os componentes conexos da
+    grade e só executam as operações vetoriais exatas dentro das caixas dos
+    componentes candidatos, em vez de unir todas as geometrias do projeto.
+    """
+
+    def __init__(self, area: Polygon, resolucao: float = 1.0):
+        self.area = area
+        self.resolucao = max(resolucao, 1e-3)
+        self.min_x, self.min_y, max_x, max_y = area.bounds
+        self.colunas = max(int(math.ceil((max_x - self.min_x) / self.resolucao)), 1)
+        self.linhas = max(int(math.ceil((max_y - self.min_y) / self.resolucao)), 1)
+        self.indice = IndiceEspacialIncremental(max(self.resolucao * 16, 20.0))
+        self.ocupada = ~self._rasterizar([area])
+
+    def _rasterizar(self, geometrias: Iterable) -> np.ndarray:
+        """
+        Máscara das células cujo centro está dentro de alguma das geometrias.
+
+        Preenchimento por linhas de varredura calculado diretamente sobre as
+        arestas dos anéis (regra par-ímpar, o que trata os furos), sem
+        operações de sobreposição do GEOS.
+        """
+        mascara = np.zeros((self.linhas, self.colunas), dtype=bool)
+        janela = self._rasterizar_janela(geometrias)
+        if janela is not None:
+            linha0, coluna0, parcial = janela
+            mascara[linha0:linha0 + parcial.shape[0], coluna0:coluna0 + parcial.shape[1]] = parcial
+        return mascara
+
+    def _rasterizar_janela(self, geometrias: Iterable) -> Optional[Tuple[int, int, np.ndarray]]:
+        """
+        Igual a `_rasterizar`, mas só sobre a janela de células atingidas:
+        retorna (linha inicial, coluna inicial, máscara da janela) ou None.
+        Marcar um lote não percorre a grade inteira.
+        """
+        return rasterizar_janela(geometrias, self.min_x, self.min_y, self.resolucao, self.linhas, self.colunas)
+
+    def marcar(self, geometrias: Iterable):
+        """Marca geometrias aceitas como ocupadas (grade e índice espacial)."""
+        geometrias = [g for g in geometrias if g is not None and not g.is_empty]
+        if not geometrias:
+            return
+        janela = self._rasterizar_janela(geometrias)
+        if janela is not None:
+            linha0, coluna0, parcial = janela
+            self.ocupada[linha0:linha0 + parcial.shape[0], coluna0:coluna0 + parcial.shape[1]] |= parcial
+        for geometria in geometrias:
+            self.indice.inserir(geometria)
+
+    def area_livre_aproximada(self) -> float:
+        return float((~self.ocupada).sum()) * self.resolucao ** 2
+
+    def regioes_livres(self, area_minima: float) -> List[Tuple[Tuple[float, float, float, float], float]]:
+        """
+        Regiões livres conexas com área aproximada (contagem de células) de pelo
+        menos `area_minima`. Retorna (caixa envolvente, área aproximada) de cada uma.
+        """
+        livre = ~self.ocupada
+
+        # Dilatação 3x3 antes da rotulação: partes da mesma região ligadas por
+        # gargalos mais finos que uma célula continuam no mesmo componente
+        dilatada = livre.copy()
+        dilatada[1:] |= livre[:-1]
+        dilatada[:-1] |= livre[1:]
+        horizontal = dilatada.copy()
+        dilatada[:, 1:] |= horizontal[:, :-1]
+        dilatada[:, :-1] |= horizontal[:, 1:]
+
+        rotulos, n = rotular_componentes(dilatada)
+        if n == 0:
+            return []
+
+        linhas, colunas = np.nonzero(rotulos * livre)
+        ids = rotulos[linhas, colunas] - 1
+        areas = np.bincount(ids, minlength=n) * self.resolucao ** 2
+
+        caixas = np.empty((n, 4), dtype=np.int64)
+        caixas[:, 0:2] = np.iinfo(np.int64).max
+        caixas[:, 2:4] = -1
+        np.minimum.at(caixas[:, 0], ids, colunas)
+        np.minimum.at(caixas[:, 1], ids, linhas)
+        np.maximum.at(caixas[:, 2], ids, colunas)
+        np.maximum.at(caixas[:, 3], ids, linhas)
+
+        r = self.resolucao
+        regioes = []
+        for k in np.nonzero(areas >= area_minima)[0]:
+            c0, l0, c1, l1 = caixas[k]
+            regioes.append(((self.min_x + c0 * r, self.min_y + l0 * r,
+                             self.min_x + (c1 + 1) * r, self.min_y + (l1 + 1) * r), float(areas[k])))
+        return regioes
+
+    def areas_livres(self, area_minima: float) -> List[Polygon]:
+        """
+        Polígonos exatos de espaço livre com área >= `area_minima`.
+
+        A grade seleciona os componentes candidatos (com folga para o erro de
+        rasterização); a diferença vetorial é feita só dentro das caixas deles,
+        contra as geometrias ocupadas que o índice encontra ali. Trechos livres
+        mais finos que uma célula (frestas entre lotes) não formam candidatos e
+        ficam de fora; a resolução da grade controla esse limite.
+        """
+        regioes = self.regioes_livres(area_minima * 0.5)
+        if not regioes:
+            return []
+
+        margem = 2 * self.resolucao
+        janela = unary_union([box(x0 - margem, y0 - margem, x1 + margem, y1 + margem)
+                              for (x0, y0, x1, y1), _ in regioes])
+
+        base = self.area.intersection(janela)
+        ocupadas = self._ocupadas_em(janela)
+        if len(ocupadas):
+            base = base.difference(unary_union(ocupadas))
+
+        return [p for p in shapely.get_parts(base) if isinstance(p, Polygon) and p.area >= area_minima]
+
+    def _ocupadas_em(self, janela) -> np.ndarray:
+        """Geometrias ocupadas que intersectam a janela (grade hash + teste exato)."""
+        ids = self.indice.consultar(janela)
+        if not ids:
+            return np.empty(0, dtype=object)
+        ocupadas = np.array([self.indice.geometrias[i] for i in ids], dtype=object)
+        return ocupadas[shapely.intersects(ocupadas, janela)]
@@ -0,0 +1,210 @@
+import csv
+import fnmatch
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import ezdxf
+import geopandas as gpd
+from shapely.geometry import Polygon
+
+from loteamento_perfil import executar_com_perfil, perfil_ativo
+from loteamento_processor_ultra_avancado import LoteamentoProcessorUltraAvancado
+from loteamento_transporte import criar_executor, desempacotar_resultado, empacotar_resultado
+
+# Prefixo de layer por gleba: 64 caracteres menos o maior nome de layer do processador ('_MALHA_VIARIA')
+TAMANHO_PREFIXO_LAYER = 64 - len('_MALHA_VIARIA')
+
+
+def _fechada(pontos: List) -> bool:
+    return len(pontos) >= 3 and tuple(pontos[0][:2]) == tuple(pontos[-1][:2])
+
+
+def _filtrar(nome: str, camada: str, camadas: Optional[Sequence[str]], filtro_nome: Optional[str]) -> bool:
+    if camadas and camada not in camadas:
+        return False
+    if filtro_nome and not fnmatch.fnmatch(nome, filtro_nome):
+        return False
+    return True
+
+
+def _carregar_parcelas_dxf(arquivo_path: str, camadas, filtro_nome) -> List[Dict[str, Any]]:
+    doc = ezdxf.readfile(arquivo_path)
+    parcelas = []
+    for entity in doc.modelspace():
+        if entity.dxftype() == 'LWPOLYLINE':
+            pontos = [(p[0], p[1], p[2]) for p in entity.get_points('xyb')]
+            fechada = entity.closed or _fechada(pontos)
+        elif entity.dxftype() == 'POLYLINE':
+            pontos = [(v.dxf.location[0], v.dxf.location[1], v.dxf.get('bulge', 0.0)) for v in entity.vertices]
+            fechada = entity.is_closed or _fechada(pontos)
+        else:
+            continue
+
+        if not fechada or len(pontos) < 3:
+            continue
+        if _fechada(pontos):
+            pontos = pontos[:-1]
+
+        camada = entity.dxf.layer
+        nome = f"{camada}_{entity.dxf.handle}"
+        if _filtrar(nome, camada, camadas, filtro_nome):
+            parcelas.append({'nome': nome, 'camada': camada, 'pontos': pontos})
+    return parcelas
+
+
+def _carregar_parcelas_kml(arquivo_path: str, camadas, filtro_nome) -> List[Dict[str, Any]]:
+    gdf = gpd.read_file(arquivo_path)
+    coluna_nome = next((c for c in ('Name', 'name', 'NOME', 'nome') if c in gdf.columns), None)
+    parcelas = []
+    for i, linha in gdf.iterrows():
+        nome_base = str(linha[coluna_nome]) if coluna_nome and linha[coluna_nome] else f"PARCELA_{i + 1}"
+        geometria = linha.geometry
+        poligonos = [geometria] if isinstance(geometria, Polygon) else \
+            [g for g in getattr(geometria, 'geoms', []) if isinstance(g, Polygon)]
+        for j, poligono in enumerate(poligonos):
+            nome = nome_base if len(poligonos) == 1 else f"{nome_base}_{j + 1}"
+            if _filtrar(nome, 'KML', camadas, filtro_nome):
+                pontos = [(x, y, 0.0) for x, y, *_ in poligono.exterior.coords[:-1]]
+                parcelas.append({'nome': nome, 'camada': 'KML', 'pontos': pontos})
+    return parcelas
+
+
+def carregar_parcelas(arquivo_path: str, camadas: Optional[Sequence[str]] = None,
+                      filtro_nome: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Carrega todas as glebas (polígonos fechados) de um DXF ou KML.
+
+    - camadas: lista de layers DXF aceitos (None = todos);
+    - filtro_nome: padrão estilo shell (ex.: 'LOTEAMENTO_*') aplicado ao nome da
+      gleba, que é '<layer>_<handle>' no DXF e o campo Name no KML.
+
+    Cada gleba é {'nome', 'camada', 'pontos'}, com pontos (x, y, bulge).
+    """
+    if arquivo_path.lower().endswith('.dxf'):
+        return _carregar_parcelas_dxf(arquivo_path, camadas, filtro_nome)
+    elif arquivo_path.lower().endswith('.kml'):
+        return _carregar_parcelas_kml(arquivo_path, camadas, filtro_nome)
+    raise ValueError(f"Formato de arquivo não suportado: {arquivo_path}")
+
+
+def _processar_parcela(parametros: Dict, parcela: Dict[str, Any]):
+    """Processa uma gleba em um worker; retorna o processador (sem estruturas auxiliares) e as estatísticas."""
+    processador = LoteamentoProcessorUltraAvancado(dict(parametros))
+    resultado = processador.processar_perimetro(parcela['pontos'])
+
+    # Estruturas de apoio não precisam voltar ao processo principal, e as
+    # camadas ficam compactadas até a gravação do DXF combinado
+    processador.grade_ocupacao = None
+    processador.cache_quadras = None
+    if resultado['sucesso']:
+        processador.compactar_camadas()
+    return processador, resultado
+
+
+def _processar_parcela_compartilhada(parametros: Dict, parcela: Dict[str, Any]):
+    """_processar_parcela em um worker: o estado do processador volta pela memória compartilhada."""
+    processador, resultado = _processar_parcela(parametros, parcela)
+    return empacotar_resultado(vars(processador)), resultado
+
+
+def _receber_parcela(parametros: Dict, estado: Dict[str, Any]) -> LoteamentoProcessorUltraAvancado:
+    processador = LoteamentoProcessorUltraAvancado(dict(parametros))
+    vars(processador).update(desempacotar_resultado(estado))
+    return processador
+
+
+def _nome_layer(nome: str, usados: Set[str]) -> str:
+    """
+    Nome de gleba seguro para uso como prefixo de layer DXF e único entre as
+    glebas do arquivo: nomes repetidos, ou que ficam iguais depois de
+    sanitizados ('Gleba 1' e 'Gleba_1'), recebem '_2', '_3', ... O prefixo é
+    truncado para que '<prefixo>_MALHA_VIARIA' caiba em 64 caracteres.
+    """
+    base = re.sub(r'[^A-Za-z0-9_-]', '_', nome).upper()[:TAMANHO_PREFIXO_LAYER]
+    prefixo, numero = base, 1
+    while prefixo in usados:
+        numero += 1
+        sufixo = f"_{numero}"
+        prefixo = base[:TAMANHO_PREFIXO_LAYER - len(sufixo)] + sufixo
+    usados.add(prefixo)
+    return prefixo
+
+
+def _gravar_estatisticas_csv(arquivo_csv: str, estatisticas: List[Dict[str, Any]]):
+    campos = ['parcela', 'prefixo_layer', 'sucesso', 'area_total', 'num_lotes', 'area_lotes', 'area_ruas',
+              'area_calcadas', 'area_verde', 'area_institucional', 'lotes_esquina']
+    with open(arquivo_csv, 'w', newline='', encoding='utf-8') as arquivo:
+        escritor = csv.DictWriter(arquivo, fieldnames=campos, extrasaction='ignore')
+        escritor.writeheader()
+        for linha in estatisticas:
+            escritor.writerow(linha)
+
+
+def processar_multiparcelas(arquivo_entrada: str, arquivo_saida: str, parametros: Dict,
+                            camadas: Optional[Sequence[str]] = None, filtro_nome: Optional[str] = None,
+                            max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Modo de múltiplas glebas: carrega todos os polígonos fechados do arquivo,
+    processa as glebas em paralelo (um processo por gleba, até `max_workers`)
+    e grava um único DXF com layers por gleba ('<GLEBA>_LOTES', ...), além de
+    um CSV com as estatísticas de cada gleba ao lado do DXF.
+    
+    Com o perfil ativo (parametros['perfil'] ou LOTEAMENTO_PERFIL), as glebas
+    são processadas no processo principal, para que o perfil cubra todo o
+    trabalho, e o resultado traz a chave 'perfil' (ver loteamento_perfil).
+    """
+    if perfil_ativo(parametros):
+        return executar_com_perfil(_processar_multiparcelas, arquivo_saida, parametros, arquivo_entrada,
+                                   arquivo_saida, parametros, camadas, filtro_nome, max_workers=1)
+    return _processar_multiparcelas(arquivo_entrada, arquivo_saida, parametros, camadas, filtro_nome, max_workers)
+
+
+def _processar_multiparcelas(arquivo_entrada: str, arquivo_saida: str, parametros: Dict,
+                             camadas: Optional[Sequence[str]], filtro_nome: Optional[str],
+                             max_workers: Optional[int]) -> Dict[str, Any]:
+    try:
+        print("=== PROCESSAMENTO DE MÚLTIPLAS GLEBAS ===")
+        parcelas = carregar_parcelas(arquivo_entrada, camadas, filtro_nome)
+        print(f"Glebas encontradas: {len(parcelas)}")
+        if not parcelas:
+            return {'sucesso': False, 'erro': 'Nenhuma gleba fechada encontrada'}
+
+        max_workers = max_workers or parametros.get('num_workers') or os.cpu_count() or 1
+        if max_workers > 1 and len(parcelas) > 1:
+            with criar_executor(min(max_workers, len(parcelas))) as executor:
+                resultados = [(_receber_parcela(parametros, estado), resultado) for estado, resultado in
+                              executor.map(_processar_parcela_compartilhada, [parametros] * len(parcelas), parcelas)]
+        else:
+            resultados = [_processar_parcela(parametros, parcela) for parcela in parcelas]
+
+        doc = ezdxf.new('R2010')
+        estatisticas = []
+        prefixos_usados: Set[str] = set()
+        for parcela, (processador, resultado) in zip(parcelas, resultados):
+            prefixo = _nome_layer(parcela['nome'], prefixos_usados)
+            if resultado['sucesso']:
+                processador.adicionar_ao_dxf(doc, prefixo=prefixo + '_')
+            estatisticas.append({'parcela': parcela['nome'], 'prefixo_layer': prefixo, **resultado})
+            print(f"  {parcela['nome']}: {resultado.get('num_lotes', 0)} lotes")
+
+        doc.saveas(arquivo_saida)
+        arquivo_csv = os.path.splitext(arquivo_saida)[0] + '_glebas.csv'
+        _gravar_estatisticas_csv(arquivo_csv, estatisticas)
+        print(f"Arquivo DXF combinado salvo: {arquivo_saida}")
+
+        sucesso = [e for e in estatisticas if e['sucesso']]
+        return {
+            'sucesso': bool(sucesso),
+            'num_glebas': len(parcelas),
+            'glebas_com_erro': len(parcelas) - len(sucesso),
+            'num_lotes': sum(e['num_lotes'] for e in sucesso),
+            'area_lotes': sum(e['area_lotes'] for e in sucesso),
+            'area_total': sum(e['area_total'] for e in sucesso),
+            'estatisticas_glebas': estatisticas,
+            'arquivo_estatisticas': arquivo_csv,
+        }
+
+    except Exception as e:
+        print(f"Erro no processamento de múltiplas glebas: {e}")
+        return {'sucesso': False, 'erro': str(e)}
@@ -0,0 +1,354 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon, LineString, Point
+
+from loteamento_transporte import desempacotar_geometrias, empacotar_geometrias
+
+
+def _partes_poligonais(geometrias, area_minima_parte: float = 1e-6) -> List[Polygon]:
+    """Explode geometrias (Multi/GeometryCollection) em polígonos não vazios."""
+    partes = shapely.get_parts(np.asarray(geometrias, dtype=object).ravel())
+    if len(partes) == 0:
+        return []
+    mascara = (shapely.get_type_id(partes) == 3) & (shapely.area(partes) > area_minima_parte)
+    return list(partes[mascara])
+
+
+def posicoes_de_corte_por_area(geometrias: np.ndarray, limites: np.ndarray, eixo: np.ndarray,
+                               areas_alvo: np.ndarray, tolerancia: float = 0.01,
+                               max_iteracoes: int = 40) -> np.ndarray:
+    """
+    Encontra, por bisseção vetorizada, a coordenada de corte que deixa
+    `areas_alvo` à esquerda (eixo 0) ou abaixo (eixo 1) de cada geometria.
+    """
+    eixo_x = eixo == 0
+    lo = np.where(eixo_x, limites[:, 0], limites[:, 1]).astype(float)
+    hi = np.where(eixo_x, limites[:, 2], limites[:, 3]).astype(float)
+
+    for _ in range(max_iteracoes):
+        if np.all(hi - lo <= tolerancia):
+            break
+        meio = (lo + hi) / 2
+        caixas = shapely.box(
+            limites[:, 0],
+            limites[:, 1],
+            np.where(eixo_x, meio, limites[:, 2]),
+            np.where(eixo_x, limites[:, 3], meio),
+        )
+        areas = shapely.area(shapely.intersection(geometrias, caixas))
+        abaixo = areas < areas_alvo
+        lo = np.where(abaixo, meio, lo)
+        hi = np.where(abaixo, hi, meio)
+
+    return (lo + hi) / 2
+
+
+def _cortar_nivel(geometrias: np.ndarray, area_minima: float) -> List[Polygon]:
+    """
+    Corta um nível inteiro da fronteira BSP de uma vez.
+
+    Cada peça é dividida perpendicularmente ao seu maior lado, numa posição
+    que separa um número inteiro de lotes de área mínima de cada lado.
+    """
+    limites = shapely.bounds(geometrias)
+    largura = limites[:, 2] - limites[:, 0]
+    altura = limites[:, 3] - limites[:, 1]
+    eixo = np.where(largura >= altura, 0, 1)
+
+    areas = shapely.area(geometrias)
+    num_lotes = np.floor(areas / area_minima)
+    areas_alvo = areas * np.floor(num_lotes / 2) / num_lotes
+
+    corte = posicoes_de_corte_por_area(geometrias, limites, eixo, areas_alvo)
+
+    eixo_x = eixo == 0
+    caixa_a = shapely.box(
+        limites[:, 0], limites[:, 1],
+        np.where(eixo_x, corte, limites[:, 2]),
+        np.where(eixo_x, limites[:, 3], corte),
+    )
+    caixa_b = shapely.box(
+        np.where(eixo_x, corte, limites[:, 0]),
+        np.where(eixo_x, limites[:, 1], corte),
+        limites[:, 2], limites[:, 3],
+    )
+
+    metades = np.concatenate([
+        shapely.intersection(geometrias, caixa_a),
+        shapely.intersection(geometrias, caixa_b),
+    ])
+    return _partes_poligonais(metades)
+
+
+def _cortar_nivel_compartilhado(pacote, area_minima: float):
+    """_cortar_nivel em um worker de processo: peças e resultado trafegam pela memória compartilhada."""
+    return empacotar_geometrias(_cortar_nivel(desempacotar_geometrias(pacote), area_minima))
+
+
+def dividir_bsp(area: Polygon, area_minima: float, testada_minima: float = 0.0,
+                profundidade_maxima: Optional[int] = None, executor=None,
+                tamanho_lote_tarefas: int = 256) -> List[Polygon]:
+    """
+    Particionamento binário do espaço (BSP) iterativo e balanceado por área.
+
+    A fronteira de peças é processada nível a nível, com todos os cortes de um
+    nível calculados em lote pelas funções vetorizadas do shapely. Os cortes
+    miram múltiplos inteiros de `area_minima`, de modo que cada folha termina
+    com área entre `area_minima` e `2 * area_minima`.
+
+    Guardas de custo:
+    - `profundidade_maxima` limita o número de níveis (padrão: log2 do número
+      de lotes esperado mais uma folga);
+    - peças cujo corte geraria faixas mais estreitas que `testada_minima`
+      (lascas) são aceitas como estão em vez de serem cortadas de novo.
+
+    Se `executor` for informado (ThreadPoolExecutor ou ProcessPoolExecutor),
+    cada nível é repartido em blocos de `tamanho_lote_tarefas` peças e
+    distribuído entre os workers. Com ProcessPoolExecutor os blocos vão e
+    voltam pela memória compartilhada (loteamento_transporte), sem pickle
+    das geometrias.
+    """
+    if area is None or area.is_empty or area_minima <= 0:
+        return []
+
+    if profundidade_maxima is None:
+        lotes_esperados = max(1.0, area.area / area_minima)
+        profundidade_maxima = int(math.ceil(math.log2(lotes_esperados))) + 4
+
+    lotes = []
+    fronteira = [p for p in _partes_poligonais([area]) if p.area >= area_minima]
+    nivel = 0
+
+    while fronteira:
+        geometrias = np.array(fronteira, dtype=object)
+        areas = shapely.area(geometrias)
+        limites = shapely.bounds(geometrias)
+        extensao = np.maximum(limites[:, 2] - limites[:, 0], limites[:, 3] - limites[:, 1])
+        num_lotes = np.floor(areas / area_minima)
+
+        dividir = num_lotes >= 2
+        if nivel >= profundidade_maxima:
+            dividir[:] = False
+        elif testada_minima > 0:
+            # Largura da menor faixa resultante ao longo do eixo de corte
+            faixa = extensao * np.floor(num_lotes / 2) / np.maximum(num_lotes, 1)
+            dividir &= faixa >= testada_minima
+
+        lotes.extend(geometrias[~dividir & (areas >= area_minima)])
+
+        a_cortar = geometrias[dividir]
+        if len(a_cortar) == 0:
+            break
+
+        if executor is not None and len(a_cortar) > tamanho_lote_tarefas:
+            blocos = [a_cortar[i:i + tamanho_lote_tarefas]
+                      for i in range(0, len(a_cortar), tamanho_lote_tarefas)]
+            if isinstance(executor, ProcessPoolExecutor):
+                pacotes = executor.map(_cortar_nivel_compartilhado, [empacotar_geometrias(b) for b in blocos],
+                                       [area_minima] * len(blocos))
+                resultados = [desempacotar_geometrias(pacote) for pacote in pacotes]
+            else:
+                resultados = executor.map(_cortar_nivel, blocos, [area_minima] * len(blocos))
+            novas = [peca for resultado in resultados for peca in resultado]
+        else:
+            novas = _cortar_nivel(a_cortar, area_minima)
+
+        fronteira = [p for p in novas if p.area >= area_minima]
+        nivel += 1
+
+    return list(lotes)
+
+
+def angulo_eixo_principal(area: Polygon) -> float:
+    """
+    Ângulo (em graus) do eixo principal da área, definido pelo maior lado do
+    retângulo mínimo rotacionado.
+    """
+    retangulo = shapely.minimum_rotated_rectangle(area)
+    coords = shapely.get_coordinates(retangulo)
+    if len(coords) < 3:
+        return 0.0
+
+    lado_a = coords[1] - coords[0]
+    lado_b = coords[2] - coords[1]
+    lado = lado_a if np.hypot(*lado_a) >= np.hypot(*lado_b) else lado_b
+    return math.degrees(math.atan2(lado[1], lado[0]))
+
+
+def fatiar_em_faixas(area: Polygon, passo: float, angulo: float = 0.0) -> List[Polygon]:
+    """
+    Fatia a área em faixas de largura aproximadamente igual a `passo`,
+    transversais à direção `angulo` (em graus).
+
+    Todas as faixas são geradas de uma vez como um array de retângulos no
+    referencial rotacionado e recortadas com uma única chamada vetorizada a
+    `shapely.intersection`. A largura efetiva é ajustada para dividir a
+    extensão da área em um número inteiro de faixas.
+    """
+    if area is None or area.is_empty or passo <= 0:
+        return []
+
+    theta = math.radians(angulo)
+    eixo_u = np.array([math.cos(theta), math.sin(theta)])
+    eixo_v = np.array([-math.sin(theta), math.cos(theta)])
+
+    coords = shapely.get_coordinates(area)
+    s = coords @ eixo_u
+    t = coords @ eixo_v
+    s_min, s_max = s.min(), s.max()
+    t_min, t_max = t.min(), t.max()
+
+    num_faixas = max(1, int((s_max - s_min) / passo))
+    bordas = np.linspace(s_min, s_max, num_faixas + 1)
+    inicio, fim = bordas[:-1], bordas[1:]
+
+    # Cantos (s, t) de cada faixa convertidos de volta para (x, y)
+    cantos_s = np.stack([inicio, fim, fim, inicio], axis=1)
+    cantos_t = np.broadcast_to(np.array([t_min, t_min, t_max, t_max]), cantos_s.shape)
+    aneis = (cantos_s[..., None] * eixo_u) + (cantos_t[..., None] * eixo_v)
+
+    faixas = shapely.polygons(aneis)
+    return _partes_poligonais(shapely.intersection(faixas, area))
+
+
+def orientar_borda_para_dentro(area: Polygon, borda: LineString) -> LineString:
+    """
+    Retorna a borda orientada de modo que sua normal à esquerda aponte para
+    dentro da área.
+    """
+    coords = list(borda.coords)
+    (x0, y0), (x1, y1) = coords[0], coords[-1]
+    comprimento = math.hypot(x1 - x0, y1 - y0)
+    if comprimento == 0:
+        return borda
+
+    passo = min(0.5, comprimento * 0.01)
+    meio_x, meio_y = (x0 + x1) / 2, (y0 + y1) / 2
+    normal_x, normal_y = -(y1 - y0) / comprimento, (x1 - x0) / comprimento
+
+    if area.contains(Point(meio_x + normal_x * passo, meio_y + normal_y * passo)):
+        return borda
+    return LineString(coords[::-1])
+
+
+def profundidades_ao_longo_da_borda(area: Polygon, borda: LineString, resolucao: float,
+                                    profundidade_maxima: float) -> np.ndarray:
+    """
+    Profundidade disponível em cada posição discretizada da borda.
+
+    Lança, de uma só vez, um raio perpendicular (normal à esquerda) a partir do
+    centro de cada célula de largura `resolucao` e mede o trecho do raio dentro
+    da área que parte da própria borda.
+    """
+    coords = np.asarray(borda.coords)
+    inicio, fim = coords[0], coords[-1]
+    comprimento = float(np.hypot(*(fim - inicio)))
+    num_celulas = int(comprimento // resolucao)
+    if num_celulas == 0:
+        return np.zeros(0)
+
+    direcao = (fim - inicio) / comprimento
+    normal = np.array([-direcao[1], direcao[0]])
+
+    distancias = (np.arange(num_celulas) + 0.5) * resolucao
+    origens = inicio + distancias[:, None] * direcao
+    extremos = origens + normal * profundidade_maxima
+
+    raios = shapely.linestrings(np.stack([origens, extremos], axis=1))
+    trechos, indices = shapely.get_parts(shapely.intersection(raios, area), return_index=True)
+
+    # Apenas o trecho conectado à borda conta como profundidade útil
+    conectados = shapely.distance(trechos, shapely.points(origens[indices])) < 1e-6
+    profundidades = np.zeros(num_celulas)
+    np.maximum.at(profundidades, indices[conectados], shapely.length(trechos[conectados]))
+    return profundidades
+
+
+def otimizar_testadas(profundidades: np.ndarray, resolucao: float, testada_minima: float,
+                      testada_maxima: float, area_minima: float, profundidade_minima: float = 0.0,
+                      profundidade_maxima: float = math.inf,
+                      objetivo: str = 'Máximo Aproveitamento',
+                      testada_preferencial: Optional[float] = None) -> List[Tuple[float, float, float]]:
+    """
+    Particiona uma borda em testadas dentro de [testada_minima, testada_maxima]
+    por programação dinâmica sobre as posições discretizadas.
+
+    A profundidade de cada lote candidato é a menor profundidade disponível
+    sob sua testada (limitada a `profundidade_maxima`); candidatos abaixo de
+    `profundidade_minima` ou de `area_minima` são descartados. O objetivo segue
+    `prioridade_aproveitamento`:
+    - 'Máximo Aproveitamento': maior área total, com desempate por mais lotes;
+    - 'Lotes Grandes': maior área total, com desempate por menos lotes;
+    - 'Lotes Regulares': mais lotes, penalizando desvios da testada preferencial;
+    - demais valores ('Lotes Pequenos'): maior número de lotes.
+
+    Custo O(N x K), com N = comprimento / resolucao e K = opções de testada.
+    Retorna tuplas (inicio, fim, profundidade) em metros ao longo da borda.
+    """
+    num_celulas = len(profundidades)
+    k_min = max(1, int(math.ceil(testada_minima / resolucao - 1e-9)))
+    k_max = min(num_celulas, int(math.floor(testada_maxima / resolucao + 1e-9)))
+    if num_celulas == 0 or k_max < k_min:
+        return []
+
+    # Menor profundidade em cada janela [i, i + k) para todas as larguras k
+    opcoes = np.arange(k_min, k_max + 1)
+    valores = np.full((len(opcoes), num_celulas), -np.inf)
+    profundidade_janela = np.full((len(opcoes), num_celulas), 0.0)
+    minimo = profundidades.copy()
+    for k in range(1, k_max + 1):
+        if k > 1:
+            minimo = np.minimum(minimo[:-1], profundidades[k - 1:])
+        if k < k_min:
+            continue
+
+        linha = k - k_min
+        largura = k * resolucao
+        prof_lote = np.minimum(minimo, profundidade_maxima)
+        area_lote = largura * prof_lote
+        validos = (prof_lote >= profundidade_minima) & (area_lote >= area_minima)
+
+        if objetivo == 'Máximo Aproveitamento':
+            valor = area_lote + 1e-3
+        elif objetivo == 'Lotes Grandes':
+            valor = area_lote - 1e-3
+        elif objetivo == 'Lotes Regulares' and testada_preferencial:
+            valor = np.full_like(area_lote, 1.0 - 0.5 * abs(largura - testada_preferencial) / testada_preferencial)
+        else:
+            valor = np.ones_like(area_lote)
+
+        inicio_valido = len(minimo)
+        valores[linha, :inicio_valido] = np.where(validos, valor, -np.inf)
+        profundidade_janela[linha, :inicio_valido] = prof_lote
+
+    melhor = np.zeros(num_celulas + 1)
+    escolha = np.zeros(num_celulas + 1, dtype=int)  # 0 = pular célula
+    for j in range(1, num_celulas + 1):
+        melhor[j] = melhor[j - 1]
+        inicios = j - opcoes
+        possiveis = inicios >= 0
+        if not possiveis.any():
+            continue
+        linhas = np.nonzero(possiveis)[0]
+        candidatos = melhor[inicios[linhas]] + valores[linhas, inicios[linhas]]
+        idx = int(np.argmax(candidatos))
+        if candidatos[idx] > melhor[j]:
+            melhor[j] = candidatos[idx]
+            escolha[j] = opcoes[linhas[idx]]
+
+    segmentos = []
+    j = num_celulas
+    while j > 0:
+        k = escolha[j]
+        if k == 0:
+            j -= 1
+            continue
+        i = j - k
+        segmentos.append((i * resolucao, j * resolucao, float(profundidade_janela[k - k_min, i])))
+        j = i
+
+    return segmentos[::-1]
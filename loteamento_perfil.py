@@ -0,0 +1,140 @@
+import cProfile
+import functools
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+# Variável de ambiente que liga o perfil em qualquer processador (ex.: LOTEAMENTO_PERFIL=1)
+VARIAVEL_PERFIL = 'LOTEAMENTO_PERFIL'
+
+
+def perfil_ativo(parametros: Dict = None) -> bool:
+    """O perfil está ligado por parametros['perfil'] ou pela variável de ambiente LOTEAMENTO_PERFIL."""
+    if parametros and parametros.get('perfil'):
+        return True
+    return os.environ.get(VARIAVEL_PERFIL, '').strip().lower() in ('1', 'true', 'sim', 'yes', 'on')
+
+
+class AmostradorPilhas:
+    """
+    Profiler por amostragem: uma thread lê periodicamente a pilha da thread
+    observada (sys._current_frames) e conta as pilhas colapsadas
+    ('modulo:funcao;modulo:funcao;...'), no formato usado por flame graphs.
+    """
+
+    def __init__(self, intervalo: float = 0.005):
+        self.intervalo = intervalo
+        self.pilhas = Counter()
+        self._alvo = None
+        self._parar = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _colapsar(frame) -> str:
+        nomes = []
+        while frame is not None:
+            codigo = frame.f_code
+            nomes.append(f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}")
+            frame = frame.f_back
+        return ';'.join(reversed(nomes))
+
+    def _amostrar(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self._alvo)
+            if frame is not None:
+                self.pilhas[self._colapsar(frame)] += 1
+
+    def iniciar(self):
+        self._alvo = threading.get_ident()
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._amostrar, daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def gravar(self, arquivo: str):
+        with open(arquivo, 'w', encoding='utf-8') as saida:
+            for pilha, amostras in self.pilhas.most_common():
+                saida.write(f"{pilha} {amostras}\n")
+
+
+def funcoes_mais_custosas(estatisticas: pstats.Stats, limite: int = 25) -> List[Dict[str, Any]]:
+    """Lista das funções com maior tempo próprio (tottime), a partir das estatísticas do cProfile."""
+    linhas = []
+    for (arquivo, linha, nome), (_, chamadas, tempo_proprio, tempo_acumulado, _) in estatisticas.stats.items():
+        linhas.append({
+            'funcao': f"{os.path.basename(arquivo)}:{linha}({nome})",
+            'chamadas': chamadas,
+            'tempo_proprio': tempo_proprio,
+            'tempo_acumulado': tempo_acumulado,
+        })
+    linhas.sort(key=lambda l: l['tempo_proprio'], reverse=True)
+    return linhas[:limite]
+
+
+def executar_com_perfil(funcao: Callable, arquivo_saida: str, parametros: Dict = None, *args, **kwargs):
+    """
+    Executa `funcao(*args, **kwargs)` sob cProfile e sob o amostrador de pilhas.
+
+    Ao lado do arquivo de saída são gravados '<base>.prof' (pstats, para
+    snakeviz/gprof2dot) e '<base>.folded' (pilhas colapsadas, para
+    flamegraph.pl/speedscope). Se o resultado for um dicionário, recebe a
+    chave 'perfil' com os arquivos e a lista das funções mais custosas.
+    """
+    parametros = parametros or {}
+    base = os.path.splitext(arquivo_saida)[0]
+    arquivo_prof, arquivo_pilhas = base + '.prof', base + '.folded'
+
+    perfilador = cProfile.Profile()
+    amostrador = AmostradorPilhas(parametros.get('intervalo_amostragem_perfil', 0.005))
+    amostrador.iniciar()
+    perfilador.enable()
+    try:
+        resultado = funcao(*args, **kwargs)
+    finally:
+        perfilador.disable()
+        amostrador.parar()
+
+    try:
+        perfilador.dump_stats(arquivo_prof)
+        amostrador.gravar(arquivo_pilhas)
+        estatisticas = pstats.Stats(perfilador)
+        perfil = {
+            'arquivo_prof': arquivo_prof,
+            'arquivo_pilhas': arquivo_pilhas,
+            'amostras': sum(amostrador.pilhas.values()),
+            'tempo_total': estatisticas.total_tt,
+            'funcoes_mais_custosas': funcoes_mais_custosas(estatisticas, parametros.get('perfil_limite', 25)),
+        }
+        print(f"Perfil salvo: {arquivo_prof} e {arquivo_pilhas}")
+        for linha in perfil['funcoes_mais_custosas'][:5]:
+            print(f"  {linha['tempo_proprio']:.3f}s  {linha['funcao']}")
+    except Exception as e:
+        print(f"Erro ao gravar o perfil: {e}")
+        perfil = {'erro': str(e)}
+
+    if isinstance(resultado, dict):
+        resultado['perfil'] = perfil
+    return resultado
+
+
+def com_perfil(metodo: Callable) -> Callable:
+    """
+    Decorador para os métodos de processamento `(self, arquivo_entrada,
+    arquivo_saida, ...)`: quando o perfil está ativo (ver `perfil_ativo`), a
+    execução é envolvida por `executar_com_perfil`.
+    """
+    @functools.wraps(metodo)
+    def envolvido(self, arquivo_entrada, arquivo_saida, *args, **kwargs):
+        parametros = getattr(self, 'parametros', None)
+        if not perfil_ativo(parametros):
+            return metodo(self, arquivo_entrada, arquivo_saida, *args, **kwargs)
+        return executar_com_perfil(metodo, arquivo_saida, parametros, self, arquivo_entrada, arquivo_saida,
+                                   *args, **kwargs)
+    return envolvido
@@ -0,0 +1,89 @@
+import math
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+
+def expandir_arcos(pontos: Sequence[Tuple[float, float, float]], fechado: bool = True,
+                   tolerancia_corda: float = 0.05) -> np.ndarray:
+    """
+    Converte uma polilinha com bulges (x, y, bulge) em vértices retos.
+
+    Cada trecho com bulge b != 0 é um arco de ângulo central 4·atan(b); ele é
+    dividido no menor número de subtrechos cuja flecha (distância máxima entre
+    arco e corda) não passa de `tolerancia_corda`.
+    """
+    pontos = np.asarray(pontos, dtype=float)
+    if pontos.ndim != 2 or len(pontos) == 0:
+        return np.empty((0, 2))
+    if pontos.shape[1] < 3:
+        return pontos[:, :2].copy()
+
+    n = len(pontos)
+    ultimo = n if fechado else n - 1
+    saida = []
+    for i in range(n):
+        x0, y0, bulge = pontos[i, :3]
+        saida.append((x0, y0))
+        if i >= ultimo or abs(bulge) < 1e-12:
+            continue
+
+        x1, y1 = pontos[(i + 1) % n, :2]
+        dx, dy = x1 - x0, y1 - y0
+        corda = math.hypot(dx, dy)
+        if corda < 1e-12:
+            continue
+
+        theta = 4 * math.atan(bulge)
+        raio = corda / (2 * abs(math.sin(theta / 2)))
+        deslocamento = (1 - bulge * bulge) / (4 * bulge)
+        cx, cy = (x0 + x1) / 2 - deslocamento * dy, (y0 + y1) / 2 + deslocamento * dx
+
+        passo_maximo = 2 * math.acos(max(-1.0, 1 - tolerancia_corda / raio)) if raio > tolerancia_corda else math.pi
+        subdivisoes = max(1, math.ceil(abs(theta) / max(passo_maximo, 1e-9)))
+        inicio = math.atan2(y0 - cy, x0 - cx)
+        angulos = inicio + theta * np.arange(1, subdivisoes) / subdivisoes
+        saida.extend(zip(cx + raio * np.cos(angulos), cy + raio * np.sin(angulos)))
+
+    return np.asarray(saida)
+
+
+def simplificar_perimetro(poligono: Polygon, tolerancia: float = 0.01) -> Polygon:
+    """
+    Remove vértices quase duplicados e colineares dentro da tolerância de
+    levantamento, preservando a topologia (Douglas-Peucker com preserve_topology).
+    """
+    if tolerancia <= 0 or poligono.is_empty:
+        return poligono
+    limpo = shapely.remove_repeated_points(poligono, tolerancia)
+    simplificado = shapely.simplify(limpo, tolerancia, preserve_topology=True)
+    if simplificado.is_empty or not simplificado.is_valid:
+        return poligono
+    return simplificado
+
+
+def preprocessar_perimetro(pontos: Sequence, tolerancia_corda: float = 0.05,
+                           tolerancia_levantamento: float = 0.01) -> Tuple[Polygon, Dict[str, int]]:
+    """
+    Etapa de pré-processamento do perímetro carregado: expande arcos (bulges),
+    corrige a geometria e simplifica dentro da tolerância de levantamento.
+
+    Retorna o polígono e um relatório com a contagem de vértices em cada passo.
+    """
+    coords = expandir_arcos(pontos, fechado=True, tolerancia_corda=tolerancia_corda)
+    poligono = Polygon(coords)
+    if not poligono.is_valid:
+        poligono = poligono.buffer(0)
+        if not isinstance(poligono, Polygon):
+            poligono = max(shapely.get_parts(poligono), key=lambda p: p.area)
+
+    simplificado = simplificar_perimetro(poligono, tolerancia_levantamento)
+
+    relatorio = {
+        'vertices_originais': len(pontos),
+        'vertices_apos_arcos': len(coords),
+        'vertices_finais': len(simplificado.exterior.coords) - 1,
+    }
+    return simplificado, relatorio
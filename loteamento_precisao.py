@@ -0,0 +1,106 @@
+from typing import Iterable, List
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+# Grade padrão do modelo de precisão: 1 mm
+GRADE_PRECISAO_PADRAO = 0.001
+
+
+def fixar_precisao(geometria, grade: float = GRADE_PRECISAO_PADRAO):
+    """
+    Arredonda os vértices de uma geometria para a grade de precisão e remove
+    os vértices quase duplicados que passam a coincidir.
+    """
+    if geometria is None or geometria.is_empty or grade <= 0:
+        return geometria
+    return _arredondar(np.array([geometria], dtype=object), grade)[0]
+
+
+def _arredondar(geoms: np.ndarray, grade: float) -> np.ndarray:
+    """
+    Arredondamento ponto a ponto (preserva a ordem e a orientação dos anéis,
+    das quais a subdivisão depende), seguido da remoção dos vértices que
+    passaram a coincidir; só as geometrias que ficarem inválidas passam pela
+    correção topológica.
+    """
+    geoms = shapely.remove_repeated_points(shapely.set_precision(geoms, grade, mode='pointwise'))
+    invalidas = ~shapely.is_valid(geoms)
+    if invalidas.any():
+        geoms[invalidas] = shapely.make_valid(geoms[invalidas])
+    return geoms
+
+
+def fixar_precisao_camada(geometrias: Iterable, grade: float = GRADE_PRECISAO_PADRAO) -> List[Polygon]:
+    """
+    Versão vetorizada para uma camada inteira: aplica a grade a todas as
+    geometrias de uma vez e devolve apenas as partes poligonais não vazias.
+    """
+    geoms = np.asarray(list(geometrias), dtype=object)
+    if len(geoms) == 0:
+        return []
+    if grade > 0:
+        geoms = _arredondar(geoms, grade)
+    partes = shapely.get_parts(geoms)
+    partes = partes[(shapely.get_type_id(partes) == 3) & ~shapely.is_empty(partes)]
+    return list(partes)
+
+
+def eh_lasca(geometrias: np.ndarray, area_lasca: float, largura_lasca: float) -> np.ndarray:
+    """Lascas: fragmentos com área pequena ou largura média (2·área/perímetro) estreita."""
+    areas = shapely.area(geometrias)
+    perimetros = np.maximum(shapely.length(geometrias), 1e-12)
+    return (areas < area_lasca) | (2 * areas / perimetros < largura_lasca)
+
+
+def incorporar_lascas(geometrias: List[Polygon], fragmentos: List[Polygon],
+                      tolerancia: float = GRADE_PRECISAO_PADRAO) -> List[Polygon]:
+    """
+    Incorpora cada fragmento ao vizinho com quem compartilha a maior extensão
+    de divisa. Os vizinhos são encontrados por um STRtree sobre as geometrias.
+    Fragmentos sem vizinho (ou cuja união não resultaria em um único polígono)
+    são descartados. A ordem e a quantidade de geometrias são preservadas.
+    """
+    geoms = np.asarray(list(geometrias), dtype=object)
+    frags = np.asarray(list(fragmentos), dtype=object)
+    if len(geoms) == 0 or len(frags) == 0:
+        return list(geoms)
+
+    arvore = shapely.STRtree(geoms)
+    idx_frag, idx_viz = arvore.query(frags, predicate='dwithin', distance=tolerancia)
+    if len(idx_frag) == 0:
+        return list(geoms)
+
+    # Extensão da divisa de cada par (fragmento, vizinho)
+    divisa = shapely.length(shapely.intersection(
+        shapely.buffer(shapely.boundary(frags[idx_frag]), tolerancia),
+        shapely.boundary(geoms[idx_viz])))
+
+    ordem = np.lexsort((-divisa, idx_frag))
+    primeiro = np.ones(len(ordem), dtype=bool)
+    primeiro[1:] = idx_frag[ordem][1:] != idx_frag[ordem][:-1]
+    escolhidos = ordem[primeiro & (divisa[ordem] > 0)]
+
+    resultado = list(geoms)
+    for vizinho in np.unique(idx_viz[escolhidos]):
+        anexos = frags[idx_frag[escolhidos][idx_viz[escolhidos] == vizinho]]
+        uniao = shapely.union_all(np.concatenate([[geoms[vizinho]], anexos]), grid_size=tolerancia)
+        if isinstance(uniao, Polygon):
+            resultado[vizinho] = uniao
+    return resultado
+
+
+def remover_lascas(geometrias: Iterable, area_lasca: float, largura_lasca: float = 0.0,
+                   tolerancia: float = GRADE_PRECISAO_PADRAO) -> List[Polygon]:
+    """
+    Separa as lascas de uma camada e as incorpora às geometrias vizinhas da
+    mesma camada (ver `incorporar_lascas`).
+    """
+    geoms = np.asarray(list(geometrias), dtype=object)
+    if len(geoms) == 0:
+        return []
+    lascas = eh_lasca(geoms, area_lasca, largura_lasca)
+    if not lascas.any():
+        return list(geoms)
+    return incorporar_lascas(list(geoms[~lascas]), list(geoms[lascas]), tolerancia)
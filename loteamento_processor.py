@@ -8,6 +8,8 @@ import math
 from typing import List, Tuple, Dict, Optional
 import os
 
+from loteamento_perfil import com_perfil
+
 class LoteamentoProcessor:
     """
     Classe responsável pelo processamento geoespacial e algoritmo de loteamento.
@@ -433,6 +435,7 @@ class LoteamentoProcessor:
         # Salvar arquivo
         doc.saveas(arquivo_saida)
     
+    @com_perfil
     def processar_loteamento(self, arquivo_entrada: str, arquivo_saida: str) -> Dict:
         """
         Executa todo o processo de loteamento.
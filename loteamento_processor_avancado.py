@@ -1,7 +1,7 @@
 import geopandas as gpd
 import shapely
 from shapely.geometry import Polygon, LineString, Point, MultiPolygon
-from shapely.ops import unary_union, split, polygonize
+from shapely.ops import unary_union, polygonize
 from shapely.affinity import rotate, translate
 import ezdxf
 import numpy as np
@@ -9,6 +9,10 @@ import math
 from typing import List, Tuple, Dict, Optional
 import os
 
+from loteamento_indice_espacial import GradeOcupacao
+from loteamento_particionamento import dividir_bsp
+from loteamento_perfil import com_perfil
+
 class LoteamentoProcessorAvancado:
     """
     Processador avançado de loteamento com melhorias para:
@@ -51,7 +55,8 @@ class LoteamentoProcessorAvancado:
             'largura_padrao_lote': 12.0,
             'profundidade_padrao_lote': 30.0,
             'percentual_area_verde': 15.0,
-            'percentual_area_institucional': 5.0
+            'percentual_area_institucional': 5.0,
+            'resolucao_grade_ocupacao': 1.0
         }
         
         for chave, valor_padrao in padroes.items():
@@ -73,6 +78,11 @@ class LoteamentoProcessorAvancado:
                     print(f"Aviso: Valor não numérico para {chave}, usando padrão {valor_padrao}")
                     parametros_limpos[chave] = valor_padrao
         
+        # Opções de diagnóstico passam sem validação numérica
+        for chave in ('perfil', 'intervalo_amostragem_perfil', 'perfil_limite'):
+            if chave in parametros:
+                parametros_limpos[chave] = parametros[chave]
+        
         return parametros_limpos
     
     def carregar_perimetro(self, arquivo_path: str) -> bool:
@@ -659,59 +669,18 @@ class LoteamentoProcessorAvancado:
     def _dividir_por_cortes_inteligentes(self, area: Polygon, area_minima: float, testada_minima: float) -> List[Polygon]:
         """
         Divide a área usando cortes inteligentes baseados na geometria.
+        Usa o particionamento BSP iterativo com cortes balanceados por área.
         """
-        lotes = []
-        
         try:
             if area.area < area_minima * 2:
                 # Área muito pequena para dividir
-                if area.area >= area_minima:
-                    lotes.append(area)
-                return lotes
-            
-            # Obter bounding box
-            bounds = area.bounds
-            min_x, min_y, max_x, max_y = bounds
+                return [area] if area.area >= area_minima else []
             
-            largura = max_x - min_x
-            altura = max_y - min_y
+            return dividir_bsp(area, area_minima, testada_minima)
             
-            # Decidir direção do corte baseado na proporção
-            if largura > altura * 1.5:
-                # Corte vertical
-                linha_corte = LineString([(min_x + largura/2, min_y - 10), (min_x + largura/2, max_y + 10)])
-            else:
-                # Corte horizontal
-                linha_corte = LineString([(min_x - 10, min_y + altura/2), (max_x + 10, min_y + altura/2)])
-            
-            # Aplicar corte
-            try:
-                partes = split(area, linha_corte)
-                if hasattr(partes, 'geoms'):
-                    partes_lista = list(partes.geoms)
-                else:
-                    partes_lista = [partes]
-                
-                # Processar cada parte recursivamente
-                for parte in partes_lista:
-                    if isinstance(parte, Polygon) and parte.area >= area_minima:
-                        if parte.area < area_minima * 3:
-                            # Parte pequena o suficiente, usar como lote
-                            lotes.append(parte)
-                        else:
-                            # Parte ainda grande, dividir recursivamente
-                            sublotes = self._dividir_por_cortes_inteligentes(parte, area_minima, testada_minima)
-                            lotes.extend(sublotes)
-                            
-            except:
-                # Se o corte falhar, usar a área original
-                if area.area >= area_minima:
-                    lotes.append(area)
-                    
         except Exception as e:
             print(f"Erro nos cortes inteligentes: {e}")
-            
-        return lotes
+            return [area] if area.area >= area_minima else []
     
     def _encontrar_bordas_com_rua(self, quadra: Polygon) -> List[LineString]:
         """
@@ -878,18 +847,12 @@ class LoteamentoProcessorAvancado:
             geometrias_utilizadas.extend(self.calcadas)
             
             if geometrias_utilizadas:
-                area_utilizada = unary_union(geometrias_utilizadas)
-                area_disponivel = self.perimetro_internalizado.difference(area_utilizada)
-                
-                if isinstance(area_disponivel, MultiPolygon):
-                    areas_disponiveis = list(area_disponivel.geoms)
-                elif isinstance(area_disponivel, Polygon) and not area_disponivel.is_empty:
-                    areas_disponiveis = [area_disponivel]
-                else:
-                    areas_disponiveis = []
+                # Grade de ocupação: só as regiões livres candidatas passam pela diferença exata
+                grade = GradeOcupacao(self.perimetro_internalizado, self.parametros['resolucao_grade_ocupacao'])
+                grade.marcar(geometrias_utilizadas)
                 
                 # Filtrar áreas muito pequenas (menos de 50 m²)
-                areas_disponiveis = [area for area in areas_disponiveis if area.area >= 50.0]
+                areas_disponiveis = grade.areas_livres(50.0)
                 
                 # Ordenar por tamanho (maiores primeiro)
                 areas_disponiveis.sort(key=lambda x: x.area, reverse=True)
@@ -1046,6 +1009,7 @@ class LoteamentoProcessorAvancado:
             print(f"Erro na exportação DXF: {e}")
             raise
     
+    @com_perfil
     def processar_loteamento_avancado(self, arquivo_entrada: str, arquivo_saida: str) -> Dict:
         """
         Executa todo o processo de loteamento avançado.
@@ -8,6 +8,8 @@ import math
 from typing import List, Tuple, Dict, Optional
 import os
 
+from loteamento_perfil import com_perfil
+
 class LoteamentoProcessorMelhorado:
     """
     Versão melhorada do processador de loteamento com algoritmo de subdivisão aprimorado.
@@ -401,6 +403,7 @@ class LoteamentoProcessorMelhorado:
         # Salvar arquivo
         doc.saveas(arquivo_saida)
     
+    @com_perfil
     def processar_loteamento(self, arquivo_entrada: str, arquivo_saida: str) -> Dict:
         """
         Executa todo o processo de loteamento com algoritmo melhorado.
@@ -8,6 +8,8 @@ import math
 from typing import List, Tuple, Dict, Optional
 import os
 
+from loteamento_perfil import com_perfil
+
 class LoteamentoProcessorRobusto:
     """
     Versão robusta do processador de loteamento com tratamento completo de erros NaN.
@@ -75,6 +77,11 @@ class LoteamentoProcessorRobusto:
                     print(f"Aviso: Valor não numérico para {chave}, usando padrão {valor_padrao}")
                     parametros_limpos[chave] = valor_padrao
         
+        # Opções de diagnóstico passam sem validação numérica
+        for chave in ('perfil', 'intervalo_amostragem_perfil', 'perfil_limite'):
+            if chave in parametros:
+                parametros_limpos[chave] = parametros[chave]
+        
         return parametros_limpos
     
     def _validar_numero(self, valor, nome_campo: str, minimo: float = 0.1, maximo: float = 1000.0) -> float:
@@ -527,6 +534,7 @@ class LoteamentoProcessorRobusto:
             print(f"Erro na exportação DXF: {e}")
             raise
     
+    @com_perfil
     def processar_loteamento_robusto(self, arquivo_entrada: str, arquivo_saida: str) -> Dict:
         """
         Executa todo o processo de loteamento com tratamento robusto de erros.
@@ -1,5 +1,6 @@
 import geopandas as gpd
 import numpy as np
+import shapely
 import math
 from shapely.geometry import Polygon, LineString, Point, MultiPolygon
 from shapely.ops import unary_union, split
@@ -7,6 +8,26 @@ from shapely.affinity import rotate, translate, scale
 import ezdxf
 from typing import List, Tuple, Optional, Dict, Any
 import random
+import multiprocessing
+import os
+import time
+
+from loteamento_acesso import TRATAMENTOS_SEM_ACESSO, somar_relatorios_acesso, validar_acesso_lotes
+from loteamento_alocacao import alocar_por_metas
+from loteamento_disputa import disputar_estrategias, estrategias_disputa
+from loteamento_cache import CacheQuadrasCongruentes, CacheQuadrasPersistente, escopo_parametros
+from loteamento_cobertura import CAMADAS_COBERTURA, auditar_cobertura
+from loteamento_exportacao import exportar_camadas, CAMADAS_GIS
+from loteamento_indice_espacial import AlocadorLotes, GradeOcupacao
+from loteamento_tabela import TabelaFeicoes
+from loteamento_escalonador import EscalonadorQuadras
+from loteamento_perfil import com_perfil, perfil_ativo
+from loteamento_qualidade import IndiceRuas, dimensoes_frente_rua, metricas_lotes, resumir_metricas
+from loteamento_perimetro import preprocessar_perimetro
+from loteamento_precisao import fixar_precisao, fixar_precisao_camada, remover_lascas, incorporar_lascas, eh_lasca
+from loteamento_superquadras import executar_em_superquadras
+from loteamento_particionamento import (fatiar_em_faixas, angulo_eixo_principal, orientar_borda_para_dentro,
+                                        profundidades_ao_longo_da_borda, otimizar_testadas)
 
 class LoteamentoProcessorUltraAvancado:
     """
@@ -22,12 +43,27 @@ class LoteamentoProcessorUltraAvancado:
         self.perimetro_original = None
         self.perimetro_internalizado = None
         self.malha_viaria = []
-        self.ruas = []
-        self.calcadas = []
-        self.quadras = []
-        self.lotes = []
-        self.areas_verdes = []
-        self.areas_institucionais = []
+        self.ruas = TabelaFeicoes('RUAS')
+        self.calcadas = TabelaFeicoes('CALCADAS')
+        self.quadras = TabelaFeicoes('QUADRAS')
+        self.lotes = TabelaFeicoes('LOTES')
+        self.areas_verdes = TabelaFeicoes('AREA_VERDE')
+        self.areas_institucionais = TabelaFeicoes('AREA_INST')
+        self.grade_ocupacao = None
+        self.cache_quadras = None
+        self.relatorio_perimetro = {}
+        self.superquadras = []
+        self.quadras_truncadas = []
+        self.metricas_escalonamento = {}
+        self.vitorias_disputa = {}
+        self.acesso_lotes = {}
+        self.areas_comuns_sem_acesso = []
+        self.deficit_area_verde = 0.0
+        self.deficit_area_institucional = 0.0
+        self._prazo_quadra = None
+        self._quadra_truncada = False
+        self._orcamento_tempo = None
+        self._indice_ruas = None
         
         # Configurações avançadas baseadas nos parâmetros
         self.configurar_estrategias_avancadas()
@@ -92,20 +128,18 @@ class LoteamentoProcessorUltraAvancado:
             doc = ezdxf.readfile(arquivo_path)
             msp = doc.modelspace()
             
+            # Pontos com bulge (x, y, b): os arcos são expandidos no pré-processamento
             pontos = []
             for entity in msp:
                 if entity.dxftype() == 'LWPOLYLINE':
-                    pontos = [(p[0], p[1]) for p in entity.get_points()]
+                    pontos = [(p[0], p[1], p[2]) for p in entity.get_points('xyb')]
                     break
                 elif entity.dxftype() == 'POLYLINE':
-                    pontos = [(v.dxf.location[0], v.dxf.location[1]) for v in entity.vertices]
+                    pontos = [(v.dxf.location[0], v.dxf.location[1], v.dxf.get('bulge', 0.0)) for v in entity.vertices]
                     break
             
             if len(pontos) >= 3:
-                if pontos[0] != pontos[-1]:
-                    pontos.append(pontos[0])
-                
-                self.perimetro_original = Polygon(pontos)
+                self.perimetro_original = self._preprocessar_perimetro(pontos)
                 print(f"Perímetro carregado. Área: {self.perimetro_original.area:.2f} m²")
                 return True
             
@@ -122,7 +156,7 @@ class LoteamentoProcessorUltraAvancado:
             if not gdf.empty:
                 geometry = gdf.geometry.iloc[0]
                 if isinstance(geometry, Polygon):
-                    self.perimetro_original = geometry
+                    self.perimetro_original = self._preprocessar_perimetro([(x, y, 0.0) for x, y, *_ in geometry.exterior.coords[:-1]])
                     print(f"Perímetro carregado. Área: {self.perimetro_original.area:.2f} m²")
                     return True
             return False
@@ -130,10 +164,43 @@ class LoteamentoProcessorUltraAvancado:
             print(f"Erro ao carregar KML: {e}")
             return False
     
-    def processar_loteamento_ultra_avancado(self, arquivo_entrada: str, arquivo_saida: str) -> Dict[str, Any]:
+    def _preprocessar_perimetro(self, pontos: List[Tuple[float, float, float]]) -> Polygon:
+        """
+        Expande arcos (bulges) com a tolerância de corda e remove vértices
+        colineares/quase duplicados dentro da tolerância de levantamento.
+        Todas as etapas seguintes escalam com o número de vértices.
+        """
+        perimetro, relatorio = preprocessar_perimetro(
+            pontos,
+            tolerancia_corda=self.parametros.get('tolerancia_corda_arcos', 0.05),
+            tolerancia_levantamento=self.parametros.get('tolerancia_levantamento', 0.01))
+        self.relatorio_perimetro = relatorio
+        
+        reducao = 1 - relatorio['vertices_finais'] / max(relatorio['vertices_apos_arcos'], 1)
+        print(f"Vértices do perímetro: {relatorio['vertices_originais']} lidos, "
+              f"{relatorio['vertices_apos_arcos']} após expandir arcos, "
+              f"{relatorio['vertices_finais']} após simplificação ({reducao:.1%} de redução)")
+        return perimetro
+    
+    @com_perfil
+    def processar_loteamento_ultra_avancado(self, arquivo_entrada: str, arquivo_saida: str,
+                                            orcamento_tempo: Optional[float] = None,
+                                            consumidor=None) -> Dict[str, Any]:
         """
         Executa o processamento ultra-avançado completo.
+        
+        `consumidor` (opcional, ex.: a cena da pré-visualização em
+        loteamento_visualizacao) recebe via `receber(tipo, dados)` os eventos
+        de `iter_resultados` à medida que cada resultado fica pronto.
+        
+        `orcamento_tempo` (segundos, ou parametros['orcamento_tempo']) limita a
+        subdivisão: cada quadra recebe uma fatia do orçamento e fica com o
+        melhor parcelamento obtido até o fim dela. As quadras cortadas pelo
+        prazo são listadas em 'quadras_truncadas'.
         """
+        # Só vale nesta chamada: o dicionário de parâmetros é do chamador e pode ser reaproveitado
+        self._orcamento_tempo = orcamento_tempo
+        
         try:
             print("=== PROCESSAMENTO ULTRA-AVANÇADO DE LOTEAMENTO ===")
             
@@ -141,31 +208,23 @@ class LoteamentoProcessorUltraAvancado:
             print("1. Carregando perímetro...")
             if not self.carregar_perimetro(arquivo_entrada):
                 return {'sucesso': False, 'erro': 'Erro ao carregar perímetro'}
+            if consumidor is not None:
+                consumidor.receber('perimetro', self.perimetro_original)
             
-            # 2. Internalizar com calçadas
-            print("2. Internalizando perímetro com calçadas...")
-            self.internalizar_perimetro_com_calcadas()
-            
-            # 3. Criar sistema viário criativo
-            print("3. Criando sistema viário criativo...")
-            self.criar_sistema_viario_criativo()
-            
-            # 4. Formar quadras com liberdade criativa
-            print("4. Formando quadras com liberdade criativa...")
-            self.formar_quadras_criativas()
-            
-            # 5. Subdividir com otimização avançada
-            print("5. Subdividindo com otimização avançada...")
-            self.subdividir_quadras_ultra_otimizado()
-            
-            # 6. Alocar áreas comuns estrategicamente
-            print("6. Alocando áreas comuns estrategicamente...")
-            self.alocar_areas_comuns_estrategicamente()
+            # 2-6. Etapas geométricas
+            self.executar_etapas(consumidor)
             
             # 7. Exportar resultado
             print("7. Exportando resultado...")
             self.exportar_dxf_ultra_avancado(arquivo_saida)
             
+            # Exportações GIS opcionais (ex.: parametros['formatos_gis'] = ['gpkg', 'geojson'])
+            arquivos_gis = []
+            for formato in self.parametros.get('formatos_gis', []):
+                arquivo_gis = os.path.splitext(arquivo_saida)[0] + '.' + formato.lstrip('.')
+                if self.exportar_gis(arquivo_gis):
+                    arquivos_gis.append(arquivo_gis)
+            
             # Calcular estatísticas
             estatisticas = self.calcular_estatisticas_detalhadas()
             
@@ -173,12 +232,121 @@ class LoteamentoProcessorUltraAvancado:
             
             return {
                 'sucesso': True,
-                **estatisticas
+                **estatisticas,
+                'arquivos_gis': arquivos_gis
             }
             
         except Exception as e:
             print(f"Erro no processamento: {e}")
             return {'sucesso': False, 'erro': str(e)}
+        
+        finally:
+            self._orcamento_tempo = None
+    
+    def orcamento_tempo(self) -> Optional[float]:
+        """Orçamento de tempo da subdivisão: o da chamada em curso ou parametros['orcamento_tempo']."""
+        if self._orcamento_tempo is not None:
+            return self._orcamento_tempo
+        return self.parametros.get('orcamento_tempo')
+    
+    def executar_etapas(self, consumidor=None):
+        """
+        Executa as etapas geométricas (2 a 6) sobre o perímetro já carregado,
+        repassando os eventos de `iter_etapas` ao consumidor, se houver.
+        """
+        for tipo, dados in self.iter_etapas():
+            if consumidor is not None:
+                consumidor.receber(tipo, dados)
+    
+    def iter_etapas(self, acumular: bool = True):
+        """
+        Etapas 2 a 6 em fluxo. Gera eventos (tipo, dados) à medida que cada
+        resultado fica pronto:
+        - ('malha_viaria', linhas);
+        - ('camada', (atributo, tabela)) para ruas, calcadas, quadras,
+          areas_verdes e areas_institucionais;
+        - ('lotes', tabela) com os lotes de uma quadra (ver `iter_lotes`).
+        """
+        # 2. Internalizar com calçadas
+        print("2. Internalizando perímetro com calçadas...")
+        self.internalizar_perimetro_com_calcadas()
+        
+        # Perímetros muito grandes: etapas 3-6 por superquadra, em paralelo
+        # (os eventos saem depois da costura, com os lotes agrupados por quadra)
+        if self.parametros.get('modo_superquadras', False):
+            print("3-6. Processando por superquadras (vias tronco)...")
+            self.superquadras = executar_em_superquadras(self)
+            yield 'malha_viaria', self.malha_viaria
+            for atributo in ('ruas', 'calcadas', 'quadras'):
+                yield 'camada', (atributo, getattr(self, atributo))
+            quadra_id = self.lotes.coluna('quadra_id')
+            inicios = np.flatnonzero(np.r_[True, quadra_id[1:] != quadra_id[:-1]]) if len(quadra_id) else []
+            for inicio, fim in zip(inicios, list(inicios[1:]) + [len(quadra_id)]):
+                yield 'lotes', self.lotes.filtrar(np.arange(inicio, fim))
+            for atributo in ('areas_verdes', 'areas_institucionais'):
+                yield 'camada', (atributo, getattr(self, atributo))
+            return
+        
+        # 3. Criar sistema viário criativo
+        print("3. Criando sistema viário criativo...")
+        self.criar_sistema_viario_criativo()
+        yield 'malha_viaria', self.malha_viaria
+        yield 'camada', ('ruas', self.ruas)
+        yield 'camada', ('calcadas', self.calcadas)
+        
+        # 4. Formar quadras com liberdade criativa
+        print("4. Formando quadras com liberdade criativa...")
+        self.formar_quadras_criativas()
+        yield 'camada', ('quadras', self.quadras)
+        
+        # 5. Subdividir com otimização avançada
+        print("5. Subdividindo com otimização avançada...")
+        for bloco in self.iter_lotes(acumular):
+            yield 'lotes', bloco
+        if acumular:
+            self.validar_acesso_lotes()
+        
+        # 6. Alocar áreas comuns estrategicamente
+        print("6. Alocando áreas comuns estrategicamente...")
+        self.alocar_areas_comuns_estrategicamente()
+        yield 'camada', ('areas_verdes', self.areas_verdes)
+        yield 'camada', ('areas_institucionais', self.areas_institucionais)
+    
+    def iter_resultados(self, arquivo_entrada: str, acumular: bool = True):
+        """
+        Processamento completo em fluxo, sem exportação: gera ('perimetro',
+        polígono), os eventos de `iter_etapas` e, ao final, ('estatisticas',
+        dicionário). Se o perímetro não puder ser carregado, gera ('erro', mensagem).
+        
+        Consumidores (DXF em fluxo, GeoPackage incremental, pré-visualização)
+        estão em loteamento_fluxo. Com `acumular=False`, as estatísticas de
+        lotes refletem apenas o que ficou em memória (nenhum lote); o relatório
+        de acesso ('acesso_lotes') cobre todos os lotes gerados.
+        """
+        print("=== PROCESSAMENTO ULTRA-AVANÇADO DE LOTEAMENTO (FLUXO) ===")
+        print("1. Carregando perímetro...")
+        if not self.carregar_perimetro(arquivo_entrada):
+            yield 'erro', 'Erro ao carregar perímetro'
+            return
+        yield 'perimetro', self.perimetro_original
+        
+        yield from self.iter_etapas(acumular)
+        yield 'estatisticas', self.calcular_estatisticas_detalhadas()
+    
+    def processar_perimetro(self, pontos: List[Tuple[float, float, float]]) -> Dict[str, Any]:
+        """
+        Processa um perímetro já em memória, dado como pontos (x, y, bulge),
+        sem leitura nem exportação de arquivo, e retorna as estatísticas.
+        Usado pelo modo de múltiplas glebas.
+        """
+        try:
+            self.perimetro_original = self._preprocessar_perimetro(pontos)
+            self.executar_etapas()
+            return {'sucesso': True, **self.calcular_estatisticas_detalhadas()}
+            
+        except Exception as e:
+            print(f"Erro no processamento: {e}")
+            return {'sucesso': False, 'erro': str(e)}
     
     def internalizar_perimetro_com_calcadas(self):
         """
@@ -197,6 +365,8 @@ class LoteamentoProcessorUltraAvancado:
                 centroid = self.perimetro_original.centroid
                 self.perimetro_internalizado = scale(self.perimetro_original, xfact=0.8, yfact=0.8, origin=centroid)
             
+            self.perimetro_internalizado = fixar_precisao(self.perimetro_internalizado, self._grade_precisao())
+            
             print(f"Perímetro internalizado. Área: {self.perimetro_internalizado.area:.2f} m²")
             
         except Exception as e:
@@ -229,6 +399,8 @@ class LoteamentoProcessorUltraAvancado:
             self.malha_viaria = []
             self.ruas = []
             self.calcadas = []
+        
+        self._consolidar_camadas()
     
     def _criar_malha_retangular(self):
         """Cria malha viária retangular tradicional"""
@@ -381,10 +553,14 @@ class LoteamentoProcessorUltraAvancado:
         largura_calcada = self.parametros['largura_calcada']
         
         try:
-            linhas_unidas = unary_union(self.malha_viaria)
+            # Buffer de cada linha seguido de união: o buffer da malha já unida custa
+            # dezenas de segundos no GEOS quando as linhas se cruzam muito (malhas livres).
+            # As faixas são as mesmas; só os arcos das pontas têm outros vértices
+            # (até r * (1 - cos(pi / 32)), ~0,02 m em uma rua de 8 m)
+            linhas = np.asarray(self.malha_viaria, dtype=object)
             
             # Criar ruas
-            ruas_buffer = linhas_unidas.buffer(largura_rua / 2)
+            ruas_buffer = shapely.union_all(shapely.buffer(linhas, largura_rua / 2))
             if isinstance(ruas_buffer, Polygon):
                 self.ruas = [ruas_buffer]
             elif hasattr(ruas_buffer, 'geoms'):
@@ -393,7 +569,7 @@ class LoteamentoProcessorUltraAvancado:
                 self.ruas = []
             
             # Criar calçadas
-            calcadas_buffer = linhas_unidas.buffer((largura_rua + 2 * largura_calcada) / 2)
+            calcadas_buffer = shapely.union_all(shapely.buffer(linhas, (largura_rua + 2 * largura_calcada) / 2))
             if self.ruas:
                 ruas_unidas = unary_union(self.ruas)
                 area_calcadas = calcadas_buffer.difference(ruas_unidas)
@@ -406,6 +582,12 @@ class LoteamentoProcessorUltraAvancado:
                     self.calcadas = []
             else:
                 self.calcadas = []
+            
+            # Fronteira de etapa: grade de precisão e lascas de calçada incorporadas às vizinhas
+            grade = self._grade_precisao()
+            self.ruas = fixar_precisao_camada(self.ruas, grade)
+            self.calcadas = remover_lascas(fixar_precisao_camada(self.calcadas, grade),
+                                           *self._limites_lasca(), tolerancia=max(grade, 1e-6))
                 
         except Exception as e:
             print(f"Erro ao gerar ruas e calçadas: {e}")
@@ -429,6 +611,8 @@ class LoteamentoProcessorUltraAvancado:
                 ruas_unidas = unary_union(self.ruas)
                 area_disponivel = area_disponivel.difference(ruas_unidas)
             
+            area_disponivel = fixar_precisao(area_disponivel, self._grade_precisao())
+            
             # Processar resultado
             if isinstance(area_disponivel, Polygon):
                 self.quadras = [area_disponivel]
@@ -448,62 +632,412 @@ class LoteamentoProcessorUltraAvancado:
         except Exception as e:
             print(f"Erro na formação de quadras: {e}")
             self.quadras = [self.perimetro_internalizado]
+        
+        self._consolidar_camadas()
+    
+    def _consolidar_camadas(self):
+        """
+        Converte as camadas ainda mantidas como listas em tabelas colunares.
+        As quadras recebem o próprio índice como quadra_id.
+        """
+        camadas = {
+            'ruas': 'RUAS',
+            'calcadas': 'CALCADAS',
+            'quadras': 'QUADRAS',
+            'lotes': 'LOTES',
+            'areas_verdes': 'AREA_VERDE',
+            'areas_institucionais': 'AREA_INST',
+        }
+        for atributo, camada in camadas.items():
+            valor = getattr(self, atributo)
+            if not isinstance(valor, TabelaFeicoes):
+                geometrias = list(valor)
+                quadra_id = np.arange(len(geometrias)) if atributo == 'quadras' else -1
+                setattr(self, atributo, TabelaFeicoes.de_geometrias(camada, geometrias, quadra_id))
+    
+    def compactar_camadas(self):
+        """
+        Compacta as tabelas das camadas (TabelaFeicoes.compactar), para um
+        resultado que só aguarda exportação: estatísticas e DXF não recriam
+        as geometrias.
+        """
+        self._consolidar_camadas()
+        for atributo in CAMADAS_GIS:
+            getattr(self, atributo).compactar()
     
     def subdividir_quadras_ultra_otimizado(self):
         """
         Subdivisão ultra-otimizada com foco em aproveitamento máximo e lotes de esquina.
         """
+        for _ in self.iter_lotes():
+            pass
+    
+    def iter_lotes(self, acumular: bool = True):
+        """
+        Versão em fluxo da subdivisão: gera, quadra a quadra, uma TabelaFeicoes
+        com os lotes da quadra assim que eles são calculados (quadra_id e ids
+        já definitivos), para que exportação e visualização comecem antes do
+        fim do processamento.
+        
+        Com `acumular=False` os lotes não são guardados em self.lotes (menor
+        pico de memória); a grade de ocupação continua sendo marcada, então a
+        alocação de áreas comuns funciona normalmente depois. Nesse modo a
+        validação de acesso (ver `validar_acesso_lotes`) é feita quadra a
+        quadra, antes de cada bloco ser gerado: a fusão só junta lotes da
+        mesma quadra, e os blocos já saem fundidos ou sem os lotes retirados.
+        """
+        total = 0
         try:
-            self.lotes = []
-            
-            for i, quadra in enumerate(self.quadras):
-                print(f"Processando quadra {i+1}: área = {quadra.area:.2f} m²")
-                
-                # Estratégia baseada no tamanho da quadra
-                if quadra.area < self.parametros['area_minima_lote'] * 2:
-                    # Quadra pequena: usar como lote único
-                    if self._quadra_tem_acesso_rua(quadra):
-                        self.lotes.append(quadra)
-                        print(f"  Quadra {i+1} convertida em lote único")
+            self.lotes = TabelaFeicoes('LOTES')
+            self.grade_ocupacao = self._criar_grade_ocupacao()
+            self.cache_quadras = None
+            if self.parametros.get('cache_quadras_congruentes', True):
+                tolerancia = self.parametros.get('tolerancia_congruencia', 0.01)
+                arquivo_cache = self.parametros.get('arquivo_cache_quadras')
+                if arquivo_cache:
+                    # Cache em arquivo, compartilhado entre execuções/processos com os mesmos parâmetros
+                    self.cache_quadras = CacheQuadrasPersistente(arquivo_cache, escopo_parametros(self.parametros),
+                                                                 tolerancia)
                 else:
-                    # Quadra grande: subdividir otimizadamente
-                    lotes_quadra = self._subdividir_quadra_otimizada(quadra, i+1)
-                    self.lotes.extend(lotes_quadra)
-                    print(f"  Lotes criados na quadra {i+1}: {len(lotes_quadra)}")
-            
-            print(f"Total de lotes criados: {len(self.lotes)}")
+                    self.cache_quadras = CacheQuadrasCongruentes(tolerancia)
+            
+            self.quadras_truncadas = []
+            self.metricas_escalonamento = {}
+            self.vitorias_disputa = {}
+            workers = self._workers_quadras()
+            if workers > 1:
+                escalonador = EscalonadorQuadras(self, workers,
+                                                 self.parametros.get('fracao_divisao_quadras', 0.5),
+                                                 self.parametros.get('lotes_minimos_subtarefa', 12.0))
+                blocos = escalonador.iter_blocos()
+            else:
+                escalonador = None
+                blocos = self._iter_blocos_serial()
+            
+            if not acumular:
+                self.areas_comuns_sem_acesso = []
+                vias = IndiceRuas(list(self.ruas) + list(self.calcadas))
+                tratamento = self.parametros.get('tratamento_lotes_sem_acesso', 'marcar')
+                if tratamento not in TRATAMENTOS_SEM_ACESSO:
+                    print(f"Aviso: tratamento de lotes sem acesso desconhecido '{tratamento}', usando 'marcar'")
+                    tratamento = 'marcar'
+                relatorios, quantidades = [], []
+            
+            for bloco in blocos:
+                self.grade_ocupacao.marcar(bloco)
+                if acumular:
+                    self.lotes.anexar(bloco)
+                else:
+                    bloco, relatorio = self._validar_acesso_bloco(bloco, vias, tratamento, total)
+                    relatorios.append(relatorio)
+                    quantidades.append(len(bloco))
+                total += len(bloco)
+                yield bloco
+            
+            if not acumular:
+                self.acesso_lotes = somar_relatorios_acesso(relatorios, quantidades)
+                self._informar_acesso()
+            if escalonador is not None:
+                self.metricas_escalonamento = escalonador.metricas
+            print(f"Total de lotes criados: {total}")
+            if self.quadras_truncadas:
+                print(f"Quadras truncadas pelo orçamento de tempo: {len(self.quadras_truncadas)}")
+            if self.vitorias_disputa:
+                print(f"Estratégias vencedoras da disputa: {self.vitorias_disputa}")
+            if self.cache_quadras is not None and self.cache_quadras.acertos:
+                print(f"Quadras congruentes reaproveitadas: {self.cache_quadras.acertos} "
+                      f"({len(self.cache_quadras)} formas distintas)")
             
         except Exception as e:
             print(f"Erro na subdivisão ultra-otimizada: {e}")
+        
+        finally:
+            self._prazo_quadra = None
+            self._indice_ruas = None
+    
+    def _workers_quadras(self) -> int:
+        """
+        Processos para a subdivisão das quadras (parametros['workers_quadras'],
+        padrão 1 = serial). Dentro de um worker (superquadras, múltiplas glebas,
+        serviço) e com o perfil ligado a subdivisão é sempre serial.
+        """
+        workers = int(self.parametros.get('workers_quadras') or 1)
+        if workers <= 1 or len(self.quadras) < 2 or multiprocessing.parent_process() is not None:
+            return 1
+        if perfil_ativo(self.parametros):
+            return 1
+        return workers
+    
+    def _iter_blocos_serial(self):
+        """Lotes quadra a quadra no próprio processo (ids sequenciais a partir de 0)."""
+        # Orçamento de tempo: cada quadra recebe uma fatia proporcional à sua área
+        # do tempo que ainda resta (o que uma quadra não usa passa para as seguintes)
+        orcamento = self.orcamento_tempo()
+        inicio = time.perf_counter()
+        area_pendente = sum(quadra.area for quadra in self.quadras)
+        total = 0
+        
+        for i, quadra in enumerate(self.quadras):
+            print(f"Processando quadra {i+1}: área = {quadra.area:.2f} m²")
+            if orcamento:
+                restante = max(0.0, orcamento - (time.perf_counter() - inicio))
+                self._prazo_quadra = time.perf_counter() + restante * quadra.area / max(area_pendente, 1e-9)
+                area_pendente -= quadra.area
+            
+            bloco = self._lotes_da_quadra(quadra, i, primeiro_id=total)
+            if len(bloco):
+                total += len(bloco)
+                yield bloco
+    
+    def _lotes_da_quadra(self, quadra: Polygon, quadra_id: int, primeiro_id: int = 0) -> TabelaFeicoes:
+        """Lotes de uma quadra (já com lascas incorporadas), em uma tabela com ids a partir de `primeiro_id`."""
+        bloco = TabelaFeicoes('LOTES', primeiro_id=primeiro_id)
+        
+        # Estratégia baseada no tamanho da quadra
+        if quadra.area < self.parametros['area_minima_lote'] * 2:
+            # Quadra pequena: usar como lote único
+            if self._quadra_tem_acesso_rua(quadra):
+                bloco.adicionar([quadra], quadra_id=quadra_id, estrategias=['quadra_unica'])
+                print(f"  Quadra {quadra_id+1} convertida em lote único")
+        else:
+            # Quadra grande: subdividir otimizadamente
+            lotes_quadra, estrategias = self._subdividir_quadra_memorizada(quadra, quadra_id+1)
+            lotes_quadra = self._limpar_lascas_quadra(quadra, lotes_quadra)
+            bloco.adicionar(lotes_quadra, quadra_id=quadra_id, estrategias=estrategias)
+            print(f"  Lotes criados na quadra {quadra_id+1}: {len(lotes_quadra)}")
+        return self._medir_frentes(bloco)
+
+    def _medir_frentes(self, bloco: TabelaFeicoes) -> TabelaFeicoes:
+        """Testada e profundidade dos lotes do bloco medidas pela frente para a rua (dimensoes_frente_rua)."""
+        if len(bloco) and self._obter_indice_ruas() is not None:
+            bloco.definir_dimensoes(*dimensoes_frente_rua(bloco.geometrias, self._indice_ruas))
+        return bloco
+    
+    def _grade_precisao(self) -> float:
+        """Grade do modelo de precisão (m); 0 desativa o arredondamento."""
+        return self.parametros.get('grade_precisao', 0.001)
+    
+    def _limites_lasca(self) -> Tuple[float, float]:
+        """Área (m²) e largura média (m) abaixo das quais um fragmento é tratado como lasca."""
+        return self.parametros.get('area_lasca', 1.0), self.parametros.get('largura_lasca', 0.3)
+    
+    def _limpar_lascas_quadra(self, quadra: Polygon, lotes: List[Polygon]) -> List[Polygon]:
+        """
+        Fronteira de etapa dos lotes de uma quadra: arredonda os lotes para a
+        grade de precisão e incorpora as lascas que sobram entre eles (e entre
+        eles e a divisa da quadra) ao lote vizinho de maior divisa comum.
+        A quantidade e a ordem dos lotes são preservadas.
+        """
+        if not lotes:
+            return lotes
+        
+        grade = self._grade_precisao()
+        geoms = np.asarray(lotes, dtype=object)
+        if grade > 0:
+            arredondados = np.array([fixar_precisao(lote, grade) for lote in geoms], dtype=object)
+            validos = shapely.get_type_id(arredondados) == 3
+            geoms = np.where(validos, arredondados, geoms)
+        
+        sobras = shapely.get_parts(quadra.difference(shapely.union_all(geoms)))
+        sobras = sobras[shapely.get_type_id(sobras) == 3] if len(sobras) else sobras
+        if len(sobras) == 0:
+            return list(geoms)
+        
+        lascas = sobras[eh_lasca(sobras, *self._limites_lasca())]
+        return incorporar_lascas(list(geoms), list(lascas), tolerancia=max(grade, 1e-6))
+    
+    def _criar_grade_ocupacao(self, incluir_lotes: bool = False) -> GradeOcupacao:
+        """Grade de ocupação do perímetro internalizado com as ruas (e, opcionalmente, os lotes) marcadas."""
+        grade = GradeOcupacao(self.perimetro_internalizado, self.parametros.get('resolucao_grade_ocupacao', 1.0))
+        grade.marcar(self.ruas)
+        if incluir_lotes:
+            grade.marcar(self.lotes)
+        return grade
+    
+    def _subdividir_quadra_memorizada(self, quadra: Polygon, numero_quadra: int) -> Tuple[List[Polygon], List[str]]:
+        """
+        Subdivide a quadra reaproveitando o parcelamento de uma quadra congruente
+        (mesma forma a menos de translação/rotação e mesmas bordas com rua).
+        """
+        if self.cache_quadras is None:
+            return self._subdividir_quadra_no_orcamento(quadra, numero_quadra)
+        
+        forma = self.cache_quadras.forma(quadra, self._mascara_bordas_com_rua(quadra))
+        resultado = self.cache_quadras.obter(forma, quadra)
+        if resultado is not None:
+            return resultado
+        
+        lotes, estrategias = self._subdividir_quadra_no_orcamento(quadra, numero_quadra)
+        # Parcelamento truncado pelo orçamento não vale para as quadras congruentes
+        if not self._quadra_truncada:
+            self.cache_quadras.guardar(forma, lotes, estrategias)
+        return lotes, estrategias
+    
+    def _prazo_esgotado(self) -> bool:
+        """
+        Indica se a fatia do orçamento de tempo da quadra atual já acabou. Só é
+        consultado antes de um passo que deixa de rodar quando o prazo acabou,
+        então um resultado verdadeiro marca a quadra como truncada.
+        """
+        esgotado = self._prazo_quadra is not None and time.perf_counter() > self._prazo_quadra
+        self._quadra_truncada = self._quadra_truncada or esgotado
+        return esgotado
+    
+    def _marcar_truncada(self, numero_quadra: int):
+        """Lista a quadra em quadras_truncadas se alguma estratégia ou passo ficou sem rodar."""
+        if self._quadra_truncada:
+            self.quadras_truncadas.append(numero_quadra - 1)
+            print(f"  Quadra {numero_quadra} truncada pelo orçamento de tempo")
+    
+    def _subdividir_quadra_no_orcamento(self, quadra: Polygon, numero_quadra: int) -> Tuple[List[Polygon], List[str]]:
+        """
+        Subdivisão "anytime": sem orçamento de tempo, usa a subdivisão completa
+        (esquinas, bordas e centro). Com orçamento, roda as estratégias da mais
+        barata para a mais cara (grade, bordas, esquinas, triangulação) e fica
+        com o melhor resultado obtido até o fim da fatia da quadra; as
+        estratégias também verificam o prazo em seus laços internos. A grade,
+        vetorizada, sempre roda, para que nenhuma quadra fique sem resultado.
+        
+        Com parametros['disputa_estrategias'] a quadra é disputada pelas
+        estratégias completas de loteamento_disputa (ver
+        _subdividir_quadra_em_disputa).
+        """
+        self._quadra_truncada = False
+        nomes = estrategias_disputa(self.parametros)
+        if nomes:
+            return self._subdividir_quadra_em_disputa(quadra, numero_quadra, nomes)
+        if self._prazo_quadra is None:
+            return self._subdividir_quadra_com_estrategias(quadra, numero_quadra)
+        
+        estrategias = [
+            self._subdividir_em_grade,
+            self._subdividir_por_bordas,
+            self._subdividir_quadra_com_estrategias,
+            self._subdividir_por_triangulacao,
+        ]
+        melhor, melhor_pontuacao = ([], []), None
+        for ordem, estrategia in enumerate(estrategias):
+            if ordem > 0 and self._prazo_esgotado():
+                break
+            lotes, nomes = estrategia(quadra, numero_quadra)
+            pontuacao = self._pontuar_parcelamento(lotes, quadra.area)
+            if melhor_pontuacao is None or pontuacao > melhor_pontuacao:
+                melhor, melhor_pontuacao = (lotes, nomes), pontuacao
+        
+        self._marcar_truncada(numero_quadra)
+        return melhor
+    
+    def _subdividir_quadra_em_disputa(self, quadra: Polygon, numero_quadra: int,
+                                      nomes: List[str]) -> Tuple[List[Polygon], List[str]]:
+        """
+        Disputa de estratégias: cada estratégia completa (esquinas, bordas
+        regulares, grade, BSP) parcela a quadra inteira e fica o parcelamento
+        de maior pontuação de qualidade (ver _pontuar_parcelamento). Em série
+        aqui; com workers_quadras > 1 o escalonador roda as estratégias de uma
+        quadra em workers diferentes.
+        """
+        lotes, estrategias, vencedora, avaliacao = disputar_estrategias(self, quadra, numero_quadra, nomes)
+        self.registrar_vitoria_disputa(numero_quadra, vencedora, avaliacao)
+        self._marcar_truncada(numero_quadra)
+        return lotes, estrategias
+    
+    def registrar_vitoria_disputa(self, numero_quadra: int, vencedora: str, avaliacao: Dict[str, float]):
+        """Contabiliza a estratégia vencedora da disputa em uma quadra."""
+        self.vitorias_disputa[vencedora] = self.vitorias_disputa.get(vencedora, 0) + 1
+        print(f"  Disputa na quadra {numero_quadra}: {vencedora} "
+              f"({avaliacao['conformes']} de {avaliacao['lotes']} lotes conformes)")
+    
+    def _obter_indice_ruas(self) -> Optional[IndiceRuas]:
+        """Índice das ruas das métricas de qualidade, montado uma vez por subdivisão (None sem ruas)."""
+        if self._indice_ruas is None and len(self.ruas):
+            self._indice_ruas = IndiceRuas(self.ruas)
+        return self._indice_ruas
+
+    def _metricas_qualidade(self, lotes) -> np.ndarray:
+        """Tabela de métricas de qualidade dos lotes (loteamento_qualidade), com o índice das ruas em cache."""
+        parametros = self.parametros
+        return metricas_lotes(lotes, self._obter_indice_ruas(), parametros['area_minima_lote'],
+                              parametros['testada_minima_lote'],
+                              area_maxima=parametros.get('area_maxima_lote', math.inf),
+                              profundidade_minima=parametros.get('profundidade_minima_lote', 0.0),
+                              profundidade_maxima=parametros.get('profundidade_maxima_lote', math.inf))
+    
+    def _pontuar_parcelamento(self, lotes: List[Polygon], area: Optional[float] = None) -> float:
+        """
+        Pontuação de um parcelamento (loteamento_qualidade.resumir_metricas):
+        lotes conformes (acesso, testada sobre a rua, área e profundidade)
+        menos os não conformes e, no empate, forma e aproveitamento da `area`
+        parcelada.
+        """
+        return resumir_metricas(self._metricas_qualidade(lotes), area)['pontuacao']
+    
+    def _subdividir_em_grade(self, quadra: Polygon, numero_quadra: int) -> Tuple[List[Polygon], List[str]]:
+        """Grade alinhada ao eixo principal: faixas da testada preferencial cortadas na profundidade padrão."""
+        try:
+            angulo = angulo_eixo_principal(quadra)
+            lotes = []
+            for faixa in fatiar_em_faixas(quadra, self.parametros['testada_preferencial_lote'], angulo):
+                lotes.extend(fatiar_em_faixas(faixa, self.parametros['profundidade_padrao_lote'], angulo + 90))
+            lotes = [lote for lote in lotes if isinstance(lote, Polygon)
+                     and lote.area >= self.parametros['area_minima_lote']]
+            return lotes, ['grade'] * len(lotes)
+            
+        except Exception as e:
+            print(f"Erro na subdivisão em grade da quadra {numero_quadra}: {e}")
+            return [], []
+    
+    def _subdividir_por_bordas(self, quadra: Polygon, numero_quadra: int) -> Tuple[List[Polygon], List[str]]:
+        """Lotes ao longo das bordas com rua e, no que sobrar, lotes de centro (sem lotes de esquina)."""
+        try:
+            area_minima = self.parametros['area_minima_lote']
+            alocador = AlocadorLotes(area_minima, tamanho_celula=self.parametros['profundidade_padrao_lote'])
+            lotes_bordas = alocador.alocar(self._criar_lotes_bordas_otimizados(quadra, {}), 'borda')
+            
+            area_restante = quadra.difference(unary_union(lotes_bordas)) if lotes_bordas else quadra
+            if isinstance(area_restante, Polygon) and area_restante.area > area_minima and not self._prazo_esgotado():
+                alocador.alocar(self._criar_lotes_centro_adaptativos(area_restante), 'centro')
+            return list(alocador.lotes), list(alocador.estrategias)
+            
+        except Exception as e:
+            print(f"Erro na subdivisão por bordas da quadra {numero_quadra}: {e}")
+            return [], []
+    
+    def _subdividir_por_triangulacao(self, quadra: Polygon, numero_quadra: int) -> Tuple[List[Polygon], List[str]]:
+        """Triangulação adaptativa da quadra inteira (último recurso para quadras muito irregulares)."""
+        lotes = self._triangular_area_adaptativa(quadra)
+        return lotes, ['triangulacao'] * len(lotes)
     
     def _subdividir_quadra_otimizada(self, quadra: Polygon, numero_quadra: int) -> List[Polygon]:
+        """Subdivide uma quadra e retorna apenas os lotes (ver _subdividir_quadra_com_estrategias)."""
+        lotes, _ = self._subdividir_quadra_com_estrategias(quadra, numero_quadra)
+        return lotes
+    
+    def _subdividir_quadra_com_estrategias(self, quadra: Polygon, numero_quadra: int,
+                                           lotes_por_borda: Optional[Dict[int, List[Polygon]]] = None
+                                           ) -> Tuple[List[Polygon], List[str]]:
         """
         Subdivide uma quadra de forma otimizada considerando:
         - Lotes de esquina com orientação otimizada
         - Máximo aproveitamento de área
         - Distribuição inteligente
-        """
-        lotes = []
         
+        Todos os candidatos passam pelo alocador com índice espacial incremental,
+        que recorta sobreposições com lotes já aceitos na quadra.
+        
+        `lotes_por_borda` traz os lotes candidatos de bordas já calculados em
+        outro processo (ver _criar_lotes_bordas_otimizados).
+        """
         try:
-            # Analisar a geometria da quadra
-            analise = self._analisar_geometria_quadra(quadra)
+            area_minima = self.parametros['area_minima_lote']
+            alocador = AlocadorLotes(area_minima, tamanho_celula=self.parametros['profundidade_padrao_lote'])
             
             # Estratégia 1: Lotes de esquina otimizados
-            lotes_esquina = self._criar_lotes_esquina_otimizados(quadra, analise)
-            lotes.extend(lotes_esquina)
-            
-            # Calcular área restante
-            if lotes_esquina:
-                area_usada = unary_union(lotes_esquina)
-                area_restante = quadra.difference(area_usada)
-            else:
-                area_restante = quadra
+            analise, area_restante = self._alocar_esquinas(quadra, alocador)
             
             # Estratégia 2: Lotes ao longo das bordas
-            if isinstance(area_restante, Polygon) and area_restante.area > self.parametros['area_minima_lote']:
-                lotes_bordas = self._criar_lotes_bordas_otimizados(area_restante, analise)
-                lotes.extend(lotes_bordas)
+            if isinstance(area_restante, Polygon) and area_restante.area > area_minima:
+                lotes_bordas = alocador.alocar(
+                    self._criar_lotes_bordas_otimizados(area_restante, analise, lotes_por_borda), 'borda')
                 
                 # Atualizar área restante
                 if lotes_bordas:
@@ -511,21 +1045,22 @@ class LoteamentoProcessorUltraAvancado:
                     area_restante = area_restante.difference(area_usada_bordas)
             
             # Estratégia 3: Lotes no centro (se sobrar área significativa)
-            if isinstance(area_restante, Polygon) and area_restante.area > self.parametros['area_minima_lote']:
-                lotes_centro = self._criar_lotes_centro_adaptativos(area_restante)
-                lotes.extend(lotes_centro)
-            
-            # Filtrar lotes muito pequenos
-            lotes_validos = []
-            for lote in lotes:
-                if isinstance(lote, Polygon) and lote.area >= self.parametros['area_minima_lote']:
-                    lotes_validos.append(lote)
+            if isinstance(area_restante, Polygon) and area_restante.area > area_minima and not self._prazo_esgotado():
+                alocador.alocar(self._criar_lotes_centro_adaptativos(area_restante), 'centro')
             
-            return lotes_validos
+            return list(alocador.lotes), list(alocador.estrategias)
             
         except Exception as e:
             print(f"Erro na subdivisão otimizada da quadra {numero_quadra}: {e}")
-            return []
+            return [], []
+    
+    def _alocar_esquinas(self, quadra: Polygon, alocador: AlocadorLotes) -> Tuple[Dict[str, Any], Any]:
+        """Analisa a quadra, aloca os lotes de esquina e retorna a análise e a área restante."""
+        analise = self._analisar_geometria_quadra(quadra)
+        lotes_esquina = alocador.alocar(self._criar_lotes_esquina_otimizados(quadra, analise), 'esquina')
+        if lotes_esquina:
+            return analise, quadra.difference(unary_union(lotes_esquina))
+        return analise, quadra
     
     def _analisar_geometria_quadra(self, quadra: Polygon) -> Dict[str, Any]:
         """
@@ -615,6 +1150,8 @@ class LoteamentoProcessorUltraAvancado:
             esquinas = analise['esquinas']
             
             for esquina in esquinas:
+                if self._prazo_esgotado():
+                    break
                 if esquina['angulo'] < 120:  # Apenas esquinas bem definidas
                     lote_esquina = self._criar_lote_esquina_individual(quadra, esquina, estrategia, analise)
                     if lote_esquina:
@@ -688,18 +1225,29 @@ class LoteamentoProcessorUltraAvancado:
             print(f"Erro ao criar lote de esquina individual: {e}")
             return None
     
-    def _criar_lotes_bordas_otimizados(self, area_restante: Polygon, analise: Dict[str, Any]) -> List[Polygon]:
+    def _criar_lotes_bordas_otimizados(self, area_restante: Polygon, analise: Dict[str, Any],
+                                       lotes_por_borda: Optional[Dict[int, List[Polygon]]] = None) -> List[Polygon]:
         """
-        Cria lotes otimizados ao longo das bordas.
+        Cria lotes otimizados ao longo das bordas. Os candidatos da borda i (na
+        ordem de _encontrar_bordas_com_rua) vêm de `lotes_por_borda[i]` quando
+        presentes (calculados pelo escalonador em paralelo) e, senão, de
+        _subdividir_borda_inteligente. Nos cantos entre bordas as faixas se
+        cruzam: quem recorta as sobreposições é o AlocadorLotes que recebe os
+        candidatos.
         """
         lotes_bordas = []
         
         try:
             # Encontrar bordas com acesso à rua
             bordas_com_rua = self._encontrar_bordas_com_rua(area_restante)
-            
-            for borda in bordas_com_rua:
-                lotes_borda = self._subdividir_borda_inteligente(area_restante, borda)
+
+            for indice, borda in enumerate(bordas_com_rua):
+                if self._prazo_esgotado():
+                    break
+                if lotes_por_borda is not None and indice in lotes_por_borda:
+                    lotes_borda = lotes_por_borda[indice]
+                else:
+                    lotes_borda = self._subdividir_borda_inteligente(area_restante, borda)
                 lotes_bordas.extend(lotes_borda)
             
             return lotes_bordas
@@ -711,28 +1259,37 @@ class LoteamentoProcessorUltraAvancado:
     def _subdividir_borda_inteligente(self, area: Polygon, borda: LineString) -> List[Polygon]:
         """
         Subdivide uma borda de forma inteligente.
+        As testadas são escolhidas por programação dinâmica dentro dos limites
+        mínimo/máximo, usando a profundidade disponível ao longo da borda.
         """
         lotes = []
         
         try:
+            borda = orientar_borda_para_dentro(area, borda)
             comprimento_borda = borda.length
+            resolucao = self.parametros.get('resolucao_testada', 0.5)
+            profundidade_max = self.parametros['profundidade_maxima_lote']
             
-            # Calcular número ótimo de lotes
-            testada_preferencial = self.parametros['testada_preferencial_lote']
-            num_lotes_ideal = max(1, int(comprimento_borda / testada_preferencial))
-            
-            # Ajustar baseado na densidade desejada
-            num_lotes_final = int(num_lotes_ideal * self.fator_densidade)
-            num_lotes_final = max(1, num_lotes_final)
-            
-            largura_lote = comprimento_borda / num_lotes_final
-            
-            # Criar lotes ao longo da borda
-            for i in range(num_lotes_final):
-                inicio_norm = i / num_lotes_final
-                fim_norm = (i + 1) / num_lotes_final
-                
-                lote = self._criar_lote_ao_longo_borda(area, borda, inicio_norm, fim_norm, largura_lote)
+            # Profundidade disponível em cada posição da borda (um único ray-cast vetorizado)
+            profundidades = profundidades_ao_longo_da_borda(area, borda, resolucao, profundidade_max)
+            
+            # Testada preferencial ajustada pela densidade desejada
+            testada_alvo = self.parametros['testada_preferencial_lote'] / self.fator_densidade
+            
+            segmentos = otimizar_testadas(
+                profundidades, resolucao,
+                self.parametros['testada_minima_lote'],
+                self.parametros['testada_maxima_lote'],
+                self.parametros['area_minima_lote'],
+                profundidade_minima=self.parametros['profundidade_minima_lote'],
+                profundidade_maxima=profundidade_max,
+                objetivo=self.parametros.get('prioridade_aproveitamento', 'Máximo Aproveitamento'),
+                testada_preferencial=testada_alvo
+            )
+            
+            for inicio, fim, profundidade in segmentos:
+                lote = self._criar_lote_ao_longo_borda(area, borda, inicio / comprimento_borda,
+                                                      fim / comprimento_borda, fim - inicio, profundidade)
                 if lote and lote.area >= self.parametros['area_minima_lote']:
                     lotes.append(lote)
             
@@ -743,9 +1300,11 @@ class LoteamentoProcessorUltraAvancado:
             return []
     
     def _criar_lote_ao_longo_borda(self, area: Polygon, borda: LineString, 
-                                  inicio_norm: float, fim_norm: float, largura: float) -> Optional[Polygon]:
+                                  inicio_norm: float, fim_norm: float, largura: float,
+                                  profundidade: Optional[float] = None) -> Optional[Polygon]:
         """
         Cria um lote ao longo de uma borda específica.
+        Se `profundidade` for informada, ela é tentada antes das profundidades adaptativas.
         """
         try:
             # Pontos ao longo da borda
@@ -771,9 +1330,11 @@ class LoteamentoProcessorUltraAvancado:
             profundidade_min = self.parametros['profundidade_minima_lote']
             
             # Tentar diferentes profundidades
-            for fator in [1.0, 0.8, 0.6, 1.2, 1.5]:
-                profundidade = min(profundidade_max, profundidade_min * fator)
-                
+            profundidades = [min(profundidade_max, profundidade_min * fator) for fator in [1.0, 0.8, 0.6, 1.2, 1.5]]
+            if profundidade:
+                profundidades.insert(0, profundidade)
+            
+            for profundidade in profundidades:
                 # Criar retângulo
                 pontos = [
                     (p1.x, p1.y),
@@ -830,77 +1391,18 @@ class LoteamentoProcessorUltraAvancado:
             return []
     
     def _dividir_verticalmente(self, area: Polygon) -> List[Polygon]:
-        """Divide área verticalmente"""
-        lotes = []
-        bounds = area.bounds
-        min_x, min_y, max_x, max_y = bounds
-        
-        largura_total = max_x - min_x
+        """Divide área em faixas transversais ao eixo principal, com largura da testada preferencial"""
         testada_preferencial = self.parametros['testada_preferencial_lote']
         
-        num_divisoes = max(1, int(largura_total / testada_preferencial))
-        largura_divisao = largura_total / num_divisoes
-        
-        for i in range(num_divisoes):
-            x = min_x + i * largura_divisao
-            linha_corte = LineString([(x, min_y - 10), (x, max_y + 10)])
-            
-            if i == 0:
-                # Primeira divisão
-                x_fim = min_x + largura_divisao
-                linha_fim = LineString([(x_fim, min_y - 10), (x_fim, max_y + 10)])
-                
-                # Criar polígono da divisão
-                pontos_divisao = [
-                    (min_x, min_y), (x_fim, min_y), (x_fim, max_y), (min_x, max_y)
-                ]
-                divisao = Polygon(pontos_divisao)
-                lote = divisao.intersection(area)
-                
-                if isinstance(lote, Polygon) and lote.area >= self.parametros['area_minima_lote']:
-                    lotes.append(lote)
-            else:
-                # Divisões intermediárias
-                x_inicio = min_x + (i-1) * largura_divisao
-                x_fim = min_x + i * largura_divisao
-                
-                pontos_divisao = [
-                    (x_inicio, min_y), (x_fim, min_y), (x_fim, max_y), (x_inicio, max_y)
-                ]
-                divisao = Polygon(pontos_divisao)
-                lote = divisao.intersection(area)
-                
-                if isinstance(lote, Polygon) and lote.area >= self.parametros['area_minima_lote']:
-                    lotes.append(lote)
-        
-        return lotes
+        faixas = fatiar_em_faixas(area, testada_preferencial, angulo_eixo_principal(area))
+        return [faixa for faixa in faixas if faixa.area >= self.parametros['area_minima_lote']]
     
     def _dividir_horizontalmente(self, area: Polygon) -> List[Polygon]:
-        """Divide área horizontalmente"""
-        lotes = []
-        bounds = area.bounds
-        min_x, min_y, max_x, max_y = bounds
-        
-        altura_total = max_y - min_y
+        """Divide área em faixas transversais ao eixo principal, com largura da profundidade padrão"""
         profundidade_preferencial = self.parametros['profundidade_padrao_lote']
         
-        num_divisoes = max(1, int(altura_total / profundidade_preferencial))
-        altura_divisao = altura_total / num_divisoes
-        
-        for i in range(num_divisoes):
-            y_inicio = min_y + i * altura_divisao
-            y_fim = min_y + (i + 1) * altura_divisao
-            
-            pontos_divisao = [
-                (min_x, y_inicio), (max_x, y_inicio), (max_x, y_fim), (min_x, y_fim)
-            ]
-            divisao = Polygon(pontos_divisao)
-            lote = divisao.intersection(area)
-            
-            if isinstance(lote, Polygon) and lote.area >= self.parametros['area_minima_lote']:
-                lotes.append(lote)
-        
-        return lotes
+        faixas = fatiar_em_faixas(area, profundidade_preferencial, angulo_eixo_principal(area))
+        return [faixa for faixa in faixas if faixa.area >= self.parametros['area_minima_lote']]
     
     def _triangular_area_adaptativa(self, area: Polygon) -> List[Polygon]:
         """Triangula área de forma adaptativa"""
@@ -929,6 +1431,8 @@ class LoteamentoProcessorUltraAvancado:
                 centroide = area.centroid
                 
                 for i in range(len(coords)):
+                    if self._prazo_esgotado():
+                        break
                     p1 = coords[i]
                     p2 = coords[(i + 1) % len(coords)]
                     
@@ -954,37 +1458,78 @@ class LoteamentoProcessorUltraAvancado:
         except:
             return False
     
+    def _mascara_bordas_com_rua(self, area: Polygon) -> np.ndarray:
+        """Indica, para cada aresta do anel exterior, se ela está a menos de 5 m de uma rua."""
+        coords = shapely.get_coordinates(area.exterior)
+        segmentos = shapely.linestrings(np.stack([coords[:-1], coords[1:]], axis=1))
+        if len(self.ruas) == 0:
+            return np.zeros(len(segmentos), dtype=bool)
+        ruas = np.asarray(self.ruas)
+        return (shapely.distance(segmentos[:, None], ruas[None, :]) < 5.0).any(axis=1)  # Tolerância de 5 metros
+    
     def _encontrar_bordas_com_rua(self, area: Polygon) -> List[LineString]:
         """Encontra bordas da área que fazem interface com ruas"""
-        bordas_com_rua = []
-        
         try:
-            # Converter perímetro em segmentos
             coords = list(area.exterior.coords)
-            
-            for i in range(len(coords) - 1):
-                segmento = LineString([coords[i], coords[i + 1]])
-                
-                # Verificar se o segmento está próximo de alguma rua
-                tem_acesso = False
-                for rua in self.ruas:
-                    if segmento.distance(rua) < 5.0:  # Tolerância de 5 metros
-                        tem_acesso = True
-                        break
-                
-                if tem_acesso:
-                    bordas_com_rua.append(segmento)
-            
-            return bordas_com_rua
+            mascara = self._mascara_bordas_com_rua(area)
+            return [LineString([coords[i], coords[i + 1]]) for i in np.nonzero(mascara)[0]]
             
         except Exception as e:
             print(f"Erro ao encontrar bordas com rua: {e}")
             return []
-    
+
+    def validar_acesso_lotes(self):
+        """
+        Validação pós-subdivisão do acesso de todos os lotes a ruas e calçadas
+        (uma consulta em massa, ver loteamento_acesso). Os lotes de centro de
+        quadra e da triangulação podem ficar encravados; conforme
+        parametros['tratamento_lotes_sem_acesso'] eles são só marcados
+        ('marcar', padrão), fundidos ao vizinho com acesso ('fundir') ou
+        passados a área comum ('area_comum'), que entra como área verde na
+        etapa seguinte. O relatório fica em self.acesso_lotes.
+
+        Opera sobre self.lotes: no fluxo acumulado, os eventos 'lotes' já
+        emitidos não refletem a fusão nem a retirada; sem acumular, a validação
+        é feita por quadra em `iter_lotes`.
+        """
+        self.areas_comuns_sem_acesso = []
+        try:
+            tratamento = self.parametros.get('tratamento_lotes_sem_acesso', 'marcar')
+            vias = list(self.ruas) + list(self.calcadas)
+            self.lotes, self.areas_comuns_sem_acesso, self.acesso_lotes = validar_acesso_lotes(
+                self.lotes, vias, tratamento, tolerancia=max(self._grade_precisao(), 1e-6))
+
+            self._informar_acesso()
+
+        except Exception as e:
+            print(f"Erro na validação de acesso dos lotes: {e}")
+            self.acesso_lotes = {}
+
+    def _validar_acesso_bloco(self, bloco: TabelaFeicoes, vias: IndiceRuas, tratamento: str, primeiro_id: int):
+        """
+        Validação de acesso dos lotes de uma quadra (fluxo sem acumular): retorna o
+        bloco tratado, com ids a partir de `primeiro_id`, e o relatório com ids
+        relativos ao bloco; as áreas comuns retiradas vão para self.areas_comuns_sem_acesso.
+        """
+        lotes, areas_comuns, relatorio = validar_acesso_lotes(
+            TabelaFeicoes.concatenar('LOTES', [bloco]), vias, tratamento,
+            tolerancia=max(self._grade_precisao(), 1e-6))
+        self.areas_comuns_sem_acesso.extend(areas_comuns)
+        tratado = TabelaFeicoes('LOTES', primeiro_id=primeiro_id)
+        tratado.anexar(lotes)
+        return tratado, relatorio
+
+    def _informar_acesso(self):
+        relatorio = self.acesso_lotes
+        print(f"Lotes sem acesso à rua: {relatorio['sem_acesso']} de {relatorio['verificados']} "
+              f"(fundidos: {relatorio['fundidos']}, áreas comuns: {relatorio['areas_comuns']})")
+
     def alocar_areas_comuns_estrategicamente(self):
         """
         Aloca áreas comuns de forma estratégica.
         """
+        self.deficit_area_verde = 0.0
+        self.deficit_area_institucional = 0.0
         try:
             area_total = self.perimetro_original.area
             percentual_verde = self.parametros['percentual_area_verde']
@@ -992,109 +1537,106 @@ class LoteamentoProcessorUltraAvancado:
             
             area_verde_necessaria = (percentual_verde / 100) * area_total
             area_institucional_necessaria = (percentual_institucional / 100) * area_total
-            
+
+            # Lotes sem acesso passados a área comum já contam para a meta de área verde
+            area_sem_acesso = sum(area.area for area in self.areas_comuns_sem_acesso)
+
             print(f"Área verde necessária: {area_verde_necessaria:.2f} m² ({percentual_verde}%)")
             print(f"Área institucional necessária: {area_institucional_necessaria:.2f} m² ({percentual_institucional}%)")
             
             # Encontrar áreas disponíveis para áreas comuns
             areas_disponiveis = self._encontrar_areas_para_areas_comuns()
             
-            # Alocar áreas verdes
-            self.areas_verdes = self._alocar_areas_verdes(areas_disponiveis, area_verde_necessaria)
-            
-            # Alocar áreas institucionais
-            self.areas_institucionais = self._alocar_areas_institucionais(areas_disponiveis, area_institucional_necessaria)
+            # Alocar áreas verdes e institucionais buscando as metas de área
+            (self.areas_verdes, self.areas_institucionais), deficits = self._alocar_areas_por_metas(
+                areas_disponiveis, max(area_verde_necessaria - area_sem_acesso, 0.0), area_institucional_necessaria)
+            self.deficit_area_verde, self.deficit_area_institucional = deficits
+            self.areas_verdes = fixar_precisao_camada(list(self.areas_verdes) + list(self.areas_comuns_sem_acesso),
+                                                      self._grade_precisao())
+            self.areas_institucionais = fixar_precisao_camada(self.areas_institucionais, self._grade_precisao())
             
             area_verde_total = sum(area.area for area in self.areas_verdes)
             area_institucional_total = sum(area.area for area in self.areas_institucionais)
             
             print(f"Áreas verdes alocadas: {len(self.areas_verdes)} ({area_verde_total:.2f} m²)")
             print(f"Áreas institucionais alocadas: {len(self.areas_institucionais)} ({area_institucional_total:.2f} m²)")
+            if self.deficit_area_verde > 0 or self.deficit_area_institucional > 0:
+                print(f"Aviso: área livre insuficiente para as metas; faltam {self.deficit_area_verde:.2f} m² "
+                      f"de área verde e {self.deficit_area_institucional:.2f} m² de área institucional")
             
         except Exception as e:
             print(f"Erro na alocação de áreas comuns: {e}")
             self.areas_verdes = []
             self.areas_institucionais = []
+        
+        self._consolidar_camadas()
     
     def _encontrar_areas_para_areas_comuns(self) -> List[Polygon]:
-        """Encontra áreas disponíveis para áreas comuns"""
-        areas_disponiveis = []
+        """
+        Encontra áreas disponíveis para áreas comuns.
         
+        A grade de ocupação (atualizada durante a subdivisão) aponta as regiões
+        livres conexas; a diferença exata só é calculada dentro delas.
+        """
         try:
-            # Área total disponível
-            area_total = self.perimetro_internalizado
-            
-            # Subtrair ruas
-            if self.ruas:
-                ruas_unidas = unary_union(self.ruas)
-                area_total = area_total.difference(ruas_unidas)
-            
-            # Subtrair lotes
-            if self.lotes:
-                lotes_unidos = unary_union(self.lotes)
-                area_restante = area_total.difference(lotes_unidos)
-                
-                if isinstance(area_restante, Polygon):
-                    areas_disponiveis.append(area_restante)
-                elif isinstance(area_restante, MultiPolygon):
-                    areas_disponiveis.extend([geom for geom in area_restante.geoms if isinstance(geom, Polygon)])
+            if self.grade_ocupacao is None:
+                self.grade_ocupacao = self._criar_grade_ocupacao(incluir_lotes=True)
             
             # Filtrar áreas muito pequenas
             area_minima = self.parametros['area_minima_lote'] * 0.5
-            areas_disponiveis = [area for area in areas_disponiveis if area.area >= area_minima]
-            
-            return areas_disponiveis
+            return self.grade_ocupacao.areas_livres(area_minima)
             
         except Exception as e:
             print(f"Erro ao encontrar áreas para áreas comuns: {e}")
             return []
     
-    def _alocar_areas_verdes(self, areas_disponiveis: List[Polygon], area_necessaria: float) -> List[Polygon]:
-        """Aloca áreas verdes"""
-        areas_verdes = []
-        area_alocada = 0
-        
-        # Ordenar áreas por tamanho (maiores primeiro)
-        areas_ordenadas = sorted(areas_disponiveis, key=lambda x: x.area, reverse=True)
-        
-        for area in areas_ordenadas:
-            if area_alocada >= area_necessaria:
-                break
-            
-            areas_verdes.append(area)
-            area_alocada += area.area
-        
-        return areas_verdes
+    def _alocar_areas_por_metas(self, areas_disponiveis: List[Polygon], area_verde_necessaria: float,
+                                area_institucional_necessaria: float
+                                ) -> Tuple[Tuple[List[Polygon], List[Polygon]], Tuple[float, float]]:
+        """
+        Reparte as áreas disponíveis entre as metas verde e institucional em
+        conjunto (loteamento_alocacao.alocar_por_metas): quando não há área
+        para as duas, ambas ficam com a mesma fração da meta. Se nenhum
+        subconjunto atingir a tolerância, o déficit é recortado da maior área livre.
+        Retorna ((verdes, institucionais), (déficit verde, déficit institucional)).
+        """
+        (verdes, institucionais), (deficit_verde, deficit_institucional) = alocar_por_metas(
+            areas_disponiveis,
+            [area_verde_necessaria, area_institucional_necessaria],
+            tolerancia_relativa=self.parametros.get('tolerancia_areas_comuns', 0.02),
+            recortar=self.parametros.get('recortar_areas_comuns', True))
+        return (verdes, institucionais), (deficit_verde, deficit_institucional)
     
-    def _alocar_areas_institucionais(self, areas_disponiveis: List[Polygon], area_necessaria: float) -> List[Polygon]:
-        """Aloca áreas institucionais"""
-        areas_institucionais = []
-        
-        # Para áreas institucionais, usar áreas menores que não foram usadas para verde
-        areas_usadas_verde = set(id(area) for area in self.areas_verdes)
-        areas_restantes = [area for area in areas_disponiveis if id(area) not in areas_usadas_verde]
-        
-        area_alocada = 0
-        for area in areas_restantes:
-            if area_alocada >= area_necessaria:
-                break
+    def auditar_cobertura(self) -> Dict[str, Any]:
+        """
+        Auditoria de cobertura (loteamento_cobertura): sobreposições, vazios e a
+        decomposição exata da área do perímetro entre as camadas. As somas
+        simples de 'area_lotes', 'area_calcadas' etc. contam duas vezes a
+        calçada sobre os lotes e as áreas comuns; as áreas da auditoria não.
+        """
+        try:
+            camadas = {atributo: getattr(self, atributo).geometrias for atributo in CAMADAS_COBERTURA}
+            return auditar_cobertura(self.perimetro_original, camadas, self.perimetro_internalizado,
+                                     self.parametros.get('largura_vazio_cobertura', 0.0))
             
-            areas_institucionais.append(area)
-            area_alocada += area.area
-        
-        return areas_institucionais
+        except Exception as e:
+            print(f"Erro na auditoria de cobertura: {e}")
+            return {}
     
     def calcular_estatisticas_detalhadas(self) -> Dict[str, float]:
         """Calcula estatísticas detalhadas do loteamento"""
         try:
+            self._consolidar_camadas()
+            
             area_total = self.perimetro_original.area
             num_lotes = len(self.lotes)
             
-            area_lotes = sum(lote.area for lote in self.lotes)
-            area_ruas = sum(rua.area for rua in self.ruas)
-            area_calcadas = sum(calcada.area for calcada in self.calcadas)
-            area_verde = sum(area.area for area in self.areas_verdes)
-            area_institucional = sum(area.area for area in self.areas_institucionais)
+            # Somas vetorizadas sobre as colunas de área
+            area_lotes = self.lotes.area_total()
+            area_ruas = self.ruas.area_total()
+            area_calcadas = self.calcadas.area_total()
+            area_verde = self.areas_verdes.area_total()
+            area_institucional = self.areas_institucionais.area_total()
             
             return {
                 'area_total': area_total,
@@ -1103,7 +1645,18 @@ class LoteamentoProcessorUltraAvancado:
                 'area_ruas': area_ruas,
                 'area_calcadas': area_calcadas,
                 'area_verde': area_verde,
-                'area_institucional': area_institucional
+                'area_institucional': area_institucional,
+                'deficit_area_verde': self.deficit_area_verde,
+                'deficit_area_institucional': self.deficit_area_institucional,
+                'lotes_esquina': int(self.lotes.coluna('esquina').sum()),
+                'lotes_por_estrategia': self.lotes.contagem_por_estrategia(),
+                'vertices_perimetro': dict(self.relatorio_perimetro),
+                'quadras_truncadas': list(self.quadras_truncadas),
+                'escalonamento': dict(self.metricas_escalonamento),
+                'disputa': dict(self.vitorias_disputa),
+                'acesso_lotes': dict(self.acesso_lotes),
+                'qualidade': resumir_metricas(self._metricas_qualidade(self.lotes.geometrias)),
+                'cobertura': self.auditar_cobertura()
             }
             
         except Exception as e:
@@ -1124,64 +1677,7 @@ class LoteamentoProcessorUltraAvancado:
         """
         try:
             doc = ezdxf.new('R2010')
-            msp = doc.modelspace()
-            
-            # Criar layers organizados
-            layers = {
-                'PERIMETRO': {'color': 1, 'linetype': 'CONTINUOUS'},  # Vermelho
-                'RUAS': {'color': 2, 'linetype': 'CONTINUOUS'},       # Amarelo
-                'CALCADAS': {'color': 8, 'linetype': 'CONTINUOUS'},   # Cinza
-                'QUADRAS': {'color': 3, 'linetype': 'DASHED'},        # Verde
-                'LOTES': {'color': 4, 'linetype': 'CONTINUOUS'},      # Ciano
-                'AREA_VERDE': {'color': 3, 'linetype': 'CONTINUOUS'}, # Verde
-                'AREA_INST': {'color': 6, 'linetype': 'CONTINUOUS'},  # Magenta
-                'MALHA_VIARIA': {'color': 7, 'linetype': 'CENTER'}    # Branco
-            }
-            
-            for layer_name, props in layers.items():
-                layer = doc.layers.new(layer_name)
-                layer.color = props['color']
-                layer.linetype = props['linetype']
-            
-            # Adicionar perímetro original
-            if self.perimetro_original:
-                coords = list(self.perimetro_original.exterior.coords)
-                msp.add_lwpolyline(coords, dxfattribs={'layer': 'PERIMETRO'})
-            
-            # Adicionar malha viária
-            for linha in self.malha_viaria:
-                coords = list(linha.coords)
-                msp.add_lwpolyline(coords, dxfattribs={'layer': 'MALHA_VIARIA'})
-            
-            # Adicionar ruas
-            for rua in self.ruas:
-                coords = list(rua.exterior.coords)
-                msp.add_lwpolyline(coords, dxfattribs={'layer': 'RUAS'})
-            
-            # Adicionar calçadas
-            for calcada in self.calcadas:
-                coords = list(calcada.exterior.coords)
-                msp.add_lwpolyline(coords, dxfattribs={'layer': 'CALCADAS'})
-            
-            # Adicionar quadras
-            for quadra in self.quadras:
-                coords = list(quadra.exterior.coords)
-                msp.add_lwpolyline(coords, dxfattribs={'layer': 'QUADRAS'})
-            
-            # Adicionar lotes
-            for lote in self.lotes:
-                coords = list(lote.exterior.coords)
-                msp.add_lwpolyline(coords, dxfattribs={'layer': 'LOTES'})
-            
-            # Adicionar áreas verdes
-            for area in self.areas_verdes:
-                coords = list(area.exterior.coords)
-                msp.add_lwpolyline(coords, dxfattribs={'layer': 'AREA_VERDE'})
-            
-            # Adicionar áreas institucionais
-            for area in self.areas_institucionais:
-                coords = list(area.exterior.coords)
-                msp.add_lwpolyline(coords, dxfattribs={'layer': 'AREA_INST'})
+            self.adicionar_ao_dxf(doc)
             
             # Salvar arquivo
             doc.saveas(arquivo_saida)
@@ -1189,4 +1685,68 @@ class LoteamentoProcessorUltraAvancado:
             
         except Exception as e:
             print(f"Erro ao exportar DXF: {e}")
-
+    
+    def adicionar_ao_dxf(self, doc, prefixo: str = ''):
+        """
+        Cria os layers (com prefixo opcional, ex.: 'GLEBA_01_') e adiciona
+        perímetro, malha viária e camadas poligonais ao modelspace do documento.
+        """
+        msp = doc.modelspace()
+        
+        # Criar layers organizados
+        layers = {
+            'PERIMETRO': {'color': 1, 'linetype': 'CONTINUOUS'},  # Vermelho
+            'RUAS': {'color': 2, 'linetype': 'CONTINUOUS'},       # Amarelo
+            'CALCADAS': {'color': 8, 'linetype': 'CONTINUOUS'},   # Cinza
+            'QUADRAS': {'color': 3, 'linetype': 'DASHED'},        # Verde
+            'LOTES': {'color': 4, 'linetype': 'CONTINUOUS'},      # Ciano
+            'AREA_VERDE': {'color': 3, 'linetype': 'CONTINUOUS'}, # Verde
+            'AREA_INST': {'color': 6, 'linetype': 'CONTINUOUS'},  # Magenta
+            'MALHA_VIARIA': {'color': 7, 'linetype': 'CENTER'}    # Branco
+        }
+        
+        for layer_name, props in layers.items():
+            layer = doc.layers.new(prefixo + layer_name)
+            layer.color = props['color']
+            layer.linetype = props['linetype']
+        
+        # Adicionar perímetro original
+        if self.perimetro_original:
+            coords = list(self.perimetro_original.exterior.coords)
+            msp.add_lwpolyline(coords, dxfattribs={'layer': prefixo + 'PERIMETRO'})
+        
+        # Adicionar malha viária
+        for linha in self.malha_viaria:
+            coords = list(linha.coords)
+            msp.add_lwpolyline(coords, dxfattribs={'layer': prefixo + 'MALHA_VIARIA'})
+        
+        # Adicionar camadas poligonais (coordenadas extraídas em lote por camada)
+        self._consolidar_camadas()
+        camadas = [
+            (self.ruas, 'RUAS'),
+            (self.calcadas, 'CALCADAS'),
+            (self.quadras, 'QUADRAS'),
+            (self.lotes, 'LOTES'),
+            (self.areas_verdes, 'AREA_VERDE'),
+            (self.areas_institucionais, 'AREA_INST'),
+        ]
+        for tabela, layer in camadas:
+            for coords in tabela.coordenadas_exteriores():
+                msp.add_lwpolyline(coords.tolist(), dxfattribs={'layer': prefixo + layer})
+    
+    def exportar_gis(self, arquivo_saida: str) -> bool:
+        """
+        Exporta lotes, quadras, ruas, calçadas e áreas comuns com atributos
+        (id, área, testada, profundidade, quadra e camada) para GeoPackage,
+        GeoParquet ou GeoJSON, conforme a extensão do arquivo.
+        """
+        try:
+            self._consolidar_camadas()
+            tabelas = {atributo: getattr(self, atributo) for atributo in CAMADAS_GIS}
+            contagem = exportar_camadas(tabelas, arquivo_saida, crs=self.parametros.get('crs'))
+            print(f"Arquivo GIS salvo: {arquivo_saida} ({sum(contagem.values())} feições)")
+            return True
+            
+        except Exception as e:
+            print(f"Erro ao exportar GIS: {e}")
+            return False
@@ -0,0 +1,255 @@
+import math
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import shapely
+
+from loteamento_tabela import dimensoes_retangulo_minimo
+
+# Distância (m) até uma rua para que o lote conte como tendo acesso
+DISTANCIA_ACESSO = 2.0
+
+# Folga (m) da testada sobre a rua, além da distância entre a aresta do lote e o segmento da rua
+TOLERANCIA_TESTADA = 0.05
+
+# Arestas do lote e da rua com até este ângulo entre si contam como paralelas (testada sobre a rua)
+ANGULO_PARALELO = 10.0
+
+# Tabela de métricas: uma linha por lote
+CAMPOS_QUALIDADE = [
+    ('area', np.float64),
+    ('perimetro', np.float64),
+    ('testada', np.float64),          # extensão ao longo da frente para a rua (ver dimensoes_frente_rua)
+    ('profundidade', np.float64),     # extensão perpendicular à frente
+    ('testada_rua', np.float64),      # comprimento do contorno voltado para rua
+    ('retangularidade', np.float64),  # área / área do retângulo mínimo rotacionado
+    ('compacidade', np.float64),      # 4 pi área / perímetro² (1 no círculo)
+    ('acesso_rua', np.bool_),
+    ('conforme', np.bool_),           # acesso, testada mínima sobre a rua e área e profundidade nos limites
+]
+
+# Pesos da forma e do aproveitamento na pontuação agregada (cada termo fica em [0, 1])
+PESO_FORMA = 0.5
+PESO_APROVEITAMENTO = 0.5
+
+
+def _segmentos(geometrias: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Início, fim e índice da geometria de cada segmento dos contornos das geometrias."""
+    partes, donos = shapely.get_parts(shapely.boundary(geometrias), return_index=True)
+    coords, indices = shapely.get_coordinates(partes, return_index=True)
+    consecutivos = indices[1:] == indices[:-1]
+    return coords[:-1][consecutivos], coords[1:][consecutivos], donos[indices[:-1][consecutivos]]
+
+
+class IndiceRuas:
+    """
+    Índice das ruas para as métricas de qualidade: STRtree dos segmentos dos
+    contornos das ruas. Consultar segmentos (e não as ruas inteiras, que
+    costumam ser um único polígono enorme) mantém o custo proporcional aos
+    lotes. Montado uma vez e reaproveitado entre chamadas.
+    """
+
+    def __init__(self, ruas):
+        self.geometrias = np.asarray(ruas, dtype=object)
+        self.inicios, self.fins, _ = _segmentos(self.geometrias)
+        self.segmentos = shapely.linestrings(np.stack([self.inicios, self.fins], axis=1))
+        self.arvore_segmentos = shapely.STRtree(self.segmentos)
+
+    def __len__(self) -> int:
+        return len(self.geometrias)
+
+
+def _trechos_sobre_rua(geoms: np.ndarray, indice: IndiceRuas, distancia_acesso: float):
+    """
+    Arestas dos lotes voltadas para a rua, a partir dos pares (aresta do
+    lote, segmento do contorno de uma rua) a até `distancia_acesso`: nos
+    pares quase paralelos (ANGULO_PARALELO), o trecho da aresta que se
+    projeta sobre o segmento e fica a até a distância do par mais
+    TOLERANCIA_TESTADA da reta dele (uma aresta que encosta na rua e se
+    afasta dela conta só o trecho encostado; uma aresta paralela do outro
+    lado da calçada conta inteira); nos demais, zero.
+    Retorna início, fim e lote de cada aresta, a aresta de cada par e o
+    trecho do par. Só aritmética de arrays depois da consulta à árvore.
+    """
+    inicios, fins, donos = _segmentos(geoms)
+    arestas = shapely.linestrings(np.stack([inicios, fins], axis=1))
+    aresta, segmento = indice.arvore_segmentos.query(arestas, predicate='dwithin', distance=distancia_acesso)
+    if len(aresta) == 0:
+        return inicios, fins, donos, aresta, np.zeros(0)
+
+    origem = indice.inicios[segmento]
+    direcao = indice.fins[segmento] - origem
+    comprimento = np.hypot(direcao[:, 0], direcao[:, 1])
+    direcao = direcao / np.maximum(comprimento, 1e-12)[:, None]
+
+    # Coordenadas da aresta no referencial do segmento: t ao longo dele, h afastamento da reta
+    relativo_inicio = inicios[aresta] - origem
+    relativo_fim = fins[aresta] - origem
+    t_inicio = relativo_inicio[:, 0] * direcao[:, 0] + relativo_inicio[:, 1] * direcao[:, 1]
+    t_fim = relativo_fim[:, 0] * direcao[:, 0] + relativo_fim[:, 1] * direcao[:, 1]
+    h_inicio = direcao[:, 0] * relativo_inicio[:, 1] - direcao[:, 1] * relativo_inicio[:, 0]
+    h_fim = direcao[:, 0] * relativo_fim[:, 1] - direcao[:, 1] * relativo_fim[:, 0]
+    extensao = np.maximum(np.hypot(t_fim - t_inicio, h_fim - h_inicio), 1e-12)
+    paralela = np.abs(h_fim - h_inicio) / extensao <= math.sin(math.radians(ANGULO_PARALELO))
+
+    # Trecho da aresta que se projeta sobre o segmento e fica a até `faixa` da reta dele (h é linear em t)
+    faixa = shapely.distance(arestas[aresta], indice.segmentos[segmento]) + TOLERANCIA_TESTADA
+    inclinacao = np.divide(h_fim - h_inicio, t_fim - t_inicio, out=np.zeros(len(aresta)),
+                           where=np.abs(t_fim - t_inicio) > 1e-12)
+    h_meio = h_inicio - inclinacao * t_inicio  # h na origem do segmento (t = 0)
+    inferior = np.maximum(np.minimum(t_inicio, t_fim), 0)
+    superior = np.minimum(np.maximum(t_inicio, t_fim), comprimento)
+    inclinada = np.abs(inclinacao) > 1e-12
+    limite_a = np.divide(-faixa - h_meio, inclinacao, out=np.full(len(aresta), -np.inf), where=inclinada)
+    limite_b = np.divide(faixa - h_meio, inclinacao, out=np.full(len(aresta), np.inf), where=inclinada)
+    perto = inclinada | (np.abs(h_meio) <= faixa)
+    inferior = np.maximum(inferior, np.minimum(limite_a, limite_b))
+    superior = np.minimum(superior, np.maximum(limite_a, limite_b))
+    trechos = np.where(paralela & perto, np.maximum(superior - inferior, 0.0), 0.0)
+    return inicios, fins, donos, aresta, trechos
+
+
+def _acesso_e_testada(geoms: np.ndarray, indice: IndiceRuas,
+                      distancia_acesso: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Acesso e testada sobre a rua de cada lote (ver `_trechos_sobre_rua`): o
+    lote tem acesso se alguma aresta dele está a até `distancia_acesso` de
+    uma rua; a testada soma os trechos das arestas voltadas para ela.
+    """
+    acesso = np.zeros(len(geoms), dtype=bool)
+    _, _, donos, aresta, trechos = _trechos_sobre_rua(geoms, indice, distancia_acesso)
+    acesso[donos[aresta]] = True
+    return acesso, np.bincount(donos[aresta], weights=trechos, minlength=len(geoms))
+
+
+def dimensoes_frente_rua(lotes, ruas=None, distancia_acesso: float = DISTANCIA_ACESSO):
+    """
+    Testada e profundidade de cada lote medidas pela frente: a testada é a
+    extensão do lote ao longo de uma aresta voltada para a rua (ver
+    `_trechos_sobre_rua`) e a profundidade, a extensão perpendicular a ela.
+    Com mais de uma frente (lote de esquina), vale a de menor extensão, a
+    testada principal. Um lote largo e raso com uma só frente tem testada
+    maior que a profundidade. Lotes sem aresta voltada para a rua (ou sem
+    `ruas`, um IndiceRuas ou as geometrias das ruas) ficam com os lados do
+    retângulo mínimo rotacionado (`dimensoes_retangulo_minimo`).
+    """
+    geoms = np.asarray(lotes, dtype=object)
+    testada, profundidade = dimensoes_retangulo_minimo(geoms)
+    if ruas is not None and not isinstance(ruas, IndiceRuas):
+        ruas = IndiceRuas(ruas)
+    if len(geoms) == 0 or ruas is None or len(ruas) == 0:
+        return testada, profundidade
+
+    inicios, fins, donos, aresta, trechos = _trechos_sobre_rua(geoms, ruas, distancia_acesso)
+    frentes = np.flatnonzero(np.bincount(aresta, weights=trechos, minlength=len(inicios)) > 0)
+    if len(frentes) == 0:
+        return testada, profundidade
+    direcao = fins[frentes] - inicios[frentes]
+    direcao = direcao / np.maximum(np.hypot(direcao[:, 0], direcao[:, 1]), 1e-12)[:, None]
+
+    # Extensão dos vértices do lote ao longo de cada frente (t) e na perpendicular (h)
+    coords, indices = shapely.get_coordinates(geoms[donos[frentes]], return_index=True)
+    direcao = direcao[indices]
+    t = coords[:, 0] * direcao[:, 0] + coords[:, 1] * direcao[:, 1]
+    h = direcao[:, 0] * coords[:, 1] - direcao[:, 1] * coords[:, 0]
+    extensoes = []
+    for valores in (t, h):
+        maximo = np.full(len(frentes), -np.inf)
+        minimo = np.full(len(frentes), np.inf)
+        np.maximum.at(maximo, indices, valores)
+        np.minimum.at(minimo, indices, valores)
+        extensoes.append(maximo - minimo)
+    largura, fundo = extensoes
+
+    # Frente de menor extensão de cada lote
+    lote = donos[frentes]
+    ordem = np.lexsort((largura, lote))
+    escolhidas = ordem[np.r_[True, lote[ordem][1:] != lote[ordem][:-1]]]
+    testada[lote[escolhidas]] = largura[escolhidas]
+    profundidade[lote[escolhidas]] = fundo[escolhidas]
+    return testada, profundidade
+
+
+def metricas_lotes(lotes, ruas=None, area_minima: float = 0.0, testada_minima: float = 0.0,
+                   distancia_acesso: float = DISTANCIA_ACESSO, area_maxima: float = math.inf,
+                   profundidade_minima: float = 0.0, profundidade_maxima: float = math.inf) -> np.ndarray:
+    """
+    Métricas de qualidade de um array de lotes, calculadas de uma vez pelas
+    funções vetorizadas do shapely. `ruas` é um IndiceRuas (ou as geometrias
+    das ruas, para montar um). Retorna um array estruturado com os campos
+    de CAMPOS_QUALIDADE, uma linha por lote. Conforme é o lote com acesso,
+    testada sobre a rua de pelo menos `testada_minima` e área e profundidade
+    (medida pela frente) dentro dos limites.
+    """
+    geoms = np.asarray(lotes, dtype=object)
+    metricas = np.zeros(len(geoms), dtype=CAMPOS_QUALIDADE)
+    if len(geoms) == 0:
+        return metricas
+
+    areas = shapely.area(geoms)
+    perimetros = shapely.length(geoms)
+    lado_menor, lado_maior = dimensoes_retangulo_minimo(geoms)
+    metricas['area'] = areas
+    metricas['perimetro'] = perimetros
+    metricas['testada'] = lado_menor
+    metricas['profundidade'] = lado_maior
+    area_retangulo = lado_menor * lado_maior
+    metricas['retangularidade'] = np.divide(areas, area_retangulo, out=np.zeros(len(geoms)), where=area_retangulo > 0)
+    metricas['compacidade'] = np.divide(4 * math.pi * areas, perimetros ** 2, out=np.zeros(len(geoms)),
+                                        where=perimetros > 0)
+
+    if ruas is not None and not isinstance(ruas, IndiceRuas):
+        ruas = IndiceRuas(ruas) if len(ruas) else None
+    if ruas is not None:
+        metricas['acesso_rua'], metricas['testada_rua'] = _acesso_e_testada(geoms, ruas, distancia_acesso)
+        metricas['testada'], metricas['profundidade'] = dimensoes_frente_rua(geoms, ruas, distancia_acesso)
+
+    # Profundidade com a mesma folga da testada
+    profundidade = metricas['profundidade']
+    metricas['conforme'] = (metricas['acesso_rua'] & (metricas['testada_rua'] >= testada_minima)
+                            & (areas >= area_minima - 1e-6) & (areas <= area_maxima + 1e-6)
+                            & (profundidade >= profundidade_minima - TOLERANCIA_TESTADA)
+                            & (profundidade <= profundidade_maxima + TOLERANCIA_TESTADA))
+    return metricas
+
+
+def resumir_metricas(metricas: np.ndarray, area_referencia: Optional[float] = None) -> Dict[str, float]:
+    """
+    Agregados da tabela de métricas e a pontuação usada na escolha entre
+    parcelamentos (estratégias, disputa, varreduras de parâmetros):
+
+        pontuação = lotes conformes - lotes não conformes
+                    + 0,5 * retangularidade média dos conformes
+                    + 0,5 * área dos conformes / área de referência
+
+    Os dois últimos termos ficam em [0, 1], então o saldo de lotes decide e
+    forma e aproveitamento desempatam: cada lote fora das regras (sem
+    acesso, pequeno ou grande demais, raso ou fundo demais) custa o que um
+    conforme vale. A área de referência padrão é a área somada de todos os lotes.
+    """
+    conformes = metricas['conforme']
+    quantidade = len(metricas)
+    area_util = float(metricas['area'][conformes].sum())
+    if area_referencia is None:
+        area_referencia = float(metricas['area'].sum())
+    forma = float(metricas['retangularidade'][conformes].mean()) if conformes.any() else 0.0
+    aproveitamento = min(area_util / area_referencia, 1.0) if area_referencia > 0 else 0.0
+
+    def media(campo):
+        return float(metricas[campo].mean()) if quantidade else 0.0
+
+    return {
+        'lotes': quantidade,
+        'conformes': int(conformes.sum()),
+        'com_acesso': int(metricas['acesso_rua'].sum()),
+        'area_lotes': float(metricas['area'].sum()),
+        'area_util': area_util,
+        'testada_media': media('testada'),
+        'profundidade_media': media('profundidade'),
+        'retangularidade_media': media('retangularidade'),
+        'compacidade_media': media('compacidade'),
+        'fracao_conformes': float(conformes.mean()) if quantidade else 0.0,
+        'aproveitamento': aproveitamento,
+        'pontuacao': (2 * int(conformes.sum()) - quantidade + PESO_FORMA * forma
+                      + PESO_APROVEITAMENTO * aproveitamento),
+    }
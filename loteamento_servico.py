@@ -0,0 +1,426 @@
+import argparse
+import contextlib
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import ezdxf
+import numpy as np
+
+# Estados de um trabalho
+NA_FILA = 'na_fila'
+EXECUTANDO = 'executando'
+CONCLUIDO = 'concluido'
+ERRO = 'erro'
+CANCELADO = 'cancelado'
+ESTADOS_FINAIS = (CONCLUIDO, ERRO, CANCELADO)
+
+
+def _json_seguro(valor):
+    """Conversor para json.dumps: tipos NumPy viram tipos Python."""
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    return str(valor)
+
+
+def _executar_trabalho(pasta: str, parametros: Dict[str, Any], arquivo_entrada: str, arquivo_saida: str):
+    """
+    Corpo do processo de um trabalho: roda o processador ultra-avançado e
+    grava 'resultado.json' (estatísticas) e 'log.txt' (saída do processamento)
+    na pasta do trabalho.
+    """
+    from loteamento_processor_ultra_avancado import LoteamentoProcessorUltraAvancado
+
+    with open(os.path.join(pasta, 'log.txt'), 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        try:
+            processador = LoteamentoProcessorUltraAvancado(dict(parametros))
+            resultado = processador.processar_loteamento_ultra_avancado(arquivo_entrada, arquivo_saida)
+            cache = processador.cache_quadras
+            if cache is not None:
+                resultado['cache_quadras'] = {'acertos': cache.acertos, 'falhas': cache.falhas,
+                                              'compartilhadas': getattr(cache, 'carregadas', 0)}
+        except Exception as e:
+            print(f"Erro no trabalho: {e}")
+            resultado = {'sucesso': False, 'erro': str(e)}
+
+    caminho = os.path.join(pasta, 'resultado.json')
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, default=_json_seguro)
+    os.replace(caminho + '.tmp', caminho)
+
+
+class ServicoLoteamento:
+    """
+    Fila de trabalhos de loteamento compartilhada por vários usuários da
+    mesma máquina.
+
+    - os trabalhos esperam em uma fila de prioridade (maior prioridade
+      primeiro; na mesma prioridade, ordem de chegada);
+    - no máximo `max_workers` processos executam ao mesmo tempo. Cada
+      trabalho roda em um processo próprio (e não em um pool reaproveitado)
+      para que o cancelamento de um trabalho em execução possa encerrá-lo;
+    - cada trabalho tem uma pasta em `pasta_trabalhos` com a entrada, o DXF,
+      as estatísticas e o log;
+    - o cache de quadras congruentes é um arquivo SQLite único
+      (`arquivo_cache`), compartilhado por todos os trabalhos com os mesmos
+      parâmetros de parcelamento (ver loteamento_cache.CacheQuadrasPersistente).
+    """
+
+    def __init__(self, pasta_trabalhos: str, max_workers: Optional[int] = None,
+                 arquivo_cache: Optional[str] = None, intervalo: float = 0.1):
+        self.pasta_trabalhos = os.path.abspath(pasta_trabalhos)
+        os.makedirs(self.pasta_trabalhos, exist_ok=True)
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.arquivo_cache = arquivo_cache or os.path.join(self.pasta_trabalhos, 'cache_quadras.sqlite')
+        self.intervalo = intervalo
+        self.trabalhos: Dict[str, Dict[str, Any]] = {}
+        self._fila: List = []
+        self._sequencia = itertools.count()
+        self._processos: Dict[str, multiprocessing.Process] = {}
+        self._condicao = threading.Condition()
+        self._parar = False
+        self._despachante = threading.Thread(target=self._despachar, daemon=True)
+        self._despachante.start()
+
+    # ------------------------------------------------------------------
+    # Operações
+    # ------------------------------------------------------------------
+
+    def enviar(self, parametros: Dict[str, Any], arquivo_entrada: Optional[str] = None,
+               pontos: Optional[List] = None, prioridade: int = 0, nome: str = '') -> Dict[str, Any]:
+        """
+        Coloca um trabalho na fila. O perímetro é um arquivo DXF/KML já
+        existente na máquina (`arquivo_entrada`) ou uma lista de pontos
+        [x, y] ou [x, y, bulge], gravada como DXF na pasta do trabalho.
+        """
+        if not arquivo_entrada and not pontos:
+            raise ValueError("Informe 'arquivo_entrada' ou 'pontos'")
+        if arquivo_entrada and not os.path.exists(arquivo_entrada):
+            raise ValueError(f"Arquivo de entrada não encontrado: {arquivo_entrada}")
+
+        identificador = uuid.uuid4().hex[:12]
+        pasta = os.path.join(self.pasta_trabalhos, identificador)
+        os.makedirs(pasta)
+        if pontos:
+            arquivo_entrada = os.path.join(pasta, 'perimetro.dxf')
+            doc = ezdxf.new('R2010')
+            doc.modelspace().add_lwpolyline([tuple(p) + (0.0,) * (3 - len(p)) for p in pontos],
+                                            format='xyb', close=True)
+            doc.saveas(arquivo_entrada)
+
+        trabalho = {
+            'id': identificador,
+            'nome': nome or identificador,
+            'estado': NA_FILA,
+            'prioridade': int(prioridade),
+            'parametros': dict(parametros, arquivo_cache_quadras=self.arquivo_cache),
+            'arquivo_entrada': os.path.abspath(arquivo_entrada),
+            'arquivo_saida': os.path.join(pasta, 'loteamento.dxf'),
+            'pasta': pasta,
+            'enviado_em': time.time(),
+            'iniciado_em': None,
+            'concluido_em': None,
+            'resultado': None,
+        }
+        with self._condicao:
+            self.trabalhos[identificador] = trabalho
+            heapq.heappush(self._fila, (-trabalho['prioridade'], next(self._sequencia), identificador))
+            self._condicao.notify_all()
+        print(f"Trabalho {identificador} na fila (prioridade {trabalho['prioridade']})")
+        return self.consultar(identificador)
+
+    def consultar(self, identificador: str) -> Optional[Dict[str, Any]]:
+        """Estado público do trabalho (sem parâmetros nem caminhos internos), ou None."""
+        with self._condicao:
+            trabalho = self.trabalhos.get(identificador)
+            if trabalho is None:
+                return None
+            estado = {chave: trabalho[chave] for chave in
+                      ('id', 'nome', 'estado', 'prioridade', 'enviado_em', 'iniciado_em', 'concluido_em')}
+            if trabalho['estado'] == NA_FILA:
+                ordem = sorted(self._fila)
+                estado['posicao_fila'] = next(i for i, item in enumerate(ordem) if item[2] == identificador)
+            if trabalho['resultado'] is not None:
+                estado['resultado'] = trabalho['resultado']
+            return estado
+
+    def listar(self) -> List[Dict[str, Any]]:
+        return [self.consultar(identificador) for identificador in list(self.trabalhos)]
+
+    def cancelar(self, identificador: str) -> Optional[Dict[str, Any]]:
+        """Cancela um trabalho na fila ou em execução (o processo é encerrado)."""
+        with self._condicao:
+            trabalho = self.trabalhos.get(identificador)
+            if trabalho is None:
+                return None
+            if trabalho['estado'] == NA_FILA:
+                self._fila = [item for item in self._fila if item[2] != identificador]
+                heapq.heapify(self._fila)
+            elif trabalho['estado'] == EXECUTANDO:
+                processo = self._processos.pop(identificador)
+                processo.terminate()
+                processo.join()
+            else:
+                return self.consultar(identificador)
+            trabalho['estado'] = CANCELADO
+            trabalho['concluido_em'] = time.time()
+            self._condicao.notify_all()
+        print(f"Trabalho {identificador} cancelado")
+        return self.consultar(identificador)
+
+    def arquivo_dxf(self, identificador: str) -> Optional[str]:
+        """Caminho do DXF de um trabalho concluído com sucesso, ou None."""
+        trabalho = self.trabalhos.get(identificador)
+        if trabalho is None or trabalho['estado'] != CONCLUIDO or not os.path.exists(trabalho['arquivo_saida']):
+            return None
+        return trabalho['arquivo_saida']
+
+    def remover(self, identificador: str) -> bool:
+        """Apaga um trabalho já finalizado e a sua pasta."""
+        with self._condicao:
+            trabalho = self.trabalhos.get(identificador)
+            if trabalho is None or trabalho['estado'] not in ESTADOS_FINAIS:
+                return False
+            del self.trabalhos[identificador]
+        shutil.rmtree(trabalho['pasta'], ignore_errors=True)
+        return True
+
+    def aguardar(self, identificador: str, tempo_limite: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Bloqueia até o trabalho terminar (ou até o tempo limite) e retorna o estado."""
+        limite = None if tempo_limite is None else time.time() + tempo_limite
+        with self._condicao:
+            while self.trabalhos[identificador]['estado'] not in ESTADOS_FINAIS:
+                restante = None if limite is None else limite - time.time()
+                if restante is not None and restante <= 0:
+                    break
+                self._condicao.wait(restante)
+        return self.consultar(identificador)
+
+    def encerrar(self):
+        """Para o despachante e encerra os processos em execução."""
+        with self._condicao:
+            self._parar = True
+            for identificador, processo in self._processos.items():
+                processo.terminate()
+                processo.join()
+                self.trabalhos[identificador]['estado'] = CANCELADO
+            self._processos = {}
+            self._condicao.notify_all()
+        self._despachante.join()
+
+    # ------------------------------------------------------------------
+    # Despacho
+    # ------------------------------------------------------------------
+
+    def _coletar(self, identificador: str, processo: multiprocessing.Process):
+        trabalho = self.trabalhos[identificador]
+        caminho = os.path.join(trabalho['pasta'], 'resultado.json')
+        try:
+            with open(caminho, encoding='utf-8') as arquivo:
+                resultado = json.load(arquivo)
+        except (OSError, ValueError):
+            resultado = {'sucesso': False, 'erro': f"Processo terminou sem resultado (código {processo.exitcode})"}
+        trabalho['resultado'] = resultado
+        trabalho['estado'] = CONCLUIDO if resultado.get('sucesso') else ERRO
+        trabalho['concluido_em'] = time.time()
+        print(f"Trabalho {identificador}: {trabalho['estado']}")
+
+    def _despachar(self):
+        """Thread que recolhe os processos terminados e inicia os próximos da fila."""
+        with self._condicao:
+            while not self._parar:
+                for identificador, processo in list(self._processos.items()):
+                    if not processo.is_alive():
+                        processo.join()
+                        del self._processos[identificador]
+                        self._coletar(identificador, processo)
+                        self._condicao.notify_all()
+
+                while self._fila and len(self._processos) < self.max_workers:
+                    _, _, identificador = heapq.heappop(self._fila)
+                    trabalho = self.trabalhos[identificador]
+                    processo = multiprocessing.Process(
+                        target=_executar_trabalho, daemon=True,
+                        args=(trabalho['pasta'], trabalho['parametros'], trabalho['arquivo_entrada'],
+                              trabalho['arquivo_saida']))
+                    processo.start()
+                    self._processos[identificador] = processo
+                    trabalho['estado'] = EXECUTANDO
+                    trabalho['iniciado_em'] = time.time()
+                    self._condicao.notify_all()
+
+                self._condicao.wait(self.intervalo)
+
+
+def _criar_manipulador(servico: ServicoLoteamento):
+    """Classe de requisições HTTP ligada ao serviço."""
+
+    class Manipulador(BaseHTTPRequestHandler):
+        """
+        API JSON:
+        - POST   /trabalhos                 envia ({parametros, arquivo_entrada | pontos, prioridade, nome})
+        - GET    /trabalhos                 lista os trabalhos
+        - GET    /trabalhos/<id>            estado (e estatísticas, quando concluído)
+        - GET    /trabalhos/<id>/dxf        DXF do resultado
+        - POST   /trabalhos/<id>/cancelar   cancela (também DELETE /trabalhos/<id>)
+        """
+
+        def log_message(self, formato, *args):
+            pass
+
+        def _responder(self, status: int, corpo: Any):
+            dados = json.dumps(corpo, default=_json_seguro).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def _partes(self) -> List[str]:
+            return [parte for parte in self.path.split('?')[0].split('/') if parte]
+
+        def do_GET(self):
+            partes = self._partes()
+            if partes == ['trabalhos']:
+                return self._responder(HTTPStatus.OK, servico.listar())
+            if len(partes) == 2 and partes[0] == 'trabalhos':
+                estado = servico.consultar(partes[1])
+                if estado is None:
+                    return self._responder(HTTPStatus.NOT_FOUND, {'erro': 'Trabalho não encontrado'})
+                return self._responder(HTTPStatus.OK, estado)
+            if len(partes) == 3 and partes[0] == 'trabalhos' and partes[2] == 'dxf':
+                arquivo = servico.arquivo_dxf(partes[1])
+                if arquivo is None:
+                    return self._responder(HTTPStatus.NOT_FOUND, {'erro': 'DXF indisponível'})
+                with open(arquivo, 'rb') as entrada:
+                    dados = entrada.read()
+                self.send_response(HTTPStatus.OK)
+                self.send_header('Content-Type', 'application/dxf')
+                self.send_header('Content-Disposition', f'attachment; filename="{partes[1]}.dxf"')
+                self.send_header('Content-Length', str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+                return
+            self._responder(HTTPStatus.NOT_FOUND, {'erro': 'Rota inexistente'})
+
+        def do_POST(self):
+            partes = self._partes()
+            if partes == ['trabalhos']:
+                try:
+                    tamanho = int(self.headers.get('Content-Length', 0))
+                    pedido = json.loads(self.rfile.read(tamanho) or b'{}')
+                    estado = servico.enviar(pedido.get('parametros', {}), pedido.get('arquivo_entrada'),
+                                            pedido.get('pontos'), pedido.get('prioridade', 0), pedido.get('nome', ''))
+                except (ValueError, TypeError) as e:
+                    return self._responder(HTTPStatus.BAD_REQUEST, {'erro': str(e)})
+                return self._responder(HTTPStatus.ACCEPTED, estado)
+            if len(partes) == 3 and partes[0] == 'trabalhos' and partes[2] == 'cancelar':
+                return self._cancelar(partes[1])
+            self._responder(HTTPStatus.NOT_FOUND, {'erro': 'Rota inexistente'})
+
+        def do_DELETE(self):
+            partes = self._partes()
+            if len(partes) == 2 and partes[0] == 'trabalhos':
+                return self._cancelar(partes[1])
+            self._responder(HTTPStatus.NOT_FOUND, {'erro': 'Rota inexistente'})
+
+        def _cancelar(self, identificador: str):
+            estado = servico.cancelar(identificador)
+            if estado is None:
+                return self._responder(HTTPStatus.NOT_FOUND, {'erro': 'Trabalho não encontrado'})
+            self._responder(HTTPStatus.OK, estado)
+
+    return Manipulador
+
+
+def criar_servidor(servico: ServicoLoteamento, host: str = '127.0.0.1', porta: int = 8765) -> ThreadingHTTPServer:
+    """Servidor HTTP do serviço (porta 0 escolhe uma porta livre; ver servidor.server_address)."""
+    return ThreadingHTTPServer((host, porta), _criar_manipulador(servico))
+
+
+class ClienteServico:
+    """Cliente da API JSON do serviço, para a interface gráfica ou scripts."""
+
+    def __init__(self, url: str = 'http://127.0.0.1:8765', tempo_limite: float = 30.0):
+        self.url = url.rstrip('/')
+        self.tempo_limite = tempo_limite
+
+    def _pedir(self, metodo: str, caminho: str, corpo: Optional[Dict] = None) -> Any:
+        dados = json.dumps(corpo).encode('utf-8') if corpo is not None else None
+        pedido = urllib.request.Request(self.url + caminho, data=dados, method=metodo,
+                                        headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(pedido, timeout=self.tempo_limite) as resposta:
+                return json.loads(resposta.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(json.loads(e.read() or b'{}').get('erro', str(e))) from e
+
+    def enviar(self, parametros: Dict[str, Any], arquivo_entrada: Optional[str] = None,
+               pontos: Optional[List] = None, prioridade: int = 0, nome: str = '') -> Dict[str, Any]:
+        return self._pedir('POST', '/trabalhos', {'parametros': parametros, 'arquivo_entrada': arquivo_entrada,
+                                                  'pontos': pontos, 'prioridade': prioridade, 'nome': nome})
+
+    def consultar(self, identificador: str) -> Dict[str, Any]:
+        return self._pedir('GET', f'/trabalhos/{identificador}')
+
+    def listar(self) -> List[Dict[str, Any]]:
+        return self._pedir('GET', '/trabalhos')
+
+    def cancelar(self, identificador: str) -> Dict[str, Any]:
+        return self._pedir('POST', f'/trabalhos/{identificador}/cancelar')
+
+    def baixar_dxf(self, identificador: str, arquivo_saida: str) -> str:
+        with urllib.request.urlopen(f'{self.url}/trabalhos/{identificador}/dxf', timeout=self.tempo_limite) as resposta:
+            with open(arquivo_saida, 'wb') as saida:
+                shutil.copyfileobj(resposta, saida)
+        return arquivo_saida
+
+    def aguardar(self, identificador: str, intervalo: float = 0.5, tempo_limite: Optional[float] = None) -> Dict[str, Any]:
+        """Consulta o trabalho periodicamente até ele terminar."""
+        inicio = time.time()
+        while True:
+            estado = self.consultar(identificador)
+            if estado['estado'] in ESTADOS_FINAIS:
+                return estado
+            if tempo_limite is not None and time.time() - inicio > tempo_limite:
+                return estado
+            time.sleep(intervalo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço local de fila de trabalhos de loteamento")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help="processos simultâneos (padrão: núcleos)")
+    parser.add_argument('--pasta', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output', 'servico'))
+    parser.add_argument('--cache', default=None, help="arquivo SQLite do cache de quadras compartilhado")
+    argumentos = parser.parse_args()
+
+    servico = ServicoLoteamento(argumentos.pasta, argumentos.workers, argumentos.cache)
+    servidor = criar_servidor(servico, argumentos.host, argumentos.porta)
+    print(f"Serviço de loteamento em http://{argumentos.host}:{servidor.server_address[1]} "
+          f"({servico.max_workers} workers, trabalhos em {servico.pasta_trabalhos})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("Encerrando serviço...")
+    finally:
+        servidor.server_close()
+        servico.encerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import os
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import LineString, Polygon
+
+from loteamento_acesso import somar_relatorios_acesso
+from loteamento_perfil import perfil_ativo
+from loteamento_precisao import fixar_precisao_camada
+from loteamento_tabela import TabelaFeicoes
+from loteamento_transporte import criar_executor, desempacotar_resultado, empacotar_resultado
+
+CAMADAS_SUPERQUADRA = {
+    'quadras': 'QUADRAS',
+    'lotes': 'LOTES',
+    'areas_verdes': 'AREA_VERDE',
+    'areas_institucionais': 'AREA_INST',
+}
+
+
+def criar_vias_tronco(perimetro: Polygon, espacamento: float) -> List[LineString]:
+    """
+    Malha de vias tronco sobre o perímetro inteiro: linhas verticais e
+    horizontais igualmente espaçadas (no máximo `espacamento` entre si),
+    recortadas pelo perímetro. Trechos desconexos de uma mesma linha viram
+    vias separadas.
+    """
+    min_x, min_y, max_x, max_y = perimetro.bounds
+    linhas = []
+    num_verticais = int((max_x - min_x) / espacamento)
+    for i in range(1, num_verticais + 1):
+        x = min_x + i * (max_x - min_x) / (num_verticais + 1)
+        linhas.append(LineString([(x, min_y - 10), (x, max_y + 10)]))
+    num_horizontais = int((max_y - min_y) / espacamento)
+    for i in range(1, num_horizontais + 1):
+        y = min_y + i * (max_y - min_y) / (num_horizontais + 1)
+        linhas.append(LineString([(min_x - 10, y), (max_x + 10, y)]))
+    if not linhas:
+        return []
+
+    trechos = shapely.get_parts(shapely.intersection(np.asarray(linhas, dtype=object), perimetro))
+    trechos = trechos[(shapely.get_type_id(trechos) == 1) & (shapely.length(trechos) > 0)]
+    return list(trechos)
+
+
+def dividir_em_superquadras(perimetro: Polygon, vias_tronco: List[LineString], largura_rua: float,
+                            grade: float = 0.0) -> Tuple[List[Polygon], Any]:
+    """
+    Recorta o perímetro pelas vias tronco. Retorna as superquadras (partes
+    poligonais do perímetro fora do leito das vias tronco) e o leito unido.
+    """
+    if not vias_tronco:
+        return [perimetro], Polygon()
+    leito = shapely.buffer(shapely.union_all(vias_tronco), largura_rua / 2)
+    superquadras = fixar_precisao_camada(shapely.get_parts(perimetro.difference(leito)), grade)
+    return superquadras, leito
+
+
+def _processar_superquadra(classe, parametros: Dict, superquadra: Polygon, leito_vizinho) -> Dict[str, Any]:
+    """
+    Executa as etapas 3 a 6 (vias locais, quadras, subdivisão e áreas comuns)
+    em uma superquadra, como se ela fosse um perímetro já internalizado. O
+    trecho vizinho do leito das vias tronco entra como rua durante o
+    processamento, para que as bordas voltadas para ele contem como testada.
+    """
+    processador = classe(dict(parametros))
+    processador.perimetro_original = superquadra
+    processador.perimetro_internalizado = superquadra
+
+    processador.criar_sistema_viario_criativo()
+    ruas_locais = list(processador.ruas)
+    if not leito_vizinho.is_empty:
+        processador.ruas = TabelaFeicoes.de_geometrias('RUAS', ruas_locais + [leito_vizinho])
+    processador.formar_quadras_criativas()
+    processador.subdividir_quadras_ultra_otimizado()
+    processador.validar_acesso_lotes()
+    processador.alocar_areas_comuns_estrategicamente()
+
+    resultado = {atributo: getattr(processador, atributo) for atributo in CAMADAS_SUPERQUADRA}
+    resultado['malha_viaria'] = list(processador.malha_viaria)
+    resultado['quadras_truncadas'] = list(processador.quadras_truncadas)
+    resultado['acesso_lotes'] = dict(processador.acesso_lotes)
+    return resultado
+
+
+def _processar_superquadra_compartilhada(classe, parametros: Dict, superquadra: Polygon, leito_vizinho):
+    """_processar_superquadra em um worker: as camadas voltam pela memória compartilhada."""
+    return empacotar_resultado(_processar_superquadra(classe, parametros, superquadra, leito_vizinho))
+
+
+def executar_em_superquadras(processador, max_workers: int = None) -> List[Polygon]:
+    """
+    Modo de superquadras para perímetros muito grandes (etapas 3 a 6).
+
+    1. traça as vias tronco sobre o perímetro internalizado inteiro;
+    2. cada superquadra delimitada por elas é processada de forma independente
+       (vias locais, quadras, subdivisão e áreas comuns) em um processo
+       separado, com metas de áreas comuns proporcionais à sua área;
+    3. o resultado é costurado: ruas e calçadas são geradas uma única vez a
+       partir da malha unida (tronco + locais), de modo que os trechos que se
+       encontram nas divisas são fundidos, e as demais camadas são
+       concatenadas com quadra_id renumerado. Como as superquadras são
+       disjuntas, não há geometria duplicada entre elas.
+
+    Retorna as superquadras.
+    """
+    parametros = processador.parametros
+    perimetro = processador.perimetro_internalizado
+    largura_rua = parametros['largura_rua']
+
+    vias_tronco = criar_vias_tronco(perimetro, parametros.get('espacamento_vias_tronco', 400.0))
+    superquadras, leito = dividir_em_superquadras(perimetro, vias_tronco, largura_rua,
+                                                  processador._grade_precisao())
+    print(f"Vias tronco: {len(vias_tronco)}, superquadras: {len(superquadras)}")
+
+    # Metas de áreas comuns: as superquadras dividem a meta do perímetro inteiro
+    area_superquadras = sum(s.area for s in superquadras)
+    fator = processador.perimetro_original.area / area_superquadras if area_superquadras > 0 else 1.0
+    parametros_superquadra = dict(parametros)
+    for chave in ('percentual_area_verde', 'percentual_area_institucional'):
+        parametros_superquadra[chave] = parametros[chave] * fator
+
+    vizinhos = [leito.intersection(s.buffer(largura_rua)) for s in superquadras]
+    classe = type(processador)
+    max_workers = max_workers or parametros.get('num_workers') or os.cpu_count() or 1
+    if perfil_ativo(parametros):
+        max_workers = 1  # o perfil só enxerga o processo principal
+
+    # Orçamento de tempo: fatias proporcionais à área, multiplicadas pelos workers simultâneos
+    lista_parametros = [parametros_superquadra] * len(superquadras)
+    orcamento = processador.orcamento_tempo()
+    if orcamento and area_superquadras > 0:
+        simultaneos = min(max_workers, len(superquadras))
+        lista_parametros = [dict(parametros_superquadra, orcamento_tempo=orcamento * simultaneos * s.area / area_superquadras)
+                            for s in superquadras]
+    argumentos = ([classe] * len(superquadras), lista_parametros, superquadras, vizinhos)
+    if max_workers > 1 and len(superquadras) > 1:
+        with criar_executor(min(max_workers, len(superquadras))) as executor:
+            resultados = [desempacotar_resultado(r) for r in executor.map(_processar_superquadra_compartilhada,
+                                                                          *argumentos)]
+    else:
+        resultados = list(map(_processar_superquadra, *argumentos))
+
+    # Costura: malha viária unida e camadas concatenadas
+    processador.malha_viaria = vias_tronco + [linha for r in resultados for linha in r['malha_viaria']]
+    processador._gerar_ruas_e_calcadas()
+
+    deslocamentos = np.cumsum([0] + [len(r['quadras']) for r in resultados[:-1]]).tolist()
+    for atributo, camada in CAMADAS_SUPERQUADRA.items():
+        tabelas = [r[atributo] for r in resultados]
+        setattr(processador, atributo, TabelaFeicoes.concatenar(camada, tabelas, deslocamentos))
+    processador.quadras_truncadas = [indice + deslocamento for r, deslocamento in zip(resultados, deslocamentos)
+                                     for indice in r['quadras_truncadas']]
+    processador.acesso_lotes = somar_relatorios_acesso([r['acesso_lotes'] for r in resultados],
+                                                       [len(r['lotes']) for r in resultados])
+    processador.grade_ocupacao = None
+    processador.cache_quadras = None
+    processador._consolidar_camadas()
+
+    print(f"Superquadras costuradas: {len(processador.quadras)} quadras, {len(processador.lotes)} lotes, "
+          f"{len(processador.ruas)} ruas")
+    return superquadras
@@ -0,0 +1,410 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import shapely
+
+# Tipos que shapely.to_ragged_array codifica (ponto, linha, polígono e as versões multi)
+TIPOS_RAGGED = (0, 1, 3, 4, 5, 6)
+
+
+class TabelaFeicoes:
+    """
+    Armazenamento colunar de feições de uma camada (lotes, quadras, ruas...).
+
+    Mantém um array de geometrias e colunas NumPy paralelas:
+    id, quadra_id, area, testada, profundidade, esquina e estrategia (código).
+    Estatísticas, filtros e exportação operam sobre as colunas inteiras.
+
+    As geometrias ficam como objetos shapely enquanto a camada é trabalhada;
+    `compactar` as troca pelas coordenadas empacotadas (codificar_geometrias),
+    cerca de 90 bytes por lote retangular contra ~400 dos objetos, mais os
+    ~26 bytes das colunas. Colunas e `coordenadas_exteriores` não recriam os
+    objetos; o acesso às geometrias (iteração, filtro, substituição) os
+    recria e a tabela volta a ficar expandida até o próximo `compactar`.
+
+    Testada e profundidade saem do retângulo mínimo rotacionado ao inserir;
+    para lotes, quem conhece as ruas as substitui pelas medidas na frente
+    (`definir_dimensoes` com loteamento_qualidade.dimensoes_frente_rua).
+
+    Também se comporta como uma sequência de geometrias (len, iteração,
+    append/extend e conversão para array), para compatibilidade com o código
+    que trata as camadas como listas.
+    """
+
+    COLUNAS = {
+        'id': np.int32,
+        'quadra_id': np.int32,
+        'area': np.float64,
+        'testada': np.float32,
+        'profundidade': np.float32,
+        'esquina': np.bool_,
+        'estrategia': np.int8,
+    }
+
+    def __init__(self, camada: str = '', primeiro_id: int = 0):
+        self.camada = camada
+        self.nomes_estrategias = ['']
+        self._geometrias = np.empty(0, dtype=object)
+        self._compactadas = None  # (arrays, grupos) de codificar_geometrias, no lugar de _geometrias
+        self._colunas = {nome: np.empty(0, dtype=tipo) for nome, tipo in self.COLUNAS.items()}
+        self._pendentes = []
+        self._proximo_id = primeiro_id
+
+    @classmethod
+    def de_geometrias(cls, camada: str, geometrias: Iterable, quadra_id: int = -1,
+                      estrategia: str = '') -> 'TabelaFeicoes':
+        """Cria uma tabela a partir de uma sequência de geometrias."""
+        tabela = cls(camada)
+        geometrias = list(geometrias)
+        tabela.adicionar(geometrias, quadra_id=quadra_id,
+                         estrategias=[estrategia] * len(geometrias) if estrategia else None)
+        return tabela
+
+    @classmethod
+    def de_colunas(cls, camada: str, geometrias, colunas: Dict[str, np.ndarray],
+                   nomes_estrategias: List[str], proximo_id: Optional[int] = None) -> 'TabelaFeicoes':
+        """
+        Cria uma tabela a partir de colunas já calculadas (ex.: vindas de outro
+        processo). `geometrias` é um array ou o par (arrays, grupos) de
+        codificar_geometrias, e nesse caso a tabela já nasce compactada.
+        """
+        tabela = cls(camada)
+        tabela.nomes_estrategias = list(nomes_estrategias)
+        if isinstance(geometrias, tuple):
+            tabela._geometrias, tabela._compactadas = None, geometrias
+        else:
+            tabela._geometrias = np.asarray(geometrias, dtype=object)
+        tabela._colunas = {nome: np.asarray(colunas[nome], dtype=tipo) for nome, tipo in cls.COLUNAS.items()}
+        tabela._proximo_id = len(tabela) if proximo_id is None else proximo_id
+        return tabela
+
+    # ------------------------------------------------------------------
+    # Inserção
+    # ------------------------------------------------------------------
+
+    def _codigo_estrategia(self, nome: str) -> int:
+        if nome not in self.nomes_estrategias:
+            self.nomes_estrategias.append(nome)
+        return self.nomes_estrategias.index(nome)
+
+    def adicionar(self, geometrias: List, quadra_id=-1,
+                  estrategias: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Adiciona um bloco de geometrias; as colunas derivadas são calculadas de
+        forma vetorizada. Retorna os ids atribuídos.
+        """
+        geoms = np.asarray(list(geometrias), dtype=object)
+        n = len(geoms)
+        if n == 0:
+            return np.empty(0, dtype=np.int32)
+
+        ids = np.arange(self._proximo_id, self._proximo_id + n, dtype=np.int32)
+        self._proximo_id += n
+
+        if estrategias is None:
+            codigos = np.zeros(n, dtype=np.int8)
+        else:
+            codigos = np.array([self._codigo_estrategia(nome) for nome in estrategias], dtype=np.int8)
+
+        testada, profundidade = dimensoes_retangulo_minimo(geoms)
+        self._pendentes.append((geoms, {
+            'id': ids,
+            'quadra_id': np.broadcast_to(np.asarray(quadra_id, dtype=np.int32), (n,)).copy(),
+            'area': shapely.area(geoms),
+            'testada': testada.astype(np.float32),
+            'profundidade': profundidade.astype(np.float32),
+            'esquina': codigos == self.nomes_estrategias.index('esquina')
+                       if 'esquina' in self.nomes_estrategias else np.zeros(n, dtype=bool),
+            'estrategia': codigos,
+        }))
+        return ids
+
+    def append(self, geometria):
+        self.adicionar([geometria])
+
+    def extend(self, geometrias: Iterable):
+        self.adicionar(list(geometrias))
+
+    def _consolidar(self):
+        """Concatena os blocos pendentes nas colunas (inserção O(1) amortizada)."""
+        if not self._pendentes:
+            return
+        self._expandir()
+        self._geometrias = np.concatenate([self._geometrias] + [g for g, _ in self._pendentes])
+        for nome, tipo in self.COLUNAS.items():
+            blocos = [self._colunas[nome]] + [c[nome] for _, c in self._pendentes]
+            self._colunas[nome] = np.concatenate(blocos).astype(tipo, copy=False)
+        self._pendentes = []
+
+    @classmethod
+    def concatenar(cls, camada: str, tabelas: List['TabelaFeicoes'],
+                   deslocamentos_quadra: Optional[List[int]] = None) -> 'TabelaFeicoes':
+        """
+        Junta tabelas processadas separadamente (ex.: superquadras) em uma só,
+        sem recalcular as colunas: os ids são renumerados, os códigos de
+        estratégia remapeados e quadra_id (quando >= 0) deslocado por tabela.
+        """
+        resultado = cls(camada)
+        deslocamentos_quadra = deslocamentos_quadra or [0] * len(tabelas)
+        for tabela, deslocamento in zip(tabelas, deslocamentos_quadra):
+            resultado.anexar(tabela, deslocamento)
+        return resultado
+
+    def anexar(self, tabela: 'TabelaFeicoes', deslocamento_quadra: int = 0):
+        """Acrescenta as linhas de outra tabela sem recalcular as colunas (ver `concatenar`)."""
+        if len(tabela) == 0:
+            return
+        colunas = {nome: tabela.coluna(nome).copy() for nome in self.COLUNAS}
+        n = len(colunas['id'])
+        colunas['id'] = np.arange(self._proximo_id, self._proximo_id + n, dtype=np.int32)
+        self._proximo_id += n
+        mapa = np.array([self._codigo_estrategia(nome) for nome in tabela.nomes_estrategias], dtype=np.int8)
+        colunas['estrategia'] = mapa[colunas['estrategia']]
+        colunas['quadra_id'] = np.where(colunas['quadra_id'] >= 0, colunas['quadra_id'] + deslocamento_quadra, -1)
+        self._pendentes.append((tabela.geometrias, colunas))
+
+    # ------------------------------------------------------------------
+    # Acesso às colunas
+    # ------------------------------------------------------------------
+
+    @property
+    def geometrias(self) -> np.ndarray:
+        self._consolidar()
+        self._expandir()
+        return self._geometrias
+
+    @property
+    def compactada(self) -> bool:
+        return self._compactadas is not None
+
+    def compactar(self):
+        """Guarda as geometrias como coordenadas empacotadas e descarta os objetos shapely."""
+        self._consolidar()
+        if self._compactadas is None:
+            self._compactadas = codificar_geometrias(self._geometrias)
+            self._geometrias = None
+
+    def _expandir(self):
+        """Recria os objetos shapely de uma tabela compactada."""
+        if self._compactadas is not None:
+            self._geometrias = decodificar_geometrias(*self._compactadas, len(self._colunas['id']))
+            self._compactadas = None
+
+    def geometrias_codificadas(self) -> Tuple[Dict[str, np.ndarray], List[Tuple]]:
+        """Arrays e grupos de codificar_geometrias, sem expandir uma tabela compactada."""
+        self._consolidar()
+        return self._compactadas or codificar_geometrias(self._geometrias)
+
+    @property
+    def proximo_id(self) -> int:
+        return self._proximo_id
+
+    def coluna(self, nome: str) -> np.ndarray:
+        self._consolidar()
+        return self._colunas[nome]
+
+    def estrategias(self) -> np.ndarray:
+        """Nomes das estratégias de origem, um por feição."""
+        return np.array(self.nomes_estrategias, dtype=object)[self.coluna('estrategia')]
+
+    def __len__(self) -> int:
+        return len(self._colunas['id']) + sum(len(g) for g, _ in self._pendentes)
+
+    def __iter__(self):
+        return iter(self.geometrias)
+
+    def __getitem__(self, indice):
+        return self.geometrias[indice]
+
+    def __array__(self, dtype=None, copy=None):
+        return self.geometrias
+
+    # ------------------------------------------------------------------
+    # Operações vetorizadas
+    # ------------------------------------------------------------------
+
+    def filtrar(self, mascara: np.ndarray) -> 'TabelaFeicoes':
+        """Nova tabela apenas com as linhas selecionadas pela máscara/índices."""
+        self._consolidar()
+        filtrada = TabelaFeicoes(self.camada)
+        filtrada.nomes_estrategias = list(self.nomes_estrategias)
+        filtrada._geometrias = self.geometrias[mascara]
+        filtrada._colunas = {nome: valores[mascara] for nome, valores in self._colunas.items()}
+        filtrada._proximo_id = self._proximo_id
+        return filtrada
+
+    def substituir_geometrias(self, indices: np.ndarray, geometrias: List, dimensoes=None):
+        """
+        Troca as geometrias das linhas indicadas, recalculando a área; testada
+        e profundidade vêm de `dimensoes` ou do retângulo mínimo rotacionado.
+        """
+        geoms = np.asarray(list(geometrias), dtype=object)
+        self.geometrias[indices] = geoms
+        self._colunas['area'][indices] = shapely.area(geoms)
+        self.definir_dimensoes(*(dimensoes or dimensoes_retangulo_minimo(geoms)), indices=indices)
+
+    def definir_dimensoes(self, testada: np.ndarray, profundidade: np.ndarray, indices=None):
+        """Substitui testada e profundidade de todas as linhas ou das `indices` (ex.: medidas pela rua)."""
+        self._consolidar()
+        indices = slice(None) if indices is None else indices
+        self._colunas['testada'][indices] = testada
+        self._colunas['profundidade'][indices] = profundidade
+
+    def renumerar_quadras(self, mapa: np.ndarray):
+        """Substitui quadra_id por mapa[quadra_id] nas linhas com quadra_id >= 0 (use -1 no mapa para desvincular)."""
+        self._consolidar()
+        quadra_id = self._colunas['quadra_id']
+        mapa = np.asarray(mapa, dtype=np.int32)
+        self._colunas['quadra_id'] = np.where(quadra_id >= 0, mapa[np.maximum(quadra_id, 0)], -1).astype(np.int32)
+
+    def area_total(self) -> float:
+        return float(self.coluna('area').sum())
+
+    def contagem_por_estrategia(self) -> Dict[str, int]:
+        contagem = np.bincount(self.coluna('estrategia'), minlength=len(self.nomes_estrategias))
+        return {nome or 'indefinida': int(qtd) for nome, qtd in zip(self.nomes_estrategias, contagem) if qtd}
+
+    def coordenadas_exteriores(self) -> List[np.ndarray]:
+        """
+        Coordenadas (x, y) do anel exterior de cada polígono, em ordem de
+        feição. Multipolígonos contribuem com um anel por parte; feições
+        vazias ou não poligonais não geram anel. Em uma tabela compactada, os
+        anéis saem direto das coordenadas empacotadas.
+        """
+        self._consolidar()
+        if self._compactadas is None:
+            aneis, origem = _aneis_exteriores(self._geometrias, np.arange(len(self._geometrias)))
+            return aneis
+
+        arrays, grupos = self._compactadas
+        aneis, origem = [], []
+        for codigo, codificacao, tipo_ragged, _ in grupos:
+            prefixo = f"g{codigo}"
+            indices = arrays[prefixo + '_indices']
+            if codificacao == 'ragged' and tipo_ragged in (3, 6):
+                coordenadas = arrays[prefixo + '_coordenadas'][:, :2]
+                inicio_anel = arrays[prefixo + '_offsets0']
+                aneis_poligono = arrays[prefixo + '_offsets1']
+                if tipo_ragged == 6:
+                    indices = np.repeat(indices, np.diff(arrays[prefixo + '_offsets2']))
+                # O primeiro anel de cada polígono (partes vazias não têm anéis)
+                primeiro = aneis_poligono[:-1]
+                validos = aneis_poligono[1:] > primeiro
+                exteriores = primeiro[validos]
+                aneis += [coordenadas[a:b] for a, b in zip(inicio_anel[exteriores], inicio_anel[exteriores + 1])]
+                origem.append(indices[validos])
+            elif codificacao == 'wkb':
+                # Coleções: só este grupo é recriado
+                geoms = decodificar_geometrias(arrays, [(codigo, codificacao, 0, 0)], len(self))[indices]
+                aneis_grupo, origem_grupo = _aneis_exteriores(geoms, indices)
+                aneis += aneis_grupo
+                origem.append(origem_grupo)
+        if not aneis:
+            return []
+        ordem = np.argsort(np.concatenate(origem), kind='stable')
+        return [aneis[i] for i in ordem]
+
+    def uso_memoria_colunas(self) -> int:
+        """Bytes ocupados pelas colunas de atributos (sem as geometrias)."""
+        self._consolidar()
+        return sum(valores.nbytes for valores in self._colunas.values())
+
+
+def dimensoes_retangulo_minimo(geometrias: np.ndarray):
+    """
+    Testada (lado menor) e profundidade (lado maior) do retângulo mínimo
+    rotacionado de cada geometria, calculadas de forma vetorizada.
+    """
+    n = len(geometrias)
+    testada = np.zeros(n)
+    profundidade = np.zeros(n)
+    if n == 0:
+        return testada, profundidade
+
+    retangulos = shapely.minimum_rotated_rectangle(geometrias)
+    eh_poligono = (shapely.get_type_id(retangulos) == 3) & ~shapely.is_empty(retangulos)
+    if eh_poligono.any():
+        coords = shapely.get_coordinates(shapely.get_exterior_ring(retangulos[eh_poligono]))
+        coords = coords.reshape(-1, 5, 2)
+        lado_a = np.hypot(*(coords[:, 1] - coords[:, 0]).T)
+        lado_b = np.hypot(*(coords[:, 2] - coords[:, 1]).T)
+        testada[eh_poligono] = np.minimum(lado_a, lado_b)
+        profundidade[eh_poligono] = np.maximum(lado_a, lado_b)
+
+    profundidade[~eh_poligono] = shapely.length(retangulos[~eh_poligono])
+    return testada, profundidade
+
+
+def _aneis_exteriores(geometrias: np.ndarray, origem: np.ndarray):
+    """Anéis exteriores das partes poligonais não vazias e a feição (`origem`) de cada um."""
+    partes, indices = shapely.get_parts(geometrias, return_index=True)
+    poligonos = (shapely.get_type_id(partes) == 3) & ~shapely.is_empty(partes)
+    partes, indices = partes[poligonos], indices[poligonos]
+    if len(partes) == 0:
+        return [], np.empty(0, dtype=np.intp)
+    coords, anel = shapely.get_coordinates(shapely.get_exterior_ring(partes), return_index=True)
+    return np.split(coords, np.flatnonzero(np.diff(anel)) + 1), np.asarray(origem)[indices]
+
+
+def codificar_geometrias(geometrias: np.ndarray) -> Tuple[Dict[str, np.ndarray], List[Tuple]]:
+    """
+    Arrays planos das geometrias, agrupadas por tipo (e por ter Z ou não):
+    coordenadas e offsets de shapely.to_ragged_array para os tipos simples e
+    multi, WKB concatenado para os demais (anéis, coleções). Ausentes (None)
+    só guardam os índices.
+
+    A grade de precisão de cada geometria (loteamento_precisao) vai junto:
+    nem o WKB nem o pickle a preservam, e as operações de sobreposição
+    seguintes arredondam pela grade da geometria de entrada.
+    """
+    arrays = {}
+    grupos = []
+    precisao = shapely.get_precision(geometrias)
+    if np.nan_to_num(precisao).any():
+        arrays['precisao'] = precisao
+    # Código do grupo: tipo * 2 + Z (-2 para ausentes)
+    codigos = shapely.get_type_id(geometrias) * 2 + shapely.has_z(geometrias)
+    for codigo in np.unique(codigos).tolist():
+        indices = np.flatnonzero(codigos == codigo)
+        tipo = codigo // 2
+        prefixo = f"g{codigo}"
+        arrays[prefixo + '_indices'] = indices
+        if tipo in TIPOS_RAGGED:
+            tipo_ragged, coordenadas, offsets = shapely.to_ragged_array(geometrias[indices])
+            arrays[prefixo + '_coordenadas'] = coordenadas
+            for nivel, offset in enumerate(offsets):
+                arrays[f"{prefixo}_offsets{nivel}"] = offset
+            grupos.append((codigo, 'ragged', int(tipo_ragged), len(offsets)))
+        elif tipo >= 0:
+            wkb = shapely.to_wkb(geometrias[indices])
+            arrays[prefixo + '_wkb'] = np.frombuffer(b''.join(wkb), dtype=np.uint8)
+            arrays[prefixo + '_fim'] = np.cumsum([len(w) for w in wkb])
+            grupos.append((codigo, 'wkb', 0, 0))
+        else:
+            grupos.append((codigo, 'nulo', 0, 0))
+    return arrays, grupos
+
+
+def decodificar_geometrias(arrays: Dict[str, np.ndarray], grupos: List[Tuple], quantidade: int) -> np.ndarray:
+    """Inverso de `codificar_geometrias`: recria os objetos shapely (None nas posições sem grupo)."""
+    geometrias = np.full(quantidade, None, dtype=object)
+    for codigo, codificacao, tipo_ragged, niveis in grupos:
+        prefixo = f"g{codigo}"
+        indices = arrays[prefixo + '_indices']
+        if codificacao == 'ragged':
+            offsets = tuple(arrays[f"{prefixo}_offsets{nivel}"] for nivel in range(niveis))
+            geometrias[indices] = shapely.from_ragged_array(shapely.GeometryType(tipo_ragged),
+                                                            arrays[prefixo + '_coordenadas'], offsets)
+        elif codificacao == 'wkb':
+            dados = arrays[prefixo + '_wkb']
+            fim = arrays[prefixo + '_fim']
+            inicio = np.concatenate([[0], fim[:-1]])
+            geometrias[indices] = shapely.from_wkb(
+                np.array([dados[a:b].tobytes() for a, b in zip(inicio, fim)], dtype=object))
+    if 'precisao' in arrays:
+        precisao = arrays['precisao']
+        for grade in np.unique(precisao[precisao > 0]).tolist():
+            # As coordenadas já estão na grade: 'pointwise' só reanexa o modelo de precisão
+            selecao = precisao == grade
+            geometrias[selecao] = shapely.set_precision(geometrias[selecao], grade, mode='pointwise')
+    return geometrias
@@ -0,0 +1,172 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from shapely.geometry.base import BaseGeometry
+
+from loteamento_tabela import TabelaFeicoes, codificar_geometrias, decodificar_geometrias
+
+ALINHAMENTO = 8
+
+
+class PacoteCompartilhado:
+    """
+    Descritor de geometrias (e colunas) gravadas em um bloco de memória
+    compartilhada. Só o descritor atravessa o pickle entre processos: o nome
+    do bloco, a posição de cada array e alguns metadados, algumas centenas de
+    bytes independentemente do número de feições.
+
+    O bloco pertence a quem recebe o pacote: `desempacotar*` o libera
+    (unlink) depois de reconstruir as geometrias.
+    """
+
+    def __init__(self, nome: str, campos: Dict[str, Tuple[str, Tuple[int, ...], int]], grupos: List[Tuple],
+                 quantidade: int, formato: str, metadados: Optional[Dict[str, Any]] = None):
+        self.nome = nome
+        self.campos = campos
+        self.grupos = grupos
+        self.quantidade = quantidade
+        self.formato = formato
+        self.metadados = metadados or {}
+
+    def __len__(self) -> int:
+        return self.quantidade
+
+    def __repr__(self) -> str:
+        return f"PacoteCompartilhado({self.formato}, {self.quantidade} feições, bloco {self.nome})"
+
+
+def criar_executor(max_workers: int, **opcoes) -> ProcessPoolExecutor:
+    """
+    ProcessPoolExecutor que pode trocar pacotes com o processo principal
+    (`opcoes`, como initializer/initargs, seguem para o executor).
+
+    O rastreador de recursos é iniciado antes dos workers, para que todos
+    compartilhem o mesmo: um bloco criado em um worker e liberado no processo
+    principal (ou vice-versa) não é dado como vazado nem apagado cedo demais.
+    """
+    resource_tracker.ensure_running()
+    return ProcessPoolExecutor(max_workers=max_workers, **opcoes)
+
+
+def _gravar(arrays: Dict[str, np.ndarray]) -> Tuple[str, Dict[str, Tuple[str, Tuple[int, ...], int]]]:
+    """Copia os arrays para um bloco novo de memória compartilhada; retorna o nome e o layout."""
+    campos = {}
+    tamanho = 0
+    for chave, valores in arrays.items():
+        campos[chave] = (valores.dtype.str, valores.shape, tamanho)
+        tamanho += -(-valores.nbytes // ALINHAMENTO) * ALINHAMENTO
+    resource_tracker.ensure_running()
+    bloco = shared_memory.SharedMemory(create=True, size=max(tamanho, 1))
+    try:
+        for chave, valores in arrays.items():
+            tipo, forma, inicio = campos[chave]
+            np.ndarray(forma, dtype=tipo, buffer=bloco.buf, offset=inicio)[...] = valores
+    except Exception:
+        bloco.close()
+        bloco.unlink()
+        raise
+    bloco.close()
+    return bloco.name, campos
+
+
+def _ler(pacote: PacoteCompartilhado, liberar: bool, funcao):
+    """
+    Abre o bloco do pacote, chama `funcao(views)` com arrays que apontam
+    direto para a memória compartilhada (sem cópia) e fecha o bloco.
+    """
+    bloco = shared_memory.SharedMemory(name=pacote.nome)
+    views = {chave: np.ndarray(forma, dtype=tipo, buffer=bloco.buf, offset=inicio)
+             for chave, (tipo, forma, inicio) in pacote.campos.items()}
+    try:
+        return funcao(views)
+    finally:
+        views = None  # o bloco só fecha sem arrays apontando para ele
+        bloco.close()
+        if liberar:
+            bloco.unlink()
+
+
+def liberar(pacote: PacoteCompartilhado):
+    """Apaga o bloco de um pacote que não será desempacotado."""
+    bloco = shared_memory.SharedMemory(name=pacote.nome)
+    bloco.close()
+    bloco.unlink()
+
+
+def empacotar_geometrias(geometrias, formato: str = 'array') -> PacoteCompartilhado:
+    """Grava uma sequência de geometrias na memória compartilhada."""
+    geometrias = np.asarray(list(geometrias) if not isinstance(geometrias, np.ndarray) else geometrias,
+                            dtype=object)
+    arrays, grupos = codificar_geometrias(geometrias)
+    nome, campos = _gravar(arrays)
+    return PacoteCompartilhado(nome, campos, grupos, len(geometrias), formato)
+
+
+def desempacotar_geometrias(pacote: PacoteCompartilhado, liberar: bool = True) -> np.ndarray:
+    """Reconstrói o array de geometrias a partir das views do bloco (e o libera, por padrão)."""
+    return _ler(pacote, liberar, lambda views: decodificar_geometrias(views, pacote.grupos, pacote.quantidade))
+
+
+def empacotar_tabela(tabela: TabelaFeicoes) -> PacoteCompartilhado:
+    """Grava geometrias e colunas de uma TabelaFeicoes na memória compartilhada."""
+    arrays, grupos = tabela.geometrias_codificadas()
+    arrays = dict(arrays)
+    for coluna in TabelaFeicoes.COLUNAS:
+        arrays['coluna_' + coluna] = tabela.coluna(coluna)
+    nome, campos = _gravar(arrays)
+    metadados = {'camada': tabela.camada, 'nomes_estrategias': list(tabela.nomes_estrategias),
+                 'proximo_id': tabela.proximo_id}
+    return PacoteCompartilhado(nome, campos, grupos, len(tabela), 'tabela', metadados)
+
+
+def desempacotar_tabela(pacote: PacoteCompartilhado, liberar: bool = True) -> TabelaFeicoes:
+    """
+    Reconstrói a TabelaFeicoes sem recalcular as colunas. A tabela chega
+    compactada: os objetos shapely só são criados quando alguém os acessa.
+    """
+    def montar(views):
+        colunas = {coluna: views['coluna_' + coluna].copy() for coluna in TabelaFeicoes.COLUNAS}
+        arrays = {chave: valores.copy() for chave, valores in views.items() if not chave.startswith('coluna_')}
+        return TabelaFeicoes.de_colunas(pacote.metadados['camada'], (arrays, pacote.grupos), colunas,
+                                        pacote.metadados['nomes_estrategias'], pacote.metadados['proximo_id'])
+    return _ler(pacote, liberar, montar)
+
+
+def _e_camada(valor) -> bool:
+    """Lista ou array não vazio só de geometrias (uma camada ainda em forma de lista)."""
+    if isinstance(valor, np.ndarray):
+        return valor.dtype == object and len(valor) > 0 and all(isinstance(g, BaseGeometry) for g in valor)
+    return isinstance(valor, list) and len(valor) > 0 and all(isinstance(g, BaseGeometry) for g in valor)
+
+
+def empacotar_resultado(valor):
+    """
+    Prepara o resultado de um worker para voltar ao processo principal:
+    tabelas e listas/arrays de geometrias (inclusive dentro de dicionários,
+    listas e tuplas) viram pacotes; o resto segue pelo pickle normal.
+    """
+    if isinstance(valor, TabelaFeicoes):
+        return empacotar_tabela(valor)
+    if _e_camada(valor):
+        return empacotar_geometrias(valor, 'lista' if isinstance(valor, list) else 'array')
+    if isinstance(valor, dict):
+        return {chave: empacotar_resultado(item) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return type(valor)(empacotar_resultado(item) for item in valor)
+    return valor
+
+
+def desempacotar_resultado(valor):
+    """Inverso de `empacotar_resultado` (libera os blocos lidos)."""
+    if isinstance(valor, PacoteCompartilhado):
+        if valor.formato == 'tabela':
+            return desempacotar_tabela(valor)
+        geometrias = desempacotar_geometrias(valor)
+        return list(geometrias) if valor.formato == 'lista' else geometrias
+    if isinstance(valor, dict):
+        return {chave: desempacotar_resultado(item) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return type(valor)(desempacotar_resultado(item) for item in valor)
+    return valor
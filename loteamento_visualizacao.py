@@ -0,0 +1,501 @@
+import math
+import threading
+import time
+import tkinter as tk
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import LineString, box
+
+from loteamento_exportacao import CAMADAS_GIS
+from loteamento_indice_espacial import rasterizar_janela
+
+# Camada -> (cor de preenchimento, cor de contorno), em RGB; None = sem preenchimento
+CORES_PREVIA = {
+    'QUADRAS': ((226, 232, 214), (120, 140, 100)),
+    'AREA_VERDE': ((150, 205, 130), (60, 130, 60)),
+    'AREA_INST': ((205, 170, 215), (130, 80, 150)),
+    'LOTES': ((250, 235, 200), (190, 120, 40)),
+    'CALCADAS': ((215, 215, 215), (160, 160, 160)),
+    'RUAS': ((120, 120, 120), (90, 90, 90)),
+    'MALHA_VIARIA': (None, (240, 200, 0)),
+    'PERIMETRO': (None, (200, 30, 30)),
+}
+
+# Ordem de desenho (de baixo para cima)
+ORDEM_CAMADAS = ['QUADRAS', 'AREA_VERDE', 'AREA_INST', 'LOTES', 'CALCADAS', 'RUAS', 'MALHA_VIARIA', 'PERIMETRO']
+
+COR_FUNDO = (255, 255, 255)
+
+
+class Vista:
+    """Janela de visualização: centro em coordenadas do projeto, escala em pixels por metro e tamanho da tela."""
+
+    def __init__(self, largura: int = 800, altura: int = 600):
+        self.largura = max(int(largura), 1)
+        self.altura = max(int(altura), 1)
+        self.centro_x = 0.0
+        self.centro_y = 0.0
+        self.escala = 1.0
+
+    @property
+    def tamanho_pixel(self) -> float:
+        """Metros por pixel."""
+        return 1.0 / self.escala
+
+    def janela(self) -> Tuple[float, float, float, float]:
+        meia_largura = self.largura / 2 / self.escala
+        meia_altura = self.altura / 2 / self.escala
+        return (self.centro_x - meia_largura, self.centro_y - meia_altura,
+                self.centro_x + meia_largura, self.centro_y + meia_altura)
+
+    def ajustar(self, limites: Tuple[float, float, float, float], margem: float = 0.05):
+        """Enquadra os limites (min_x, min_y, max_x, max_y) na tela."""
+        min_x, min_y, max_x, max_y = limites
+        self.centro_x, self.centro_y = (min_x + max_x) / 2, (min_y + max_y) / 2
+        largura, altura = max(max_x - min_x, 1e-6), max(max_y - min_y, 1e-6)
+        self.escala = (1 - 2 * margem) * min(self.largura / largura, self.altura / altura)
+
+    def redimensionar(self, largura: int, altura: int):
+        self.largura, self.altura = max(int(largura), 1), max(int(altura), 1)
+
+    def deslocar(self, dx_pixels: float, dy_pixels: float):
+        """Arrasta o conteúdo (dx, dy) pixels na tela."""
+        self.centro_x -= dx_pixels / self.escala
+        self.centro_y += dy_pixels / self.escala
+
+    def ampliar(self, fator: float, px: Optional[float] = None, py: Optional[float] = None):
+        """Multiplica a escala por `fator` mantendo fixo o ponto da tela (px, py) (padrão: centro)."""
+        px = self.largura / 2 if px is None else px
+        py = self.altura / 2 if py is None else py
+        x, y = self.para_projeto(px, py)
+        self.escala *= fator
+        self.centro_x = x - (px - self.largura / 2) / self.escala
+        self.centro_y = y + (py - self.altura / 2) / self.escala
+
+    def para_projeto(self, px: float, py: float) -> Tuple[float, float]:
+        return (self.centro_x + (px - self.largura / 2) / self.escala,
+                self.centro_y - (py - self.altura / 2) / self.escala)
+
+    def para_tela(self, coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Coordenadas do projeto (n, 2) -> (colunas, linhas) de pixel, em ponto flutuante."""
+        min_x, _, _, max_y = self.janela()
+        return (coords[:, 0] - min_x) * self.escala, (max_y - coords[:, 1]) * self.escala
+
+
+def _tracar_segmentos(imagem: np.ndarray, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray,
+                      cor: Tuple[int, int, int]):
+    """Traça segmentos (em pixels) na imagem, amostrando cada um a cada pixel, de forma vetorizada."""
+    if len(x0) == 0:
+        return
+    altura, largura = imagem.shape[:2]
+    passos = np.ceil(np.maximum(np.abs(x1 - x0), np.abs(y1 - y0))).astype(np.int64) + 1
+    segmento = np.repeat(np.arange(len(x0)), passos)
+    deslocamento = np.arange(len(segmento)) - np.repeat(np.cumsum(passos) - passos, passos)
+    t = deslocamento / np.maximum(passos[segmento] - 1, 1)
+    colunas = np.floor(x0[segmento] + t * (x1[segmento] - x0[segmento])).astype(np.int64)
+    linhas = np.floor(y0[segmento] + t * (y1[segmento] - y0[segmento])).astype(np.int64)
+    dentro = (colunas >= 0) & (colunas < largura) & (linhas >= 0) & (linhas < altura)
+    imagem[linhas[dentro], colunas[dentro]] = cor
+
+
+class _DadosCamada:
+    """Geometrias de uma camada da cena, com índice espacial e versões simplificadas por nível de detalhe."""
+
+    def __init__(self):
+        self.pedacos = []
+        self.geometrias = np.empty(0, dtype=object)
+        self.limites = np.empty((0, 4))
+        self.tamanhos = np.empty(0)
+        self.centros = np.empty((0, 2))
+        self.arvore = None
+        self.simplificadas: Dict[int, np.ndarray] = {}
+        self.pendente = False
+
+    def acrescentar(self, geometrias):
+        geoms = np.asarray(list(geometrias), dtype=object)
+        if len(geoms):
+            self.pedacos.append(geoms)
+            self.pendente = True
+
+    def preparar(self):
+        """Consolida os pedaços recebidos e reconstrói o índice (apenas se algo mudou)."""
+        if not self.pendente:
+            return
+        self.geometrias = np.concatenate([self.geometrias] + self.pedacos)
+        self.pedacos = []
+        limites = self.limites = shapely.bounds(self.geometrias)
+        self.tamanhos = np.maximum(limites[:, 2] - limites[:, 0], limites[:, 3] - limites[:, 1])
+        self.centros = (limites[:, :2] + limites[:, 2:]) / 2
+        self.arvore = shapely.STRtree(self.geometrias)
+        # Camadas só crescem: as simplificações já feitas continuam válidas
+        for nivel, simplificadas in self.simplificadas.items():
+            faltam = len(self.geometrias) - len(simplificadas)
+            self.simplificadas[nivel] = np.concatenate([simplificadas, np.full(faltam, None, dtype=object)])
+        self.pendente = False
+
+    def simplificadas_no_nivel(self, nivel: int, indices: np.ndarray) -> np.ndarray:
+        """Geometrias simplificadas com tolerância 2**nivel metros, calculadas sob demanda e guardadas."""
+        if nivel not in self.simplificadas:
+            self.simplificadas[nivel] = np.full(len(self.geometrias), None, dtype=object)
+        cache = self.simplificadas[nivel]
+        faltam = indices[shapely.is_missing(cache[indices])]
+        if len(faltam):
+            cache[faltam] = shapely.simplify(self.geometrias[faltam], 2.0 ** nivel, preserve_topology=False)
+        return cache[indices]
+
+
+class CenaLoteamento:
+    """
+    Cena da pré-visualização: guarda as camadas recebidas em fluxo e as
+    desenha em uma imagem RGB com nível de detalhe dependente da escala.
+
+    É um consumidor de eventos (receber/fechar, ver loteamento_fluxo), seguro
+    para ser alimentado por outra thread enquanto a interface desenha. Ao
+    desenhar, cada camada é tratada em lote:
+    - só as feições que tocam a janela são consultadas (STRtree);
+    - feições menores que `pixels_minimos` viram um único pixel (dizimação);
+    - as demais são simplificadas com tolerância de `tolerancia_pixels`
+      pixels (em níveis de potência de 2, guardados entre quadros);
+    - o preenchimento da camada inteira é uma única rasterização por linhas
+      de varredura e os contornos (só de feições maiores que
+      `pixels_contorno`) um único traçado vetorizado.
+    """
+
+    def __init__(self, pixels_minimos: float = 2.0, pixels_contorno: float = 6.0, tolerancia_pixels: float = 0.5):
+        self.pixels_minimos = pixels_minimos
+        self.pixels_contorno = pixels_contorno
+        self.tolerancia_pixels = tolerancia_pixels
+        self.versao = 0
+        self.estatisticas_desenho: Dict[str, Dict[str, int]] = {}
+        self._camadas: Dict[str, _DadosCamada] = {}
+        self._trava = threading.Lock()
+
+    def limpar(self):
+        with self._trava:
+            self._camadas = {}
+            self.versao += 1
+
+    def definir_camada(self, camada: str, geometrias):
+        """Substitui o conteúdo de uma camada."""
+        dados = _DadosCamada()
+        dados.acrescentar(geometrias)
+        with self._trava:
+            self._camadas[camada] = dados
+            self.versao += 1
+
+    def acrescentar(self, camada: str, geometrias):
+        """Acrescenta feições a uma camada (usado para os lotes, que chegam quadra a quadra)."""
+        with self._trava:
+            self._camadas.setdefault(camada, _DadosCamada()).acrescentar(geometrias)
+            self.versao += 1
+
+    def receber(self, tipo: str, dados: Any):
+        if tipo == 'perimetro':
+            self.definir_camada('PERIMETRO', [dados])
+        elif tipo == 'malha_viaria':
+            self.definir_camada('MALHA_VIARIA', dados)
+        elif tipo == 'camada':
+            atributo, tabela = dados
+            self.definir_camada(CAMADAS_GIS[atributo], tabela.geometrias)
+        elif tipo == 'lotes':
+            self.acrescentar('LOTES', dados.geometrias)
+
+    def fechar(self):
+        pass
+
+    def carregar(self, processador):
+        """Substitui a cena inteira pelas camadas atuais de um processador (ex.: após uma edição)."""
+        self.definir_camada('PERIMETRO', [processador.perimetro_original])
+        self.definir_camada('MALHA_VIARIA', processador.malha_viaria)
+        for atributo, camada in CAMADAS_GIS.items():
+            self.definir_camada(camada, getattr(processador, atributo))
+
+    def _instantaneo(self) -> Dict[str, _DadosCamada]:
+        with self._trava:
+            for dados in self._camadas.values():
+                dados.preparar()
+            return dict(self._camadas)
+
+    def contagem(self, camada: str) -> int:
+        return len(self._instantaneo().get(camada, _DadosCamada()).geometrias)
+
+    def limites(self) -> Optional[Tuple[float, float, float, float]]:
+        """Limites de todas as camadas (ou None se a cena está vazia)."""
+        limites = [shapely.total_bounds(d.geometrias) for d in self._instantaneo().values() if len(d.geometrias)]
+        if not limites:
+            return None
+        limites = np.array(limites)
+        return (limites[:, 0].min(), limites[:, 1].min(), limites[:, 2].max(), limites[:, 3].max())
+
+    def desenhar(self, vista: Vista) -> np.ndarray:
+        """Desenha a cena na vista; retorna a imagem (altura, largura, 3) em uint8."""
+        imagem = np.empty((vista.altura, vista.largura, 3), dtype=np.uint8)
+        imagem[:] = COR_FUNDO
+        camadas = self._instantaneo()
+        tamanho_pixel = vista.tamanho_pixel
+        min_x, min_y, max_x, max_y = vista.janela()
+        # Recorte um pouco além da tela: as bordas criadas pelo recorte ficam fora da imagem
+        margem = 2 * tamanho_pixel
+        recorte = (min_x - margem, min_y - margem, max_x + margem, max_y + margem)
+        nivel = math.floor(math.log2(max(tamanho_pixel * self.tolerancia_pixels, 1e-6)))
+
+        estatisticas = {}
+        for camada in ORDEM_CAMADAS:
+            dados = camadas.get(camada)
+            if dados is None or dados.arvore is None:
+                continue
+            preenchimento, contorno = CORES_PREVIA[camada]
+            indices = np.sort(dados.arvore.query(box(*recorte)))
+            if len(indices) == 0:
+                continue
+
+            # Dizimação: feições com menos de `pixels_minimos` viram um pixel
+            pequenas = dados.tamanhos[indices] < self.pixels_minimos * tamanho_pixel
+            if pequenas.any():
+                colunas, linhas = vista.para_tela(dados.centros[indices[pequenas]])
+                _tracar_segmentos(imagem, colunas, linhas, colunas, linhas, preenchimento or contorno)
+            indices = indices[~pequenas]
+
+            # Só as feições que cruzam a borda da janela precisam ser recortadas
+            geoms = dados.simplificadas_no_nivel(nivel, indices)
+            limites = dados.limites[indices]
+            cruzam = ((limites[:, 0] < recorte[0]) | (limites[:, 1] < recorte[1]) |
+                      (limites[:, 2] > recorte[2]) | (limites[:, 3] > recorte[3]))
+            if cruzam.any():
+                geoms = geoms.copy()
+                geoms[cruzam] = shapely.clip_by_rect(geoms[cruzam], *recorte)
+            if preenchimento is not None:
+                janela = rasterizar_janela(geoms, min_x, min_y, tamanho_pixel, vista.altura, vista.largura)
+                if janela is not None:
+                    linha0, coluna0, mascara = janela
+                    # A grade tem a linha 0 embaixo; a imagem, em cima
+                    fim = vista.altura - linha0
+                    regiao = imagem[fim - mascara.shape[0]:fim, coluna0:coluna0 + mascara.shape[1]]
+                    regiao[mascara[::-1]] = preenchimento
+
+            # Contornos: camadas sem preenchimento sempre; as demais só nas feições grandes na tela
+            com_contorno = dados.tamanhos[indices] >= self.pixels_contorno * tamanho_pixel
+            if preenchimento is None:
+                com_contorno[:] = True
+            partes = shapely.get_parts(geoms[com_contorno])
+            poligonais = shapely.get_type_id(partes) == 3
+            linhas_contorno = np.concatenate([partes[~poligonais], shapely.get_rings(partes[poligonais])])
+            coords, parte = shapely.get_coordinates(linhas_contorno, return_index=True)
+            if len(coords) > 1:
+                colunas, linhas = vista.para_tela(coords)
+                mesma = parte[1:] == parte[:-1]
+                _tracar_segmentos(imagem, colunas[:-1][mesma], linhas[:-1][mesma],
+                                  colunas[1:][mesma], linhas[1:][mesma], contorno)
+
+            estatisticas[camada] = {
+                'visiveis': int(len(indices) + pequenas.sum()),
+                'pontos': int(pequenas.sum()),
+                'contornos': int(com_contorno.sum()),
+                'vertices': int(len(coords)),
+            }
+        self.estatisticas_desenho = estatisticas
+        return imagem
+
+
+def imagem_ppm(imagem: np.ndarray) -> bytes:
+    """Imagem RGB (altura, largura, 3) em PPM binário, aceito diretamente por tk.PhotoImage."""
+    altura, largura = imagem.shape[:2]
+    return f"P6 {largura} {altura} 255\n".encode('ascii') + np.ascontiguousarray(imagem, dtype=np.uint8).tobytes()
+
+
+class PreviaLoteamento:
+    """
+    Canvas tkinter com a pré-visualização do loteamento.
+
+    A cena pode ser alimentada por outra thread (ex.: `consumir(processador.
+    iter_resultados(...), previa.cena)`); o canvas verifica a versão da cena a
+    cada `intervalo_ms` e redesenha quando há novidades. Cada quadro é uma
+    única imagem: arrastar move a imagem já desenhada e só redesenha ao
+    soltar; a roda do mouse amplia em torno do cursor; duplo clique
+    enquadra o projeto.
+
+    Com um editor ativo (`ativar_edicao`, ver loteamento_edicao), arrastar
+    um trecho da malha viária o desloca, Shift+arrastar traça um trecho novo
+    e o botão direito remove o trecho clicado; após cada edição a cena é
+    recarregada do processador e `ao_editar(relatorio)` é chamado.
+    """
+
+    def __init__(self, parent, largura: int = 600, altura: int = 500, intervalo_ms: int = 200,
+                 cena: Optional[CenaLoteamento] = None):
+        self.cena = cena or CenaLoteamento()
+        self.vista = Vista(largura, altura)
+        self.intervalo_ms = intervalo_ms
+        self.canvas = tk.Canvas(parent, width=largura, height=altura, background='#ffffff',
+                                highlightthickness=0)
+        self.editor = None
+        self.ao_editar: Optional[Callable[[Dict[str, Any]], None]] = None
+        self.pixels_selecao = 8
+        self._imagem = None
+        self._item_imagem = None
+        self._item_texto = None
+        self._versao_desenhada = -1
+        self._enquadrada = False
+        self._arraste = None
+        self._edicao = None
+        self._redesenho_agendado = False
+
+        self.canvas.bind('<Configure>', self._ao_redimensionar)
+        self.canvas.bind('<ButtonPress-1>', self._ao_pressionar)
+        self.canvas.bind('<Shift-ButtonPress-1>', self._ao_pressionar_com_shift)
+        self.canvas.bind('<B1-Motion>', self._ao_arrastar)
+        self.canvas.bind('<ButtonRelease-1>', self._ao_soltar)
+        self.canvas.bind('<ButtonPress-3>', self._ao_clicar_direito)
+        self.canvas.bind('<Double-Button-1>', lambda evento: self.enquadrar())
+        self.canvas.bind('<MouseWheel>', self._ao_rolar)
+        self.canvas.bind('<Button-4>', self._ao_rolar)
+        self.canvas.bind('<Button-5>', self._ao_rolar)
+        self.canvas.after(self.intervalo_ms, self._verificar_cena)
+
+    def pack(self, **kwargs):
+        self.canvas.pack(**kwargs)
+
+    def grid(self, **kwargs):
+        self.canvas.grid(**kwargs)
+
+    def limpar(self):
+        """Esvazia a cena (novo processamento); a próxima cena é enquadrada ao chegar."""
+        self.cena.limpar()
+        self._enquadrada = False
+
+    def ativar_edicao(self, editor, ao_editar: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.editor = editor
+        self.ao_editar = ao_editar
+
+    def desativar_edicao(self):
+        self.editor = None
+        self._edicao = None
+
+    def enquadrar(self):
+        limites = self.cena.limites()
+        if limites is not None:
+            self.vista.ajustar(limites)
+            self._enquadrada = True
+            self.redesenhar()
+
+    def redesenhar(self):
+        self._redesenho_agendado = False
+        try:
+            inicio = time.perf_counter()
+            versao = self.cena.versao
+            imagem = self.cena.desenhar(self.vista)
+            self._imagem = tk.PhotoImage(data=imagem_ppm(imagem), format='PPM')
+            self.canvas.delete('all')
+            self._item_imagem = self.canvas.create_image(0, 0, image=self._imagem, anchor='nw')
+            tempo = (time.perf_counter() - inicio) * 1000
+            lotes = self.cena.estatisticas_desenho.get('LOTES', {}).get('visiveis', 0)
+            self._item_texto = self.canvas.create_text(
+                8, 8, anchor='nw', fill='#333333',
+                text=f"{self.cena.contagem('LOTES')} lotes ({lotes} visíveis) | "
+                     f"{self.vista.escala:.3g} px/m | {tempo:.0f} ms")
+            self._versao_desenhada = versao
+        except Exception as e:
+            print(f"Erro ao desenhar a pré-visualização: {e}")
+
+    def _agendar_redesenho(self):
+        # Vários eventos seguidos (roda do mouse) geram um único quadro
+        if not self._redesenho_agendado:
+            self._redesenho_agendado = True
+            self.canvas.after_idle(self.redesenhar)
+
+    def _verificar_cena(self):
+        if self.cena.versao != self._versao_desenhada and self._arraste is None and self._edicao is None:
+            if not self._enquadrada:
+                self.enquadrar()
+            else:
+                self.redesenhar()
+        self.canvas.after(self.intervalo_ms, self._verificar_cena)
+
+    def _ao_redimensionar(self, evento):
+        self.vista.redimensionar(evento.width, evento.height)
+        self._agendar_redesenho()
+
+    def _segmento_sob_cursor(self, evento) -> Optional[int]:
+        x, y = self.vista.para_projeto(evento.x, evento.y)
+        return self.editor.segmento_mais_proximo(x, y, self.pixels_selecao * self.vista.tamanho_pixel)
+
+    def _ao_pressionar(self, evento):
+        indice = self._segmento_sob_cursor(evento) if self.editor is not None else None
+        if indice is None:
+            self._arraste = (evento.x, evento.y, evento.x, evento.y)
+            return
+        # Arrastar um trecho: o traço dele acompanha o mouse até soltar
+        colunas, linhas = self.vista.para_tela(np.asarray(self.editor.processador.malha_viaria[indice].coords))
+        item = self.canvas.create_line(*np.column_stack([colunas, linhas]).ravel().tolist(), fill='#0050ff', width=3)
+        self._edicao = {'operacao': 'mover', 'indice': indice, 'inicio': (evento.x, evento.y),
+                        'ultimo': (evento.x, evento.y), 'item': item}
+
+    def _ao_pressionar_com_shift(self, evento):
+        if self.editor is None:
+            return self._ao_pressionar(evento)
+        item = self.canvas.create_line(evento.x, evento.y, evento.x, evento.y, fill='#0050ff', width=3)
+        self._edicao = {'operacao': 'adicionar', 'inicio': (evento.x, evento.y),
+                        'ultimo': (evento.x, evento.y), 'item': item}
+
+    def _ao_arrastar(self, evento):
+        if self._edicao is not None:
+            x0, y0 = self._edicao['inicio']
+            ultimo_x, ultimo_y = self._edicao['ultimo']
+            if self._edicao['operacao'] == 'adicionar':
+                self.canvas.coords(self._edicao['item'], x0, y0, evento.x, evento.y)
+            else:
+                self.canvas.move(self._edicao['item'], evento.x - ultimo_x, evento.y - ultimo_y)
+            self._edicao['ultimo'] = (evento.x, evento.y)
+            return
+        if self._arraste is None:
+            return
+        x0, y0, ultimo_x, ultimo_y = self._arraste
+        self.canvas.move('all', evento.x - ultimo_x, evento.y - ultimo_y)
+        self._arraste = (x0, y0, evento.x, evento.y)
+
+    def _ao_soltar(self, evento):
+        if self._edicao is not None:
+            edicao, self._edicao = self._edicao, None
+            x0, y0 = edicao['inicio']
+            if (evento.x, evento.y) == (x0, y0):
+                self.canvas.delete(edicao['item'])
+            elif edicao['operacao'] == 'mover':
+                self._editar(self.editor.deslocar_segmento, edicao['indice'],
+                             (evento.x - x0) / self.vista.escala, -(evento.y - y0) / self.vista.escala)
+            else:
+                linha = LineString([self.vista.para_projeto(x0, y0), self.vista.para_projeto(evento.x, evento.y)])
+                self._editar(self.editor.adicionar_segmento, linha)
+            return
+        if self._arraste is None:
+            return
+        x0, y0, _, _ = self._arraste
+        self._arraste = None
+        if (evento.x, evento.y) != (x0, y0):
+            self.vista.deslocar(evento.x - x0, evento.y - y0)
+            self._agendar_redesenho()
+
+    def _ao_clicar_direito(self, evento):
+        if self.editor is None:
+            return
+        indice = self._segmento_sob_cursor(evento)
+        if indice is not None:
+            self._editar(self.editor.remover_segmento, indice)
+
+    def _editar(self, operacao: Callable, *args):
+        """Aplica a edição (recálculo local, síncrono) e recarrega a cena do processador."""
+        self.canvas.configure(cursor='watch')
+        self.canvas.update_idletasks()
+        try:
+            relatorio = operacao(*args)
+            self.cena.carregar(self.editor.processador)
+            self.redesenhar()
+            if self.ao_editar is not None:
+                self.ao_editar(relatorio)
+        finally:
+            self.canvas.configure(cursor='')
+
+    def _ao_rolar(self, evento):
+        ampliar = getattr(evento, 'num', None) == 4 or getattr(evento, 'delta', 0) > 0
+        self.vista.ampliar(1.25 if ampliar else 0.8, evento.x, evento.y)
+        self._agendar_redesenho()
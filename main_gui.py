@@ -6,6 +6,8 @@ import sys
 import threading
 import math
 from loteamento_processor_ultra_avancado import LoteamentoProcessorUltraAvancado
+from loteamento_visualizacao import PreviaLoteamento
+from loteamento_edicao import EditorMalhaViaria
 
 # Configuração do tema do CustomTkinter
 ctk.set_appearance_mode("light")  # Modes: "System" (standard), "Dark", "Light"
@@ -15,7 +17,7 @@ class LoteamentoApp:
     def __init__(self):
         self.root = ctk.CTk()
         self.root.title("Aplicativo de Loteamento Urbano")
-        self.root.geometry("900x700")
+        self.root.geometry("1500x800")
         self.root.resizable(True, True)
         
         # Variáveis para armazenar os parâmetros
@@ -64,8 +66,11 @@ class LoteamentoApp:
     def create_interface(self):
         """Cria toda a interface do usuário"""
         # Frame principal com scroll
-        main_frame = ctk.CTkScrollableFrame(self.root, label_text="Parâmetros do Loteamento")
-        main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        main_frame = ctk.CTkScrollableFrame(self.root, label_text="Parâmetros do Loteamento", width=820)
+        main_frame.pack(side="left", fill="both", expand=False, padx=(20, 10), pady=20)
+        
+        # Pré-visualização ao lado dos parâmetros
+        self.create_preview_section(self.root)
         
         # Seção 1: Informações do Projeto
         self.create_project_info_section(main_frame)
@@ -85,6 +90,65 @@ class LoteamentoApp:
         # Seção 6: Botões de Ação
         self.create_action_buttons(main_frame)
         
+    def create_preview_section(self, parent):
+        """Cria o painel de pré-visualização, atualizado durante o processamento"""
+        section_frame = ctk.CTkFrame(parent)
+        section_frame.pack(side="right", fill="both", expand=True, padx=(10, 20), pady=20)
+        
+        title_label = ctk.CTkLabel(section_frame, text="🗺️ Pré-visualização", 
+                                  font=ctk.CTkFont(size=18, weight="bold"))
+        title_label.pack(pady=(15, 5))
+        
+        ctk.CTkLabel(section_frame, text="Arraste para mover • Roda do mouse para zoom • Duplo clique para enquadrar").pack(pady=(0, 10))
+        
+        self.previa = PreviaLoteamento(section_frame, largura=560, altura=600)
+        self.previa.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        
+        # Edição da malha viária sobre o resultado processado
+        edicao_frame = ctk.CTkFrame(section_frame)
+        edicao_frame.pack(fill="x", padx=10, pady=(0, 10))
+        
+        self.processor = None
+        self.arquivo_saida = None
+        self.modo_edicao = ctk.BooleanVar(value=False)
+        self.edicao_switch = ctk.CTkSwitch(edicao_frame, text="Editar ruas", variable=self.modo_edicao,
+                                           command=self.alternar_modo_edicao, state="disabled")
+        self.edicao_switch.pack(side="left", padx=10, pady=10)
+        
+        self.salvar_edicao_button = ctk.CTkButton(edicao_frame, text="Salvar DXF editado", width=150,
+                                                  command=self.salvar_edicao, state="disabled")
+        self.salvar_edicao_button.pack(side="right", padx=10, pady=10)
+        
+        self.edicao_status = ctk.CTkLabel(edicao_frame, text="Arraste: mover trecho • Shift+arraste: novo trecho • Botão direito: remover")
+        self.edicao_status.pack(side="left", padx=10, pady=10)
+        
+    def alternar_modo_edicao(self):
+        """Liga/desliga a edição interativa da malha viária na pré-visualização"""
+        if self.modo_edicao.get() and self.processor is not None:
+            self.previa.ativar_edicao(EditorMalhaViaria(self.processor), self.ao_editar)
+        else:
+            self.previa.desativar_edicao()
+            
+    def ao_editar(self, relatorio):
+        """Mostra o resumo da última edição (recálculo local)"""
+        if relatorio['sucesso']:
+            self.edicao_status.configure(
+                text=f"{relatorio['quadras_afetadas']} quadras recalculadas • "
+                     f"-{relatorio['lotes_removidos']} / +{relatorio['lotes_criados']} lotes • "
+                     f"{relatorio['tempo']:.2f} s")
+        else:
+            self.edicao_status.configure(text=f"Edição não aplicada: {relatorio.get('erro', '')}")
+            
+    def salvar_edicao(self):
+        """Exporta novamente o DXF com as edições da malha viária"""
+        if self.processor is None or not self.arquivo_saida:
+            return
+        try:
+            self.processor.exportar_dxf_ultra_avancado(self.arquivo_saida)
+            messagebox.showinfo("Edição Salva", f"Arquivo DXF atualizado:\n{self.arquivo_saida}")
+        except Exception as e:
+            messagebox.showerror("Erro ao Salvar", f"Não foi possível salvar o DXF:\n\n{str(e)}")
+        
     def create_project_info_section(self, parent):
         """Cria a seção de informações do projeto"""
         # Frame da seção
@@ -354,11 +418,11 @@ class LoteamentoApp:
         inner_frame.pack(pady=20)
         
         # Botão de processar
-        process_button = ctk.CTkButton(inner_frame, text="🚀 Processar Loteamento", 
-                                      command=self.processar_loteamento,
-                                      font=ctk.CTkFont(size=14, weight="bold"),
-                                      height=40, width=200)
-        process_button.pack(side="left", padx=10)
+        self.process_button = ctk.CTkButton(inner_frame, text="🚀 Processar Loteamento", 
+                                           command=self.processar_loteamento,
+                                           font=ctk.CTkFont(size=14, weight="bold"),
+                                           height=40, width=200)
+        self.process_button.pack(side="left", padx=10)
         
         # Botão de limpar
         clear_button = ctk.CTkButton(inner_frame, text="🗑️ Limpar Campos", 
@@ -553,12 +617,21 @@ class LoteamentoApp:
         
         arquivo_saida = os.path.join(output_dir, f"{nome_projeto}.dxf")
         
+        # Um processamento por vez: uma segunda execução misturaria lotes na mesma cena da pré-visualização
+        self.process_button.configure(state="disabled")
+        
+        # Sem edição da malha enquanto um novo processamento está em andamento
+        self.modo_edicao.set(False)
+        self.previa.desativar_edicao()
+        self.edicao_switch.configure(state="disabled")
+        self.salvar_edicao_button.configure(state="disabled")
+        
         # Criar janela de progresso
         progress_window = ctk.CTkToplevel(self.root)
         progress_window.title("Processando Loteamento")
         progress_window.geometry("400x200")
         progress_window.transient(self.root)
-        progress_window.grab_set()
+        # Sem grab_set: a pré-visualização continua navegável durante o processamento
         
         # Centralizar janela de progresso
         progress_window.update_idletasks()
@@ -583,6 +656,10 @@ class LoteamentoApp:
             status_label.configure(text=etapa)
             progress_window.update()
         
+        def liberar_processamento():
+            """Reabilita o botão de processar (no laço de eventos do Tk) ao fim da execução"""
+            self.root.after(0, lambda: self.process_button.configure(state="normal"))
+        
         def processar_em_thread():
             """Executa o processamento em thread separada"""
             try:
@@ -595,11 +672,14 @@ class LoteamentoApp:
                 if not processor.carregar_perimetro(self.arquivo_path.get()):
                     raise Exception("Erro ao carregar perímetro do arquivo")
                 
-                # Executar processamento ultra-avançado completo
+                # Executar processamento ultra-avançado completo, desenhando
+                # perímetro, ruas, quadras e lotes à medida que ficam prontos
                 atualizar_progresso("Executando processamento ultra-avançado...", 0.3)
+                self.previa.limpar()
                 resultado = processor.processar_loteamento_ultra_avancado(
                     self.arquivo_path.get(), 
-                    arquivo_saida
+                    arquivo_saida,
+                    consumidor=self.previa.cena
                 )
                 
                 if not resultado['sucesso']:
@@ -607,6 +687,14 @@ class LoteamentoApp:
                 
                 atualizar_progresso("Processamento concluído!", 1.0)
                 
+                # Resultado disponível para edição da malha viária
+                self.processor = processor
+                self.arquivo_saida = arquivo_saida
+                self.modo_edicao.set(False)
+                self.previa.desativar_edicao()
+                self.edicao_switch.configure(state="normal")
+                self.salvar_edicao_button.configure(state="normal")
+                
                 # Usar estatísticas do resultado
                 area_total = resultado.get('area_total', 0)
                 num_lotes = resultado.get('num_lotes', 0)
@@ -615,9 +703,12 @@ class LoteamentoApp:
                 area_calcadas = resultado.get('area_calcadas', 0)
                 area_verde = resultado.get('area_verde', 0)
                 area_institucional = resultado.get('area_institucional', 0)
+                deficit_verde = resultado.get('deficit_area_verde', 0)
+                deficit_institucional = resultado.get('deficit_area_institucional', 0)
                 
                 # Fechar janela de progresso
                 progress_window.destroy()
+                liberar_processamento()
                 
                 # Exibir resultados ultra-avançados
                 percentual_lotes = (area_lotes/area_total)*100 if area_total > 0 else 0
@@ -625,6 +716,11 @@ class LoteamentoApp:
                 percentual_calcadas = (area_calcadas/area_total)*100 if area_total > 0 else 0
                 percentual_verde = (area_verde/area_total)*100 if area_total > 0 else 0
                 percentual_institucional = (area_institucional/area_total)*100 if area_total > 0 else 0
+                aviso_deficit = ""
+                if deficit_verde > 0 or deficit_institucional > 0:
+                    aviso_deficit = (f"\n• ⚠️ Metas não atingidas por falta de área livre: faltam "
+                                     f"{deficit_verde:.2f} m² de área verde e {deficit_institucional:.2f} m² "
+                                     f"de área institucional")
                 
                 resultado_texto = f"""
 🎉 LOTEAMENTO ULTRA-AVANÇADO PROCESSADO COM SUCESSO!
@@ -636,7 +732,7 @@ class LoteamentoApp:
 • Área das ruas: {area_ruas:.2f} m² ({percentual_ruas:.1f}%)
 • Área das calçadas: {area_calcadas:.2f} m² ({percentual_calcadas:.1f}%)
 • Área verde: {area_verde:.2f} m² ({percentual_verde:.1f}%)
-• Área institucional: {area_institucional:.2f} m² ({percentual_institucional:.1f}%)
+• Área institucional: {area_institucional:.2f} m² ({percentual_institucional:.1f}%){aviso_deficit}
 
 🚀 FUNCIONALIDADES ULTRA-AVANÇADAS APLICADAS:
 • ✅ Subdivisão otimizada com lotes irregulares
@@ -667,6 +763,7 @@ O arquivo DXF foi salvo com layers organizados e pode ser aberto em qualquer sof
                 
             except Exception as e:
                 progress_window.destroy()
+                liberar_processamento()
                 messagebox.showerror("Erro no Processamento", f"Ocorreu um erro durante o processamento:\n\n{str(e)}")
         
         # Iniciar processamento em thread separada
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Teste da validação de acesso dos lotes à rua (loteamento_acesso)
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from shapely.geometry import box
+
+from dados_teste import processar, verificar_consistencia
+from loteamento_acesso import destinos_fusao, mascara_acesso, somar_relatorios_acesso, validar_acesso_lotes
+from loteamento_qualidade import IndiceRuas
+from loteamento_tabela import TabelaFeicoes
+
+# Rua ao sul da quadra 0 <= y <= 75; a calçada de 2 m fica entre a rua e os lotes
+VIAS = [box(-10, -12, 110, -2), box(-10, -2, 110, 0)]
+
+
+def tabela_em_faixas():
+    """Quadra com três faixas de 4 lotes de 25 x 25 m: só a faixa da frente encosta na calçada"""
+    lotes = [box(x, y, x + 25, y + 25) for y in (0, 25, 50) for x in range(0, 100, 25)]
+    return TabelaFeicoes.de_geometrias('LOTES', lotes, quadra_id=0, estrategia='borda')
+
+
+def teste_mascara_e_fusao():
+    """Verifica a marcação dos lotes encravados e o destino da fusão em rodadas"""
+    print("=" * 60)
+    print("TESTE DA MARCAÇÃO E DOS DESTINOS DE FUSÃO")
+    print("=" * 60)
+
+    tabela = tabela_em_faixas()
+    acesso = mascara_acesso(tabela.geometrias, IndiceRuas(VIAS))
+    destino = destinos_fusao(tabela.geometrias, acesso, tabela.coluna('quadra_id'))
+    print(f"Acesso: {acesso.astype(int)}")
+    print(f"Destinos: {destino}")
+
+    # Em outra quadra, o mesmo lote encostado não serve de destino
+    outra_quadra = np.r_[np.zeros(4, dtype=np.int32), np.ones(8, dtype=np.int32)]
+    sem_destino = destinos_fusao(tabela.geometrias, acesso, outra_quadra)
+    ok = acesso.tolist() == [True] * 4 + [False] * 8
+    ok = ok and destino.tolist() == [-1] * 4 + [0, 1, 2, 3] * 2
+    return ok and (sem_destino == -1).all()
+
+
+def teste_tratamentos():
+    """Verifica os três tratamentos: marcar, fundir e passar a área comum"""
+    print("=" * 60)
+    print("TESTE DOS TRATAMENTOS DE LOTES SEM ACESSO")
+    print("=" * 60)
+
+    resultados = {nome: validar_acesso_lotes(tabela_em_faixas(), VIAS, nome)
+                  for nome in ('marcar', 'fundir', 'area_comum')}
+    for nome, (lotes, areas_comuns, relatorio) in resultados.items():
+        print(f"{nome}: {len(lotes)} lotes, {len(areas_comuns)} áreas comuns, relatório {relatorio}")
+
+    marcados, _, relatorio = resultados['marcar']
+    ok = len(marcados) == 12 and relatorio['sem_acesso'] == 8 and relatorio['ids_sem_acesso'] == list(range(4, 12))
+
+    fundidos, _, relatorio = resultados['fundir']
+    ok = ok and len(fundidos) == 4 and relatorio['fundidos'] == 8 and relatorio['ids_sem_acesso'] == []
+    ok = ok and np.allclose(fundidos.coluna('area'), 25 * 75) and np.allclose(fundidos.coluna('profundidade'), 75)
+    ok = ok and fundidos.coluna('id').tolist() == [0, 1, 2, 3] and fundidos.contagem_por_estrategia() == {'borda': 4}
+
+    restantes, areas_comuns, relatorio = resultados['area_comum']
+    ok = ok and len(restantes) == 4 and len(areas_comuns) == 8 and relatorio['areas_comuns'] == 8
+
+    total = somar_relatorios_acesso([resultados['marcar'][2], resultados['marcar'][2]], [12, 12])
+    print(f"Soma de dois relatórios: {total}")
+    return ok and total['sem_acesso'] == 16 and total['ids_sem_acesso'][8:] == list(range(16, 24))
+
+
+def teste_desempenho():
+    """Verifica que a validação de 50 mil lotes fica abaixo de um segundo"""
+    print("=" * 60)
+    print("TESTE DE DESEMPENHO (50 MIL LOTES)")
+    print("=" * 60)
+
+    # 240 quadras de 100 lotes de 10 x 25 m por faixa, entre ruas de 10 m: duas faixas (ambas
+    # com frente para uma rua) ou, a cada 12 quadras, três faixas (a do meio sem acesso)
+    lotes, quadra_id, ruas = [], [], []
+    y0 = 0.0
+    for q in range(240):
+        ruas.append(box(-10, y0 - 10, 1010, y0))
+        faixas = 3 if q % 12 == 0 else 2
+        for faixa in range(faixas):
+            y = y0 + 25 * faixa
+            lotes.extend(box(x, y, x + 10, y + 25) for x in range(0, 1000, 10))
+            quadra_id.extend([q] * 100)
+        y0 += 25 * faixas + 10
+    ruas.append(box(-10, y0 - 10, 1010, y0))
+    tabela = TabelaFeicoes('LOTES')
+    tabela.adicionar(lotes, quadra_id=np.array(quadra_id))
+    tabela.geometrias  # consolida os blocos fora da medição
+
+    inicio = time.perf_counter()
+    _, _, relatorio = validar_acesso_lotes(tabela, ruas, 'marcar')
+    tempo = time.perf_counter() - inicio
+    print(f"{relatorio['verificados']} lotes, {relatorio['sem_acesso']} sem acesso em {tempo * 1000:.0f} ms")
+    return relatorio['verificados'] == 50000 and relatorio['sem_acesso'] == 2000 and tempo < 1.0
+
+
+def teste_loteamento():
+    """Verifica o relatório nas estatísticas e a consistência após fundir ou retirar os lotes encravados"""
+    print("=" * 60)
+    print("TESTE DA VALIDAÇÃO DE ACESSO NO LOTEAMENTO")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        _, resultado_marcar = processar(pasta, "marcar")
+        fundir, resultado_fundir = processar(pasta, "fundir", tratamento_lotes_sem_acesso='fundir')
+        area_comum, resultado_area = processar(pasta, "area_comum", tratamento_lotes_sem_acesso='area_comum')
+
+    marcados = resultado_marcar['acesso_lotes']
+    fundidos = resultado_fundir['acesso_lotes']
+    retirados = resultado_area['acesso_lotes']
+    print(f"Marcar: {marcados['sem_acesso']} sem acesso de {marcados['verificados']}")
+    print(f"Fundir: {fundidos['fundidos']} fundidos, restam {len(fundidos['ids_sem_acesso'])}")
+    print(f"Área comum: {retirados['areas_comuns']} retirados, área verde {resultado_area['area_verde']:.0f} m² "
+          f"(marcar: {resultado_marcar['area_verde']:.0f} m²)")
+
+    ok = marcados['sem_acesso'] == len(marcados['ids_sem_acesso']) > 0
+    ok = ok and resultado_fundir['num_lotes'] == resultado_marcar['num_lotes'] - fundidos['fundidos']
+    ok = ok and abs(resultado_fundir['area_lotes'] - resultado_marcar['area_lotes']) < 1.0
+    ok = ok and resultado_area['num_lotes'] == resultado_marcar['num_lotes'] - retirados['areas_comuns']
+    ok = ok and retirados['areas_comuns'] == marcados['sem_acesso'] and retirados['ids_sem_acesso'] == []
+    ok = ok and resultado_area['area_verde'] >= resultado_marcar['area_verde']
+
+    # Nenhum lote que segue na tabela fica sem acesso além dos listados no relatório
+    vias = IndiceRuas(list(fundir.ruas) + list(fundir.calcadas))
+    sem_acesso = np.flatnonzero(~mascara_acesso(fundir.lotes.geometrias, vias)).tolist()
+    ok = ok and sem_acesso == fundidos['ids_sem_acesso']
+    return ok and verificar_consistencia(fundir) and verificar_consistencia(area_comum)
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "Marcação e fusão": teste_mascara_e_fusao(),
+        "Tratamentos": teste_tratamentos(),
+        "Desempenho": teste_desempenho(),
+        "Loteamento": teste_loteamento(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE ACESSO DOS LOTES")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
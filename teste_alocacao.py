@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Teste da alocação de áreas comuns por metas de área (loteamento_alocacao)
+"""
+
+import sys
+import os
+import random
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ezdxf
+from shapely.geometry import box, Polygon
+
+from dados_teste import PARAMETROS
+from loteamento_alocacao import subconjunto_por_area, recortar_por_area, alocar_por_metas
+from loteamento_processor_ultra_avancado import LoteamentoProcessorUltraAvancado
+
+
+def teste_subconjunto():
+    """Verifica que o subset-sum encontra a combinação exata disponível"""
+    print("=" * 60)
+    print("TESTE DE SUBCONJUNTO POR ÁREA")
+    print("=" * 60)
+
+    areas = [520.0, 310.0, 275.0, 190.0, 130.0, 85.0]
+    escolhidos = subconjunto_por_area(areas, 595.0, tolerancia=1.0)
+    soma = sum(areas[i] for i in escolhidos)
+    print(f"Escolhidos: {escolhidos} -> {soma:.1f} m² (meta 595 m²)")
+
+    abaixo = subconjunto_por_area(areas, 100.0, tolerancia=1.0, somente_abaixo=True)
+    print(f"Somente abaixo de 100 m²: {abaixo}")
+
+    return abs(soma - 595.0) <= 1.0 and abaixo == [5]
+
+
+def teste_recorte():
+    """Verifica o recorte de uma porção com área exata"""
+    print("\n" + "=" * 60)
+    print("TESTE DE RECORTE POR ÁREA")
+    print("=" * 60)
+
+    area = Polygon([(0, 0), (80, 0), (60, 40), (0, 30)])
+    recorte, restante = recortar_por_area(area, 700.0)
+    area_recorte = sum(p.area for p in recorte)
+    area_restante = sum(p.area for p in restante)
+    print(f"Recorte: {area_recorte:.3f} m² | Restante: {area_restante:.3f} m²")
+
+    return abs(area_recorte - 700.0) < 0.1 and abs(area_recorte + area_restante - area.area) < 1e-6
+
+
+def teste_duas_metas():
+    """Verifica que as metas verde e institucional são atingidas sem repetir áreas"""
+    print("\n" + "=" * 60)
+    print("TESTE DE ALOCAÇÃO COM DUAS METAS")
+    print("=" * 60)
+
+    candidatos = [box(i * 30, 0, i * 30 + 20, 10 + 7 * i) for i in range(8)]
+    (verdes, institucionais), deficits = alocar_por_metas(candidatos, [1500.0, 600.0], tolerancia_relativa=0.01)
+    area_verde = sum(p.area for p in verdes)
+    area_inst = sum(p.area for p in institucionais)
+    print(f"Verde: {area_verde:.2f} m² (meta 1500) | Institucional: {area_inst:.2f} m² (meta 600)")
+    print(f"Déficits: {deficits}")
+
+    sobreposicao = any(v.intersection(i).area > 1e-6 for v in verdes for i in institucionais)
+    return (abs(area_verde - 1500.0) <= 15.0 and abs(area_inst - 600.0) <= 6.0 and not sobreposicao
+            and deficits[0] <= 15.0 and deficits[1] <= 6.0)
+
+
+def teste_metas_sem_area_suficiente():
+    """Verifica que, sem área para as duas metas, o déficit é repartido em vez de zerar a institucional"""
+    print("\n" + "=" * 60)
+    print("TESTE DE METAS SEM ÁREA SUFICIENTE")
+    print("=" * 60)
+
+    # 4000 m² disponíveis para metas de 4500 + 1500 m²: as duas ficam com 2/3 da meta
+    # e o que falta de cada uma (1500 e 500 m²) é devolvido como déficit
+    candidatos = [box(i * 30, 0, i * 30 + 20, 50) for i in range(4)]
+    (verdes, institucionais), deficits = alocar_por_metas(candidatos, [4500.0, 1500.0], tolerancia_relativa=0.01)
+    area_verde = sum(p.area for p in verdes)
+    area_inst = sum(p.area for p in institucionais)
+    print(f"Verde: {area_verde:.2f} m² (meta 4500) | Institucional: {area_inst:.2f} m² (meta 1500)")
+    print(f"Déficit verde: {deficits[0]:.2f} m² | Déficit institucional: {deficits[1]:.2f} m²")
+
+    sobreposicao = any(v.intersection(i).area > 1e-6 for v in verdes for i in institucionais)
+    return (abs(area_inst - 1000.0) <= 10.0 and abs(area_verde + area_inst - 4000.0) < 1e-6
+            and abs(deficits[0] - (4500.0 - area_verde)) < 1e-6 and abs(deficits[1] - (1500.0 - area_inst)) < 1e-6
+            and abs(sum(deficits) - 2000.0) < 1e-6 and not sobreposicao)
+
+
+def teste_deficit_nas_estatisticas():
+    """Verifica que o que falta das metas num terreno sem área livre suficiente aparece nas estatísticas"""
+    print("\n" + "=" * 60)
+    print("TESTE DE DÉFICIT NAS ESTATÍSTICAS")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        entrada = os.path.join(pasta, "retangulo.dxf")
+        doc = ezdxf.new("R2010")
+        doc.modelspace().add_lwpolyline([(0, 0), (100, 0), (100, 200), (0, 200)], close=True)
+        doc.saveas(entrada)
+        random.seed(1)
+        processador = LoteamentoProcessorUltraAvancado(dict(PARAMETROS))
+        resultado = processador.processar_loteamento_ultra_avancado(entrada, os.path.join(pasta, "saida.dxf"))
+
+    meta_verde = PARAMETROS['percentual_area_verde'] / 100 * resultado['area_total']
+    meta_inst = PARAMETROS['percentual_area_institucional'] / 100 * resultado['area_total']
+    print(f"Verde: {resultado['area_verde']:.2f} de {meta_verde:.2f} m², déficit {resultado['deficit_area_verde']:.2f} m²")
+    print(f"Institucional: {resultado['area_institucional']:.2f} de {meta_inst:.2f} m², "
+          f"déficit {resultado['deficit_area_institucional']:.2f} m²")
+
+    # Sem lotes sem acesso, a área alocada mais o déficit fecham cada meta
+    return (resultado['sucesso'] and resultado['deficit_area_verde'] > 0
+            and resultado['deficit_area_institucional'] > 0
+            and abs(resultado['area_verde'] + resultado['deficit_area_verde'] - meta_verde) < 0.02 * meta_verde
+            and abs(resultado['area_institucional'] + resultado['deficit_area_institucional'] - meta_inst)
+            < 0.02 * meta_inst)
+
+
+def teste_memoria_subconjunto():
+    """Verifica que o subset-sum com 1000 candidatos usa memória proporcional só à capacidade"""
+    print("\n" + "=" * 60)
+    print("TESTE DE MEMÓRIA DO SUBCONJUNTO (1000 CANDIDATOS)")
+    print("=" * 60)
+
+    areas = [150.0 + (i * 37) % 400 for i in range(1000)]
+    alvo = 0.3 * sum(areas)
+    tracemalloc.start()
+    escolhidos = subconjunto_por_area(areas, alvo, tolerancia=0.02 * alvo)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    soma = sum(areas[i] for i in escolhidos)
+    print(f"Soma {soma:.1f} m² (meta {alvo:.1f} m²), pico de memória {pico / 1e6:.1f} MB")
+
+    # A tabela (n + 1) x capacidade ocuparia cerca de 200 MB
+    return abs(soma - alvo) <= 0.02 * alvo and len(set(escolhidos)) == len(escolhidos) and pico < 10e6
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "Subconjunto por área": teste_subconjunto(),
+        "Recorte por área": teste_recorte(),
+        "Duas metas": teste_duas_metas(),
+        "Metas sem área suficiente": teste_metas_sem_area_suficiente(),
+        "Déficit nas estatísticas": teste_deficit_nas_estatisticas(),
+        "Memória do subconjunto": teste_memoria_subconjunto(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE ALOCAÇÃO")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Teste da memoização de quadras congruentes (loteamento_cache)
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shapely.geometry import Polygon, box
+from shapely.affinity import rotate, translate
+
+from loteamento_cache import forma_canonica, CacheQuadrasCongruentes
+
+QUADRA = Polygon([(0, 0), (60, 0), (60, 30), (10, 40), (0, 30)])
+MASCARA = [True, False, False, False, True]
+
+
+def _congruente(poligono, angulo, dx, dy):
+    return translate(rotate(poligono, angulo, origin=(0, 0)), dx, dy)
+
+
+def teste_forma_canonica():
+    """Verifica que quadras congruentes têm a mesma chave e bordas diferentes não"""
+    print("=" * 60)
+    print("TESTE DE FORMA CANÔNICA")
+    print("=" * 60)
+
+    original = forma_canonica(QUADRA, MASCARA)
+    girada = forma_canonica(_congruente(QUADRA, 37.0, 250.0, -80.0), MASCARA)
+    outra_mascara = forma_canonica(QUADRA, [False, True, False, False, True])
+
+    print(f"Chave igual após rotação/translação: {original[0] == girada[0]}")
+    print(f"Chave diferente com outras bordas de rua: {original[0] != outra_mascara[0]}")
+
+    return original[0] == girada[0] and original[0] != outra_mascara[0]
+
+
+def teste_reaplicacao():
+    """Verifica que o parcelamento reaplicado coincide com a quadra congruente"""
+    print("\n" + "=" * 60)
+    print("TESTE DE REAPLICAÇÃO DO PARCELAMENTO")
+    print("=" * 60)
+
+    cache = CacheQuadrasCongruentes()
+    lotes = [QUADRA.intersection(box(i * 12, 0, i * 12 + 12, 40)) for i in range(5)]
+    cache.guardar(cache.forma(QUADRA, MASCARA), lotes, ['borda'] * 5)
+
+    copia = _congruente(QUADRA, 120.0, -40.0, 500.0)
+    reaplicados, estrategias = cache.obter(cache.forma(copia, MASCARA), copia)
+    esperados = [_congruente(lote, 120.0, -40.0, 500.0) for lote in lotes]
+    diferenca = max(a.symmetric_difference(b).area for a, b in zip(reaplicados, esperados))
+
+    print(f"Lotes reaplicados: {len(reaplicados)} | Maior diferença: {diferenca:.6f} m²")
+    print(f"Acertos: {cache.acertos} | Falhas: {cache.falhas}")
+
+    return len(reaplicados) == 5 and diferenca < 1e-6 and estrategias == ['borda'] * 5 and cache.acertos == 1
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "Forma canônica": teste_forma_canonica(),
+        "Reaplicação": teste_reaplicacao(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DO CACHE DE QUADRAS")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
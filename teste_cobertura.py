@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Teste da auditoria de cobertura e da decomposição exata de áreas (loteamento_cobertura)
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon, box
+
+from dados_teste import processar
+from loteamento_cobertura import CAMADAS_COBERTURA, auditar_cobertura, validar_cobertura
+
+PERIMETRO = box(0, 0, 100, 100)
+INTERNALIZADO = box(2, 2, 98, 98)
+
+
+def camadas_sinteticas():
+    """Rua atravessando o perímetro, calçada sobre os lotes, lote duplicado e área verde sobre um lote"""
+    return {
+        'ruas': [box(-5, 45, 105, 55)],                                         # 100 m² fora do perímetro
+        'calcadas': [box(2, 43, 98, 45), box(2, 55, 98, 57)],
+        'lotes': [box(x, 25, x + 24, 44) for x in range(2, 98, 24)]             # 1 m sobre a calçada
+                 + [box(2, 25, 26, 44)]                                         # duplicado do primeiro
+                 + [box(x, 57, x + 24, 80) for x in range(2, 98, 24)],
+        'areas_verdes': [box(74, 70, 98, 98)],                                  # 10 m sobre o último lote
+        'areas_institucionais': [],
+    }
+
+
+def teste_decomposicao():
+    """Verifica as sobreposições e que a decomposição é exata e soma a área do perímetro"""
+    print("=" * 60)
+    print("TESTE DA DECOMPOSIÇÃO EXATA DE ÁREAS")
+    print("=" * 60)
+
+    camadas = camadas_sinteticas()
+    auditoria = auditar_cobertura(PERIMETRO, camadas, INTERNALIZADO)
+    areas = auditoria['areas']
+    for nome, valor in areas.items():
+        print(f"{nome}: {valor:.2f} m²")
+    print(f"Sobreposições: {auditoria['sobreposicoes']}")
+    print(f"Fora do perímetro: {auditoria['fora_perimetro']:.2f} m², válida: {auditoria['valida']}")
+
+    # Referência por uniões sucessivas na ordem de precedência
+    coberto = Polygon()
+    esperado = {}
+    for nome in CAMADAS_COBERTURA:
+        uniao = shapely.union_all(np.asarray(camadas[nome], dtype=object)).intersection(PERIMETRO)
+        esperado[nome] = uniao.difference(coberto).area
+        coberto = coberto.union(uniao)
+    margem = PERIMETRO.difference(INTERNALIZADO).difference(coberto).area
+    vazios = PERIMETRO.area - coberto.area - margem
+
+    ok = all(abs(areas[nome] - esperado[nome]) < 1e-6 for nome in CAMADAS_COBERTURA)
+    ok = ok and abs(areas['margem_livre'] - margem) < 1e-6 and abs(areas['vazios'] - vazios) < 1e-6
+    ok = ok and abs(sum(areas.values()) - PERIMETRO.area) < 1e-6 and abs(auditoria['fora_perimetro'] - 100) < 1e-6
+    ok = ok and auditoria['sobreposicoes']['lotes/lotes'] == {'pares': 1, 'area': 24 * 19}
+    ok = ok and auditoria['sobreposicoes']['calcadas/lotes']['pares'] == 5
+    ok = ok and abs(auditoria['sobreposicoes']['lotes/areas_verdes']['area'] - 240) < 1e-6
+    return ok and not auditoria['valida'] and not auditoria['camadas']['lotes']['valida']
+
+
+def teste_validade():
+    """Verifica a validade de coberturas: divisas coincidentes, vértice faltando e fresta estreita"""
+    print("=" * 60)
+    print("TESTE DE VALIDADE DAS COBERTURAS")
+    print("=" * 60)
+
+    grade = [box(x, y, x + 10, y + 10) for x in (0, 10) for y in (0, 10)]
+    # Lote da direita inteiro contra dois da esquerda: o vértice (10, 10) falta nele
+    sem_vertice = [box(0, 0, 10, 10), box(0, 10, 10, 20), box(10, 0, 20, 20)]
+    fresta = [box(0, 0, 10, 10), box(10.2, 0, 20, 10)]
+    resultados = {
+        'grade': validar_cobertura(grade),
+        'sem_vertice': validar_cobertura(sem_vertice),
+        'fresta': validar_cobertura(fresta),
+        'fresta_largura': validar_cobertura(fresta, largura_vazio=0.5),
+    }
+    for nome, resultado in resultados.items():
+        print(f"{nome}: {resultado}")
+    return (resultados['grade']['valida'] and not resultados['sem_vertice']['valida']
+            and resultados['sem_vertice']['feicoes_invalidas'] >= 1 and resultados['fresta']['valida']
+            and not resultados['fresta_largura']['valida'])
+
+
+def teste_loteamento():
+    """Verifica a auditoria nas estatísticas contra uniões exatas e o custo frente ao processamento"""
+    print("=" * 60)
+    print("TESTE DA AUDITORIA NO LOTEAMENTO")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        inicio = time.perf_counter()
+        # Sem o cache de quadras congruentes, para medir o custo de subdividir todas as quadras
+        processador, resultado = processar(pasta, "cobertura", cache_quadras_congruentes=False)
+        tempo_processamento = time.perf_counter() - inicio
+    cobertura = resultado['cobertura']
+    inicio = time.perf_counter()
+    processador.auditar_cobertura()
+    tempo_auditoria = time.perf_counter() - inicio
+
+    areas = cobertura['areas']
+    soma_simples = sum(resultado[chave] for chave in ('area_lotes', 'area_ruas', 'area_calcadas', 'area_verde',
+                                                       'area_institucional'))
+    print(f"Áreas exatas: { {nome: round(valor) for nome, valor in areas.items()} }")
+    print(f"Soma exata: {sum(areas.values()):.2f} m², perímetro {resultado['area_total']:.2f} m², "
+          f"soma simples das camadas {soma_simples:.2f} m²")
+    print(f"Sobreposições: { {par: round(dados['area']) for par, dados in cobertura['sobreposicoes'].items()} }")
+    print(f"Auditoria: {tempo_auditoria * 1000:.0f} ms, processamento: {tempo_processamento:.1f} s")
+
+    feicoes = np.concatenate([getattr(processador, nome).geometrias for nome in CAMADAS_COBERTURA])
+    coberto = shapely.union_all(feicoes).intersection(processador.perimetro_original).area
+    ok = abs(sum(areas.values()) - resultado['area_total']) < 1e-6
+    ok = ok and abs(sum(areas[nome] for nome in CAMADAS_COBERTURA) - coberto) < 0.5
+    ok = ok and soma_simples > resultado['area_total'] and areas['lotes'] < resultado['area_lotes']
+    ok = ok and cobertura['sobreposicoes']['calcadas/lotes']['area'] > 0
+    return ok and tempo_auditoria < 0.1 * tempo_processamento
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "Decomposição": teste_decomposicao(),
+        "Validade": teste_validade(),
+        "Loteamento": teste_loteamento(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE AUDITORIA DE COBERTURA")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
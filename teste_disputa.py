@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Teste da disputa de estratégias por quadra (loteamento_disputa)
+"""
+
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import shapely
+from shapely.geometry import box
+
+from dados_teste import PARAMETROS, processar, verificar_consistencia
+from loteamento_disputa import (ESTRATEGIA_REFERENCIA, ESTRATEGIAS_DISPUTA, avaliar_parcelamento, escolher_vencedora,
+                                estrategias_disputa, subdividir_com_estrategia)
+from loteamento_processor_ultra_avancado import LoteamentoProcessorUltraAvancado
+from loteamento_tabela import TabelaFeicoes
+
+
+def processador_com_rua():
+    """Processador com uma quadra 100 x 60 m e rua (além da calçada de 2 m) só na borda de baixo"""
+    processador = LoteamentoProcessorUltraAvancado(dict(PARAMETROS))
+    processador.ruas = TabelaFeicoes.de_geometrias('RUAS', [box(5, -10, 95, -2)])
+    return processador, box(0, 0, 100, 60)
+
+
+def conformes_por_quadra(processador):
+    """Lotes conformes somados quadra a quadra"""
+    quadra_id = processador.lotes.coluna('quadra_id')
+    lotes = processador.lotes.geometrias
+    return sum(avaliar_parcelamento(processador, quadra, list(lotes[quadra_id == i]))['conformes']
+               for i, quadra in enumerate(processador.quadras.geometrias))
+
+
+def teste_avaliacao():
+    """Verifica a contagem de lotes conformes pela testada sobre a borda com rua"""
+    print("=" * 60)
+    print("TESTE DA AVALIAÇÃO DE PARCELAMENTO")
+    print("=" * 60)
+
+    processador, quadra = processador_com_rua()
+    frente = [box(x, 0, x + 20, 30) for x in range(0, 100, 20)]     # testada de 20 m na rua, 600 m²
+    fundos = [box(x, 30, x + 20, 60) for x in range(0, 100, 20)]    # sem testada
+    estreitos = [box(x, 0, x + 5, 60) for x in range(0, 20, 5)]     # testada de 5 m < 8 m
+    avaliacao = avaliar_parcelamento(processador, quadra, frente + fundos)
+    avaliacao_estreitos = avaliar_parcelamento(processador, quadra, estreitos)
+    print(f"Frente + fundos: {avaliacao}")
+    print(f"Estreitos: {avaliacao_estreitos}")
+
+    candidatos = [('a', avaliacao), ('b', avaliacao_estreitos), ('c', dict(avaliacao))]
+    ok = avaliacao['lotes'] == 10 and avaliacao['conformes'] == 5 and abs(avaliacao['area_util'] - 3000) < 1e-6
+    # Quadra toda em lotes: nada livre; reserva de 20% (15% verde + 5% institucional) dos 6000 m²
+    ok = ok and avaliacao['area_livre_util'] == 0 and abs(avaliacao['reserva_areas_comuns'] - 1200) < 1e-6
+    ok = ok and abs(avaliar_parcelamento(processador, quadra, frente)['area_livre_util'] - 3000) < 1e-6
+    ok = ok and avaliacao_estreitos['conformes'] == 0 and escolher_vencedora(candidatos) == 0
+    ok = ok and estrategias_disputa({'disputa_estrategias': True}) == list(ESTRATEGIAS_DISPUTA)
+    ok = ok and estrategias_disputa({'disputa_estrategias': ['bsp', 'grade']}) == ['grade', 'bsp']
+
+    # Diante de uma referência que deixa 1500 m² livres, não vence quem deixa mais lotes sem acesso ou
+    # menos que a reserva de 1200 m² livre; quem ocupa com lotes só a área livre além da reserva pode vencer
+    referencia = dict(avaliacao, area_livre_util=1500.0)
+    mais_area = dict(referencia, pontuacao=avaliacao['pontuacao'] + 1, area_lotes=avaliacao['area_lotes'] + 300,
+                     area_livre_util=1200.0)
+    na_reserva = dict(mais_area, pontuacao=avaliacao['pontuacao'] + 2, area_livre_util=1100.0)
+    sem_acesso = dict(referencia, pontuacao=avaliacao['pontuacao'] + 2, com_acesso=avaliacao['com_acesso'] - 1)
+    ok = ok and escolher_vencedora([('esquinas', referencia), ('grade', na_reserva), ('bsp', sem_acesso)]) == 0
+    ok = ok and escolher_vencedora([('esquinas', referencia), ('grade', mais_area), ('bsp', na_reserva)]) == 1
+    # Referência já abaixo da reserva: basta não deixar menos área livre útil que ela
+    ok = ok and escolher_vencedora([('esquinas', avaliacao), ('grade', dict(na_reserva, area_livre_util=0.0))]) == 1
+    ok = ok and escolher_vencedora([('grade', na_reserva), ('bsp', referencia)]) == 0
+    return ok and estrategias_disputa({}) == []
+
+
+def teste_estrategias():
+    """Verifica que cada estratégia parcela a quadra sem sobreposição e dentro dela"""
+    print("=" * 60)
+    print("TESTE DAS ESTRATÉGIAS DA DISPUTA")
+    print("=" * 60)
+
+    processador, quadra = processador_com_rua()
+    ok = True
+    for nome in ESTRATEGIAS_DISPUTA:
+        lotes, estrategias = subdividir_com_estrategia(processador, nome, quadra, 1)
+        geoms = np.asarray(lotes, dtype=object)
+        sobreposicao = float(shapely.union_all(geoms).area) if len(geoms) else 0.0
+        sobreposicao = float(shapely.area(geoms).sum()) - sobreposicao
+        dentro = bool(shapely.contains(quadra.buffer(0.01), geoms).all())
+        avaliacao = avaliar_parcelamento(processador, quadra, lotes)
+        print(f"{nome}: {len(lotes)} lotes, {avaliacao['conformes']} conformes, "
+              f"rótulos {sorted(set(estrategias))}, sobreposição {sobreposicao:.3f} m², dentro: {dentro}")
+        ok = ok and len(lotes) > 0 and len(estrategias) == len(lotes) and sobreposicao < 0.5 and dentro
+    return ok
+
+
+def deficit_areas_comuns(resultado):
+    """Área que falta para as metas de área verde e institucional"""
+    return resultado['deficit_area_verde'] + resultado['deficit_area_institucional']
+
+
+def quadras_com_ganho(processador):
+    """
+    Quadras em que a vencedora da disputa não é a referência e tem mais lotes
+    conformes e mais área em lotes que ela: (quadra, vencedora, ganho de área)
+    """
+    ganhos = []
+    for i, quadra in enumerate(processador.quadras.geometrias):
+        if quadra.area < 2 * processador.parametros['area_minima_lote']:
+            continue
+        candidatos = [(nome, avaliar_parcelamento(processador, quadra,
+                                                  subdividir_com_estrategia(processador, nome, quadra, i + 1)[0]))
+                      for nome in ESTRATEGIAS_DISPUTA]
+        nome, vencedora = candidatos[escolher_vencedora(candidatos)]
+        referencia = dict(candidatos)[ESTRATEGIA_REFERENCIA]
+        if (nome != ESTRATEGIA_REFERENCIA and vencedora['conformes'] > referencia['conformes']
+                and vencedora['area_lotes'] > referencia['area_lotes']):
+            ganhos.append((i, nome, vencedora['area_lotes'] - referencia['area_lotes']))
+    return ganhos
+
+
+def teste_loteamento():
+    """
+    Verifica o ganho de lotes conformes, sem mais lotes sem acesso nem mais déficit de áreas comuns
+    que a subdivisão padrão, e que a disputa em paralelo reproduz a serial
+    """
+    print("=" * 60)
+    print("TESTE DA DISPUTA NO LOTEAMENTO")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        base, resultado_base = processar(pasta, "base")
+        serial, resultado_serial = processar(pasta, "serial", disputa_estrategias=True)
+        paralelo, resultado_paralelo = processar(pasta, "paralelo", disputa_estrategias=True, workers_quadras=2)
+
+    conformes_base = conformes_por_quadra(base)
+    conformes_disputa = conformes_por_quadra(serial)
+    vitorias = resultado_serial['disputa']
+    print(f"Lotes: base {resultado_base['num_lotes']}, disputa {resultado_serial['num_lotes']}, "
+          f"paralelo {resultado_paralelo['num_lotes']}")
+    print(f"Lotes conformes: base {conformes_base}, disputa {conformes_disputa}")
+    print(f"Vitórias: serial {vitorias}, paralelo {resultado_paralelo['disputa']}")
+    print(f"Tarefas no escalonador: {resultado_paralelo['escalonamento']['tarefas']}")
+    sem_acesso_base = resultado_base['acesso_lotes']['sem_acesso']
+    sem_acesso_disputa = resultado_serial['acesso_lotes']['sem_acesso']
+    deficit_base = deficit_areas_comuns(resultado_base)
+    deficit_disputa = deficit_areas_comuns(resultado_serial)
+    ganhos = quadras_com_ganho(base)
+    print(f"Lotes sem acesso: base {sem_acesso_base}, disputa {sem_acesso_disputa}")
+    print(f"Déficit de áreas comuns: base {deficit_base:.0f} m², disputa {deficit_disputa:.0f} m²")
+    print(f"Quadras em que a disputa ganha da referência em lotes conformes e área: {len(ganhos)} "
+          f"(+{sum(g for _, _, g in ganhos):.0f} m²)")
+
+    iguais = set(shapely.to_wkb(serial.lotes.geometrias)) == set(shapely.to_wkb(paralelo.lotes.geometrias))
+    print(f"Lotes do paralelo idênticos aos do serial: {iguais}")
+    ok = conformes_disputa >= conformes_base and resultado_base['disputa'] == {} and sum(vitorias.values()) > 0
+    ok = ok and iguais and resultado_paralelo['disputa'] == vitorias
+    ok = ok and sem_acesso_disputa <= sem_acesso_base and deficit_disputa <= deficit_base + 1.0 and len(ganhos) > 0
+    ok = ok and resultado_paralelo['escalonamento']['tarefas'] == len(ESTRATEGIAS_DISPUTA) * sum(vitorias.values())
+    return ok and verificar_consistencia(serial) and verificar_consistencia(paralelo)
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "Avaliação": teste_avaliacao(),
+        "Estratégias": teste_estrategias(),
+        "Loteamento": teste_loteamento(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DA DISPUTA DE ESTRATÉGIAS")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Teste da edição interativa da malha viária com recálculo local (loteamento_edicao)
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ezdxf
+import numpy as np
+import shapely
+from shapely.geometry import LineString
+
+from dados_teste import PARAMETROS
+from loteamento_edicao import EditorMalhaViaria
+from loteamento_processor_ultra_avancado import LoteamentoProcessorUltraAvancado
+
+PERIMETRO = [(0, 0), (700, 0), (740, 420), (350, 560), (-40, 430)]
+
+
+def processar(pasta):
+    """Processa um perímetro de ~30 ha e retorna o processador e o tempo gasto"""
+    arquivo = os.path.join(pasta, "perimetro.dxf")
+    doc = ezdxf.new("R2010")
+    doc.modelspace().add_lwpolyline(PERIMETRO, close=True)
+    doc.saveas(arquivo)
+
+    processador = LoteamentoProcessorUltraAvancado(dict(PARAMETROS))
+    inicio = time.perf_counter()
+    processador.processar_loteamento_ultra_avancado(arquivo, os.path.join(pasta, "saida.dxf"))
+    return processador, time.perf_counter() - inicio
+
+
+def verificar_consistencia(processador):
+    """Lotes sem sobreposição entre si nem com ruas, cada um dentro da quadra indicada por quadra_id"""
+    lotes = processador.lotes.geometrias
+    quadras = processador.quadras.geometrias
+    quadra_id = processador.lotes.coluna('quadra_id')
+
+    i, j = shapely.STRtree(lotes).query(lotes, predicate='intersects')
+    pares = i < j
+    sobreposicao = float(shapely.area(shapely.intersection(lotes[i[pares]], lotes[j[pares]])).sum())
+    em_ruas = float(shapely.area(shapely.intersection(lotes, shapely.union_all(np.asarray(processador.ruas)))).sum())
+    ids_validos = bool(((quadra_id >= 0) & (quadra_id < len(quadras))).all())
+    dentro = ids_validos and bool(shapely.contains(shapely.buffer(quadras[quadra_id], 0.01), lotes).all())
+    quadras_numeradas = processador.quadras.coluna('quadra_id').tolist() == list(range(len(quadras)))
+
+    print(f"  Sobreposição entre lotes: {sobreposicao:.3f} m², lotes sobre ruas: {em_ruas:.3f} m²")
+    print(f"  quadra_id válidos: {ids_validos}, lotes dentro das quadras: {dentro}, "
+          f"quadras numeradas: {quadras_numeradas}")
+    return sobreposicao < 1.0 and em_ruas < 1.0 and dentro and quadras_numeradas
+
+
+def teste_mover_trecho(processador, tempo_completo):
+    """Verifica que arrastar um trecho recalcula só a vizinhança e preserva o resto"""
+    print("=" * 60)
+    print("TESTE DE MOVER UM TRECHO DA MALHA VIÁRIA")
+    print("=" * 60)
+
+    editor = EditorMalhaViaria(processador)
+    linha = processador.malha_viaria[0]
+    lotes_antes = set(shapely.to_wkb(processador.lotes.geometrias))
+    quadras_antes = len(processador.quadras)
+
+    relatorio = editor.deslocar_segmento(0, 15.0, 10.0)
+    print(f"Relatório: {relatorio}")
+    print(f"Tempo do processamento completo: {tempo_completo:.2f}s")
+
+    # Os lotes fora da região alterada continuam exatamente os mesmos
+    regiao = shapely.union_all([linha, processador.malha_viaria[-1]]).buffer(editor._alcance() + 60)
+    lotes_depois = processador.lotes.geometrias
+    longe = lotes_depois[~shapely.intersects(lotes_depois, regiao)]
+    preservados = set(shapely.to_wkb(longe)) <= lotes_antes
+
+    ok = relatorio['sucesso'] and 0 < relatorio['quadras_afetadas'] < quadras_antes
+    ok = ok and relatorio['lotes_criados'] > 0 and len(processador.lotes) > 0
+    ok = ok and relatorio['tempo'] < tempo_completo
+    ok = ok and preservados and len(longe) > 0
+    print(f"Lotes longe da edição preservados: {preservados} ({len(longe)} lotes)")
+    return ok and verificar_consistencia(processador)
+
+
+def teste_adicionar_remover(processador):
+    """Verifica acrescentar um trecho novo e removê-lo em seguida"""
+    print("=" * 60)
+    print("TESTE DE ACRESCENTAR E REMOVER TRECHOS")
+    print("=" * 60)
+
+    editor = EditorMalhaViaria(processador)
+    trechos = len(processador.malha_viaria)
+    area_ruas = processador.ruas.area_total()
+
+    relatorio = editor.adicionar_segmento(LineString([(100, 60), (380, 330)]))
+    area_com_trecho = processador.ruas.area_total()
+    print(f"Acrescentar: {relatorio}")
+    print(f"Trechos: {trechos} -> {len(processador.malha_viaria)}, área de ruas: {area_ruas:.0f} -> {area_com_trecho:.0f} m²")
+    ok = relatorio['sucesso'] and len(processador.malha_viaria) == trechos + 1 and area_com_trecho > area_ruas
+    ok = ok and verificar_consistencia(processador)
+
+    indice = editor.segmento_mais_proximo(240, 195, 5.0)
+    relatorio = editor.remover_segmento(indice)
+    print(f"Remover: {relatorio}")
+    print(f"Trechos: {len(processador.malha_viaria)}, área de ruas: {processador.ruas.area_total():.0f} m²")
+    ok = ok and indice == trechos and relatorio['sucesso'] and len(processador.malha_viaria) == trechos
+    ok = ok and abs(processador.ruas.area_total() - area_ruas) < 1.0
+    return ok and verificar_consistencia(processador)
+
+
+def teste_edicao_invalida(processador):
+    """Verifica que uma edição inválida não altera o loteamento"""
+    print("=" * 60)
+    print("TESTE DE EDIÇÃO INVÁLIDA")
+    print("=" * 60)
+
+    editor = EditorMalhaViaria(processador)
+    lotes, malha = processador.lotes, list(processador.malha_viaria)
+    relatorio = editor.adicionar_segmento(LineString([(2000, 2000), (2100, 2100)]))
+    print(f"Relatório: {relatorio}")
+    return not relatorio['sucesso'] and processador.lotes is lotes and processador.malha_viaria == malha
+
+
+def main():
+    """Função principal dos testes"""
+    with tempfile.TemporaryDirectory() as pasta:
+        processador, tempo_completo = processar(pasta)
+        resultados = {
+            "Mover trecho": teste_mover_trecho(processador, tempo_completo),
+            "Acrescentar e remover trechos": teste_adicionar_remover(processador),
+            "Edição inválida": teste_edicao_invalida(processador),
+        }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE EDIÇÃO DA MALHA VIÁRIA")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
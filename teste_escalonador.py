@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Teste do escalonador de quadras por tamanho (loteamento_escalonador)
+"""
+
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon, box
+
+from dados_teste import processar, verificar_consistencia
+from loteamento_escalonador import EscalonadorQuadras, estimar_custos, repartir_bordas
+
+
+def teste_custos_e_divisao():
+    """Verifica a estimativa de custo e a repartição das bordas de uma quadra entre subtarefas"""
+    print("=" * 60)
+    print("TESTE DE CUSTO ESTIMADO E DIVISÃO DE QUADRA")
+    print("=" * 60)
+
+    retangulo = box(0, 0, 100, 50)
+    irregular = Polygon([(0, 0), (60, -5), (100, 0), (110, 25), (100, 50), (50, 55), (0, 50), (-8, 25)])
+    grande = box(0, 0, 400, 50)
+    custos = estimar_custos(np.array([retangulo, irregular, grande], dtype=object), [4, 4, 4], 300.0)
+    print(f"Custos (retângulo, irregular, grande): {np.round(custos, 1)}")
+    ok = custos[0] < custos[1] and custos[0] < custos[2]
+
+    comprimentos = [240, 60, 240, 60, 30]
+    grupos = repartir_bordas(comprimentos, 3)
+    somas = [sum(comprimentos[i] for i in grupo) for grupo in grupos]
+    print(f"Bordas por parte: {grupos}, comprimentos: {somas}")
+    ok = ok and sorted(i for grupo in grupos for i in grupo) == list(range(len(comprimentos)))
+    ok = ok and all(grupo == sorted(grupo) for grupo in grupos) and sorted(somas) == [150, 240, 240]
+    return ok and repartir_bordas([10.0], 3) == [[0], [], []]
+
+
+def teste_plano():
+    """Verifica a ordem das tarefas (maior custo primeiro) e a deduplicação das quadras congruentes"""
+    print("=" * 60)
+    print("TESTE DO PLANO DE EXECUÇÃO")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        processador, _ = processar(pasta, "base")
+    processador.cache_quadras = processador.cache_quadras.__class__(0.01)
+    plano, tarefas = EscalonadorQuadras(processador, 4, fracao_divisao=0.2, lotes_minimos_subtarefa=4).planejar()
+    custos = [tarefa['custo'] for tarefa in sorted(tarefas, key=lambda t: t['ordem'])]
+    modos = {modo: sum(1 for entrada in plano if entrada['modo'] == modo)
+             for modo in ('tarefa', 'congruente', 'pequena', 'cache')}
+    divididas = [entrada for entrada in plano if len(entrada['tarefas']) > 1]
+    print(f"Quadras: {len(plano)}, modos: {modos}, tarefas: {len(tarefas)}, quadras divididas: {len(divididas)}")
+
+    ok = custos == sorted(custos, reverse=True) and modos['congruente'] > 0
+    ok = ok and len(divididas) > 0 and max(custos) <= max(entrada['custo'] for entrada in plano)
+    # Quadras divididas: uma subtarefa por parte, todas sobre a quadra inteira, com as partes das bordas
+    ok = ok and all([tarefas[t]['bordas'] for t in entrada['tarefas']]
+                    == [(parte, entrada['divisao']) for parte in range(entrada['divisao'])]
+                    and all(tarefas[t]['geometria'] is entrada['quadra'] for t in entrada['tarefas'])
+                    for entrada in divididas)
+    return ok
+
+
+def teste_paralelo():
+    """Verifica que o escalonador reproduz o serial e que as quadras grandes são divididas"""
+    print("=" * 60)
+    print("TESTE DA SUBDIVISÃO PARALELA")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        serial, resultado_serial = processar(pasta, "serial")
+        paralelo, resultado_paralelo = processar(pasta, "paralelo", workers_quadras=2)
+        dividido, resultado_dividido = processar(pasta, "dividido", workers_quadras=2, fracao_divisao_quadras=0.05,
+                                                 lotes_minimos_subtarefa=4)
+
+    metricas = resultado_paralelo['escalonamento']
+    print(f"Lotes: serial {resultado_serial['num_lotes']}, paralelo {resultado_paralelo['num_lotes']}, "
+          f"com divisão {resultado_dividido['num_lotes']}")
+    print(f"Métricas: {metricas['tarefas']} tarefas, utilização média {metricas['utilizacao_media']:.0%}, "
+          f"por worker: {[(w['tarefas'], round(w['utilizacao'], 2)) for w in metricas['por_worker']]}")
+    print(f"Quadras divididas: {resultado_dividido['escalonamento']['quadras_divididas']}")
+
+    iguais = set(shapely.to_wkb(serial.lotes.geometrias)) == set(shapely.to_wkb(paralelo.lotes.geometrias))
+    print(f"Lotes do paralelo idênticos aos do serial: {iguais}")
+    ok = iguais and resultado_serial['escalonamento'] == {} and len(metricas['por_worker']) == 2
+    ok = ok and sum(w['tarefas'] for w in metricas['por_worker']) == metricas['tarefas']
+    ok = ok and all(0 < w['utilizacao'] <= 1.05 for w in metricas['por_worker'])
+    ok = ok and verificar_consistencia(paralelo)
+
+    # A divisão de quadras entre workers não muda o loteamento
+    iguais = set(shapely.to_wkb(serial.lotes.geometrias)) == set(shapely.to_wkb(dividido.lotes.geometrias))
+    print(f"Lotes com divisão idênticos aos do serial: {iguais}")
+    ok = ok and resultado_dividido['escalonamento']['quadras_divididas'] > 0 and iguais
+    ok = ok and resultado_dividido['num_lotes'] == resultado_serial['num_lotes']
+    return ok and verificar_consistencia(dividido)
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "Custos e divisão": teste_custos_e_divisao(),
+        "Plano de execução": teste_plano(),
+        "Subdivisão paralela": teste_paralelo(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DO ESCALONADOR DE QUADRAS")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
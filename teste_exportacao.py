@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Teste da exportação GIS em lote (loteamento_exportacao)
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shapely.geometry import box
+
+from loteamento_tabela import TabelaFeicoes
+from loteamento_exportacao import exportar_camadas
+
+
+def _tabelas_exemplo():
+    lotes = TabelaFeicoes('LOTES')
+    lotes.adicionar([box(i * 12, 0, i * 12 + 12, 25) for i in range(10)], quadra_id=0,
+                    estrategias=['esquina'] + ['borda'] * 9)
+    quadras = TabelaFeicoes.de_geometrias('QUADRAS', [box(0, 0, 120, 25)], quadra_id=0)
+    return {'lotes': lotes, 'quadras': quadras}
+
+
+def teste_geojson():
+    """Verifica que o GeoJSON traz todas as feições com seus atributos"""
+    print("=" * 60)
+    print("TESTE DE EXPORTAÇÃO GEOJSON")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'loteamento.geojson')
+        contagem = exportar_camadas(_tabelas_exemplo(), caminho)
+        with open(caminho, encoding='utf-8') as arquivo:
+            features = json.load(arquivo)['features']
+
+    print(f"Feições por camada: {contagem}")
+    propriedades = [f['properties'] for f in features]
+    lotes = [p for p in propriedades if p['camada'] == 'LOTES']
+
+    ok = contagem == {'LOTES': 10, 'QUADRAS': 1} and len(features) == 11
+    ok = ok and all(abs(p['area'] - 300.0) < 1e-6 for p in lotes)
+    ok = ok and all(abs(p['testada'] - 12.0) < 1e-4 and abs(p['profundidade'] - 25.0) < 1e-4 for p in lotes)
+    return ok
+
+
+def teste_geopackage():
+    """Verifica que o GeoPackage recebe uma camada por tipo de feição"""
+    print("\n" + "=" * 60)
+    print("TESTE DE EXPORTAÇÃO GEOPACKAGE")
+    print("=" * 60)
+
+    try:
+        import pyogrio
+    except ImportError:
+        print("pyogrio não disponível - teste ignorado")
+        return True
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'loteamento.gpkg')
+        exportar_camadas(_tabelas_exemplo(), caminho)
+        camadas = {nome for nome, _ in pyogrio.list_layers(caminho)}
+        info = pyogrio.read_info(caminho, layer='LOTES')
+
+    print(f"Camadas: {sorted(camadas)} | Lotes: {info['features']}")
+    return camadas == {'LOTES', 'QUADRAS'} and info['features'] == 10
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "GeoJSON": teste_geojson(),
+        "GeoPackage": teste_geopackage(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE EXPORTAÇÃO")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
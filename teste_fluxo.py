@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Teste da API em fluxo (iter_lotes/iter_resultados) e dos consumidores (loteamento_fluxo)
+"""
+
+import sys
+import os
+import tempfile
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ezdxf
+import numpy as np
+import pyogrio
+
+from dados_teste import PARAMETROS, PERIMETRO_PEQUENO, criar_dxf_perimetro
+from loteamento_fluxo import AcrescentadorGPKG, EscritorDXFFluxo, consumir
+from loteamento_processor_ultra_avancado import LoteamentoProcessorUltraAvancado
+
+
+def teste_iter_lotes(entrada):
+    """Verifica que os lotes saem quadra a quadra, com ids e quadra_id definitivos"""
+    print("=" * 60)
+    print("TESTE DE LOTES EM FLUXO (iter_lotes)")
+    print("=" * 60)
+
+    lote_a_lote = LoteamentoProcessorUltraAvancado(dict(PARAMETROS))
+    lote_a_lote.carregar_perimetro(entrada)
+    lote_a_lote.internalizar_perimetro_com_calcadas()
+    lote_a_lote.criar_sistema_viario_criativo()
+    lote_a_lote.formar_quadras_criativas()
+    blocos = list(lote_a_lote.iter_lotes())
+
+    completo = LoteamentoProcessorUltraAvancado(dict(PARAMETROS))
+    completo.processar_loteamento_ultra_avancado(entrada, os.path.join(os.path.dirname(entrada), "completo.dxf"))
+
+    quadras = [int(bloco.coluna('quadra_id')[0]) for bloco in blocos]
+    ids = np.concatenate([bloco.coluna('id') for bloco in blocos])
+
+    print(f"Blocos gerados: {len(blocos)}, lotes: {len(ids)} (processamento completo: {len(completo.lotes)})")
+
+    ok = len(blocos) > 1 and quadras == sorted(set(quadras))
+    ok = ok and all(len(set(bloco.coluna('quadra_id'))) == 1 for bloco in blocos)
+    ok = ok and ids.tolist() == list(range(len(ids))) and len(ids) == len(lote_a_lote.lotes) == len(completo.lotes)
+    return ok
+
+
+def teste_consumidores(entrada):
+    """Verifica a ordem dos eventos e a gravação em fluxo de DXF e GeoPackage"""
+    print("\n" + "=" * 60)
+    print("TESTE DE CONSUMIDORES EM FLUXO (iter_resultados)")
+    print("=" * 60)
+
+    pasta = os.path.dirname(entrada)
+    arquivo_dxf = os.path.join(pasta, "fluxo.dxf")
+    arquivo_gpkg = os.path.join(pasta, "fluxo.gpkg")
+
+    processador = LoteamentoProcessorUltraAvancado(dict(PARAMETROS))
+    tipos = []
+
+    def eventos():
+        for tipo, dados in processador.iter_resultados(entrada, acumular=False):
+            tipos.append(dados[0] if tipo == 'camada' else tipo)
+            yield tipo, dados
+
+    escritor = EscritorDXFFluxo(arquivo_dxf)
+    gpkg = AcrescentadorGPKG(arquivo_gpkg, quadras_por_gravacao=3)
+    resultado = consumir(eventos(), escritor, gpkg)
+
+    camadas_dxf = Counter(entidade.dxf.layer for entidade in ezdxf.readfile(arquivo_dxf).modelspace())
+    lotes_gpkg = pyogrio.read_info(arquivo_gpkg, layer='LOTES')['features']
+    eventos_lotes = tipos.count('lotes')
+
+    print(f"Eventos: {len(tipos)} ({eventos_lotes} de lotes), primeiros: {tipos[:5]}")
+    print(f"DXF: {dict(camadas_dxf)}")
+    print(f"GeoPackage: {gpkg.contagem}")
+    print(f"Lotes mantidos em memória: {len(processador.lotes)}")
+
+    ok = resultado['sucesso'] and tipos[0] == 'perimetro' and tipos[-1] == 'estatisticas'
+    ok = ok and tipos.index('lotes') < tipos.index('areas_verdes') and eventos_lotes > 1
+    ok = ok and camadas_dxf['LOTES'] == lotes_gpkg == gpkg.contagem['LOTES'] > 0
+    ok = ok and camadas_dxf['QUADRAS'] == gpkg.contagem['QUADRAS'] and camadas_dxf['PERIMETRO'] == 1
+    ok = ok and len(processador.lotes) == 0
+    return ok
+
+
+def teste_acesso_sem_acumular(entrada):
+    """Verifica que, sem acumular, o acesso é validado quadra a quadra como no processamento completo"""
+    print("\n" + "=" * 60)
+    print("TESTE DA VALIDAÇÃO DE ACESSO SEM ACUMULAR")
+    print("=" * 60)
+
+    ok = True
+    for tratamento in ('marcar', 'fundir', 'area_comum'):
+        execucoes = {}
+        for acumular in (True, False):
+            processador = LoteamentoProcessorUltraAvancado(dict(PARAMETROS, tratamento_lotes_sem_acesso=tratamento))
+            blocos = []
+            for tipo, dados in processador.iter_resultados(entrada, acumular=acumular):
+                if tipo == 'lotes':
+                    blocos.append(dados)
+                elif tipo == 'estatisticas':
+                    execucoes[acumular] = (blocos, dados)
+        _, completo = execucoes[True]
+        blocos, fluxo = execucoes[False]
+        ids = np.concatenate([bloco.coluna('id') for bloco in blocos])
+        print(f"{tratamento}: completo {completo['num_lotes']} lotes, {completo['acesso_lotes']}")
+        print(f"{tratamento}: fluxo {len(ids)} lotes, {fluxo['acesso_lotes']}")
+
+        ok = ok and fluxo['acesso_lotes'] == completo['acesso_lotes']
+        ok = ok and fluxo['acesso_lotes']['verificados'] > 0
+        ok = ok and ids.tolist() == list(range(completo['num_lotes']))
+        ok = ok and abs(fluxo['area_verde'] - completo['area_verde']) < 1.0
+    return ok
+
+
+def main():
+    """Função principal dos testes"""
+    with tempfile.TemporaryDirectory() as pasta:
+        entrada = criar_dxf_perimetro(os.path.join(pasta, "perimetro.dxf"), PERIMETRO_PEQUENO)
+        resultados = {
+            "Lotes em fluxo": teste_iter_lotes(entrada),
+            "Consumidores em fluxo": teste_consumidores(entrada),
+            "Acesso sem acumular": teste_acesso_sem_acumular(entrada),
+        }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DA API EM FLUXO")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
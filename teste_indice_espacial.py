@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Teste das estruturas espaciais incrementais (loteamento_indice_espacial)
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from shapely.geometry import Polygon, box
+from shapely.ops import unary_union
+
+from loteamento_indice_espacial import IndiceEspacialIncremental, AlocadorLotes, GradeOcupacao, rotular_componentes
+
+
+def teste_indice_incremental():
+    """Verifica inserção e consulta no índice por grade"""
+    print("=" * 60)
+    print("TESTE DO ÍNDICE ESPACIAL INCREMENTAL")
+    print("=" * 60)
+
+    indice = IndiceEspacialIncremental(tamanho_celula=10.0)
+    for i in range(10):
+        indice.inserir(box(i * 10, 0, i * 10 + 10, 10))
+
+    encontrados = indice.consultar(box(25, 2, 35, 8))
+    print(f"Geometrias indexadas: {len(indice)}")
+    print(f"Candidatos para a consulta: {encontrados}")
+    return 2 in encontrados and 3 in encontrados and 0 not in encontrados
+
+
+def teste_alocacao_sem_sobreposicao():
+    """Verifica que candidatos sobrepostos são recortados antes da aceitação"""
+    print("\n" + "=" * 60)
+    print("TESTE DE ALOCAÇÃO SEM SOBREPOSIÇÃO")
+    print("=" * 60)
+
+    alocador = AlocadorLotes(area_minima=100.0, tamanho_celula=20.0)
+    candidatos = [
+        box(0, 0, 20, 30),     # lote de esquina
+        box(0, 0, 12, 30),     # totalmente coberto pelo primeiro
+        box(15, 0, 35, 30),    # sobrepõe 5 m do primeiro
+        box(30, 0, 50, 30),    # sobrepõe 5 m do anterior
+    ]
+    aceitos = alocador.alocar(candidatos, 'teste')
+    soma = sum(lote.area for lote in aceitos)
+    uniao = unary_union(aceitos).area
+
+    print(f"Candidatos: {len(candidatos)} | Aceitos: {len(aceitos)}")
+    print(f"Soma das áreas: {soma:.2f} m² | União: {uniao:.2f} m²")
+
+    return len(aceitos) == 3 and abs(soma - uniao) < 1e-6 and abs(soma - 1500.0) < 1e-6
+
+
+def teste_rotulacao_componentes():
+    """Verifica a rotulação de componentes conexos (vizinhança 4)"""
+    print("\n" + "=" * 60)
+    print("TESTE DE ROTULAÇÃO DE COMPONENTES")
+    print("=" * 60)
+
+    mascara = np.array([
+        [1, 1, 0, 1],
+        [0, 1, 0, 1],
+        [1, 0, 0, 1],
+        [1, 1, 1, 1],
+    ], dtype=bool)
+    rotulos, n = rotular_componentes(mascara)
+    print(f"Componentes: {n}")
+    print(rotulos)
+
+    ok = n == 2
+    ok = ok and rotulos[0, 0] == rotulos[0, 1] == rotulos[1, 1]
+    ok = ok and rotulos[0, 0] != rotulos[0, 3] and rotulos[0, 3] == rotulos[3, 0]
+    return ok
+
+
+def teste_grade_ocupacao():
+    """Verifica que a grade encontra o espaço livre e a diferença exata o recorta"""
+    print("\n" + "=" * 60)
+    print("TESTE DA GRADE DE OCUPAÇÃO")
+    print("=" * 60)
+
+    area = Polygon([(0, 0), (100, 0), (100, 60), (0, 60)])
+    grade = GradeOcupacao(area, resolucao=1.0)
+    grade.marcar([box(0, 0, 100, 8)])                                   # rua
+    grade.marcar([box(i * 12, 8, i * 12 + 12, 33) for i in range(6)])  # lotes
+    grade.marcar([box(0, 33, 100, 35)])                                 # faixa ocupada
+    livres = grade.areas_livres(100.0)
+    areas = sorted(round(p.area, 3) for p in livres)
+
+    print(f"Área livre aproximada: {grade.area_livre_aproximada():.1f} m²")
+    print(f"Regiões livres exatas: {areas}")
+
+    ok = areas == [700.0, 2500.0]
+    ok = ok and abs(grade.area_livre_aproximada() - 3200.0) < 1e-9
+    return ok
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "Índice incremental": teste_indice_incremental(),
+        "Alocação sem sobreposição": teste_alocacao_sem_sobreposicao(),
+        "Rotulação de componentes": teste_rotulacao_componentes(),
+        "Grade de ocupação": teste_grade_ocupacao(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE ÍNDICE ESPACIAL")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
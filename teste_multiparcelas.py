@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Teste do modo de múltiplas glebas (loteamento_multiparcelas)
+"""
+
+import sys
+import os
+import csv
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ezdxf
+
+from dados_teste import PARAMETROS, criar_dxf_glebas
+from loteamento_multiparcelas import carregar_parcelas, processar_multiparcelas
+
+
+def criar_kml_nomes_repetidos(arquivo):
+    """Glebas de KML cujos nomes são repetidos ou ficam iguais como prefixo de layer"""
+    placemarks = []
+    for i, nome in enumerate(['Gleba 1', 'Gleba_1', 'Gleba 1', 'L' * 80, 'L' * 80]):
+        x = i * 200
+        coordenadas = f"{x},0 {x + 160},0 {x + 160},200 {x},210 {x},0"
+        placemarks.append(f"<Placemark><name>{nome}</name><Polygon><outerBoundaryIs><LinearRing>"
+                          f"<coordinates>{coordenadas}</coordinates></LinearRing></outerBoundaryIs></Polygon></Placemark>")
+    with open(arquivo, 'w', encoding='utf-8') as kml:
+        kml.write('<?xml version="1.0" encoding="UTF-8"?>\n<kml xmlns="http://www.opengis.net/kml/2.2"><Document>\n'
+                  + "\n".join(placemarks) + "\n</Document></kml>\n")
+
+
+def teste_carregamento(arquivo):
+    """Verifica a leitura das glebas fechadas e os filtros de layer e nome"""
+    print("=" * 60)
+    print("TESTE DE CARREGAMENTO DE GLEBAS")
+    print("=" * 60)
+
+    todas = carregar_parcelas(arquivo)
+    por_layer = carregar_parcelas(arquivo, camadas=['GLEBAS'])
+    por_nome = carregar_parcelas(arquivo, filtro_nome='OUTROS_*')
+
+    print(f"Glebas fechadas: {len(todas)}")
+    print(f"Filtro por layer GLEBAS: {len(por_layer)}")
+    print(f"Filtro por nome OUTROS_*: {len(por_nome)}")
+
+    return len(todas) == 4 and len(por_layer) == 3 and len(por_nome) == 1
+
+
+def teste_processamento(arquivo, pasta, max_workers):
+    """Processa as glebas e confere o DXF combinado e o CSV de estatísticas"""
+    print("\n" + "=" * 60)
+    print(f"TESTE DE PROCESSAMENTO DE GLEBAS (max_workers={max_workers})")
+    print("=" * 60)
+
+    saida = os.path.join(pasta, f"glebas_{max_workers}.dxf")
+    resultado = processar_multiparcelas(arquivo, saida, PARAMETROS, camadas=['GLEBAS'],
+                                        max_workers=max_workers)
+    if not resultado['sucesso']:
+        print(f"Falha: {resultado.get('erro')}")
+        return False
+
+    doc = ezdxf.readfile(saida)
+    prefixos = {f"{p['nome'].upper()}_LOTES" for p in carregar_parcelas(arquivo, camadas=['GLEBAS'])}
+    layers = {layer.dxf.name for layer in doc.layers}
+    lotes_dxf = sum(1 for e in doc.modelspace() if e.dxf.layer.endswith('_LOTES'))
+
+    with open(resultado['arquivo_estatisticas'], encoding='utf-8') as arquivo_csv:
+        linhas = list(csv.DictReader(arquivo_csv))
+
+    print(f"Glebas: {resultado['num_glebas']} (com erro: {resultado['glebas_com_erro']})")
+    print(f"Lotes: {resultado['num_lotes']} (no DXF: {lotes_dxf})")
+    print(f"Linhas no CSV: {len(linhas)}")
+
+    ok = resultado['num_glebas'] == 3 and resultado['glebas_com_erro'] == 0
+    ok = ok and prefixos <= layers and lotes_dxf == resultado['num_lotes'] > 0
+    ok = ok and len(linhas) == 3 and sum(int(l['num_lotes']) for l in linhas) == resultado['num_lotes']
+    return ok
+
+
+def teste_nomes_repetidos(pasta):
+    """Glebas com o mesmo prefixo de layer recebem sufixos e o DXF combinado é gravado"""
+    print("\n" + "=" * 60)
+    print("TESTE DE GLEBAS COM NOMES REPETIDOS (KML)")
+    print("=" * 60)
+
+    arquivo = os.path.join(pasta, "glebas.kml")
+    criar_kml_nomes_repetidos(arquivo)
+    saida = os.path.join(pasta, "glebas_kml.dxf")
+    resultado = processar_multiparcelas(arquivo, saida, PARAMETROS, max_workers=1)
+    if not resultado['sucesso']:
+        print(f"Falha: {resultado.get('erro')}")
+        return False
+
+    prefixos = [e['prefixo_layer'] for e in resultado['estatisticas_glebas']]
+    layers = {layer.dxf.name for layer in ezdxf.readfile(saida).layers}
+    print(f"Prefixos: {prefixos}")
+
+    return (resultado['glebas_com_erro'] == 0 and len(set(prefixos)) == 5
+            and prefixos[:3] == ['GLEBA_1', 'GLEBA_1_2', 'GLEBA_1_3']
+            and all(f"{p}_MALHA_VIARIA" in layers and len(f"{p}_MALHA_VIARIA") <= 64 for p in prefixos))
+
+
+def main():
+    """Função principal dos testes"""
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo = os.path.join(pasta, "glebas.dxf")
+        criar_dxf_glebas(arquivo)
+        resultados = {
+            "Carregamento e filtros": teste_carregamento(arquivo),
+            "Processamento sequencial": teste_processamento(arquivo, pasta, 1),
+            "Processamento paralelo": teste_processamento(arquivo, pasta, 2),
+            "Nomes repetidos": teste_nomes_repetidos(pasta),
+        }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE MÚLTIPLAS GLEBAS")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
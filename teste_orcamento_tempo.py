@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Teste da subdivisão com orçamento de tempo ("anytime") do processador ultra-avançado
+"""
+
+import sys
+import os
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import shapely
+
+from dados_teste import PARAMETROS, criar_dxf_estrela
+from loteamento_processor_ultra_avancado import LoteamentoProcessorUltraAvancado
+
+
+def _processar(pasta, orcamento, parametros=None):
+    entrada = os.path.join(pasta, "estrela.dxf")
+    if not os.path.exists(entrada):
+        criar_dxf_estrela(entrada)
+    processador = LoteamentoProcessorUltraAvancado(dict(PARAMETROS) if parametros is None else parametros)
+    inicio = time.perf_counter()
+    resultado = processador.processar_loteamento_ultra_avancado(entrada, os.path.join(pasta, "saida.dxf"),
+                                                                orcamento_tempo=orcamento)
+    return processador, resultado, time.perf_counter() - inicio
+
+
+def _sem_sobreposicao(processador):
+    lotes = processador.lotes.geometrias
+    return len(lotes) == 0 or shapely.area(lotes).sum() - shapely.union_all(lotes).area < 1.0
+
+
+def teste_sem_orcamento(pasta):
+    """Sem orçamento, nenhuma quadra é truncada"""
+    print("=" * 60)
+    print("TESTE SEM ORÇAMENTO DE TEMPO")
+    print("=" * 60)
+
+    processador, resultado, duracao = _processar(pasta, None)
+    print(f"Lotes: {resultado['num_lotes']}, truncadas: {resultado['quadras_truncadas']}, {duracao:.2f}s")
+    return resultado['sucesso'] and resultado['quadras_truncadas'] == [] and _sem_sobreposicao(processador)
+
+
+def teste_orcamento_esgotado(pasta):
+    """Com orçamento mínimo, as quadras são truncadas mas ficam com o resultado da grade"""
+    print("\n" + "=" * 60)
+    print("TESTE COM ORÇAMENTO ESGOTADO")
+    print("=" * 60)
+
+    processador, resultado, duracao = _processar(pasta, 1e-4)
+    truncadas = resultado['quadras_truncadas']
+    com_lotes = np.unique(processador.lotes.coluna('quadra_id'))
+
+    print(f"Lotes: {resultado['num_lotes']}, quadras com lotes: {len(com_lotes)} de {len(processador.quadras)}")
+    print(f"Truncadas: {truncadas}, {duracao:.2f}s")
+    print(f"Lotes por estratégia: {resultado['lotes_por_estrategia']}")
+    # Parcelamentos truncados não são memorizados para as quadras congruentes
+    guardadas = len(processador.cache_quadras)
+    subdivididas = sum(quadra.area >= 2 * PARAMETROS['area_minima_lote'] for quadra in processador.quadras)
+    print(f"Formas memorizadas: {guardadas} (quadras subdivididas: {subdivididas})")
+
+    return (resultado['sucesso'] and len(truncadas) > 0 and resultado['num_lotes'] > 0
+            and guardadas <= subdivididas - len(truncadas)
+            and all(0 <= i < len(processador.quadras) for i in truncadas)
+            and set(resultado['lotes_por_estrategia']) <= {'grade', 'quadra_unica'}
+            and _sem_sobreposicao(processador))
+
+
+def teste_orcamento_folgado(pasta):
+    """Com orçamento folgado, todas as estratégias rodam e nenhuma quadra é truncada"""
+    print("\n" + "=" * 60)
+    print("TESTE COM ORÇAMENTO FOLGADO")
+    print("=" * 60)
+
+    processador, resultado, duracao = _processar(pasta, 120.0)
+    print(f"Lotes: {resultado['num_lotes']}, truncadas: {resultado['quadras_truncadas']}, {duracao:.2f}s")
+    print(f"Lotes por estratégia: {resultado['lotes_por_estrategia']}")
+    return (resultado['sucesso'] and resultado['quadras_truncadas'] == [] and resultado['num_lotes'] > 0
+            and _sem_sobreposicao(processador))
+
+
+def teste_parametros_reaproveitados(pasta):
+    """O orçamento de uma chamada não fica no dicionário de parâmetros nem vale para as seguintes"""
+    print("\n" + "=" * 60)
+    print("TESTE DE PARÂMETROS REAPROVEITADOS")
+    print("=" * 60)
+
+    parametros = dict(PARAMETROS)
+    processador, com_orcamento, _ = _processar(pasta, 1e-4, parametros)
+    _, reaproveitado, _ = _processar(pasta, None, parametros)
+    sem_orcamento = processador.processar_loteamento_ultra_avancado(os.path.join(pasta, "estrela.dxf"),
+                                                                    os.path.join(pasta, "saida.dxf"))
+    print(f"Truncadas com orçamento: {len(com_orcamento['quadras_truncadas'])}, "
+          f"com o dicionário reaproveitado: {len(reaproveitado['quadras_truncadas'])}, "
+          f"no mesmo processador: {len(sem_orcamento['quadras_truncadas'])}")
+    return ('orcamento_tempo' not in parametros and len(com_orcamento['quadras_truncadas']) > 0
+            and reaproveitado['quadras_truncadas'] == [] and sem_orcamento['quadras_truncadas'] == [])
+
+
+def main():
+    """Função principal dos testes"""
+    with tempfile.TemporaryDirectory() as pasta:
+        resultados = {
+            "Sem orçamento": teste_sem_orcamento(pasta),
+            "Orçamento esgotado": teste_orcamento_esgotado(pasta),
+            "Orçamento folgado": teste_orcamento_folgado(pasta),
+            "Parâmetros reaproveitados": teste_parametros_reaproveitados(pasta),
+        }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE ORÇAMENTO DE TEMPO")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Teste dos motores de particionamento geométrico (loteamento_particionamento)
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shapely.geometry import Polygon, LineString
+from shapely.affinity import rotate
+from shapely.ops import unary_union
+
+from loteamento_particionamento import (dividir_bsp, fatiar_em_faixas, angulo_eixo_principal,
+                                        orientar_borda_para_dentro, profundidades_ao_longo_da_borda,
+                                        otimizar_testadas)
+
+AREA_IRREGULAR = Polygon([(0, 0), (150, -20), (200, 100), (100, 250), (0, 200), (-50, 50)])
+
+
+def teste_bsp_balanceado():
+    """Verifica que o BSP gera lotes entre 1x e 2x a área mínima, sem sobreposição"""
+    print("=" * 60)
+    print("TESTE BSP BALANCEADO POR ÁREA")
+    print("=" * 60)
+
+    area_minima = 200.0
+    lotes = dividir_bsp(AREA_IRREGULAR, area_minima, testada_minima=8.0)
+    soma = sum(lote.area for lote in lotes)
+    uniao = unary_union(lotes).area
+
+    print(f"Lotes gerados: {len(lotes)}")
+    print(f"Área dos lotes: {soma:.2f} m² de {AREA_IRREGULAR.area:.2f} m²")
+
+    ok = len(lotes) > 0
+    ok = ok and all(area_minima <= lote.area < 2 * area_minima + 1e-6 for lote in lotes)
+    ok = ok and abs(soma - uniao) < 1e-3
+    ok = ok and soma <= AREA_IRREGULAR.area + 1e-6
+    return ok
+
+
+def teste_bsp_lasca():
+    """Verifica que a guarda de lascas limita o corte de faixas estreitas"""
+    print("\n" + "=" * 60)
+    print("TESTE BSP EM LASCA")
+    print("=" * 60)
+
+    lasca = Polygon([(0, 0), (1000, 0), (1000, 3), (0, 3)])
+    lotes = dividir_bsp(lasca, 200.0, testada_minima=8.0, profundidade_maxima=3)
+    print(f"Lotes gerados: {len(lotes)} (máximo esperado: 8)")
+    return 0 < len(lotes) <= 8
+
+
+def teste_faixas_rotacionadas():
+    """Verifica que as faixas seguem o eixo principal de uma quadra rotacionada"""
+    print("\n" + "=" * 60)
+    print("TESTE DE FATIAMENTO EM FAIXAS ROTACIONADAS")
+    print("=" * 60)
+
+    quadra = rotate(Polygon([(0, 0), (100, 0), (100, 20), (0, 20)]), 30, origin=(0, 0))
+    angulo = angulo_eixo_principal(quadra)
+    faixas = fatiar_em_faixas(quadra, 12.0, angulo)
+    areas = [faixa.area for faixa in faixas]
+
+    print(f"Eixo principal: {angulo:.1f}°")
+    print(f"Faixas: {len(faixas)} -> {[round(a, 1) for a in areas]}")
+
+    ok = abs(angulo - 30.0) < 1e-6
+    ok = ok and len(faixas) == 8
+    ok = ok and all(abs(a - 250.0) < 1e-6 for a in areas)
+    ok = ok and abs(sum(areas) - quadra.area) < 1e-6
+    return ok
+
+
+def teste_testadas_otimizadas():
+    """Verifica que as testadas respeitam os limites e a profundidade disponível"""
+    print("\n" + "=" * 60)
+    print("TESTE DE OTIMIZAÇÃO DE TESTADAS")
+    print("=" * 60)
+
+    # Quadra em "L": metade rasa (15 m) e metade funda (30 m)
+    quadra = Polygon([(0, 0), (100, 0), (100, 30), (50, 30), (50, 15), (0, 15)])
+    borda = orientar_borda_para_dentro(quadra, LineString([(100, 0), (0, 0)]))
+    profundidades = profundidades_ao_longo_da_borda(quadra, borda, 0.5, 40.0)
+    segmentos = otimizar_testadas(profundidades, 0.5, 8.0, 20.0, 200.0,
+                                  profundidade_minima=15.0, profundidade_maxima=40.0,
+                                  objetivo='Lotes Pequenos')
+
+    print(f"Lotes na borda: {len(segmentos)}")
+    for inicio, fim, profundidade in segmentos:
+        print(f"  {inicio:6.1f} - {fim:6.1f} m  (testada {fim - inicio:4.1f} m, profundidade {profundidade:4.1f} m)")
+
+    ok = len(segmentos) == 9
+    ok = ok and all(8.0 <= fim - inicio <= 20.0 for inicio, fim, _ in segmentos)
+    ok = ok and all((fim - inicio) * prof >= 200.0 for inicio, fim, prof in segmentos)
+    ok = ok and all(fim <= proximo for (_, fim, _), (proximo, _, _) in zip(segmentos, segmentos[1:]))
+    return ok
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "BSP balanceado": teste_bsp_balanceado(),
+        "BSP em lasca": teste_bsp_lasca(),
+        "Faixas rotacionadas": teste_faixas_rotacionadas(),
+        "Testadas otimizadas": teste_testadas_otimizadas(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE PARTICIONAMENTO")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
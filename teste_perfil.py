@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Teste do perfil de execução embutido (loteamento_perfil)
+"""
+
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ezdxf
+
+from dados_teste import PARAMETROS, criar_dxf_glebas
+from loteamento_perfil import executar_com_perfil, perfil_ativo, VARIAVEL_PERFIL
+from loteamento_processor_ultra_avancado import LoteamentoProcessorUltraAvancado
+from loteamento_multiparcelas import processar_multiparcelas
+
+
+def _funcao_lenta(n):
+    return {'soma': sum(i * i for i in range(n))}
+
+
+def teste_chave_e_ambiente():
+    """Verifica a ativação pelo parâmetro e pela variável de ambiente"""
+    print("=" * 60)
+    print("TESTE DE ATIVAÇÃO DO PERFIL")
+    print("=" * 60)
+
+    anterior = os.environ.pop(VARIAVEL_PERFIL, None)
+    try:
+        desligado = perfil_ativo({}) or perfil_ativo(None)
+        por_parametro = perfil_ativo({'perfil': True})
+        os.environ[VARIAVEL_PERFIL] = '1'
+        por_ambiente = perfil_ativo({})
+    finally:
+        os.environ.pop(VARIAVEL_PERFIL, None)
+        if anterior is not None:
+            os.environ[VARIAVEL_PERFIL] = anterior
+
+    print(f"Desligado: {desligado}, por parâmetro: {por_parametro}, por ambiente: {por_ambiente}")
+    return not desligado and por_parametro and por_ambiente
+
+
+def _pilhas_validas(arquivo):
+    with open(arquivo, encoding='utf-8') as entrada:
+        linhas = entrada.read().splitlines()
+    return len(linhas) > 0 and all(l.rsplit(' ', 1)[1].isdigit() for l in linhas), linhas
+
+
+def teste_execucao_com_perfil():
+    """Verifica os arquivos .prof/.folded e a lista de funções mais custosas"""
+    print("\n" + "=" * 60)
+    print("TESTE DE EXECUÇÃO COM PERFIL")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        saida = os.path.join(pasta, "resultado.dxf")
+        resultado = executar_com_perfil(_funcao_lenta, saida, {'intervalo_amostragem_perfil': 0.001}, 2000000)
+        perfil = resultado['perfil']
+        existe = os.path.exists(os.path.join(pasta, "resultado.prof"))
+        validas, linhas = _pilhas_validas(perfil['arquivo_pilhas'])
+
+    nomes = [l['funcao'] for l in perfil['funcoes_mais_custosas']]
+    print(f"Amostras: {perfil['amostras']}, tempo total: {perfil['tempo_total']:.3f}s")
+    print(f"Mais custosas: {nomes[:3]}")
+    print(f"Pilha mais frequente: {linhas[0] if linhas else '-'}")
+
+    return (resultado['soma'] > 0 and existe and validas and perfil['amostras'] > 0
+            and any('_funcao_lenta' in nome or 'genexpr' in nome for nome in nomes[:3])
+            and any('_funcao_lenta' in l for l in linhas))
+
+
+def teste_processadores():
+    """Verifica o perfil no processador ultra-avançado e no processamento de várias glebas"""
+    print("\n" + "=" * 60)
+    print("TESTE DE PERFIL NOS PROCESSADORES")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        entrada = os.path.join(pasta, "perimetro.dxf")
+        doc = ezdxf.new("R2010")
+        doc.modelspace().add_lwpolyline([(0, 0), (150, 0), (160, 180), (0, 200)], close=True)
+        doc.saveas(entrada)
+
+        processador = LoteamentoProcessorUltraAvancado(dict(PARAMETROS, perfil=True))
+        resultado = processador.processar_loteamento_ultra_avancado(entrada, os.path.join(pasta, "ultra.dxf"))
+        perfil_ultra = resultado.get('perfil', {})
+        arquivos_ultra = all(os.path.exists(os.path.join(pasta, f"ultra.{ext}")) for ext in ('prof', 'folded'))
+
+        glebas = os.path.join(pasta, "glebas.dxf")
+        criar_dxf_glebas(glebas)
+        lote = processar_multiparcelas(glebas, os.path.join(pasta, "lote.dxf"), dict(PARAMETROS, perfil=True),
+                                       camadas=['GLEBAS'], max_workers=2)
+        perfil_lote = lote.get('perfil', {})
+        arquivos_lote = all(os.path.exists(os.path.join(pasta, f"lote.{ext}")) for ext in ('prof', 'folded'))
+
+    nomes_lote = [l['funcao'] for l in perfil_lote.get('funcoes_mais_custosas', [])]
+    print(f"Ultra: {resultado['num_lotes']} lotes, {len(perfil_ultra.get('funcoes_mais_custosas', []))} funções")
+    print(f"Glebas: {lote.get('num_lotes')} lotes, tempo perfilado {perfil_lote.get('tempo_total', 0):.2f}s")
+
+    return (resultado['sucesso'] and arquivos_ultra and len(perfil_ultra.get('funcoes_mais_custosas', [])) > 0
+            and lote['sucesso'] and arquivos_lote and len(nomes_lote) > 0)
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "Ativação": teste_chave_e_ambiente(),
+        "Execução com perfil": teste_execucao_com_perfil(),
+        "Processadores": teste_processadores(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE PERFIL")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Teste do pré-processamento do perímetro: arcos e simplificação (loteamento_perimetro)
+"""
+
+import sys
+import os
+import math
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from shapely.geometry import Point
+
+from loteamento_perimetro import expandir_arcos, preprocessar_perimetro
+
+
+def teste_expansao_arcos():
+    """Verifica que o semicírculo expandido respeita a tolerância de corda"""
+    print("=" * 60)
+    print("TESTE DE EXPANSÃO DE ARCOS (BULGE)")
+    print("=" * 60)
+
+    # Bulge 1 entre (0, 0) e (20, 0): semicírculo anti-horário de raio 10 centrado em (10, 0)
+    coords = expandir_arcos([(0, 0, 1.0), (20, 0, 0.0), (20, 5, 0.0), (0, 5, 0.0)],
+                            fechado=True, tolerancia_corda=0.01)
+    arco = coords[1:-3]
+    raios = np.hypot(arco[:, 0] - 10, arco[:, 1])
+    cordas = np.hypot(*np.diff(coords[:-2], axis=0).T)
+    flecha = 10 - math.sqrt(100 - (cordas.max() / 2) ** 2)
+
+    print(f"Vértices após expansão: {len(coords)}")
+    print(f"Raio dos vértices do arco: {raios.min():.6f} - {raios.max():.6f}")
+    print(f"Maior flecha: {flecha:.5f} m (tolerância 0,01 m)")
+
+    return np.allclose(raios, 10.0) and flecha <= 0.01 + 1e-9 and arco[:, 1].max() < 0
+
+
+def teste_simplificacao():
+    """Verifica a remoção de vértices colineares e quase duplicados"""
+    print("\n" + "=" * 60)
+    print("TESTE DE SIMPLIFICAÇÃO DO PERÍMETRO")
+    print("=" * 60)
+
+    lado = [(x, 0.002 * math.sin(x), 0.0) for x in np.linspace(0, 100, 1001)]
+    pontos = lado + [(100, 0.0005, 0.0), (100, 60, 0.0), (0, 60, 0.0)]
+    perimetro, relatorio = preprocessar_perimetro(pontos, tolerancia_levantamento=0.01)
+
+    print(f"Relatório: {relatorio}")
+    print(f"Área: {perimetro.area:.3f} m²")
+
+    ok = relatorio['vertices_originais'] == 1004 and relatorio['vertices_finais'] == 4
+    ok = ok and abs(perimetro.area - 6000.0) < 1.0
+    ok = ok and perimetro.buffer(0.01).contains(Point(50, 30))
+    return ok
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "Expansão de arcos": teste_expansao_arcos(),
+        "Simplificação": teste_simplificacao(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE PRÉ-PROCESSAMENTO DO PERÍMETRO")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Teste do modelo de precisão e da remoção de lascas (loteamento_precisao)
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shapely.geometry import Polygon, box
+
+from loteamento_precisao import fixar_precisao, remover_lascas
+
+
+def teste_grade_precisao():
+    """Verifica o arredondamento sem alterar a ordem nem a orientação dos vértices"""
+    print("=" * 60)
+    print("TESTE DA GRADE DE PRECISÃO")
+    print("=" * 60)
+
+    quadra = Polygon([(0, 0), (30.00004, 0.0002), (30.0001, 0.0001), (30, 20), (0, 20.00049)])
+    fixada = fixar_precisao(quadra, 0.001)
+    coords = list(fixada.exterior.coords)
+    print(f"Vértices: {len(quadra.exterior.coords)} -> {len(coords)}")
+    print(f"Coordenadas: {coords}")
+
+    ok = coords == [(0, 0), (30, 0), (30, 20), (0, 20), (0, 0)]
+    ok = ok and fixada.exterior.is_ccw == quadra.exterior.is_ccw
+    return ok
+
+
+def teste_remocao_lascas():
+    """Verifica que a lasca é incorporada ao vizinho de maior divisa comum"""
+    print("\n" + "=" * 60)
+    print("TESTE DE REMOÇÃO DE LASCAS")
+    print("=" * 60)
+
+    lote_a = box(0, 0, 12, 25)
+    lote_b = box(12, 0, 24, 10)
+    lasca = box(12, 10, 12.2, 25)   # divisa de 15 m com A e 0,2 m com B
+    resultado = remover_lascas([lote_a, lasca, lote_b], area_lasca=1.0, largura_lasca=0.3)
+
+    print(f"Geometrias: 3 -> {len(resultado)}")
+    print(f"Áreas: {[round(g.area, 3) for g in resultado]}")
+
+    ok = len(resultado) == 2
+    ok = ok and abs(resultado[0].area - (lote_a.area + lasca.area)) < 1e-9
+    ok = ok and abs(resultado[1].area - lote_b.area) < 1e-9
+    return ok
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "Grade de precisão": teste_grade_precisao(),
+        "Remoção de lascas": teste_remocao_lascas(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE PRECISÃO")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
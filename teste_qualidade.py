@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Teste das métricas de qualidade dos lotes (loteamento_qualidade)
+"""
+
+import sys
+import os
+import math
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon, box
+
+from dados_teste import processar
+from loteamento_qualidade import CAMPOS_QUALIDADE, IndiceRuas, dimensoes_frente_rua, metricas_lotes, resumir_metricas
+from loteamento_tabela import TabelaFeicoes
+
+# Rua ao sul da faixa y = 0 (com calçada de 2 m) e rua a oeste de x = 0 (encostada)
+RUAS = [box(-10, -10, 200, -2), box(-10, -10, 0, 100)]
+
+
+def teste_metricas():
+    """Verifica as métricas de lotes conhecidos"""
+    print("=" * 60)
+    print("TESTE DAS MÉTRICAS DE LOTES")
+    print("=" * 60)
+
+    lotes = [
+        box(0, 0, 12, 25),                                   # esquina: testada 12 na rua sul + 25 na oeste
+        box(12, 0, 24, 25),                                  # meio de quadra: testada 12
+        box(24, 0, 30, 40),                                  # estreito: testada 6 < 8
+        box(40, 40, 52, 65),                                 # sem acesso
+        Polygon([(60, 0), (80, 0), (70, 30)]),               # triangular, testada 20
+        box(90, 0, 120, 25),                                 # 750 m² > área máxima
+        box(130, 0, 150, 12),                                # raso: profundidade 12 < 15
+    ]
+    metricas = metricas_lotes(lotes, RUAS, area_minima=200.0, testada_minima=8.0, area_maxima=600.0,
+                              profundidade_minima=15.0, profundidade_maxima=40.0)
+    for campo in ('testada', 'profundidade', 'testada_rua', 'retangularidade', 'compacidade'):
+        print(f"{campo}: {np.round(metricas[campo], 3)}")
+    print(f"acesso_rua: {metricas['acesso_rua']}, conforme: {metricas['conforme']}")
+
+    esperado_compacidade = 4 * math.pi * 300 / 74 ** 2
+    ok = metricas.dtype.names == tuple(nome for nome, _ in CAMPOS_QUALIDADE) and len(metricas) == 7
+    ok = ok and np.allclose(metricas['testada'][:2], 12) and np.allclose(metricas['profundidade'][:2], 25)
+    ok = ok and abs(metricas['testada_rua'][0] - 37) < 0.2 and abs(metricas['testada_rua'][1] - 12) < 0.2
+    ok = ok and abs(metricas['testada_rua'][2] - 6) < 0.2 and metricas['testada_rua'][3] == 0
+    ok = ok and np.allclose(metricas['retangularidade'][:4], 1) and metricas['retangularidade'][4] < 0.75
+    ok = ok and abs(metricas['compacidade'][0] - esperado_compacidade) < 1e-9
+    ok = ok and metricas['acesso_rua'].tolist() == [True, True, True, False, True, True, True]
+    ok = ok and np.allclose(metricas['profundidade'][5:], [25, 12])
+    return ok and metricas['conforme'].tolist() == [True, True, False, False, True, False, False]
+
+
+def teste_dimensoes_frente():
+    """Verifica testada e profundidade medidas pela frente para a rua, e não pelos lados do retângulo"""
+    print("=" * 60)
+    print("TESTE DA TESTADA MEDIDA PELA FRENTE")
+    print("=" * 60)
+
+    lotes = [
+        box(0, 0, 12, 25),                                   # esquina: testada principal 12 (menor frente)
+        box(40, 0, 70, 12),                                  # largo e raso: testada 30, profundidade 12
+        box(0, 30, 30, 42),                                  # frente só para a rua oeste: testada 12
+        box(40, 40, 52, 65),                                 # sem acesso: lados do retângulo mínimo
+    ]
+    testada, profundidade = dimensoes_frente_rua(lotes, RUAS)
+    tabela = TabelaFeicoes.de_geometrias('LOTES', lotes)
+    ao_inserir = tabela.coluna('testada').copy()
+    tabela.definir_dimensoes(testada, profundidade)
+    print(f"Testadas: {testada}, profundidades: {profundidade}")
+    print(f"Na tabela: {ao_inserir} ao inserir, {tabela.coluna('testada')} pela frente")
+
+    ok = np.allclose(testada, [12, 30, 12, 12]) and np.allclose(profundidade, [25, 12, 30, 25])
+    ok = ok and np.allclose(ao_inserir, [12, 12, 12, 12]) and np.allclose(tabela.coluna('testada'), testada)
+    return ok and np.allclose(metricas_lotes(lotes, RUAS)['testada'], testada)
+
+
+def teste_pontuacao():
+    """Verifica que a pontuação agregada prefere mais lotes conformes, desconta os não conformes e desempata pela forma"""
+    print("=" * 60)
+    print("TESTE DA PONTUAÇÃO AGREGADA")
+    print("=" * 60)
+
+    indice = IndiceRuas(RUAS)
+    retangulos = [box(x, 0, x + 12, 25) for x in range(0, 48, 12)]
+    trapezios = [Polygon([(x, 0), (x + 12, 0), (x + 14, 25), (x - 2, 25)]) for x in range(0, 48, 16)]
+    poucos = [box(0, 0, 24, 25), box(24, 0, 48, 25)]
+    # Os quatro retângulos e, atrás deles, três lotes sem acesso
+    com_fundos = retangulos + [box(x, 25, x + 12, 50) for x in range(12, 48, 12)]
+    casos = (('retangulos', retangulos), ('trapezios', trapezios), ('poucos', poucos), ('com_fundos', com_fundos))
+    resumos = {nome: resumir_metricas(metricas_lotes(lotes, indice, 200.0, 8.0), 48 * 25) for nome, lotes in casos}
+    for nome, resumo in resumos.items():
+        print(f"{nome}: {resumo['conformes']} conformes, pontuação {resumo['pontuacao']:.3f}")
+
+    vazio = resumir_metricas(metricas_lotes([], indice))
+    print(f"Vazio: {vazio['pontuacao']}")
+    ok = resumos['retangulos']['pontuacao'] > resumos['trapezios']['pontuacao'] > resumos['poucos']['pontuacao']
+    ok = ok and resumos['poucos']['pontuacao'] > resumos['com_fundos']['pontuacao']
+    ok = ok and resumos['com_fundos']['conformes'] == resumos['retangulos']['conformes'] == 4
+    return ok and vazio['pontuacao'] == 0 and vazio['lotes'] == 0
+
+
+def teste_loteamento():
+    """Verifica as métricas nas estatísticas e o custo vetorizado contra um laço por lote"""
+    print("=" * 60)
+    print("TESTE DAS MÉTRICAS NO LOTEAMENTO")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        processador, resultado = processar(pasta, "qualidade")
+    qualidade = resultado['qualidade']
+    print(f"Qualidade: {qualidade}")
+
+    lotes = processador.lotes.geometrias
+    indice = IndiceRuas(processador.ruas)
+    inicio = time.perf_counter()
+    metricas = metricas_lotes(lotes, indice, 200.0, 8.0)
+    tempo_vetorizado = time.perf_counter() - inicio
+
+    # Referência: as mesmas métricas lote a lote (testada pelo contorno dentro da rua engordada)
+    rua = shapely.union_all(np.asarray(processador.ruas))
+    faixa = rua.buffer(0.05)
+    inicio = time.perf_counter()
+    acesso = [lote.distance(rua) <= 2.0 for lote in lotes]
+    retangularidade = [lote.area / lote.minimum_rotated_rectangle.area for lote in lotes]
+    testada_rua = [lote.boundary.intersection(faixa).length for lote in lotes]
+    tempo_laco = time.perf_counter() - inicio
+    print(f"{len(lotes)} lotes: vetorizado {tempo_vetorizado * 1000:.0f} ms, laço {tempo_laco * 1000:.0f} ms")
+
+    # Lotes encostados na rua: a referência também soma os trechos das divisas laterais e das
+    # arestas oblíquas que cruzam a faixa de 0,05 m, que a métrica vetorizada não conta
+    encostados = np.array([lote.distance(rua) < 1e-6 for lote in lotes])
+    diferenca = np.abs(metricas['testada_rua'] - testada_rua)[encostados]
+    print(f"Testada sobre a rua (lotes encostados): diferença máxima {diferenca.max():.3f} m")
+    ok = qualidade['lotes'] == len(lotes) and 0 < qualidade['conformes'] <= qualidade['com_acesso'] <= len(lotes)
+    ok = ok and metricas['acesso_rua'].tolist() == acesso and np.allclose(metricas['retangularidade'], retangularidade)
+    ok = ok and diferenca.max() < 1.0
+    # As colunas da tabela de lotes também vêm da frente para a rua
+    ok = ok and np.allclose(processador.lotes.coluna('testada'), metricas['testada'], atol=1e-3)
+    ok = ok and np.allclose(processador.lotes.coluna('profundidade'), metricas['profundidade'], atol=1e-3)
+    return ok and tempo_vetorizado < tempo_laco
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "Métricas": teste_metricas(),
+        "Testada pela frente": teste_dimensoes_frente(),
+        "Pontuação": teste_pontuacao(),
+        "Loteamento": teste_loteamento(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE QUALIDADE DOS LOTES")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Teste da geração de ruas e calçadas a partir da malha viária (buffer de cada linha seguido de união)
+"""
+
+import sys
+import os
+import math
+import random
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import shapely
+from shapely.ops import unary_union
+
+from dados_teste import PARAMETROS, criar_dxf_estrela, criar_dxf_perimetro
+from loteamento_processor_ultra_avancado import LoteamentoProcessorUltraAvancado
+
+
+def gerar_malha(arquivo, **parametros):
+    """Processador com perímetro internalizado, malha viária, ruas e calçadas, e o tempo das ruas"""
+    processador = LoteamentoProcessorUltraAvancado(dict(PARAMETROS, **parametros))
+    processador.carregar_perimetro(arquivo)
+    processador.internalizar_perimetro_com_calcadas()
+    processador.criar_sistema_viario_criativo()
+    inicio = time.perf_counter()
+    processador._gerar_ruas_e_calcadas()
+    return processador, time.perf_counter() - inicio
+
+
+def teste_equivalencia(pasta):
+    """Ruas e calçadas iguais ao buffer da malha já unida, a menos dos vértices dos arcos das pontas"""
+    print("=" * 60)
+    print("TESTE DE EQUIVALÊNCIA COM O BUFFER DA MALHA UNIDA")
+    print("=" * 60)
+
+    processador, _ = gerar_malha(criar_dxf_perimetro(os.path.join(pasta, "perimetro.dxf")))
+
+    largura_rua = PARAMETROS['largura_rua']
+    largura_total = largura_rua + 2 * PARAMETROS['largura_calcada']
+    linhas_unidas = unary_union(processador.malha_viaria)
+    ruas = shapely.union_all(np.asarray(processador.ruas, dtype=object))
+    faixa = shapely.union_all(np.asarray(processador.ruas + processador.calcadas, dtype=object))
+
+    ok = len(processador.malha_viaria) > 10
+    for nome, obtido, raio in (('ruas', ruas, largura_rua / 2), ('ruas + calçadas', faixa, largura_total / 2)):
+        esperado = linhas_unidas.buffer(raio)
+        # Flecha dos arcos de 8 segmentos por quadrante, mais a grade de precisão
+        limite = raio * (1 - math.cos(math.pi / 32)) + 0.002
+        distancia = obtido.hausdorff_distance(esperado)
+        diferenca = abs(obtido.area - esperado.area) / esperado.area
+        print(f"{nome}: Hausdorff {distancia:.4f} m (limite {limite:.4f} m), diferença de área {diferenca:.2e}")
+        ok = ok and distancia <= limite and diferenca < 1e-4
+    return ok
+
+
+def teste_malha_densa(pasta):
+    """Malha livre muito cruzada (o buffer da malha unida leva ~30 s): ruas e calçadas geradas"""
+    print("\n" + "=" * 60)
+    print("TESTE DE MALHA DENSA (ESTRELA, FORMAS LIVRES)")
+    print("=" * 60)
+
+    arquivo = os.path.join(pasta, "estrela.dxf")
+    criar_dxf_estrela(arquivo)
+    random.seed(1)
+    processador, tempo = gerar_malha(arquivo, experimentacao_formas='Totalmente Livres')
+    print(f"{len(processador.malha_viaria)} linhas: ruas e calçadas em {tempo * 1000:.0f} ms")
+    return len(processador.malha_viaria) > 100 and len(processador.ruas) > 0
+
+
+def main():
+    """Função principal dos testes"""
+    with tempfile.TemporaryDirectory() as pasta:
+        resultados = {
+            "Equivalência": teste_equivalencia(pasta),
+            "Malha densa": teste_malha_densa(pasta),
+        }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE RUAS E CALÇADAS")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
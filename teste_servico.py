@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Teste do serviço local de fila de trabalhos (loteamento_servico)
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ezdxf
+
+from dados_teste import PARAMETROS, PERIMETRO_PEQUENO, criar_dxf_perimetro
+from loteamento_servico import ClienteServico, ServicoLoteamento, criar_servidor
+
+
+def iniciar(pasta, max_workers=1):
+    """Serviço com servidor HTTP em uma porta livre"""
+    servico = ServicoLoteamento(os.path.join(pasta, 'trabalhos'), max_workers=max_workers)
+    servidor = criar_servidor(servico, porta=0)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    cliente = ClienteServico(f"http://127.0.0.1:{servidor.server_address[1]}")
+    return servico, servidor, cliente
+
+
+def teste_fila_e_resultado(cliente, pasta):
+    """Verifica prioridade, cancelamento, DXF e estatísticas de trabalhos enviados por HTTP"""
+    print("=" * 60)
+    print("TESTE DA FILA DE PRIORIDADE E DOS RESULTADOS")
+    print("=" * 60)
+
+    entrada = criar_dxf_perimetro(os.path.join(pasta, "perimetro.dxf"), PERIMETRO_PEQUENO)
+    primeiro = cliente.enviar(PARAMETROS, arquivo_entrada=entrada, nome='primeiro')
+    normal = cliente.enviar(PARAMETROS, pontos=[list(p) for p in PERIMETRO_PEQUENO], nome='normal')
+    cancelado = cliente.enviar(PARAMETROS, arquivo_entrada=entrada, nome='cancelado')
+    urgente = cliente.enviar(PARAMETROS, arquivo_entrada=entrada, prioridade=5, nome='urgente')
+    ordem = {t['nome']: t.get('posicao_fila') for t in cliente.listar()}
+    print(f"Posições na fila: {ordem}")
+
+    estado_cancelado = cliente.cancelar(cancelado['id'])
+    finais = {nome: cliente.aguardar(t['id'], intervalo=0.2, tempo_limite=300)
+              for nome, t in (('primeiro', primeiro), ('normal', normal), ('urgente', urgente))}
+    for nome, estado in finais.items():
+        print(f"{nome}: {estado['estado']}, iniciado em {estado['iniciado_em'] - primeiro['enviado_em']:.2f}s")
+
+    ok = estado_cancelado['estado'] == 'cancelado' and cliente.consultar(cancelado['id'])['iniciado_em'] is None
+    ok = ok and ordem['urgente'] < ordem['normal']
+    ok = ok and all(estado['estado'] == 'concluido' for estado in finais.values())
+    if not ok:
+        return False
+    ok = finais['primeiro']['iniciado_em'] < finais['urgente']['iniciado_em'] < finais['normal']['iniciado_em']
+
+    # DXF e estatísticas; o segundo e o terceiro trabalhos reaproveitam as quadras do primeiro
+    dxf = cliente.baixar_dxf(urgente['id'], os.path.join(pasta, 'urgente.dxf'))
+    lotes = len(ezdxf.readfile(dxf).modelspace().query('*[layer=="LOTES"]'))
+    resultados = {nome: estado['resultado'] for nome, estado in finais.items()}
+    print(f"Lotes no DXF baixado: {lotes} (estatísticas: {resultados['urgente']['num_lotes']})")
+    print(f"Cache de quadras: {({nome: r['cache_quadras'] for nome, r in resultados.items()})}")
+    ok = ok and lotes == resultados['urgente']['num_lotes'] > 0
+    ok = ok and resultados['urgente']['num_lotes'] == resultados['primeiro']['num_lotes']
+    ok = ok and resultados['primeiro']['cache_quadras']['compartilhadas'] == 0
+    ok = ok and resultados['urgente']['cache_quadras']['compartilhadas'] > 0
+    return ok
+
+
+def teste_cancelar_em_execucao(servico, cliente, pasta):
+    """Verifica que cancelar um trabalho em execução encerra o processo e libera o worker"""
+    print("=" * 60)
+    print("TESTE DE CANCELAMENTO DE TRABALHO EM EXECUÇÃO")
+    print("=" * 60)
+
+    grande = [(0, 0), (1500, 0), (1560, 900), (700, 1200), (-80, 950)]
+    longo = cliente.enviar(PARAMETROS, pontos=[list(p) for p in grande], nome='longo')
+    seguinte = cliente.enviar(PARAMETROS, arquivo_entrada=criar_dxf_perimetro(os.path.join(pasta, "perimetro.dxf"), PERIMETRO_PEQUENO), nome='seguinte')
+    while cliente.consultar(longo['id'])['estado'] == 'na_fila':
+        time.sleep(0.1)
+    time.sleep(0.5)
+
+    estado = cliente.cancelar(longo['id'])
+    final = cliente.aguardar(seguinte['id'], intervalo=0.2, tempo_limite=300)
+    print(f"Longo: {estado['estado']}, seguinte: {final['estado']}")
+    try:
+        cliente.baixar_dxf(longo['id'], os.path.join(pasta, 'longo.dxf'))
+        sem_dxf = False
+    except Exception:
+        sem_dxf = True
+    return estado['estado'] == 'cancelado' and final['estado'] == 'concluido' and sem_dxf and not servico._processos
+
+
+def main():
+    """Função principal dos testes"""
+    with tempfile.TemporaryDirectory() as pasta:
+        servico, servidor, cliente = iniciar(pasta)
+        try:
+            resultados = {
+                "Fila e resultados": teste_fila_e_resultado(cliente, pasta),
+                "Cancelar em execução": teste_cancelar_em_execucao(servico, cliente, pasta),
+            }
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+            servico.encerrar()
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DO SERVIÇO DE TRABALHOS")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Teste do modo de superquadras com vias tronco (loteamento_superquadras)
+"""
+
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ezdxf
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+from dados_teste import PARAMETROS
+from loteamento_superquadras import criar_vias_tronco, dividir_em_superquadras
+from loteamento_processor_ultra_avancado import LoteamentoProcessorUltraAvancado
+
+PERIMETRO = [(0, 0), (700, 0), (760, 420), (350, 560), (-40, 450)]
+
+
+def teste_divisao():
+    """Verifica que as superquadras e o leito tronco particionam o perímetro"""
+    print("=" * 60)
+    print("TESTE DE DIVISÃO EM SUPERQUADRAS")
+    print("=" * 60)
+
+    perimetro = Polygon(PERIMETRO)
+    vias = criar_vias_tronco(perimetro, 250.0)
+    superquadras, leito = dividir_em_superquadras(perimetro, vias, 8.0)
+
+    soma = sum(s.area for s in superquadras)
+    uniao = shapely.union_all(superquadras).area
+    cobertura = soma + leito.intersection(perimetro).area
+
+    print(f"Vias tronco: {len(vias)}, superquadras: {len(superquadras)}")
+    print(f"Soma das superquadras: {soma:.2f} m² (união {uniao:.2f} m²)")
+    print(f"Superquadras + leito: {cobertura:.2f} m² de {perimetro.area:.2f} m²")
+
+    return len(superquadras) >= 4 and abs(soma - uniao) < 1e-6 and abs(cobertura - perimetro.area) < 1e-6
+
+
+def teste_costura(max_workers):
+    """Processa por superquadras e verifica a costura das camadas"""
+    print("\n" + "=" * 60)
+    print(f"TESTE DE COSTURA DAS SUPERQUADRAS (num_workers={max_workers})")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        entrada = os.path.join(pasta, "grande.dxf")
+        doc = ezdxf.new("R2010")
+        doc.modelspace().add_lwpolyline(PERIMETRO, close=True)
+        doc.saveas(entrada)
+
+        parametros = dict(PARAMETROS, modo_superquadras=True, espacamento_vias_tronco=250.0,
+                          num_workers=max_workers)
+        processador = LoteamentoProcessorUltraAvancado(parametros)
+        resultado = processador.processar_loteamento_ultra_avancado(entrada, os.path.join(pasta, "saida.dxf"))
+    if not resultado['sucesso']:
+        return False
+
+    lotes = processador.lotes.geometrias
+    quadras = processador.quadras.geometrias
+    ocupadas = np.concatenate([lotes, processador.areas_verdes.geometrias,
+                               processador.areas_institucionais.geometrias])
+    sobreposicao = shapely.area(ocupadas).sum() - shapely.union_all(ocupadas).area
+
+    # Cada lote dentro da quadra indicada por quadra_id (renumerada na costura)
+    quadra_id = processador.lotes.coluna('quadra_id')
+    dentro = shapely.within(lotes, shapely.buffer(quadras[quadra_id], 0.01))
+
+    # Nada faltando nas divisas: fora de quadras e ruas só ficam as quadras
+    # pequenas demais, descartadas como no processamento sem superquadras
+    faltando = shapely.get_parts(processador.perimetro_internalizado.difference(
+        shapely.union_all(np.concatenate([quadras, processador.ruas.geometrias]))))
+    maior_faltando = shapely.area(faltando).max() if len(faltando) else 0.0
+
+    print(f"Superquadras: {len(processador.superquadras)}, quadras: {len(quadras)}, lotes: {len(lotes)}")
+    print(f"Sobreposição entre lotes e áreas comuns: {sobreposicao:.3f} m²")
+    print(f"Lotes dentro da própria quadra: {dentro.sum()}/{len(lotes)}")
+    print(f"Maior área sem quadra nem rua: {maior_faltando:.3f} m²")
+
+    return (len(processador.superquadras) >= 4 and len(lotes) > 0 and sobreposicao < 0.1
+            and dentro.all() and maior_faltando < PARAMETROS['area_minima_lote'] * 3 and len(processador.ruas) > 0)
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "Divisão em superquadras": teste_divisao(),
+        "Costura sequencial": teste_costura(1),
+        "Costura paralela": teste_costura(2),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE SUPERQUADRAS")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Teste do armazenamento colunar de feições (loteamento_tabela)
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from shapely.geometry import MultiPolygon, Polygon, box
+from shapely.ops import unary_union
+
+from loteamento_tabela import TabelaFeicoes
+
+
+def teste_colunas_vetorizadas():
+    """Verifica as colunas derivadas e as estatísticas por estratégia"""
+    print("=" * 60)
+    print("TESTE DE COLUNAS VETORIZADAS")
+    print("=" * 60)
+
+    tabela = TabelaFeicoes('LOTES')
+    tabela.adicionar([box(0, 0, 10, 30), box(10, 0, 22, 30)], quadra_id=3,
+                     estrategias=['esquina', 'borda'])
+    tabela.append(box(30, 0, 45, 25))
+
+    print(f"Lotes: {len(tabela)} | Área total: {tabela.area_total():.2f} m²")
+    print(f"Testadas: {tabela.coluna('testada')} | Profundidades: {tabela.coluna('profundidade')}")
+    print(f"Por estratégia: {tabela.contagem_por_estrategia()}")
+    print(f"Memória das colunas: {tabela.uso_memoria_colunas()} bytes")
+
+    ok = len(tabela) == 3 and abs(tabela.area_total() - 1035.0) < 1e-9
+    ok = ok and np.allclose(tabela.coluna('testada'), [10, 12, 15])
+    ok = ok and np.allclose(tabela.coluna('profundidade'), [30, 30, 25])
+    ok = ok and list(tabela.coluna('esquina')) == [True, False, False]
+    ok = ok and list(tabela.coluna('quadra_id')) == [3, 3, -1]
+    return ok
+
+
+def teste_filtro_e_exportacao():
+    """Verifica filtros por máscara, extração de coordenadas e compatibilidade de sequência"""
+    print("\n" + "=" * 60)
+    print("TESTE DE FILTRO E EXTRAÇÃO DE COORDENADAS")
+    print("=" * 60)
+
+    tabela = TabelaFeicoes.de_geometrias('LOTES', [box(i * 10, 0, i * 10 + 10, 20 + i) for i in range(5)])
+    grandes = tabela.filtrar(tabela.coluna('area') >= 220)
+    coords = grandes.coordenadas_exteriores()
+
+    print(f"Lotes filtrados: {len(grandes)} de {len(tabela)}")
+    print(f"Anéis extraídos: {[c.shape for c in coords]}")
+
+    ok = len(grandes) == 3 and all(c.shape == (5, 2) for c in coords)
+    ok = ok and abs(unary_union(tabela).area - tabela.area_total()) < 1e-9
+    ok = ok and sum(lote.area for lote in tabela) == tabela.area_total()
+    return ok
+
+
+def teste_concatenacao():
+    """Verifica a junção de tabelas com renumeração de ids, estratégias e quadras"""
+    print("\n" + "=" * 60)
+    print("TESTE DE CONCATENAÇÃO DE TABELAS")
+    print("=" * 60)
+
+    primeira = TabelaFeicoes('LOTES')
+    primeira.adicionar([box(0, 0, 10, 20), box(10, 0, 20, 20)], quadra_id=1, estrategias=['esquina', 'borda'])
+    segunda = TabelaFeicoes('LOTES')
+    segunda.adicionar([box(30, 0, 40, 25)], quadra_id=0, estrategias=['borda'])
+    segunda.adicionar([box(50, 0, 60, 30)], quadra_id=-1)
+
+    tabela = TabelaFeicoes.concatenar('LOTES', [primeira, segunda], [0, 5])
+
+    print(f"Ids: {tabela.coluna('id').tolist()}")
+    print(f"Quadras: {tabela.coluna('quadra_id').tolist()}")
+    print(f"Estratégias: {tabela.estrategias().tolist()}")
+
+    ok = tabela.coluna('id').tolist() == [0, 1, 2, 3]
+    ok = ok and tabela.coluna('quadra_id').tolist() == [1, 1, 5, -1]
+    ok = ok and tabela.estrategias().tolist() == ['esquina', 'borda', 'borda', '']
+    ok = ok and tabela.coluna('esquina').tolist() == [True, False, False, False]
+    ok = ok and tabela.area_total() == primeira.area_total() + segunda.area_total()
+    return ok
+
+
+def teste_compactacao():
+    """Verifica a compactação: anéis sem recriar objetos, multipolígonos, vazios e ida e volta"""
+    print("\n" + "=" * 60)
+    print("TESTE DE COMPACTAÇÃO DAS GEOMETRIAS")
+    print("=" * 60)
+
+    lotes = [box(i * 10, 0, i * 10 + 10, 30) for i in range(2000)]
+    especiais = [MultiPolygon([box(0, 40, 5, 45), box(10, 40, 15, 45)]), Polygon(), box(0, 50, 8, 58)]
+    tabela = TabelaFeicoes.de_geometrias('LOTES', lotes + especiais)
+    esperadas = [c.copy() for c in tabela.coordenadas_exteriores()]
+    area = tabela.area_total()
+
+    tabela.compactar()
+    arrays, _ = tabela.geometrias_codificadas()
+    bytes_por_feicao = sum(valores.nbytes for valores in arrays.values()) / len(tabela)
+    aneis = tabela.coordenadas_exteriores()
+    print(f"Geometrias compactadas: {bytes_por_feicao:.0f} bytes por feição")
+    print(f"Anéis: {len(aneis)} para {len(tabela)} feições (multipolígono com 2 partes, 1 vazia)")
+
+    ok = len(esperadas) == len(tabela) and all(len(c) == 5 for c in esperadas)
+    ok = ok and tabela.compactada and bytes_por_feicao < 120
+    ok = ok and len(aneis) == len(esperadas) and all(np.array_equal(a, b) for a, b in zip(aneis, esperadas))
+    ok = ok and tabela.compactada and tabela.area_total() == area
+
+    # Ida e volta: os objetos recriados são os mesmos, e a tabela volta a ficar expandida
+    ok = ok and all(a.equals_exact(b, 0) for a, b in zip(tabela.geometrias, lotes + especiais))
+    ok = ok and not tabela.compactada and len(tabela) == len(lotes) + len(especiais)
+    return ok
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "Colunas vetorizadas": teste_colunas_vetorizadas(),
+        "Filtro e exportação": teste_filtro_e_exportacao(),
+        "Concatenação": teste_concatenacao(),
+        "Compactação": teste_compactacao(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DA TABELA DE FEIÇÕES")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
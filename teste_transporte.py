@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Teste do transporte de geometrias por memória compartilhada (loteamento_transporte)
+"""
+
+import sys
+import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import shapely
+from shapely.geometry import GeometryCollection, LineString, MultiPolygon, Point, Polygon, box
+
+from loteamento_particionamento import dividir_bsp
+from loteamento_tabela import TabelaFeicoes
+from loteamento_transporte import (criar_executor, desempacotar_geometrias, desempacotar_resultado,
+                                   desempacotar_tabela, empacotar_geometrias, empacotar_resultado, empacotar_tabela)
+
+
+def blocos_em_uso():
+    """Blocos de memória compartilhada existentes (Linux)"""
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+
+def grade_de_lotes(colunas=100, linhas=200):
+    xs, ys = np.meshgrid(np.arange(colunas), np.arange(linhas))
+    return shapely.box(xs.ravel() * 10, ys.ravel() * 10, xs.ravel() * 10 + 9.5, ys.ravel() * 10 + 9.5)
+
+
+def _dividir_no_worker(pacote):
+    """Worker de teste: recebe lotes, devolve uma tabela com as metades de cada um"""
+    lotes = desempacotar_geometrias(pacote)
+    limites = shapely.bounds(lotes)
+    meio = (limites[:, 0] + limites[:, 2]) / 2
+    metades = np.concatenate([shapely.box(limites[:, 0], limites[:, 1], meio, limites[:, 3]),
+                              shapely.box(meio, limites[:, 1], limites[:, 2], limites[:, 3])])
+    return empacotar_resultado({'tabela': TabelaFeicoes.de_geometrias('LOTES', metades, quadra_id=7),
+                                'origem': os.getpid()})
+
+
+def teste_ida_e_volta():
+    """Verifica que todos os tipos de geometria voltam idênticos, na mesma ordem"""
+    print("=" * 60)
+    print("TESTE DE IDA E VOLTA DAS GEOMETRIAS")
+    print("=" * 60)
+
+    furado = Polygon([(0, 0), (10, 0), (10, 10), (0, 10)], [[(2, 2), (4, 2), (4, 4), (2, 4)]])
+    geometrias = np.array([
+        box(0, 0, 1, 1), furado, None, LineString([(0, 0), (5, 5), (9, 1)]), Point(3, 4),
+        MultiPolygon([box(0, 0, 1, 1), box(2, 2, 3, 3)]), Polygon(), box(5, 5, 6, 7),
+        GeometryCollection([Point(1, 1), box(0, 0, 1, 1)]), Point(1, 2, 3),
+    ], dtype=object)
+    antes = blocos_em_uso()
+    pacote = empacotar_geometrias(geometrias)
+    tamanho_descritor = len(pickle.dumps(pacote))
+    recebidas = desempacotar_geometrias(pacote)
+
+    iguais = all((a is None and b is None) or (a is not None and b is not None and a.equals_exact(b, 0) and
+                                                a.geom_type == b.geom_type and a.has_z == b.has_z)
+                 or (a is not None and a.is_empty and b.is_empty)
+                 for a, b in zip(geometrias, recebidas))
+    print(f"Geometrias: {len(recebidas)}, idênticas: {iguais}, descritor: {tamanho_descritor} bytes")
+    print(f"Blocos restantes após desempacotar: {len(blocos_em_uso() - antes)}")
+    return iguais and len(recebidas) == len(geometrias) and not (blocos_em_uso() - antes)
+
+
+def teste_tabela():
+    """Verifica que uma TabelaFeicoes volta com as mesmas colunas e estratégias"""
+    print("=" * 60)
+    print("TESTE DE TRANSPORTE DE TABELA")
+    print("=" * 60)
+
+    tabela = TabelaFeicoes('LOTES')
+    lotes = grade_de_lotes(20, 10)
+    tabela.adicionar(lotes[:100], quadra_id=3, estrategias=['faixas'] * 100)
+    tabela.adicionar(lotes[100:], quadra_id=4, estrategias=['bsp'] * 100)
+    recebida = desempacotar_tabela(empacotar_tabela(tabela))
+
+    colunas_iguais = all(np.array_equal(tabela.coluna(c), recebida.coluna(c)) for c in TabelaFeicoes.COLUNAS)
+    geometrias_iguais = bool(shapely.equals_exact(tabela.geometrias, recebida.geometrias, 0).all())
+    print(f"Colunas iguais: {colunas_iguais}, geometrias iguais: {geometrias_iguais}, "
+          f"estratégias: {recebida.contagem_por_estrategia()}")
+    recebida.append(box(0, 0, 1, 1))
+    return (colunas_iguais and geometrias_iguais and recebida.camada == 'LOTES'
+            and recebida.contagem_por_estrategia() == tabela.contagem_por_estrategia() | {'indefinida': 1}
+            and recebida.coluna('id')[-1] == tabela.proximo_id)
+
+
+def teste_entre_processos():
+    """Verifica ida e volta por um worker de processo e compara o custo de serialização com o pickle"""
+    print("=" * 60)
+    print("TESTE ENTRE PROCESSOS (20.000 LOTES)")
+    print("=" * 60)
+
+    lotes = grade_de_lotes()
+    antes = blocos_em_uso()
+    with criar_executor(1) as executor:
+        resultado = desempacotar_resultado(executor.submit(_dividir_no_worker, empacotar_geometrias(lotes)).result())
+
+    # Custo de serialização de uma tarefa: pickle das geometrias x pacote (gravar, descritor, reconstruir)
+    inicio = time.perf_counter()
+    pickle.loads(pickle.dumps(list(lotes)))
+    tempo_pickle = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    descritor = pickle.dumps(empacotar_geometrias(lotes))
+    desempacotar_geometrias(pickle.loads(descritor))
+    tempo_pacote = time.perf_counter() - inicio
+
+    tabela = resultado['tabela']
+    area_ok = abs(tabela.area_total() - float(shapely.area(lotes).sum())) < 1e-6
+    print(f"Tabela recebida: {len(tabela)} feições de outro processo ({resultado['origem'] != os.getpid()})")
+    print(f"Serialização de {len(lotes)} lotes: pickle {tempo_pickle * 1000:.0f} ms, "
+          f"pacote {tempo_pacote * 1000:.0f} ms (descritor de {len(descritor)} bytes)")
+    print(f"Blocos restantes: {len(blocos_em_uso() - antes)}")
+    return (len(tabela) == 2 * len(lotes) and area_ok and set(tabela.coluna('quadra_id').tolist()) == {7}
+            and resultado['origem'] != os.getpid() and not (blocos_em_uso() - antes)
+            and tempo_pacote < tempo_pickle and len(descritor) < 2048)
+
+
+def teste_bsp_em_processos():
+    """Verifica que o BSP com ProcessPoolExecutor dá o mesmo resultado que com threads"""
+    print("=" * 60)
+    print("TESTE DO BSP DISTRIBUÍDO ENTRE PROCESSOS")
+    print("=" * 60)
+
+    area = Polygon([(0, 0), (900, 0), (950, 700), (400, 820), (-60, 600)])
+    with ThreadPoolExecutor(2) as executor:
+        em_threads = dividir_bsp(area, 200.0, testada_minima=8.0, executor=executor, tamanho_lote_tarefas=64)
+    with criar_executor(2) as executor:
+        distribuido = dividir_bsp(area, 200.0, testada_minima=8.0, executor=executor, tamanho_lote_tarefas=64)
+    iguais = len(em_threads) == len(distribuido) and bool(
+        shapely.equals_exact(np.asarray(em_threads, dtype=object), np.asarray(distribuido, dtype=object), 0).all())
+    print(f"Lotes: threads {len(em_threads)}, processos {len(distribuido)}, idênticos: {iguais}")
+    return iguais
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "Ida e volta": teste_ida_e_volta(),
+        "Tabela": teste_tabela(),
+        "Entre processos": teste_entre_processos(),
+        "BSP em processos": teste_bsp_em_processos(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DE TRANSPORTE POR MEMÓRIA COMPARTILHADA")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)
@@ -113,7 +113,9 @@ def main():
     params2 = params1.copy()
     params2["tolerancia_forma"] = "Baixa (Mais Regular)"
     params2["experimentacao_formas"] = "Retangulares"
-    if not run_processor_test("Regular_Irregular1", params2, "irregular1.dxf", expected_min_lotes=10, expected_max_lotes=34):
+    # Limites superiores dos casos irregulares: sem sobreposição entre lotes e com os lotes acima da
+    # área máxima divididos (antes 19 dos 43 lotes do irregular2 passavam de 600 m²), saem 38 e 74 lotes
+    if not run_processor_test("Regular_Irregular1", params2, "irregular1.dxf", expected_min_lotes=10, expected_max_lotes=42):
         all_tests_passed = False
 
     # Test Case 3: Irregular area, focus on irregular lots and corner strategy
@@ -121,7 +123,7 @@ def main():
     params3["tolerancia_forma"] = "Alta (Mais Irregular)"
     params3["estrategia_esquina"] = "Testada Maior"
     params3["liberdade_criativa"] = "Criativa"
-    if not run_processor_test("Irregular_Corner_Creative", params3, "irregular2.dxf", expected_min_lotes=15, expected_max_lotes=43):
+    if not run_processor_test("Irregular_Corner_Creative", params3, "irregular2.dxf", expected_min_lotes=15, expected_max_lotes=82):
         all_tests_passed = False
 
     # Test Case 4: Larger lots, lower density
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Teste da cena da pré-visualização (loteamento_visualizacao), sem precisar de tela
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import shapely
+from shapely.geometry import box
+
+from dados_teste import PARAMETROS, PERIMETRO_PEQUENO, criar_dxf_perimetro
+from loteamento_tabela import TabelaFeicoes
+from loteamento_visualizacao import CORES_PREVIA, CenaLoteamento, Vista, imagem_ppm
+from loteamento_processor_ultra_avancado import LoteamentoProcessorUltraAvancado
+
+
+def criar_cena_grade(colunas=150, linhas=200):
+    """Cena sintética com colunas x linhas lotes de 9,5 m em uma quadra só"""
+    cena = CenaLoteamento()
+    cena.receber('perimetro', box(-5, -5, colunas * 10 + 5, linhas * 10 + 5))
+    cena.receber('camada', ('quadras', TabelaFeicoes.de_geometrias('QUADRAS', [box(0, 0, colunas * 10, linhas * 10)])))
+    xs, ys = np.meshgrid(np.arange(colunas), np.arange(linhas))
+    lotes = shapely.box(xs.ravel() * 10, ys.ravel() * 10, xs.ravel() * 10 + 9.5, ys.ravel() * 10 + 9.5)
+    for inicio in range(0, len(lotes), 500):
+        cena.receber('lotes', TabelaFeicoes.de_geometrias('LOTES', list(lotes[inicio:inicio + 500])))
+    return cena
+
+
+def teste_vista():
+    """Verifica enquadramento, zoom em torno do cursor e deslocamento"""
+    print("=" * 60)
+    print("TESTE DA VISTA")
+    print("=" * 60)
+
+    vista = Vista(800, 600)
+    vista.ajustar((0, 0, 400, 300), margem=0.0)
+    colunas, linhas = vista.para_tela(np.array([[0.0, 300.0], [400.0, 0.0]]))
+    print(f"Escala: {vista.escala:.3f} px/m, cantos na tela: {list(zip(colunas, linhas))}")
+    ok = np.allclose(colunas, [0, 800]) and np.allclose(linhas, [0, 600])
+
+    antes = vista.para_projeto(100, 50)
+    vista.ampliar(3.0, 100, 50)
+    depois = vista.para_projeto(100, 50)
+    print(f"Ponto sob o cursor antes/depois do zoom: {antes} / {depois}")
+    ok = ok and np.allclose(antes, depois) and np.isclose(vista.escala, 6.0)
+
+    centro = (vista.centro_x, vista.centro_y)
+    vista.deslocar(60, -30)
+    print(f"Centro após arrastar (60, -30) px: {centro} -> {(vista.centro_x, vista.centro_y)}")
+    ok = ok and np.allclose((centro[0] - vista.centro_x, vista.centro_y - centro[1]), (10, -5))
+    return ok
+
+
+def teste_nivel_de_detalhe():
+    """Verifica dizimação, contornos e recorte por janela conforme o zoom"""
+    print("=" * 60)
+    print("TESTE DE NÍVEL DE DETALHE (30.000 LOTES)")
+    print("=" * 60)
+
+    cena = criar_cena_grade()
+    vista = Vista(1000, 700)
+    vista.ajustar(cena.limites())
+    ok = cena.contagem('LOTES') == 30000
+
+    tempos = []
+    estatisticas = []
+    for fator in (0.5, 2.0, 4.0, 4.0):
+        vista.ampliar(fator)
+        inicio = time.perf_counter()
+        imagem = cena.desenhar(vista)
+        tempos.append(time.perf_counter() - inicio)
+        estatisticas.append(cena.estatisticas_desenho['LOTES'])
+        print(f"{vista.escala:7.3f} px/m: {estatisticas[-1]} em {tempos[-1] * 1000:.0f} ms")
+
+    distante, geral, proximo, detalhe = estatisticas
+    # De longe os lotes viram pixels, sem contorno; de perto só os da janela são desenhados, com contorno
+    ok = ok and distante['pontos'] == distante['visiveis'] == 30000 and distante['contornos'] == 0
+    ok = ok and geral['pontos'] == 0 and geral['contornos'] < geral['visiveis']
+    ok = ok and proximo['visiveis'] < 30000 and detalhe['visiveis'] < proximo['visiveis']
+    ok = ok and detalhe['contornos'] == detalhe['visiveis'] > 0
+
+    # A imagem tem as cores dos lotes (preenchimento e contorno)
+    cores = {tuple(c) for c in np.unique(imagem.reshape(-1, 3), axis=0)}
+    preenchimento, contorno = CORES_PREVIA['LOTES']
+    ok = ok and preenchimento in cores and contorno in cores
+
+    ppm = imagem_ppm(imagem)
+    ok = ok and ppm.startswith(b"P6 1000 700 255\n") and len(ppm) == len(b"P6 1000 700 255\n") + 1000 * 700 * 3
+    print(f"Pior tempo de quadro: {max(tempos) * 1000:.0f} ms")
+    return ok
+
+
+def teste_cena_em_fluxo():
+    """Verifica a cena alimentada em outra thread pelo processamento ultra-avançado"""
+    print("=" * 60)
+    print("TESTE DA CENA ALIMENTADA DURANTE O PROCESSAMENTO")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        entrada = criar_dxf_perimetro(os.path.join(pasta, "perimetro.dxf"), PERIMETRO_PEQUENO)
+        processador = LoteamentoProcessorUltraAvancado(dict(PARAMETROS))
+        cena = CenaLoteamento()
+        resultado = {}
+        thread = threading.Thread(target=lambda: resultado.update(processador.processar_loteamento_ultra_avancado(
+            entrada, os.path.join(pasta, "saida.dxf"), consumidor=cena)))
+        thread.start()
+
+        # Desenha enquanto o processamento avança, como a interface faz
+        vista = Vista(400, 300)
+        quadros = 0
+        while thread.is_alive() or quadros == 0:
+            limites = cena.limites()
+            if limites is not None:
+                vista.ajustar(limites)
+                cena.desenhar(vista)
+                quadros += 1
+            time.sleep(0.05)
+        thread.join()
+        cena.desenhar(vista)
+
+    print(f"Quadros desenhados durante o processamento: {quadros}")
+    print(f"Lotes na cena: {cena.contagem('LOTES')} (resultado: {resultado.get('num_lotes')})")
+    print(f"Camadas desenhadas: {sorted(cena.estatisticas_desenho)}")
+
+    ok = resultado.get('sucesso') and cena.contagem('LOTES') == resultado['num_lotes'] > 0
+    ok = ok and cena.contagem('PERIMETRO') == 1 and cena.contagem('QUADRAS') == len(processador.quadras)
+    ok = ok and {'LOTES', 'QUADRAS', 'RUAS', 'PERIMETRO'} <= set(cena.estatisticas_desenho)
+    return ok
+
+
+def main():
+    """Função principal dos testes"""
+    resultados = {
+        "Vista": teste_vista(),
+        "Nível de detalhe": teste_nivel_de_detalhe(),
+        "Cena em fluxo": teste_cena_em_fluxo(),
+    }
+
+    print("\n" + "=" * 60)
+    print("RESUMO DOS TESTES DA PRÉ-VISUALIZAÇÃO")
+    print("=" * 60)
+    for nome, ok in resultados.items():
+        print(f"{nome}: {'✅ PASSOU' if ok else '❌ FALHOU'}")
+
+    return all(resultados.values())
+
+
+if __name__ == "__main__":
+    sucesso = main()
+    sys.exit(0 if sucesso else 1)